@@ -7,20 +7,59 @@ query planning, and AI capability detection with fallback systems.
 """
 
 import logging
+import os
 import re
 import math
-from typing import Dict, List, Optional, Any, Union, Callable, Tuple
-from dataclasses import dataclass
+import heapq
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Union, Callable, Tuple, Sequence, Set, Iterable, Iterator
+from dataclasses import dataclass, field
 from pathlib import Path
 from enum import Enum
 import hashlib
 import json
 from datetime import datetime
+import tempfile
 import threading
+import time
 import queue
 
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+try:
+    from .vector_search import (VectorIndex, available_embedding_providers,
+                                NUMPY_AVAILABLE as VECTOR_SEARCH_AVAILABLE)
+except ImportError:
+    VECTOR_SEARCH_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
+    'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did',
+    'will', 'would', 'could', 'should'
+})
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+
+def _default_token_counter() -> Callable[[str], int]:
+    """tiktoken's cl100k_base counts when available, else ~4 characters per token."""
+    if TIKTOKEN_AVAILABLE:
+        try:
+            encoding = tiktoken.get_encoding("cl100k_base")
+            return lambda text: len(encoding.encode(text, disallowed_special=()))
+        except Exception as e:
+            logger.warning(f"tiktoken encoding unavailable, estimating tokens: {e}")
+    
+    # Rough estimate: 1 token ≈ 4 characters for English text
+    return lambda text: len(text) // 4
+
 
 class ChunkType(Enum):
     """Types of document chunks."""
@@ -75,10 +114,24 @@ class QueryStep:
     estimated_time: float = 0.0
     completed: bool = False
     result: Any = None
+    timeout: Optional[float] = None
+    # Set when the step times out or its plan is cancelled; long handlers should poll it
+    cancelled: threading.Event = field(default_factory=threading.Event, repr=False, compare=False)
 
 
 class DocumentChunker:
-    """Handles document chunking with multiple strategies."""
+    """Handles document chunking with multiple strategies.
+    
+    Paragraph and sentence chunking locate unit boundaries with a regex and
+    pack units into chunks by offset, slicing each chunk out of the source
+    once. iter_chunks() does the same over a stream of text blocks, holding
+    only the current open chunk in memory.
+    """
+    
+    SEPARATORS = {
+        ChunkType.PARAGRAPH: re.compile(r'\n\s*\n'),
+        ChunkType.SENTENCE: re.compile(r'(?<=[.!?])\s+')
+    }
     
     def __init__(self, chunk_size: int = 1000, overlap: int = 200):
         self.chunk_size = chunk_size
@@ -87,95 +140,113 @@ class DocumentChunker:
     
     def chunk_by_paragraphs(self, text: str, max_chunk_size: int = None) -> List[DocumentChunk]:
         """Chunk document by paragraphs."""
+        return list(self.iter_chunks([text], ChunkType.PARAGRAPH, max_chunk_size))
+    
+    def chunk_by_sentences(self, text: str, max_chunk_size: int = None) -> List[DocumentChunk]:
+        """Chunk document by sentences."""
+        return list(self.iter_chunks([text], ChunkType.SENTENCE, max_chunk_size))
+    
+    def iter_chunks(self, blocks: Iterable[str], chunk_type: ChunkType = ChunkType.PARAGRAPH,
+                    max_chunk_size: int = None, id_prefix: str = None) -> Iterator[DocumentChunk]:
+        """Chunk a document arriving as consecutive text blocks.
+        
+        Units are packed greedily into chunks of at most ``max_chunk_size``;
+        each new chunk starts ``overlap`` characters before the end of the
+        previous one. Chunks are yielded as soon as they close, with offsets
+        relative to the start of the whole stream.
+        """
         if max_chunk_size is None:
             max_chunk_size = self.chunk_size
+        separator = self.SEPARATORS[chunk_type]
         
-        paragraphs = re.split(r'\n\s*\n', text)
-        chunks = []
-        current_chunk = ""
-        current_start = 0
+        pending = ""
+        base = 0          # stream offset of pending[0]
+        scan_from = 0     # start of the unterminated tail within pending
+        chunk_start = None
+        chunk_end = 0
         
-        for paragraph in paragraphs:
-            paragraph = paragraph.strip()
-            if not paragraph:
-                continue
+        def pack(spans):
+            nonlocal chunk_start, chunk_end
+            for start, end in spans:
+                if chunk_start is None:
+                    chunk_start = start
+                elif end - chunk_start > max_chunk_size:
+                    yield self._create_chunk(pending[chunk_start:chunk_end], chunk_type,
+                                             base + chunk_start, base + chunk_end, id_prefix)
+                    chunk_start = min(max(chunk_end - self.overlap, chunk_start + 1), start) if self.overlap > 0 else start
+                chunk_end = end
+        
+        for block in blocks:
+            pending += block
+            spans, scan_from = self._unit_spans(pending, separator, max_chunk_size, scan_from, final=False)
+            yield from pack(spans)
             
-            # If adding this paragraph would exceed the max size, create a chunk
-            if current_chunk and len(current_chunk) + len(paragraph) + 2 > max_chunk_size:
-                chunk = self._create_chunk(
-                    current_chunk, 
-                    ChunkType.PARAGRAPH, 
-                    current_start, 
-                    current_start + len(current_chunk)
-                )
-                chunks.append(chunk)
-                
-                # Start new chunk with overlap
-                current_start = current_start + len(current_chunk) - self.overlap
-                current_chunk = current_chunk[-self.overlap:] + "\n\n" + paragraph if self.overlap > 0 else paragraph
-            else:
-                if current_chunk:
-                    current_chunk += "\n\n" + paragraph
-                else:
-                    current_chunk = paragraph
-        
-        # Add remaining chunk
-        if current_chunk:
-            chunk = self._create_chunk(
-                current_chunk, 
-                ChunkType.PARAGRAPH, 
-                current_start, 
-                current_start + len(current_chunk)
-            )
-            chunks.append(chunk)
+            # Keep only the open chunk and the unterminated tail
+            keep_from = min(chunk_start, scan_from) if chunk_start is not None else scan_from
+            pending = pending[keep_from:]
+            base += keep_from
+            scan_from -= keep_from
+            if chunk_start is not None:
+                chunk_start -= keep_from
+                chunk_end -= keep_from
         
-        return chunks
+        spans, _ = self._unit_spans(pending, separator, max_chunk_size, scan_from, final=True)
+        yield from pack(spans)
+        if chunk_start is not None:
+            yield self._create_chunk(pending[chunk_start:chunk_end], chunk_type,
+                                     base + chunk_start, base + chunk_end, id_prefix)
     
-    def chunk_by_sentences(self, text: str, max_chunk_size: int = None) -> List[DocumentChunk]:
-        """Chunk document by sentences."""
-        if max_chunk_size is None:
-            max_chunk_size = self.chunk_size
+    def _unit_spans(self, text: str, separator, max_chunk_size: int, scan_from: int,
+                    final: bool) -> Tuple[List[Tuple[int, int]], int]:
+        """Stripped (start, end) spans of separator-delimited units after ``scan_from``.
         
-        # Simple sentence splitting (could be improved with spaCy/NLTK)
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        chunks = []
-        current_chunk = ""
-        current_start = 0
+        Unless ``final``, the text after the last separator may continue in the
+        next block, so it is left out and its start returned. Units longer than
+        a chunk are split at word boundaries.
+        """
+        spans = []
+        unit_start = scan_from
         
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-            
-            if current_chunk and len(current_chunk) + len(sentence) + 1 > max_chunk_size:
-                chunk = self._create_chunk(
-                    current_chunk, 
-                    ChunkType.SENTENCE, 
-                    current_start, 
-                    current_start + len(current_chunk)
-                )
-                chunks.append(chunk)
-                
-                # Start new chunk with overlap
-                current_start = current_start + len(current_chunk) - self.overlap
-                current_chunk = current_chunk[-self.overlap:] + " " + sentence if self.overlap > 0 else sentence
-            else:
-                if current_chunk:
-                    current_chunk += " " + sentence
-                else:
-                    current_chunk = sentence
-        
-        # Add remaining chunk
-        if current_chunk:
-            chunk = self._create_chunk(
-                current_chunk, 
-                ChunkType.SENTENCE, 
-                current_start, 
-                current_start + len(current_chunk)
-            )
-            chunks.append(chunk)
+        for match in separator.finditer(text, scan_from):
+            self._add_unit(text, unit_start, match.start(), max_chunk_size, spans)
+            unit_start = match.end()
         
-        return chunks
+        if final:
+            self._add_unit(text, unit_start, len(text), max_chunk_size, spans)
+            return spans, len(text)
+        
+        # An unterminated unit this long will be split anyway; emit its leading pieces now
+        unit_start = self._skip_space(text, unit_start, len(text))
+        while len(text) - unit_start > max_chunk_size * 2:
+            cut = self._word_boundary(text, unit_start, unit_start + max_chunk_size)
+            spans.append((unit_start, cut))
+            unit_start = self._skip_space(text, cut, len(text))
+        
+        return spans, unit_start
+    
+    def _add_unit(self, text: str, start: int, end: int, max_chunk_size: int, spans: List[Tuple[int, int]]):
+        start = self._skip_space(text, start, end)
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        
+        while end - start > max_chunk_size:
+            cut = self._word_boundary(text, start, start + max_chunk_size)
+            spans.append((start, cut))
+            start = self._skip_space(text, cut, end)
+        
+        if start < end:
+            spans.append((start, end))
+    
+    @staticmethod
+    def _skip_space(text: str, start: int, end: int) -> int:
+        while start < end and text[start].isspace():
+            start += 1
+        return start
+    
+    @staticmethod
+    def _word_boundary(text: str, start: int, end: int) -> int:
+        last_space = text.rfind(' ', start, end)
+        return last_space if last_space > start else end
     
     def chunk_by_fixed_size(self, text: str, chunk_size: int = None) -> List[DocumentChunk]:
         """Chunk document by fixed character size."""
@@ -203,10 +274,12 @@ class DocumentChunker:
         
         return chunks
     
-    def _create_chunk(self, content: str, chunk_type: ChunkType, start: int, end: int) -> DocumentChunk:
+    def _create_chunk(self, content: str, chunk_type: ChunkType, start: int, end: int,
+                      id_prefix: str = None) -> DocumentChunk:
         """Create a document chunk."""
         self.chunk_counter += 1
-        chunk_id = f"chunk_{self.chunk_counter}_{hashlib.md5(content.encode()).hexdigest()[:8]}"
+        content_hash = hashlib.md5(content.encode()).hexdigest()
+        chunk_id = f"{id_prefix or 'chunk'}_{self.chunk_counter}_{content_hash[:8]}"
         
         return DocumentChunk(
             id=chunk_id,
@@ -217,23 +290,39 @@ class DocumentChunker:
             metadata={
                 'length': len(content),
                 'word_count': len(content.split()),
+                'content_hash': content_hash,
                 'created_at': datetime.now().isoformat()
             }
         )
 
 
 class SlidingWindowManager:
-    """Manages sliding window context for AI conversations."""
+    """Manages sliding window context for AI conversations.
     
-    def __init__(self, window_size: int = 4096, max_context_tokens: int = 8192):
+    History lives in a deque with a running token total, so adding, trimming
+    and assembling a window only touch the entries involved. Token counts
+    come from tiktoken when installed (or a supplied ``token_counter``) and
+    are computed once per entry; each entry's term set is indexed for
+    relevance lookups.
+    """
+    
+    def __init__(self, window_size: int = 4096, max_context_tokens: int = 8192,
+                 token_counter: Optional[Callable[[str], int]] = None):
         self.window_size = window_size
         self.max_context_tokens = max_context_tokens
-        self.context_history = []
+        self.context_history = deque()
         self.current_position = 0
+        self.total_tokens = 0
+        self.token_counter = token_counter or _default_token_counter()
+        self._term_index: Dict[str, Set[int]] = {}
+        self._entries_by_position: Dict[int, Dict] = {}
         self.lock = threading.RLock()
     
     def add_context(self, content: str, context_type: str = "user", metadata: Dict = None):
         """Add content to the sliding window context."""
+        terms = self._terms(content)
+        token_estimate = self._estimate_tokens(content)
+        
         with self.lock:
             context_entry = {
                 'content': content,
@@ -241,10 +330,15 @@ class SlidingWindowManager:
                 'timestamp': datetime.now().isoformat(),
                 'position': self.current_position,
                 'metadata': metadata or {},
-                'token_estimate': self._estimate_tokens(content)
+                'token_estimate': token_estimate,
+                'terms': terms
             }
             
             self.context_history.append(context_entry)
+            self._entries_by_position[self.current_position] = context_entry
+            for term in terms:
+                self._term_index.setdefault(term, set()).add(self.current_position)
+            self.total_tokens += token_estimate
             self.current_position += 1
             
             # Maintain window size
@@ -266,9 +360,10 @@ class SlidingWindowManager:
                 if total_tokens + entry_tokens > max_tokens:
                     break
                 
-                context_parts.insert(0, f"[{entry['type']}] {entry['content']}")
+                context_parts.append(f"[{entry['type']}] {entry['content']}")
                 total_tokens += entry_tokens
             
+            context_parts.reverse()
             return "\n".join(context_parts)
     
     def get_relevant_context(self, query: str, max_tokens: int = None) -> str:
@@ -276,29 +371,23 @@ class SlidingWindowManager:
         if max_tokens is None:
             max_tokens = self.max_context_tokens // 2
         
+        query_terms = self._terms(query)
+        
         with self.lock:
-            # Simple relevance scoring based on keyword overlap
-            scored_entries = []
-            query_words = set(query.lower().split())
-            
-            for entry in self.context_history:
-                content_words = set(entry['content'].lower().split())
-                overlap = len(query_words.intersection(content_words))
-                relevance_score = overlap / max(len(query_words), 1)
-                
-                scored_entries.append((relevance_score, entry))
+            # Only entries sharing a term with the query can score above zero
+            overlaps = Counter()
+            for term in query_terms:
+                overlaps.update(self._term_index.get(term, ()))
             
             # Sort by relevance and recent-ness
-            scored_entries.sort(key=lambda x: (x[0], x[1]['position']), reverse=True)
+            ranked = sorted(overlaps.items(), key=lambda item: (item[1], item[0]), reverse=True)
             
             # Build context within token limit
             context_parts = []
             total_tokens = 0
             
-            for score, entry in scored_entries:
-                if score == 0:  # No relevance
-                    continue
-                
+            for position, _ in ranked:
+                entry = self._entries_by_position[position]
                 entry_tokens = entry['token_estimate']
                 if total_tokens + entry_tokens > max_tokens:
                     continue
@@ -308,29 +397,41 @@ class SlidingWindowManager:
             
             return "\n".join(context_parts)
     
+    @staticmethod
+    def _terms(text: str) -> frozenset:
+        return frozenset(text.lower().split())
+    
     def _estimate_tokens(self, text: str) -> int:
-        """Estimate token count for text (rough approximation)."""
-        # Rough estimate: 1 token ≈ 4 characters for English text
-        return len(text) // 4
+        """Count tokens for text with the configured tokenizer."""
+        return self.token_counter(text)
     
     def _maintain_window_size(self):
         """Maintain the sliding window size."""
-        total_tokens = sum(entry['token_estimate'] for entry in self.context_history)
-        
-        while total_tokens > self.max_context_tokens and self.context_history:
-            removed_entry = self.context_history.pop(0)
-            total_tokens -= removed_entry['token_estimate']
+        while self.total_tokens > self.max_context_tokens and self.context_history:
+            removed_entry = self.context_history.popleft()
+            self.total_tokens -= removed_entry['token_estimate']
+            
+            position = removed_entry['position']
+            del self._entries_by_position[position]
+            for term in removed_entry['terms']:
+                positions = self._term_index[term]
+                positions.discard(position)
+                if not positions:
+                    del self._term_index[term]
     
     def clear_context(self):
         """Clear all context history."""
         with self.lock:
             self.context_history.clear()
+            self._entries_by_position.clear()
+            self._term_index.clear()
+            self.total_tokens = 0
             self.current_position = 0
     
     def get_context_stats(self) -> Dict:
         """Get statistics about the current context."""
         with self.lock:
-            total_tokens = sum(entry['token_estimate'] for entry in self.context_history)
+            total_tokens = self.total_tokens
             
             return {
                 'total_entries': len(self.context_history),
@@ -342,111 +443,393 @@ class SlidingWindowManager:
             }
 
 
+class ReadWriteLock:
+    """Many concurrent readers or one writer; waiting writers block new readers."""
+    
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+    
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+    
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class InvertedIndex:
+    """BM25 inverted index over chunk keywords.
+    
+    Besides term postings it keeps attribute postings (e.g. ``('chunk_type',
+    'paragraph')``) so equality filters narrow the candidate set before any
+    scoring happens. Not thread-safe on its own; PriorityRAG guards it.
+    """
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.attribute_postings: Dict[Tuple[str, Any], Set[str]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._doc_attributes: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0
+    
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+    
+    def add(self, chunk_id: str, keywords: Sequence[str], attributes: Dict[str, Any] = None):
+        """Index a chunk's pre-normalized keywords and filterable attributes."""
+        if chunk_id in self.doc_lengths:
+            self.remove(chunk_id)
+        
+        term_counts = Counter(keywords)
+        for term, tf in term_counts.items():
+            self.postings.setdefault(term, {})[chunk_id] = tf
+        
+        attributes = attributes or {}
+        for item in attributes.items():
+            self.attribute_postings.setdefault(item, set()).add(chunk_id)
+        
+        self.doc_lengths[chunk_id] = len(keywords)
+        self._doc_terms[chunk_id] = tuple(term_counts)
+        self._doc_attributes[chunk_id] = attributes
+        self._total_length += len(keywords)
+    
+    def remove(self, chunk_id: str):
+        """Drop a chunk from all postings lists."""
+        if chunk_id not in self.doc_lengths:
+            return
+        
+        for term in self._doc_terms.pop(chunk_id):
+            postings = self.postings[term]
+            del postings[chunk_id]
+            if not postings:
+                del self.postings[term]
+        
+        for item in self._doc_attributes.pop(chunk_id).items():
+            members = self.attribute_postings[item]
+            members.discard(chunk_id)
+            if not members:
+                del self.attribute_postings[item]
+        
+        self._total_length -= self.doc_lengths.pop(chunk_id)
+    
+    def filter_candidates(self, attributes: Dict[str, Any]) -> Optional[Set[str]]:
+        """Chunk ids matching every attribute, or None when nothing is filtered."""
+        if not attributes:
+            return None
+        
+        # Intersect smallest postings first
+        member_sets = sorted((self.attribute_postings.get(item, set()) for item in attributes.items()),
+                             key=len)
+        candidates = set(member_sets[0])
+        for members in member_sets[1:]:
+            candidates &= members
+        return candidates
+    
+    def score(self, terms: Sequence[str], candidates: Optional[Set[str]] = None) -> Dict[str, float]:
+        """BM25 scores for chunks containing at least one of ``terms``.
+        
+        Only the postings of the query terms are visited, so cost follows the
+        number of matching chunks rather than the corpus size.
+        """
+        total_docs = len(self.doc_lengths)
+        if not total_docs or not terms:
+            return {}
+        
+        avg_length = self._total_length / total_docs or 1.0
+        scores: Dict[str, float] = {}
+        
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            
+            df = len(postings)
+            idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+            
+            if candidates is None:
+                matches = postings.items()
+            elif len(candidates) < len(postings):
+                matches = ((cid, postings[cid]) for cid in candidates if cid in postings)
+            else:
+                matches = ((cid, tf) for cid, tf in postings.items() if cid in candidates)
+            
+            for chunk_id, tf in matches:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[chunk_id] / avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        
+        return scores
+
+
 class PriorityRAG:
-    """Priority-based Retrieval Augmented Generation system."""
+    """Priority-based Retrieval Augmented Generation system.
+    
+    Chunks are held in a BM25 inverted index; retrieval scores only the chunks
+    that share a term with the query and keeps the best ``max_results`` with a
+    heap. Readers share a read lock, so concurrent retrievals do not serialize.
+    When ``index_path`` is given, save() writes the corpus there and it is
+    reloaded on start.
+    
+    With an ``embedder`` (see backend.vector_search) chunks are also embedded
+    in batches into a vector index, and hybrid_search() fuses BM25 with
+    vector similarity.
+    """
+    
+    INDEX_FORMAT_VERSION = 1
     
-    def __init__(self, max_results: int = 10):
+    # Filters answered by attribute postings; anything else is checked per candidate
+    INDEXED_FILTERS = {'doc_type', 'chunk_type'}
+    
+    def __init__(self, max_results: int = 10, index_path: Optional[Union[str, Path]] = None,
+                 embedder=None, vector_dtype: str = 'float32'):
         self.max_results = max_results
         self.document_store = {}
         self.chunk_index = {}
+        self.index = InvertedIndex()
         self.priority_weights = {
             'recency': 0.3,
             'relevance': 0.4,
             'priority': 0.2,
             'user_rating': 0.1
         }
-        self.lock = threading.RLock()
+        self.index_path = Path(index_path) if index_path else None
+        self.lock = ReadWriteLock()
+        self._stats_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.embedder = embedder
+        self.vector_index = None
+        
+        if embedder is not None:
+            self._open_vector_index(vector_dtype)
+        
+        if self.index_path and self.index_path.exists():
+            self.load()
     
-    def add_document(self, doc_id: str, chunks: List[DocumentChunk], metadata: Dict = None):
-        """Add a document and its chunks to the RAG system."""
-        with self.lock:
-            self.document_store[doc_id] = {
-                'chunks': chunks,
-                'metadata': metadata or {},
-                'added_at': datetime.now(),
-                'access_count': 0,
-                'last_accessed': None
+    def _open_vector_index(self, dtype: str):
+        """Reopen the persisted vector index, or start a new one if the embedder changed."""
+        vector_path = self.index_path.with_name(self.index_path.stem + '_vectors') if self.index_path else None
+        
+        if vector_path is not None:
+            existing = VectorIndex.load(vector_path)
+            if existing and existing.dim == self.embedder.dim and existing.model_id == self.embedder.model_id:
+                self.vector_index = existing
+                return
+        
+        self.vector_index = VectorIndex(self.embedder.dim, vector_path, dtype=dtype,
+                                        model_id=self.embedder.model_id)
+    
+    def _embed_chunks(self, chunks: List[DocumentChunk]):
+        """Embed chunk contents in batches; runs outside the index lock."""
+        if self.embedder is None or not chunks:
+            return None
+        return self.embedder.embed_batched([chunk.content for chunk in chunks])
+    
+    def add_document(self, doc_id: str, chunks: List[DocumentChunk], metadata: Dict = None,
+                     persist: bool = False):
+        """Add a document and its chunks to the RAG system.
+        
+        save() writes the whole corpus, so callers batch their changes and
+        save once; ``persist=True`` saves straight away.
+        """
+        vectors = self._embed_chunks(chunks)
+        
+        with self.lock.write():
+            self._add_document(doc_id, chunks, metadata or {}, datetime.now())
+            if vectors is not None:
+                self.vector_index.add([chunk.id for chunk in chunks], vectors)
+        
+        if persist and self.index_path:
+            self.save()
+    
+    def _add_document(self, doc_id: str, chunks: List[DocumentChunk], metadata: Dict,
+                      added_at: datetime, keywords: Dict[str, List[str]] = None, **stats):
+        if doc_id in self.document_store:
+            self._remove_document(doc_id)
+        
+        self.document_store[doc_id] = {
+            'chunks': chunks,
+            'metadata': metadata,
+            'added_at': added_at,
+            'access_count': stats.get('access_count', 0),
+            'last_accessed': stats.get('last_accessed')
+        }
+        if 'user_rating' in stats:
+            self.document_store[doc_id]['user_rating'] = stats['user_rating']
+        
+        # Index chunks
+        for chunk in chunks:
+            chunk_keywords = (keywords or {}).get(chunk.id) or self._extract_keywords(chunk.content)
+            self.chunk_index[chunk.id] = {
+                'doc_id': doc_id,
+                'chunk': chunk,
+                'keywords': chunk_keywords
             }
-            
-            # Index chunks
-            for chunk in chunks:
-                self.chunk_index[chunk.id] = {
-                    'doc_id': doc_id,
-                    'chunk': chunk,
-                    'keywords': self._extract_keywords(chunk.content)
-                }
+            self.index.add(chunk.id, chunk_keywords, {
+                'doc_type': metadata.get('type'),
+                'chunk_type': chunk.chunk_type.value
+            })
+    
+    def remove_document(self, doc_id: str, persist: bool = False) -> bool:
+        """Remove a document and its chunks (see add_document for ``persist``)."""
+        with self.lock.write():
+            removed = self._remove_document(doc_id)
+        
+        if removed and persist and self.index_path:
+            self.save()
+        return removed
+    
+    def _remove_document(self, doc_id: str) -> bool:
+        doc_info = self.document_store.pop(doc_id, None)
+        if doc_info is None:
+            return False
+        
+        for chunk in doc_info['chunks']:
+            self.chunk_index.pop(chunk.id, None)
+            self.index.remove(chunk.id)
+            if self.vector_index is not None:
+                self.vector_index.remove(chunk.id)
+        return True
     
     def retrieve(self, query: str, max_results: int = None, filters: Dict = None) -> List[Tuple[DocumentChunk, float]]:
         """Retrieve relevant chunks with priority scoring."""
         if max_results is None:
             max_results = self.max_results
         
-        with self.lock:
-            query_keywords = self._extract_keywords(query)
-            scored_chunks = []
+        query_keywords = self._extract_keywords(query)
+        filters = filters or {}
+        
+        with self.lock.read():
+            allowed = self._filter_candidates(filters)
+            bm25_scores = self.index.score(query_keywords, allowed)
+            
+            if query_keywords:
+                candidates = bm25_scores.keys()
+            else:
+                # No usable terms: rank the (filtered) corpus on priors alone
+                candidates = allowed if allowed is not None else self.chunk_index.keys()
             
-            for chunk_id, chunk_data in self.chunk_index.items():
+            return self._rank(self._scale_bm25(bm25_scores), candidates, filters, max_results)
+    
+    def hybrid_search(self, query: str, max_results: int = None, filters: Dict = None,
+                      vector_weight: float = 0.5) -> List[Tuple[DocumentChunk, float]]:
+        """Retrieve with relevance fused from BM25 and embedding similarity.
+        
+        Candidates are the union of BM25 matches and the nearest vectors, so
+        chunks that share no words with the query can still be found. Falls
+        back to retrieve() when no embedder is configured.
+        """
+        if self.vector_index is None:
+            return self.retrieve(query, max_results, filters)
+        
+        if max_results is None:
+            max_results = self.max_results
+        
+        query_keywords = self._extract_keywords(query)
+        query_vector = self.embedder.embed([query])[0]
+        filters = filters or {}
+        
+        with self.lock.read():
+            allowed = self._filter_candidates(filters)
+            relevance = {
+                chunk_id: score * (1 - vector_weight)
+                for chunk_id, score in self._scale_bm25(self.index.score(query_keywords, allowed)).items()
+            }
+            
+            # Over-fetch so post-filters (min_priority) still leave enough results
+            for chunk_id, similarity in self.vector_index.search(query_vector, max_results * 4, allowed):
+                relevance[chunk_id] = relevance.get(chunk_id, 0.0) + max(similarity, 0.0) * vector_weight
+            
+            return self._rank(relevance, relevance.keys(), filters, max_results)
+    
+    def _filter_candidates(self, filters: Dict) -> Optional[Set[str]]:
+        return self.index.filter_candidates(
+            {k: v for k, v in filters.items() if k in self.INDEXED_FILTERS})
+    
+    @staticmethod
+    def _scale_bm25(bm25_scores: Dict[str, float]) -> Dict[str, float]:
+        """BM25 is unbounded; scale to [0, 1] so the weights stay comparable."""
+        top_bm25 = max(bm25_scores.values(), default=0.0) or 1.0
+        return {chunk_id: score / top_bm25 for chunk_id, score in bm25_scores.items()}
+    
+    def _rank(self, relevance: Dict[str, float], candidates: Iterable[str], filters: Dict,
+              max_results: int) -> List[Tuple[DocumentChunk, float]]:
+        """Combine relevance with priority factors and keep the top results.
+        
+        Must be called with the read lock held.
+        """
+        min_priority = filters.get('min_priority')
+        weights = self.priority_weights
+        recency_by_doc = {}
+        
+        def scored():
+            for chunk_id in candidates:
+                chunk_data = self.chunk_index[chunk_id]
                 chunk = chunk_data['chunk']
-                doc_info = self.document_store[chunk_data['doc_id']]
-                
-                # Apply filters
-                if filters and not self._passes_filters(chunk, doc_info, filters):
+                if min_priority is not None and chunk.priority < min_priority:
                     continue
                 
-                # Calculate composite score
+                doc_id = chunk_data['doc_id']
+                doc_info = self.document_store[doc_id]
+                if doc_id not in recency_by_doc:
+                    recency_by_doc[doc_id] = self._calculate_recency_score(doc_info['added_at'])
+                
                 scores = {
-                    'relevance': self._calculate_relevance(query_keywords, chunk_data['keywords']),
-                    'recency': self._calculate_recency_score(doc_info['added_at']),
+                    'relevance': relevance.get(chunk_id, 0.0),
+                    'recency': recency_by_doc[doc_id],
                     'priority': chunk.priority,
                     'user_rating': doc_info.get('user_rating', 0.5)
                 }
-                
                 composite_score = sum(
-                    scores[factor] * weight 
-                    for factor, weight in self.priority_weights.items()
+                    scores[factor] * weight
+                    for factor, weight in weights.items()
                 )
-                
-                scored_chunks.append((chunk, composite_score, scores))
-            
-            # Sort by composite score
-            scored_chunks.sort(key=lambda x: x[1], reverse=True)
-            
-            # Update access statistics
-            for chunk, score, _ in scored_chunks[:max_results]:
-                doc_id = self.chunk_index[chunk.id]['doc_id']
+                yield composite_score, chunk_id
+        
+        top = heapq.nlargest(max_results, scored())
+        
+        # Update access statistics
+        now = datetime.now()
+        with self._stats_lock:
+            for doc_id in {self.chunk_index[chunk_id]['doc_id'] for _, chunk_id in top}:
                 self.document_store[doc_id]['access_count'] += 1
-                self.document_store[doc_id]['last_accessed'] = datetime.now()
-            
-            return [(chunk, score) for chunk, score, _ in scored_chunks[:max_results]]
+                self.document_store[doc_id]['last_accessed'] = now
+        
+        return [(self.chunk_index[chunk_id]['chunk'], score) for score, chunk_id in top]
     
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract keywords from text (simple implementation)."""
         # Remove punctuation and convert to lowercase
-        cleaned_text = re.sub(r'[^\w\s]', '', text.lower())
-        words = cleaned_text.split()
+        words = _PUNCTUATION_RE.sub('', text.lower()).split()
         
         # Filter out common stop words
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should'}
-        keywords = [word for word in words if word not in stop_words and len(word) > 2]
-        
-        return keywords
-    
-    def _calculate_relevance(self, query_keywords: List[str], content_keywords: List[str]) -> float:
-        """Calculate relevance score between query and content."""
-        if not query_keywords or not content_keywords:
-            return 0.0
-        
-        query_set = set(query_keywords)
-        content_set = set(content_keywords)
-        
-        intersection = query_set.intersection(content_set)
-        union = query_set.union(content_set)
-        
-        if not union:
-            return 0.0
-        
-        # Jaccard similarity
-        return len(intersection) / len(union)
+        return [word for word in words if word not in STOP_WORDS and len(word) > 2]
     
     def _calculate_recency_score(self, added_at: datetime) -> float:
         """Calculate recency score (more recent = higher score)."""
@@ -456,40 +839,134 @@ class PriorityRAG:
         # Exponential decay: score = e^(-age_days/30)
         return math.exp(-age_days / 30)
     
-    def _passes_filters(self, chunk: DocumentChunk, doc_info: Dict, filters: Dict) -> bool:
-        """Check if chunk passes all filters."""
-        for filter_key, filter_value in filters.items():
-            if filter_key == 'doc_type':
-                if doc_info['metadata'].get('type') != filter_value:
-                    return False
-            elif filter_key == 'min_priority':
-                if chunk.priority < filter_value:
-                    return False
-            elif filter_key == 'chunk_type':
-                if chunk.chunk_type.value != filter_value:
-                    return False
-        
-        return True
-    
     def update_priority_weights(self, weights: Dict[str, float]):
         """Update priority scoring weights."""
-        with self.lock:
+        with self.lock.write():
             total_weight = sum(weights.values())
             if abs(total_weight - 1.0) > 0.01:
                 # Normalize weights
                 weights = {k: v / total_weight for k, v in weights.items()}
             
-            self.priority_weights.update(weights)
+            self.priority_weights = {**self.priority_weights, **weights}
+    
+    def save(self, path: Optional[Union[str, Path]] = None):
+        """Write the corpus (chunks, keywords and document stats) to disk."""
+        path = Path(path) if path else self.index_path
+        if path is None:
+            raise ValueError("No index path configured")
+        
+        with self.lock.read():
+            documents = {}
+            for doc_id, doc_info in self.document_store.items():
+                documents[doc_id] = {
+                    'metadata': doc_info['metadata'],
+                    'added_at': doc_info['added_at'].isoformat(),
+                    'access_count': doc_info['access_count'],
+                    'last_accessed': doc_info['last_accessed'].isoformat() if doc_info['last_accessed'] else None,
+                    'chunks': [
+                        dict(chunk.to_dict(), embedding=chunk.embedding,
+                             keywords=self.chunk_index[chunk.id]['keywords'])
+                        for chunk in doc_info['chunks']
+                    ]
+                }
+                if 'user_rating' in doc_info:
+                    documents[doc_id]['user_rating'] = doc_info['user_rating']
+            
+            snapshot = json.dumps({'version': self.INDEX_FORMAT_VERSION, 'documents': documents})
+        
+        # Saves are serialized so a later snapshot is never overwritten by an earlier one
+        with self._save_lock:
+            if self.vector_index is not None and self.vector_index.path:
+                # Saving compacts the vector matrix, which searches must not see half-done
+                with self.lock.write():
+                    self.vector_index.save()
+            
+            tmp_path = None
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix=path.name, suffix='.tmp', dir=path.parent)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(snapshot)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.error(f"Failed to save RAG index: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+    
+    def load(self, path: Optional[Union[str, Path]] = None):
+        """Load a corpus written by save(), replacing the current one."""
+        path = Path(path) if path else self.index_path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load RAG index: {e}")
+            return
+        
+        if data.get('version') != self.INDEX_FORMAT_VERSION:
+            logger.warning(f"Ignoring RAG index with unsupported version {data.get('version')}")
+            return
+        
+        with self.lock.write():
+            self.document_store = {}
+            self.chunk_index = {}
+            self.index = InvertedIndex()
+            
+            for doc_id, doc in data['documents'].items():
+                chunks = [
+                    DocumentChunk(
+                        id=record['id'],
+                        content=record['content'],
+                        chunk_type=ChunkType(record['chunk_type']),
+                        start_index=record['start_index'],
+                        end_index=record['end_index'],
+                        metadata=record['metadata'],
+                        embedding=record.get('embedding'),
+                        priority=record['priority']
+                    )
+                    for record in doc['chunks']
+                ]
+                stats = {
+                    'access_count': doc.get('access_count', 0),
+                    'last_accessed': datetime.fromisoformat(doc['last_accessed']) if doc.get('last_accessed') else None
+                }
+                if 'user_rating' in doc:
+                    stats['user_rating'] = doc['user_rating']
+                
+                self._add_document(doc_id, chunks, doc['metadata'], datetime.fromisoformat(doc['added_at']),
+                                   keywords={record['id']: record.get('keywords') for record in doc['chunks']},
+                                   **stats)
+        
+        logger.info(f"Loaded RAG index with {len(self.document_store)} documents from {path}")
+        
+        if self.vector_index is not None:
+            self._embed_missing_chunks()
+    
+    def _embed_missing_chunks(self):
+        """Embed chunks the vector index does not know yet, e.g. after an embedder change."""
+        with self.lock.read():
+            missing = [data['chunk'] for chunk_id, data in self.chunk_index.items()
+                       if chunk_id not in self.vector_index.id_rows]
+        if not missing:
+            return
+        
+        vectors = self._embed_chunks(missing)
+        with self.lock.write():
+            live = [i for i, chunk in enumerate(missing) if chunk.id in self.chunk_index]
+            self.vector_index.add([missing[i].id for i in live], vectors[live])
+        logger.info(f"Embedded {len(live)} chunks into the vector index")
     
     def get_document_stats(self) -> Dict:
         """Get statistics about the document store."""
-        with self.lock:
+        with self.lock.read():
             total_chunks = sum(len(doc['chunks']) for doc in self.document_store.values())
             
             return {
                 'total_documents': len(self.document_store),
                 'total_chunks': total_chunks,
                 'indexed_chunks': len(self.chunk_index),
+                'indexed_terms': len(self.index.postings),
+                'embedded_chunks': len(self.vector_index) if self.vector_index is not None else 0,
                 'priority_weights': self.priority_weights.copy()
             }
 
@@ -497,15 +974,27 @@ class PriorityRAG:
 class QueryPlanner:
     """Plans and executes complex AI queries."""
     
-    def __init__(self):
+    RESULT_CACHE_SIZE = 256
+    
+    def __init__(self, max_workers: int = 8):
         self.step_handlers = {}
+        self.cacheable_steps = {}
         self.active_plans = {}
         self.completed_plans = {}
+        self.result_cache = OrderedDict()
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
         self.lock = threading.RLock()
     
-    def register_step_handler(self, step_type: str, handler: Callable):
-        """Register a handler for a specific step type."""
+    def register_step_handler(self, step_type: str, handler: Callable, cacheable: bool = False):
+        """Register a handler for a specific step type.
+        
+        Results of cacheable handlers are reused when a step runs again with
+        the same parameters and dependency results, so only pure handlers
+        (no dependence on time or changing data) should be marked cacheable.
+        """
         self.step_handlers[step_type] = handler
+        self.cacheable_steps[step_type] = cacheable
     
     def create_query_plan(self, query: str, query_type: QueryType = QueryType.SIMPLE) -> str:
         """Create a query execution plan."""
@@ -608,64 +1097,213 @@ class QueryPlanner:
         
         return plan_id
     
-    def execute_plan(self, plan_id: str) -> Dict:
-        """Execute a query plan."""
+    def execute_plan(self, plan_id: str, step_timeout: Optional[float] = None,
+                     use_cache: bool = True) -> Dict:
+        """Execute a query plan.
+        
+        Steps are scheduled onto the thread pool as soon as all of their
+        dependencies have finished, so independent branches run concurrently
+        and the plan takes roughly its critical-path time. ``step_timeout``
+        applies to steps without their own ``timeout``.
+        """
         with self.lock:
             if plan_id not in self.active_plans:
                 return {'error': 'Plan not found'}
             
             plan = self.active_plans[plan_id]
+            if plan['status'] == 'executing':
+                return {'error': 'Plan is already executing'}
             plan['status'] = 'executing'
-            
-            try:
-                results = {}
-                completed_steps = set()
+            plan['trace'] = {}
+            cancel_event = plan['cancel_event'] = threading.Event()
+            steps = plan['steps']
+        
+        # Dependency counts and reverse edges for topological scheduling
+        waiting_on = {step_id: len(step.depends_on) for step_id, step in steps.items()}
+        dependents = {step_id: [] for step_id in steps}
+        for step_id, step in steps.items():
+            for dep in step.depends_on:
+                if dep not in steps:
+                    return self._fail_plan(plan_id, f"Step {step_id} depends on missing step {dep}")
+                dependents[dep].append(step_id)
+        
+        results = {}
+        running = {}  # future -> (step, timeout, deadline)
+        ready = [step_id for step_id, count in waiting_on.items() if count == 0]
+        started_at = time.perf_counter()
+        
+        try:
+            while ready or running:
+                if cancel_event.is_set():
+                    self._abandon(running)
+                    with self.lock:
+                        plan['status'] = 'cancelled'
+                        plan['results'] = results
+                        self.completed_plans[plan_id] = self.active_plans.pop(plan_id)
+                    return {'error': 'Plan cancelled', 'results': results, 'trace': plan['trace']}
+                
+                for step_id in ready:
+                    step = steps[step_id]
+                    step.cancelled.clear()
+                    timeout = step.timeout if step.timeout is not None else step_timeout
+                    deadline = time.perf_counter() + timeout if timeout else None
+                    future = self._get_executor().submit(self._run_step, plan, step, dict(results),
+                                                         use_cache, started_at)
+                    running[future] = (step, timeout, deadline)
+                ready = []
+                
+                deadlines = [d for _, _, d in running.values() if d is not None]
+                wait_for = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+                # Wake periodically to notice cancellation
+                wait_for = min(wait_for, 0.1) if wait_for is not None else 0.1
+                done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
                 
-                while len(completed_steps) < len(plan['steps']):
-                    # Find steps that can be executed (dependencies met)
-                    ready_steps = []
-                    for step_id, step in plan['steps'].items():
-                        if step_id not in completed_steps and all(dep in completed_steps for dep in step.depends_on):
-                            ready_steps.append(step)
+                now = time.perf_counter()
+                for future in list(running):
+                    step, timeout, deadline = running[future]
+                    if future in done:
+                        result = future.result()
+                    elif deadline is not None and now >= deadline:
+                        # Threads cannot be interrupted: signal the handler, discard its
+                        # late result and schedule later steps on a fresh pool
+                        self._abandon({future: running[future]})
+                        result = f"Step timed out after {timeout}s"
+                        self._record_trace(plan, step.step_id, status='timeout')
+                    else:
+                        continue
                     
-                    if not ready_steps:
-                        return {'error': 'Circular dependencies or missing steps'}
+                    del running[future]
+                    results[step.step_id] = result
+                    step.completed = True
+                    step.result = result
                     
-                    # Execute ready steps
-                    for step in ready_steps:
-                        result = self._execute_step(step, results)
-                        results[step.step_id] = result
-                        step.completed = True
-                        step.result = result
-                        completed_steps.add(step.step_id)
-                        
-                        # Update progress
-                        plan['progress'] = len(completed_steps) / len(plan['steps']) * 100
-                
+                    for child in dependents[step.step_id]:
+                        waiting_on[child] -= 1
+                        if waiting_on[child] == 0:
+                            ready.append(child)
+                    
+                    with self.lock:
+                        plan['progress'] = len(results) / len(steps) * 100
+            
+            if len(results) < len(steps):
+                return self._fail_plan(plan_id, 'Circular dependencies or missing steps')
+            
+            with self.lock:
                 plan['status'] = 'completed'
                 plan['results'] = results
+                plan['elapsed_ms'] = (time.perf_counter() - started_at) * 1000
                 
                 # Move to completed plans
                 self.completed_plans[plan_id] = self.active_plans.pop(plan_id)
-                
-                return {'success': True, 'results': results}
-                
-            except Exception as e:
-                plan['status'] = 'failed'
-                plan['error'] = str(e)
-                return {'error': str(e)}
+            
+            return {'success': True, 'results': results, 'trace': plan['trace'],
+                    'elapsed_ms': plan['elapsed_ms']}
+            
+        except Exception as e:
+            self._abandon(running)
+            return self._fail_plan(plan_id, str(e))
+    
+    def cancel_plan(self, plan_id: str) -> bool:
+        """Stop scheduling further steps of an executing plan."""
+        with self.lock:
+            plan = self.active_plans.get(plan_id)
+            if not plan or plan['status'] != 'executing':
+                return False
+            plan['cancel_event'].set()
+            return True
     
-    def _execute_step(self, step: QueryStep, previous_results: Dict) -> Any:
-        """Execute a single step."""
+    def _fail_plan(self, plan_id: str, error: str) -> Dict:
+        with self.lock:
+            plan = self.completed_plans[plan_id] = self.active_plans.pop(plan_id)
+            plan['status'] = 'failed'
+            plan['error'] = error
+        return {'error': error}
+    
+    def _abandon(self, running: Dict):
+        """Signal steps to stop and cancel them, or retire the pool if any already started."""
+        started = False
+        for future, (step, _, _) in running.items():
+            step.cancelled.set()
+            started |= not future.cancel()
+        if started:
+            self._retire_executor()
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self.lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="query-step")
+            return self._executor
+    
+    def _retire_executor(self):
+        """Hand new steps to a fresh pool while a stuck worker finishes in the old one.
+        
+        Work already queued on the old pool still runs; its threads exit once idle.
+        """
+        with self.lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+    
+    def _record_trace(self, plan: Dict, step_id: str, **fields):
+        with self.lock:
+            entry = plan['trace'].setdefault(step_id, {})
+            if entry.get('status') != 'timeout':  # A late finish does not undo a timeout
+                entry.update(fields)
+    
+    def _run_step(self, plan: Dict, step: QueryStep, previous_results: Dict,
+                  use_cache: bool, plan_started: float) -> Any:
+        """Worker-side wrapper: cache lookup, execution and latency trace."""
+        started = time.perf_counter()
+        self._record_trace(plan, step.step_id, start_offset_ms=(started - plan_started) * 1000,
+                           status='running')
+        
+        if step.cancelled.is_set():
+            return f"Step cancelled: {step.step_id}"
+        
+        cache_key = None
+        if use_cache and self.cacheable_steps.get(step.step_type, False):
+            cache_key = self._cache_key(step, previous_results)
+            with self.lock:
+                if cache_key in self.result_cache:
+                    self.result_cache.move_to_end(cache_key)
+                    self._record_trace(plan, step.step_id, status='cached', latency_ms=0.0)
+                    return self.result_cache[cache_key]
+        
+        result, ok = self._execute_step(step, previous_results)
+        
+        if ok and cache_key is not None:
+            with self.lock:
+                self.result_cache[cache_key] = result
+                if len(self.result_cache) > self.RESULT_CACHE_SIZE:
+                    self.result_cache.popitem(last=False)
+        
+        self._record_trace(plan, step.step_id, status='completed' if ok else 'failed',
+                           latency_ms=(time.perf_counter() - started) * 1000)
+        return result
+    
+    @staticmethod
+    def _cache_key(step: QueryStep, previous_results: Dict) -> str:
+        """Hash of everything a step consumes: its type, parameters and dependency results."""
+        inputs = {
+            'type': step.step_type,
+            'parameters': step.parameters,
+            'depends_on': {dep: previous_results.get(dep) for dep in step.depends_on}
+        }
+        encoded = json.dumps(inputs, sort_keys=True, default=repr)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+    
+    def _execute_step(self, step: QueryStep, previous_results: Dict) -> Tuple[Any, bool]:
+        """Execute a single step; returns the result and whether it succeeded."""
         handler = self.step_handlers.get(step.step_type)
         if not handler:
-            return f"No handler for step type: {step.step_type}"
+            return f"No handler for step type: {step.step_type}", False
         
         try:
-            return handler(step, previous_results)
+            return handler(step, previous_results), True
         except Exception as e:
             logger.error(f"Error executing step {step.step_id}: {e}")
-            return f"Step execution failed: {e}"
+            return f"Step execution failed: {e}", False
     
     def get_plan_status(self, plan_id: str) -> Dict:
         """Get the status of a query plan."""
@@ -679,7 +1317,8 @@ class QueryPlanner:
                     'total_steps': len(plan['steps'])
                 }
             elif plan_id in self.completed_plans:
-                return {'status': 'completed', 'progress': 100.0}
+                plan = self.completed_plans[plan_id]
+                return {'status': plan['status'], 'progress': plan['progress']}
             else:
                 return {'status': 'not_found'}
 
@@ -718,10 +1357,13 @@ class AICapabilityDetector:
     
     def _check_embeddings(self) -> Dict:
         """Check for embedding capabilities."""
+        providers = available_embedding_providers() if VECTOR_SEARCH_AVAILABLE else []
+        semantic = [p for p in providers if p != 'hashing']
         return {
-            'available': False,  # Would check for embedding models/APIs
-            'provider': None,
-            'fallback': 'keyword_search'
+            'available': bool(semantic),
+            'provider': semantic[0] if semantic else None,
+            'providers': providers,
+            'fallback': 'hashing' if providers else 'keyword_search'
         }
     
     def _check_text_generation(self) -> Dict:
@@ -743,8 +1385,8 @@ class AICapabilityDetector:
     def _check_vector_search(self) -> Dict:
         """Check for vector search capabilities."""
         return {
-            'available': False,  # Would check for vector databases
-            'provider': None,
+            'available': VECTOR_SEARCH_AVAILABLE,
+            'provider': 'ivf_memmap' if VECTOR_SEARCH_AVAILABLE else None,
             'fallback': 'keyword_search'
         }
     
@@ -785,11 +1427,14 @@ class AICapabilityDetector:
         return time_since_check > self.check_interval
 
 
+# Where the shared RAG corpus is kept between runs
+RAG_INDEX_PATH = Path.home() / ".westfall_assistant" / "rag" / "rag_index.json"
+
 # Global instances
 ai_integration = {
     'chunker': DocumentChunker(),
     'context_manager': SlidingWindowManager(),
-    'rag_system': PriorityRAG(),
+    'rag_system': PriorityRAG(index_path=RAG_INDEX_PATH),
     'query_planner': QueryPlanner(),
     'capability_detector': AICapabilityDetector()
 }
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Document Ingestion Pipeline for Westfall Personal Assistant
+
+Streams text files and PDFs through DocumentChunker and feeds the chunks into
+a PriorityRAG index. Files are read incrementally (StreamProcessor blocks or
+one PDF page at a time), chunked in worker processes when there are several
+of them, and deduplicated by content hash before indexing.
+"""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .ai_integration import ChunkType, DocumentChunk, DocumentChunker, PriorityRAG
+from .memory_management import StreamProcessor
+
+# Optional dependency
+try:
+    from pypdf import PdfReader
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = {'.txt', '.md', '.rst', '.log', '.csv', '.json', '.html', '.xml'}
+PDF_EXTENSIONS = {'.pdf'}
+
+# Bytes of input below which a pool round-trip costs more than it saves
+PARALLEL_MIN_BYTES = 256 * 1024
+
+
+def iter_document_blocks(path: Path, block_size: int = 64 * 1024) -> Iterator[str]:
+    """Yield a document's text in order without loading it whole."""
+    if path.suffix.lower() in PDF_EXTENSIONS:
+        if not PYPDF_AVAILABLE:
+            raise RuntimeError("pypdf not available - cannot read PDF files")
+        for page in PdfReader(str(path)).pages:
+            yield (page.extract_text() or "") + "\n\n"
+    else:
+        yield from StreamProcessor(block_size).process_large_file(path, lambda block: block)
+
+
+def chunk_file(path: Union[str, Path], chunk_type: ChunkType = ChunkType.PARAGRAPH,
+               chunk_size: int = 1000, overlap: int = 200,
+               block_size: int = 64 * 1024) -> Tuple[str, Dict, List[DocumentChunk]]:
+    """Stream and chunk one file; also the unit of work for pool workers.
+
+    Returns the document id, document metadata and the file's chunks with
+    ids scoped to the document so workers never collide.
+    """
+    path = Path(path)
+    doc_id = hashlib.sha1(str(path.resolve()).encode()).hexdigest()[:16]
+    chunker = DocumentChunker(chunk_size, overlap)
+    chunks = list(chunker.iter_chunks(iter_document_blocks(path, block_size), chunk_type,
+                                      id_prefix=doc_id))
+
+    metadata = {
+        'type': path.suffix.lower().lstrip('.') or 'text',
+        'source_path': str(path),
+        'size_bytes': path.stat().st_size
+    }
+    return doc_id, metadata, chunks
+
+
+class DocumentIngestor:
+    """Ingests files and folders into a PriorityRAG index, scaling with cores."""
+
+    def __init__(self, rag: PriorityRAG, chunk_type: ChunkType = ChunkType.PARAGRAPH,
+                 chunk_size: int = 1000, overlap: int = 200, max_workers: Optional[int] = None):
+        self.rag = rag
+        self.chunk_type = chunk_type
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # content hash -> id of the document that first contributed it
+        self.seen_hashes: Dict[str, str] = {}
+
+        # Chunks already in the index count as seen
+        for chunk_data in rag.chunk_index.values():
+            content_hash = (chunk_data['chunk'].metadata or {}).get('content_hash')
+            if content_hash:
+                self.seen_hashes.setdefault(content_hash, chunk_data['doc_id'])
+
+    def ingest_directory(self, directory: Union[str, Path], recursive: bool = True,
+                         extensions: Optional[Iterable[str]] = None) -> Dict:
+        """Ingest every supported file under ``directory``."""
+        extensions = {e.lower() for e in (extensions or TEXT_EXTENSIONS | PDF_EXTENSIONS)}
+        pattern = '**/*' if recursive else '*'
+        paths = [p for p in Path(directory).glob(pattern) if p.is_file() and p.suffix.lower() in extensions]
+        return self.ingest_files(paths)
+
+    def ingest_files(self, paths: Sequence[Union[str, Path]]) -> Dict:
+        """Chunk ``paths`` (in a process pool when worthwhile) and index the results."""
+        paths = [Path(p) for p in paths]
+        stats = {'files': 0, 'failed': 0, 'chunks': 0, 'duplicates': 0}
+        if not paths:
+            return stats
+
+        total_bytes = sum(p.stat().st_size for p in paths)
+        args = (self.chunk_type, self.chunk_size, self.overlap)
+
+        if len(paths) == 1 or self.max_workers == 1 or total_bytes < PARALLEL_MIN_BYTES:
+            for path in paths:
+                self._index_result(path, lambda: chunk_file(path, *args), stats)
+        else:
+            # Largest files first so one big file does not finish last on its own
+            paths.sort(key=lambda p: p.stat().st_size, reverse=True)
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(paths))) as pool:
+                futures = {pool.submit(chunk_file, path, *args): path for path in paths}
+                for future in as_completed(futures):
+                    self._index_result(futures[future], future.result, stats)
+
+        if self.rag.index_path:
+            self.rag.save()
+
+        logger.info(f"Ingested {stats['files']} files into {stats['chunks']} chunks "
+                    f"({stats['duplicates']} duplicates skipped, {stats['failed']} failed)")
+        return stats
+
+    def _index_result(self, path: Path, get_result, stats: Dict):
+        try:
+            doc_id, metadata, chunks = get_result()
+        except Exception as e:
+            logger.error(f"Failed to ingest {path}: {e}")
+            stats['failed'] += 1
+            return
+
+        unique = []
+        for chunk in chunks:
+            # Re-ingesting a document replaces it, so its own chunks are not duplicates
+            owner = self.seen_hashes.setdefault(chunk.metadata['content_hash'], doc_id)
+            if owner != doc_id:
+                stats['duplicates'] += 1
+                continue
+            unique.append(chunk)
+
+        self.rag.add_document(doc_id, unique, metadata)
+        stats['files'] += 1
+        stats['chunks'] += len(unique)
@@ -3,7 +3,8 @@
 Advanced Calculator for Westfall Personal Assistant
 
 Scientific calculator with history, memory functions, unit converter,
-and programmer mode with hex/binary support.
+and programmer mode with hex/binary support. Expressions are compiled once
+by the expression compiler and can be swept over ranges of a variable.
 """
 
 import asyncio
@@ -11,11 +12,15 @@ import logging
 import json
 import sqlite3
 import math
-import re
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Union
 from decimal import Decimal, getcontext
-import operator
+
+from .async_database import get_database
+from .expression_compiler import (
+    NUMPY_AVAILABLE, ExpressionError, build_namespace, compile_expression,
+    evaluate_many, parse_sweep, sweep_points
+)
 
 logger = logging.getLogger(__name__)
 
@@ -95,8 +100,12 @@ class AdvancedCalculator:
             "avogadro": 6.02214076e23
         }
         
+        # Expression namespaces, keyed by (mode, angle mode, vectorized)
+        self._namespaces: Dict[tuple, Dict] = {}
+        
         # Initialize database
         self._init_database()
+        self.db = get_database(self.db_path)
     
     def _init_database(self):
         """Initialize SQLite database for calculator history."""
@@ -166,8 +175,11 @@ class AdvancedCalculator:
             if mode:
                 self.current_mode = mode
             
-            # Clean and validate expression
-            expression = self._clean_expression(expression)
+            expression = expression.strip()
+            
+            # "sin(x) for x in 0..10 step 0.1" evaluates over a range
+            if parse_sweep(expression):
+                return await self.sweep(expression)
             
             # Handle different modes
             if self.current_mode == "programmer":
@@ -201,36 +213,28 @@ class AdvancedCalculator:
                 "success": False
             }
     
-    def _clean_expression(self, expression: str) -> str:
-        """Clean and normalize expression."""
-        # Remove whitespace
-        expression = expression.strip()
-        
-        # Replace constants
-        for const_name, const_value in self.constants.items():
-            expression = expression.replace(const_name, str(const_value))
-        
-        # Replace 'x' with '*' for multiplication
-        expression = re.sub(r'(\d+)x(\d+)', r'\1*\2', expression)
-        
-        # Handle implicit multiplication (e.g., 2(3+4) -> 2*(3+4))
-        expression = re.sub(r'(\d+)\(', r'\1*(', expression)
-        expression = re.sub(r'\)(\d+)', r')*\1', expression)
-        
-        return expression
+    def _namespace(self, mode: str, vectorized: bool = False) -> Dict:
+        """Functions and constants for a mode, built once per angle mode."""
+        key = (mode, self.angle_mode, vectorized)
+        namespace = self._namespaces.get(key)
+        if namespace is None:
+            namespace = self._namespaces[key] = build_namespace(
+                mode, self.angle_mode, self.constants, vectorized)
+        return namespace
+    
+    def _evaluate(self, expression: str, mode: str):
+        """Evaluate an expression through the compiled-expression cache."""
+        compiled = compile_expression(expression)
+        namespace = self._namespace(mode)
+        if mode == "scientific":
+            namespace["last"] = self.last_result
+        compiled.check(namespace)
+        return compiled.evaluate(namespace)
     
     async def _calculate_standard(self, expression: str) -> Dict:
         """Perform standard arithmetic calculation."""
         try:
-            # Basic arithmetic evaluation
-            result = eval(expression, {"__builtins__": {}}, {
-                "abs": abs,
-                "round": round,
-                "max": max,
-                "min": min,
-                "sum": sum,
-                "pow": pow
-            })
+            result = self._evaluate(expression, "standard")
             
             return {
                 "value": result,
@@ -244,30 +248,8 @@ class AdvancedCalculator:
     async def _calculate_scientific(self, expression: str) -> Dict:
         """Perform scientific calculation with advanced functions."""
         try:
-            # Create safe environment with scientific functions
-            safe_dict = {
-                "__builtins__": {},
-                # Basic functions
-                "abs": abs, "round": round, "max": max, "min": min, "sum": sum, "pow": pow,
-                # Math functions
-                "sin": math.sin, "cos": math.cos, "tan": math.tan,
-                "asin": math.asin, "acos": math.acos, "atan": math.atan,
-                "sinh": math.sinh, "cosh": math.cosh, "tanh": math.tanh,
-                "log": math.log, "log10": math.log10, "log2": math.log2,
-                "exp": math.exp, "sqrt": math.sqrt, "factorial": math.factorial,
-                "degrees": math.degrees, "radians": math.radians,
-                "floor": math.floor, "ceil": math.ceil,
-                # Constants
-                "pi": math.pi, "e": math.e,
-                # Custom functions
-                "last": self.last_result
-            }
-            
-            # Handle angle mode for trigonometric functions
-            if self.angle_mode == "degrees":
-                expression = self._convert_trig_to_degrees(expression)
-            
-            result = eval(expression, safe_dict)
+            # sin, cos and tan take degrees when angle_mode is "degrees"
+            result = self._evaluate(expression, "scientific")
             
             return {
                 "value": result,
@@ -282,20 +264,8 @@ class AdvancedCalculator:
     async def _calculate_programmer(self, expression: str) -> Dict:
         """Perform programmer mode calculation with different number bases."""
         try:
-            # Handle different number bases in input
-            expression = self._convert_bases_in_expression(expression)
-            
-            # Evaluate expression
-            result = eval(expression, {"__builtins__": {}}, {
-                "abs": abs, "pow": pow,
-                # Bitwise operations
-                "and": operator.and_,
-                "or": operator.or_,
-                "xor": operator.xor,
-                "not": operator.not_,
-                "lshift": operator.lshift,
-                "rshift": operator.rshift
-            })
+            # 0x, 0b and 0o literals and bitwise operators parse natively
+            result = self._evaluate(expression, "programmer")
             
             # Convert result to different bases
             formatted_result = self._format_programmer_result(int(result))
@@ -310,26 +280,63 @@ class AdvancedCalculator:
         except Exception as e:
             raise ValueError(f"Invalid programmer expression: {e}")
     
-    def _convert_trig_to_degrees(self, expression: str) -> str:
-        """Convert trigonometric functions to work with degrees."""
-        # Replace trig functions to handle degrees
-        expression = re.sub(r'sin\((.*?)\)', r'sin(radians(\1))', expression)
-        expression = re.sub(r'cos\((.*?)\)', r'cos(radians(\1))', expression)
-        expression = re.sub(r'tan\((.*?)\)', r'tan(radians(\1))', expression)
-        return expression
+    async def sweep(self, expression: str, mode: str = None) -> Dict:
+        """Evaluate an expression over a range, for tables and plots.
     
-    def _convert_bases_in_expression(self, expression: str) -> str:
-        """Convert different number bases to decimal for evaluation."""
-        # Hex numbers (0x prefix)
-        expression = re.sub(r'0x([0-9A-Fa-f]+)', lambda m: str(int(m.group(1), 16)), expression)
+        Accepts "sin(x) for x in 0..10 step 0.001". The bounds may be
+        expressions ("-pi..pi"); without a step the range is split into
+        evenly spaced points.
+        """
+        try:
+            sweep = parse_sweep(expression)
+            if not sweep:
+                raise ExpressionError("Expected '<expression> for <name> in <start>..<stop> [step <n>]'")
         
-        # Binary numbers (0b prefix)
-        expression = re.sub(r'0b([01]+)', lambda m: str(int(m.group(1), 2)), expression)
+            if not mode:
+                mode = "scientific" if self.current_mode == "programmer" else self.current_mode
+            start = float(self._evaluate(sweep.start, mode))
+            stop = float(self._evaluate(sweep.stop, mode))
+            step = float(self._evaluate(sweep.step, mode)) if sweep.step else None
+            inputs = sweep_points(start, stop, step)
         
-        # Octal numbers (0o prefix)
-        expression = re.sub(r'0o([0-7]+)', lambda m: str(int(m.group(1), 8)), expression)
+            results = await self.evaluate_many(sweep.expression, inputs, sweep.variable, mode)
         
-        return expression
+            self.db.execute_nowait('''
+                INSERT INTO calculation_history (expression, result, mode, calculation_type)
+                VALUES (?, ?, ?, 'sweep')
+            ''', (expression, f"{len(inputs)} points", mode))
+            
+            return {
+                "expression": expression,
+                "variable": sweep.variable,
+                "inputs": inputs.tolist() if NUMPY_AVAILABLE else inputs,
+                "results": results.tolist() if NUMPY_AVAILABLE else results,
+                "points": len(inputs),
+                "mode": mode,
+                "calculation_type": "sweep",
+                "success": True
+            }
+        
+        except Exception as e:
+            logger.error(f"Sweep failed: {e}")
+            return {
+                "expression": expression,
+                "error": str(e),
+                "success": False
+            }
+    
+    async def evaluate_many(self, expression: str, values, variable: str = "x", mode: str = None):
+        """Evaluate an expression for every value of one variable in a single pass.
+        
+        Returns a NumPy array when NumPy is installed, otherwise a list.
+        """
+        mode = mode or self.current_mode
+        compiled = compile_expression(expression)
+        namespace = {**self._namespace(mode, vectorized=True), "last": self.last_result}
+        
+        # Large sweeps are evaluated off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, evaluate_many, compiled, namespace, variable, values)
     
     def _format_programmer_result(self, result: int) -> str:
         """Format result for programmer mode showing different bases."""
@@ -357,13 +364,10 @@ class AdvancedCalculator:
             self.memory = value
             
             # Store in database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO memory_storage (memory_slot, value, description)
-                    VALUES ('main', ?, 'Main memory')
-                ''', (value,))
-                conn.commit()
+            await self.db.execute('''
+                INSERT OR REPLACE INTO memory_storage (memory_slot, value, description)
+                VALUES ('main', ?, 'Main memory')
+            ''', (value,))
             
             return True
             
@@ -384,13 +388,10 @@ class AdvancedCalculator:
             self.memory += value
             
             # Update in database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE memory_storage SET value = ?, updated_at = ?
-                    WHERE memory_slot = 'main'
-                ''', (self.memory, datetime.now().isoformat()))
-                conn.commit()
+            await self.db.execute('''
+                UPDATE memory_storage SET value = ?, updated_at = ?
+                WHERE memory_slot = 'main'
+            ''', (self.memory, datetime.now().isoformat()))
             
             return True
             
@@ -407,13 +408,10 @@ class AdvancedCalculator:
             self.memory -= value
             
             # Update in database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE memory_storage SET value = ?, updated_at = ?
-                    WHERE memory_slot = 'main'
-                ''', (self.memory, datetime.now().isoformat()))
-                conn.commit()
+            await self.db.execute('''
+                UPDATE memory_storage SET value = ?, updated_at = ?
+                WHERE memory_slot = 'main'
+            ''', (self.memory, datetime.now().isoformat()))
             
             return True
             
@@ -427,13 +425,10 @@ class AdvancedCalculator:
             self.memory = 0.0
             
             # Clear in database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE memory_storage SET value = 0, updated_at = ?
-                    WHERE memory_slot = 'main'
-                ''', (datetime.now().isoformat(),))
-                conn.commit()
+            await self.db.execute('''
+                UPDATE memory_storage SET value = 0, updated_at = ?
+                WHERE memory_slot = 'main'
+            ''', (datetime.now().isoformat(),))
             
             return True
             
@@ -512,13 +507,11 @@ class AdvancedCalculator:
     async def _store_calculation(self, expression: str, result: str, mode: str):
         """Store calculation in history."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO calculation_history (expression, result, mode)
-                    VALUES (?, ?, ?)
-                ''', (expression, result, mode))
-                conn.commit()
+            # History rides along with the next group commit
+            self.db.execute_nowait('''
+                INSERT INTO calculation_history (expression, result, mode)
+                VALUES (?, ?, ?)
+            ''', (expression, result, mode))
         except Exception as e:
             logger.error(f"Failed to store calculation: {e}")
     
@@ -526,30 +519,24 @@ class AdvancedCalculator:
                                to_value: float, to_unit: str, category: str):
         """Store unit conversion in history."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO conversion_history 
-                    (from_value, from_unit, to_value, to_unit, category)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (from_value, from_unit, to_value, to_unit, category))
-                conn.commit()
+            self.db.execute_nowait('''
+                INSERT INTO conversion_history 
+                (from_value, from_unit, to_value, to_unit, category)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (from_value, from_unit, to_value, to_unit, category))
         except Exception as e:
             logger.error(f"Failed to store conversion: {e}")
     
     async def get_calculation_history(self, limit: int = 100) -> List[Dict]:
         """Get calculation history."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT * FROM calculation_history
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                ''', (limit,))
+            results = await self.db.fetchall('''
+                SELECT * FROM calculation_history
+                ORDER BY timestamp DESC
+                LIMIT ?
+            ''', (limit,))
                 
-                results = cursor.fetchall()
-                return self._format_history(results)
+            return self._format_history(results)
                 
         except Exception as e:
             logger.error(f"Failed to get calculation history: {e}")
@@ -576,7 +563,7 @@ class AdvancedCalculator:
     async def clear_history(self, history_type: str = "all") -> int:
         """Clear calculation history."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            def clear(conn):
                 cursor = conn.cursor()
                 
                 if history_type == "calculations":
@@ -587,10 +574,9 @@ class AdvancedCalculator:
                     cursor.execute('DELETE FROM calculation_history')
                     cursor.execute('DELETE FROM conversion_history')
                 
-                deleted_count = cursor.rowcount
-                conn.commit()
+                return cursor.rowcount
                 
-                return deleted_count
+            return await self.db.run_write(clear)
                 
         except Exception as e:
             logger.error(f"Failed to clear history: {e}")
@@ -607,7 +593,7 @@ class AdvancedCalculator:
     async def get_calculator_stats(self) -> Dict:
         """Get calculator usage statistics."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            def read_stats(conn):
                 cursor = conn.cursor()
                 
                 # Total calculations
@@ -634,15 +620,20 @@ class AdvancedCalculator:
                 ''')
                 conversion_stats = dict(cursor.fetchall())
                 
-                return {
-                    "total_calculations": total_calculations,
-                    "total_conversions": total_conversions,
-                    "calculations_by_mode": mode_stats,
-                    "popular_conversions": conversion_stats,
-                    "memory_value": self.memory,
-                    "current_mode": self.current_mode,
-                    "angle_mode": self.angle_mode
-                }
+                return total_calculations, total_conversions, mode_stats, conversion_stats
+            
+            total_calculations, total_conversions, mode_stats, conversion_stats = \
+                await self.db.run_read(read_stats)
+            
+            return {
+                "total_calculations": total_calculations,
+                "total_conversions": total_conversions,
+                "calculations_by_mode": mode_stats,
+                "popular_conversions": conversion_stats,
+                "memory_value": self.memory,
+                "current_mode": self.current_mode,
+                "angle_mode": self.angle_mode
+            }
                 
         except Exception as e:
             logger.error(f"Failed to get calculator stats: {e}")
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Async Database Layer for Westfall Personal Assistant feature managers
+
+SQLite work is kept off the event loop: one writer thread owns a persistent
+WAL connection and commits everything queued since its last commit as a
+single transaction (group commit), while a small pool of reader threads with
+their own persistent connections serves queries. Callers await futures that
+resolve on their own loop once the data is committed or read.
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on jobs folded into one commit, so a flood of background writes
+# cannot hold the write lock indefinitely
+MAX_GROUP_COMMIT = 256
+
+
+@dataclass
+class WriteResult:
+    """Outcome of a write statement."""
+    lastrowid: Optional[int]
+    rowcount: int
+
+
+class _WriteJob:
+    __slots__ = ('fn', 'loop', 'future')
+
+    def __init__(self, fn: Callable[[sqlite3.Connection], Any],
+                 loop: Optional[asyncio.AbstractEventLoop] = None,
+                 future: Optional[asyncio.Future] = None):
+        self.fn = fn
+        self.loop = loop
+        self.future = future
+
+
+def _resolve(future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None):
+    if future.done():  # Caller gave up (cancelled or timed out)
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    # Autocommit mode: transactions are managed explicitly by the writer
+    conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=5000')
+    return conn
+
+
+class AsyncDatabase:
+    """Awaitable SQLite access with a dedicated writer and pooled readers."""
+
+    def __init__(self, db_path: str, readers: int = 2):
+        self.db_path = db_path
+        self._queue: "queue.Queue[Optional[_WriteJob]]" = queue.Queue()
+        self._closed = False
+
+        self._writer_conn = _connect(db_path)
+        self._writer = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+        self._writer.start()
+
+        self._reader_local = threading.local()
+        self._reader_conns: List[sqlite3.Connection] = []
+        self._reader_lock = threading.Lock()
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+
+    # Writes
+
+    async def run_write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run ``fn(conn)`` on the writer thread and await its result.
+
+        ``fn`` runs inside its own savepoint, so an exception rolls back only
+        its statements; the future resolves after the group commits.
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("Database is closed")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put(_WriteJob(fn, loop, future))
+        return await future
+
+    async def execute(self, sql: str, params: Sequence = ()) -> WriteResult:
+        """Execute one write statement."""
+        def write(conn):
+            cursor = conn.execute(sql, params)
+            return WriteResult(cursor.lastrowid, cursor.rowcount)
+        return await self.run_write(write)
+
+    async def executemany(self, sql: str, seq_of_params: Iterable[Sequence]) -> WriteResult:
+        """Execute one write statement for every parameter set."""
+        seq_of_params = list(seq_of_params)
+
+        def write(conn):
+            cursor = conn.executemany(sql, seq_of_params)
+            return WriteResult(cursor.lastrowid, cursor.rowcount)
+        return await self.run_write(write)
+
+    def run_write_nowait(self, fn: Callable[[sqlite3.Connection], Any]):
+        """Queue ``fn(conn)`` for the writer without waiting for it.
+
+        Meant for history and usage records: the work joins the next group
+        commit, is ordered after every write queued before it, and failures
+        are logged rather than raised.
+        """
+        if self._closed:
+            logger.warning(f"Dropping write to closed database {self.db_path}")
+            return
+        self._queue.put(_WriteJob(fn))
+
+    def execute_nowait(self, sql: str, params: Sequence = ()):
+        """Queue one write statement without waiting for it."""
+        self.run_write_nowait(lambda conn: conn.execute(sql, params))
+
+    def _writer_loop(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            batch = [job]
+            stop = False
+            while len(batch) < MAX_GROUP_COMMIT:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                batch.append(job)
+
+            self._commit_batch(batch)
+            if stop:
+                break
+
+        self._writer_conn.close()
+
+    def _commit_batch(self, batch: List[_WriteJob]):
+        conn = self._writer_conn
+        outcomes = []
+
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for job in batch:
+                conn.execute('SAVEPOINT job')
+                try:
+                    result = job.fn(conn)
+                    conn.execute('RELEASE job')
+                    outcomes.append((result, None))
+                except Exception as e:
+                    conn.execute('ROLLBACK TO job')
+                    conn.execute('RELEASE job')
+                    outcomes.append((None, e))
+            conn.execute('COMMIT')
+        except Exception as e:
+            logger.error(f"Group commit of {len(batch)} writes to {self.db_path} failed: {e}")
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            outcomes = [(None, e)] * len(batch)
+
+        for job, (result, error) in zip(batch, outcomes):
+            if job.future is None:
+                if error is not None:
+                    logger.error(f"Background write to {self.db_path} failed: {error}")
+                continue
+            try:
+                job.loop.call_soon_threadsafe(_resolve, job.future, result, error)
+            except RuntimeError:
+                pass  # The caller's loop has already closed
+
+    # Reads
+
+    def _reader_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._reader_local, 'conn', None)
+        if conn is None:
+            conn = self._reader_local.conn = _connect(self.db_path)
+            with self._reader_lock:
+                self._reader_conns.append(conn)
+        return conn
+
+    async def run_read(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run ``fn(conn)`` on a reader thread and await its result."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Database is closed")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, lambda: fn(self._reader_conn()))
+
+    async def fetchall(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        return await self.run_read(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def fetchone(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        return await self.run_read(lambda conn: conn.execute(sql, params).fetchone())
+
+    def close(self):
+        """Flush queued writes and close every connection."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        self._readers.shutdown(wait=True)
+        with self._reader_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns.clear()
+
+
+# Shared instances, one per database file
+_databases: Dict[str, AsyncDatabase] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(db_path: str) -> AsyncDatabase:
+    """Get the shared AsyncDatabase for ``db_path``."""
+    key = os.path.abspath(db_path)
+    with _databases_lock:
+        database = _databases.get(key)
+        if database is None or database._closed:
+            database = _databases[key] = AsyncDatabase(db_path)
+        return database
+
+
+@atexit.register
+def close_all_databases():
+    """Flush and close every shared database."""
+    with _databases_lock:
+        databases = list(_databases.values())
+        _databases.clear()
+    for database in databases:
+        database.close()
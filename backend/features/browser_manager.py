@@ -18,6 +18,10 @@ from urllib.parse import urlparse, urljoin
 import mimetypes
 from pathlib import Path
 
+from .async_database import get_database
+from .download_manager import (ACTIVE_STATUSES, MAX_CONCURRENT_DOWNLOADS, PART_SUFFIX,
+                               DownloadEngine, DownloadJob, parse_checksum)
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,9 +43,14 @@ class BrowserManager:
         self.download_directory = os.path.expanduser("~/Downloads")
         self.max_history_days = 30
         self.auto_clear_downloads = True
+        self.max_concurrent_downloads = MAX_CONCURRENT_DOWNLOADS
+        self.download_bandwidth_limit = None  # Bytes per second across all downloads
         
         # Initialize database
         self._init_database()
+        self.db = get_database(self.db_path)
+        self.download_engine = DownloadEngine(self.db, self.max_concurrent_downloads,
+                                              self.download_bandwidth_limit)
     
     def _init_database(self):
         """Initialize SQLite database for browser data."""
@@ -155,6 +164,22 @@ class BrowserManager:
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_bookmarks_folder ON bookmarks(folder_path)')
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_downloads_status ON downloads(status)')
                 
+                # Checksums and resume state were added after the original
+                # schema, so older databases get the columns here
+                cursor.execute('PRAGMA table_info(downloads)')
+                columns = {row[1] for row in cursor.fetchall()}
+                if 'checksum' not in columns:
+                    cursor.execute('ALTER TABLE downloads ADD COLUMN checksum TEXT')
+                if 'resume_state' not in columns:
+                    cursor.execute('ALTER TABLE downloads ADD COLUMN resume_state TEXT')
+                
+                # Continue download numbering from earlier sessions
+                cursor.execute('''
+                    SELECT MAX(CAST(substr(download_id, 10) AS INTEGER)) FROM downloads
+                    WHERE download_id LIKE 'download_%'
+                ''')
+                self.next_download_id = (cursor.fetchone()[0] or 0) + 1
+                
                 conn.commit()
                 logger.info("Browser database initialized successfully")
                 
@@ -183,13 +208,10 @@ class BrowserManager:
             }
             
             # Save to database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO tabs (tab_id, title, url, is_active)
-                    VALUES (?, ?, ?, ?)
-                ''', (tab_id, title, url, False))
-                conn.commit()
+            await self.db.execute('''
+                INSERT INTO tabs (tab_id, title, url, is_active)
+                VALUES (?, ?, ?, ?)
+            ''', (tab_id, title, url, False))
             
             logger.info(f"Created new tab: {tab_id}")
             return tab_id
@@ -213,10 +235,7 @@ class BrowserManager:
                         self.active_tab_id = None
                 
                 # Remove from database
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('DELETE FROM tabs WHERE tab_id = ?', (tab_id,))
-                    conn.commit()
+                await self.db.execute('DELETE FROM tabs WHERE tab_id = ?', (tab_id,))
                 
                 logger.info(f"Closed tab: {tab_id}")
                 return True
@@ -240,11 +259,11 @@ class BrowserManager:
                 self.current_tabs[tab_id]["is_active"] = True
                 
                 # Update database
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('UPDATE tabs SET is_active = FALSE')
-                    cursor.execute('UPDATE tabs SET is_active = TRUE WHERE tab_id = ?', (tab_id,))
-                    conn.commit()
+                def activate(conn):
+                    conn.execute('UPDATE tabs SET is_active = FALSE')
+                    conn.execute('UPDATE tabs SET is_active = TRUE WHERE tab_id = ?', (tab_id,))
+                
+                await self.db.run_write(activate)
                 
                 return True
             
@@ -283,13 +302,10 @@ class BrowserManager:
             # Record in global history
             await self._record_history(url, "", tab_id)
             
-            # Update database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE tabs SET url = ?, updated_at = ? WHERE tab_id = ?
-                ''', (url, datetime.now().isoformat(), tab_id))
-                conn.commit()
+            # Update database; tab state rides along with the next group commit
+            self.db.execute_nowait('''
+                UPDATE tabs SET url = ?, updated_at = ? WHERE tab_id = ?
+            ''', (url, datetime.now().isoformat(), tab_id))
             
             logger.info(f"Tab {tab_id} navigated to: {url}")
             return True
@@ -311,12 +327,9 @@ class BrowserManager:
                     history[current_index]["title"] = title
                 
                 # Update database
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        UPDATE tabs SET title = ?, updated_at = ? WHERE tab_id = ?
-                    ''', (title, datetime.now().isoformat(), tab_id))
-                    conn.commit()
+                self.db.execute_nowait('''
+                    UPDATE tabs SET title = ?, updated_at = ? WHERE tab_id = ?
+                ''', (title, datetime.now().isoformat(), tab_id))
                 
                 return True
             
@@ -339,10 +352,7 @@ class BrowserManager:
                 tab["url"] = new_url
                 
                 # Update database
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('UPDATE tabs SET url = ? WHERE tab_id = ?', (new_url, tab_id))
-                    conn.commit()
+                self.db.execute_nowait('UPDATE tabs SET url = ? WHERE tab_id = ?', (new_url, tab_id))
                 
                 return True
             
@@ -365,10 +375,7 @@ class BrowserManager:
                 tab["url"] = new_url
                 
                 # Update database
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('UPDATE tabs SET url = ? WHERE tab_id = ?', (new_url, tab_id))
-                    conn.commit()
+                self.db.execute_nowait('UPDATE tabs SET url = ? WHERE tab_id = ?', (new_url, tab_id))
                 
                 return True
             
@@ -379,37 +386,38 @@ class BrowserManager:
             return False
     
     async def _record_history(self, url: str, title: str, tab_id: str) -> bool:
-        """Record page visit in browser history."""
+        """Record page visit in browser history.
+        
+        The visit is queued for the next group commit rather than awaited.
+        """
+        visit_time = datetime.now().isoformat()
+        
+        def record(conn):
+            # Check if URL was visited recently (within last hour)
+            recent_visit = conn.execute('''
+                SELECT id, visit_count FROM browse_history 
+                WHERE url = ? AND visit_time > datetime('now', '-1 hour')
+                ORDER BY visit_time DESC LIMIT 1
+            ''', (url,)).fetchone()
+            
+            if recent_visit:
+                # Update existing recent entry
+                conn.execute('''
+                    UPDATE browse_history 
+                    SET visit_count = ?, visit_time = ?, title = ?
+                    WHERE id = ?
+                ''', (recent_visit[1] + 1, visit_time, title, recent_visit[0]))
+            else:
+                # Create new history entry
+                conn.execute('''
+                    INSERT INTO browse_history (url, title, tab_id)
+                    VALUES (?, ?, ?)
+                ''', (url, title, tab_id))
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Check if URL was visited recently (within last hour)
-                cursor.execute('''
-                    SELECT id, visit_count FROM browse_history 
-                    WHERE url = ? AND visit_time > datetime('now', '-1 hour')
-                    ORDER BY visit_time DESC LIMIT 1
-                ''', (url,))
-                
-                recent_visit = cursor.fetchone()
-                
-                if recent_visit:
-                    # Update existing recent entry
-                    cursor.execute('''
-                        UPDATE browse_history 
-                        SET visit_count = ?, visit_time = ?, title = ?
-                        WHERE id = ?
-                    ''', (recent_visit[1] + 1, datetime.now().isoformat(), title, recent_visit[0]))
-                else:
-                    # Create new history entry
-                    cursor.execute('''
-                        INSERT INTO browse_history (url, title, tab_id)
-                        VALUES (?, ?, ?)
-                    ''', (url, title, tab_id))
-                
-                conn.commit()
-                return True
-                
+            self.db.run_write_nowait(record)
+            return True
+            
         except Exception as e:
             logger.error(f"Failed to record history for {url}: {e}")
             return False
@@ -420,19 +428,14 @@ class BrowserManager:
         try:
             tags_str = json.dumps(tags) if tags else "[]"
             
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO bookmarks (title, url, description, folder_path, tags)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (title, url, description, folder_path, tags_str))
-                
-                bookmark_id = cursor.lastrowid
-                conn.commit()
-                
-                logger.info(f"Added bookmark: {title}")
-                return bookmark_id
-                
+            result = await self.db.execute('''
+                INSERT INTO bookmarks (title, url, description, folder_path, tags)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (title, url, description, folder_path, tags_str))
+            
+            logger.info(f"Added bookmark: {title}")
+            return result.lastrowid
+            
         except Exception as e:
             logger.error(f"Failed to add bookmark: {e}")
             return None
@@ -440,13 +443,9 @@ class BrowserManager:
     async def remove_bookmark(self, bookmark_id: int) -> bool:
         """Remove a bookmark."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM bookmarks WHERE id = ?', (bookmark_id,))
-                conn.commit()
-                
-                return cursor.rowcount > 0
-                
+            result = await self.db.execute('DELETE FROM bookmarks WHERE id = ?', (bookmark_id,))
+            return result.rowcount > 0
+            
         except Exception as e:
             logger.error(f"Failed to remove bookmark {bookmark_id}: {e}")
             return False
@@ -454,20 +453,16 @@ class BrowserManager:
     async def get_bookmarks(self, folder_path: str = None) -> List[Dict]:
         """Get bookmarks, optionally filtered by folder."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                if folder_path is not None:
-                    cursor.execute('''
-                        SELECT * FROM bookmarks WHERE folder_path = ?
-                        ORDER BY title
-                    ''', (folder_path,))
-                else:
-                    cursor.execute('SELECT * FROM bookmarks ORDER BY folder_path, title')
-                
-                results = cursor.fetchall()
-                return self._format_bookmarks(results)
-                
+            if folder_path is not None:
+                results = await self.db.fetchall('''
+                    SELECT * FROM bookmarks WHERE folder_path = ?
+                    ORDER BY title
+                ''', (folder_path,))
+            else:
+                results = await self.db.fetchall('SELECT * FROM bookmarks ORDER BY folder_path, title')
+            
+            return self._format_bookmarks(results)
+            
         except Exception as e:
             logger.error(f"Failed to get bookmarks: {e}")
             return []
@@ -496,18 +491,15 @@ class BrowserManager:
     async def search_history(self, query: str, limit: int = 50) -> List[Dict]:
         """Search browser history."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT * FROM browse_history 
-                    WHERE url LIKE ? OR title LIKE ?
-                    ORDER BY visit_time DESC
-                    LIMIT ?
-                ''', (f'%{query}%', f'%{query}%', limit))
-                
-                results = cursor.fetchall()
-                return self._format_history(results)
-                
+            results = await self.db.fetchall('''
+                SELECT * FROM browse_history 
+                WHERE url LIKE ? OR title LIKE ?
+                ORDER BY visit_time DESC
+                LIMIT ?
+            ''', (f'%{query}%', f'%{query}%', limit))
+            
+            return self._format_history(results)
+            
         except Exception as e:
             logger.error(f"Failed to search history: {e}")
             return []
@@ -534,30 +526,33 @@ class BrowserManager:
     async def clear_history(self, days: int = None) -> int:
         """Clear browser history."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                if days:
-                    cursor.execute('''
-                        DELETE FROM browse_history 
-                        WHERE visit_time < datetime('now', '-{} days')
-                    '''.format(days))
-                else:
-                    cursor.execute('DELETE FROM browse_history')
-                
-                deleted_count = cursor.rowcount
-                conn.commit()
-                
-                logger.info(f"Cleared {deleted_count} history entries")
-                return deleted_count
-                
+            if days:
+                result = await self.db.execute('''
+                    DELETE FROM browse_history 
+                    WHERE visit_time < datetime('now', ?)
+                ''', (f'-{int(days)} days',))
+            else:
+                result = await self.db.execute('DELETE FROM browse_history')
+            
+            deleted_count = result.rowcount
+            logger.info(f"Cleared {deleted_count} history entries")
+            return deleted_count
+            
         except Exception as e:
             logger.error(f"Failed to clear history: {e}")
             return 0
     
-    async def start_download(self, url: str, filename: str = None, tab_id: str = None) -> str:
-        """Start a file download."""
+    async def start_download(self, url: str, filename: str = None, tab_id: str = None,
+                             checksum: str = None) -> str:
+        """Start a file download.
+        
+        ``checksum`` ("sha256:<hex>", or another hashlib algorithm) is
+        verified as the file streams in; without it a SHA-256 is recorded.
+        """
         try:
+            if checksum:
+                parse_checksum(checksum)
+            
             download_id = f"download_{self.next_download_id}"
             self.next_download_id += 1
             
@@ -566,10 +561,13 @@ class BrowserManager:
                 parsed_url = urlparse(url)
                 filename = os.path.basename(parsed_url.path) or "download"
             
-            # Ensure unique filename
+            # Ensure unique filename, including against transfers still in progress
+            reserved = {d["file_path"] for d in self.downloads.values()
+                        if d["status"] in ACTIVE_STATUSES + ("paused",)}
             file_path = os.path.join(self.download_directory, filename)
             counter = 1
-            while os.path.exists(file_path):
+            while (os.path.exists(file_path) or os.path.exists(file_path + PART_SUFFIX)
+                   or file_path in reserved):
                 name, ext = os.path.splitext(filename)
                 file_path = os.path.join(self.download_directory, f"{name}_{counter}{ext}")
                 counter += 1
@@ -593,14 +591,18 @@ class BrowserManager:
             self.downloads[download_id] = download_info
             
             # Save to database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO downloads 
-                    (download_id, url, filename, file_path, status, tab_id, mime_type)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (download_id, url, filename, file_path, "pending", tab_id, mime_type))
-                conn.commit()
+            await self.db.execute('''
+                INSERT INTO downloads 
+                (download_id, url, filename, file_path, status, tab_id, mime_type, checksum)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (download_id, url, filename, file_path, "pending", tab_id, mime_type, checksum))
+            
+            os.makedirs(self.download_directory, exist_ok=True)
+            if not self.download_engine.start(DownloadJob(download_id, url, file_path, download_info,
+                                                          expected_checksum=checksum)):
+                download_info["status"] = "failed"
+                await self.db.execute('UPDATE downloads SET status = ? WHERE download_id = ?',
+                                      ("failed", download_id))
             
             logger.info(f"Started download: {download_id} - {filename}")
             return download_id
@@ -609,23 +611,104 @@ class BrowserManager:
             logger.error(f"Failed to start download: {e}")
             return None
     
+    async def pause_download(self, download_id: str) -> bool:
+        """Pause a download, keeping its partial file."""
+        try:
+            return await self.download_engine.pause(download_id)
+        except Exception as e:
+            logger.error(f"Failed to pause download {download_id}: {e}")
+            return False
+    
+    async def resume_download(self, download_id: str) -> bool:
+        """Resume a paused or failed download from where it stopped."""
+        try:
+            row = await self.db.fetchone('SELECT * FROM downloads WHERE download_id = ?', (download_id,))
+            if not row or row[7] in ("completed", "cancelled"):
+                return False
+            return self._resume_from_row(row)
+        except Exception as e:
+            logger.error(f"Failed to resume download {download_id}: {e}")
+            return False
+    
+    async def resume_downloads(self) -> int:
+        """Restart downloads that were in progress when the app last stopped."""
+        try:
+            placeholders = ", ".join("?" * len(ACTIVE_STATUSES))
+            rows = await self.db.fetchall(
+                f'SELECT * FROM downloads WHERE status IN ({placeholders})', ACTIVE_STATUSES)
+            resumed = sum(1 for row in rows if self._resume_from_row(row))
+            if resumed:
+                logger.info(f"Resumed {resumed} interrupted downloads")
+            return resumed
+        except Exception as e:
+            logger.error(f"Failed to resume downloads: {e}")
+            return 0
+    
+    def _resume_from_row(self, row) -> bool:
+        if self.download_engine.is_active(row[1]):
+            return True
+        download_info = self._format_downloads([row])[0]
+        download_info["id"] = download_info.pop("download_id")
+        download_info["status"] = "pending"
+        self.downloads[download_info["id"]] = download_info
+        
+        job = DownloadJob(download_info["id"], row[2], row[4], download_info,
+                          expected_checksum=row[12])
+        job.load_resume_state(row[13])
+        return self.download_engine.start(job)
+    
+    async def cancel_download(self, download_id: str) -> bool:
+        """Cancel a download and delete its partial file."""
+        try:
+            download = self.downloads.get(download_id)
+            if download:
+                file_path = download["file_path"]
+            else:
+                row = await self.db.fetchone(
+                    'SELECT file_path FROM downloads WHERE download_id = ?', (download_id,))
+                if not row:
+                    return False
+                file_path = row[0]
+            
+            await self.download_engine.cancel(download_id, file_path)
+            if download:
+                download["status"] = "cancelled"
+            return True
+        except Exception as e:
+            logger.error(f"Failed to cancel download {download_id}: {e}")
+            return False
+    
+    def set_download_bandwidth_limit(self, bytes_per_second: Optional[int]):
+        """Cap the combined download rate; None removes the cap."""
+        self.download_bandwidth_limit = bytes_per_second
+        self.download_engine.limiter.rate = bytes_per_second
+    
+    async def close_downloads(self):
+        """Stop active downloads so they resume on the next start."""
+        await self.download_engine.close()
+    
     async def get_downloads(self, status: str = None) -> List[Dict]:
         """Get download list."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                if status:
-                    cursor.execute('''
-                        SELECT * FROM downloads WHERE status = ?
-                        ORDER BY start_time DESC
-                    ''', (status,))
-                else:
-                    cursor.execute('SELECT * FROM downloads ORDER BY start_time DESC')
-                
-                results = cursor.fetchall()
-                return self._format_downloads(results)
-                
+            if status:
+                results = await self.db.fetchall('''
+                    SELECT * FROM downloads WHERE status = ?
+                    ORDER BY start_time DESC
+                ''', (status,))
+            else:
+                results = await self.db.fetchall('SELECT * FROM downloads ORDER BY start_time DESC')
+            
+            downloads = self._format_downloads(results)
+            
+            # Active transfers are ahead of their last throttled database write
+            for download in downloads:
+                live = self.downloads.get(download["download_id"])
+                if live and self.download_engine.is_active(download["download_id"]):
+                    for key in ("status", "file_size", "downloaded_bytes", "progress"):
+                        download[key] = live.get(key, download[key])
+            
+            return downloads
+            
         except Exception as e:
             logger.error(f"Failed to get downloads: {e}")
             return []
@@ -648,6 +731,7 @@ class BrowserManager:
                 "end_time": row[9],
                 "tab_id": row[10],
                 "mime_type": row[11],
+                "checksum": row[12],
                 "progress": (row[6] / row[5] * 100) if row[5] > 0 else 0
             }
             downloads.append(download)
@@ -661,7 +745,7 @@ class BrowserManager:
     async def get_browser_stats(self) -> Dict:
         """Get browser usage statistics."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            def read_stats(conn):
                 cursor = conn.cursor()
                 
                 # Total history entries
@@ -692,15 +776,20 @@ class BrowserManager:
                 ''')
                 top_domains = cursor.fetchall()
                 
-                return {
-                    "total_tabs": len(self.current_tabs),
-                    "total_history": total_history,
-                    "total_bookmarks": total_bookmarks,
-                    "total_downloads": total_downloads,
-                    "recent_history": recent_history,
-                    "top_domains": [{"domain": d[0], "visits": d[1]} for d in top_domains]
-                }
-                
+                return total_history, total_bookmarks, total_downloads, recent_history, top_domains
+            
+            total_history, total_bookmarks, total_downloads, recent_history, top_domains = \
+                await self.db.run_read(read_stats)
+            
+            return {
+                "total_tabs": len(self.current_tabs),
+                "total_history": total_history,
+                "total_bookmarks": total_bookmarks,
+                "total_downloads": total_downloads,
+                "recent_history": recent_history,
+                "top_domains": [{"domain": d[0], "visits": d[1]} for d in top_domains]
+            }
+            
         except Exception as e:
             logger.error(f"Failed to get browser stats: {e}")
             return {}
\ No newline at end of file
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Download Engine for Westfall Personal Assistant
+
+Streams downloads into a ``.part`` file in fixed-size chunks over one shared
+aiohttp session. Interrupted transfers resume with Range requests, large
+files served with range support are split into parallel segments, and the
+checksum is computed while the data arrives. Progress lives in memory and is
+flushed to the downloads table at a throttled rate, which is also where a
+restart picks the transfer back up.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .async_database import AsyncDatabase
+
+# Optional dependencies
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the network and written to disk per step
+CHUNK_SIZE = 256 * 1024
+
+# Files smaller than this are fetched in a single stream; larger ones get one
+# segment per SEGMENT_MIN_SIZE bytes, up to MAX_SEGMENTS
+SEGMENT_MIN_SIZE = 8 * 1024 * 1024
+MAX_SEGMENTS = 4
+
+MAX_CONCURRENT_DOWNLOADS = 3
+
+# Seconds between progress writes to the database for one download
+PROGRESS_FLUSH_INTERVAL = 1.0
+
+CONNECT_TIMEOUT = 30
+READ_TIMEOUT = 60
+MAX_ATTEMPTS = 4
+RETRY_BACKOFF = 1.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+PART_SUFFIX = ".part"
+
+# Downloads in these states are restarted by resume_downloads()
+ACTIVE_STATUSES = ("pending", "downloading")
+
+UPDATE_PROGRESS_SQL = '''
+    UPDATE downloads SET downloaded_bytes = ?, file_size = ?, resume_state = ?
+    WHERE download_id = ?
+'''
+
+
+class DownloadError(Exception):
+    """A download failed in a way retrying will not fix."""
+
+
+class _RangeIgnored(Exception):
+    """The server answered a range request with the whole body."""
+
+
+def parse_checksum(checksum: str) -> Tuple[str, str]:
+    """Split ``"algorithm:hex"`` (bare hex means SHA-256) into its parts."""
+    algorithm, _, digest = checksum.rpartition(":")
+    algorithm = algorithm.lower().replace("-", "") or "sha256"
+    if algorithm not in hashlib.algorithms_available:
+        raise ValueError(f"Unsupported checksum algorithm: {algorithm}")
+    return algorithm, digest.lower()
+
+
+@dataclass
+class Segment:
+    """A byte range of the file; ``end`` is exclusive and -1 while unknown."""
+    start: int
+    end: int
+    done: int = 0
+
+    @property
+    def position(self) -> int:
+        return self.start + self.done
+
+    @property
+    def complete(self) -> bool:
+        return self.end >= 0 and self.position >= self.end
+
+
+def plan_segments(size: int, count: int) -> List[Segment]:
+    """Split ``size`` bytes into ``count`` nearly equal segments."""
+    if size <= 0 or count <= 1:
+        return [Segment(0, size if size > 0 else -1)]
+    step = -(-size // count)
+    return [Segment(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+class StreamingDigest:
+    """Hash of a file whose bytes may be written out of order.
+
+    Bytes that continue the hashed prefix are hashed as they stream in;
+    bytes written further ahead (by a later segment, or before a restart)
+    are read back from disk once the gap in front of them has closed.
+    """
+
+    def __init__(self, algorithm: str = "sha256"):
+        self.algorithm = algorithm
+        self.offset = 0
+        self._hasher = hashlib.new(algorithm)
+        self._lock = asyncio.Lock()
+
+    async def feed(self, offset: int, data: bytes):
+        """Hash ``data`` if it starts where the hashed prefix ends."""
+        if offset != self.offset:
+            return
+        async with self._lock:
+            if offset == self.offset:
+                await asyncio.get_running_loop().run_in_executor(None, self._hasher.update, data)
+                self.offset += len(data)
+
+    async def catch_up(self, path: str, contiguous_end: Callable[[], int]):
+        """Hash what is already on disk up to the end of the written prefix."""
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            while self.offset < contiguous_end():
+                self.offset += await loop.run_in_executor(
+                    None, self._hash_file_range, path, self.offset, contiguous_end())
+
+    def _hash_file_range(self, path: str, start: int, end: int) -> int:
+        with open(path, "rb") as f:
+            f.seek(start)
+            position = start
+            while position < end:
+                data = f.read(min(CHUNK_SIZE, end - position))
+                if not data:
+                    raise DownloadError(f"{path} is shorter than its recorded progress")
+                self._hasher.update(data)
+                position += len(data)
+        return position - start
+
+    def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
+
+
+class BandwidthLimiter:
+    """Token bucket shared by every transfer; ``rate`` is bytes per second."""
+
+    def __init__(self, rate: Optional[int] = None):
+        self.rate = rate
+        self._allowance = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def consume(self, amount: int):
+        if not self.rate:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            self._allowance = min(self.rate, self._allowance + (now - self._updated) * self.rate)
+            self._updated = now
+            self._allowance -= amount
+            if self._allowance < 0:
+                # Holding the lock while paying off the debt keeps callers in FIFO order
+                await asyncio.sleep(-self._allowance / self.rate)
+
+
+@dataclass
+class DownloadJob:
+    """In-memory state of one transfer."""
+    download_id: str
+    url: str
+    file_path: str
+    info: Dict  # BrowserManager's record of the download, kept current in place
+    expected_checksum: Optional[str] = None
+    total_size: int = -1
+    validator: Optional[str] = None  # Strong ETag or Last-Modified, sent as If-Range
+    segments: List[Segment] = field(default_factory=list)
+    digest: Optional[StreamingDigest] = None
+    task: Optional[asyncio.Task] = None
+    last_flush: float = 0.0
+
+    @property
+    def part_path(self) -> str:
+        return self.file_path + PART_SUFFIX
+
+    @property
+    def algorithm(self) -> str:
+        return parse_checksum(self.expected_checksum)[0] if self.expected_checksum else "sha256"
+
+    @property
+    def downloaded(self) -> int:
+        return sum(segment.done for segment in self.segments)
+
+    def contiguous_end(self) -> int:
+        """End of the prefix of the file that has been fully written."""
+        end = 0
+        for segment in self.segments:
+            end = segment.position
+            if not segment.complete:
+                break
+        return end
+
+    def resume_state(self) -> str:
+        return json.dumps({
+            "size": self.total_size,
+            "validator": self.validator,
+            "segments": [[s.start, s.end, s.done] for s in self.segments]
+        })
+
+    def load_resume_state(self, state: Optional[str]):
+        if not state:
+            return
+        data = json.loads(state)
+        self.total_size = data.get("size", -1)
+        self.validator = data.get("validator")
+        self.segments = [Segment(*segment) for segment in data.get("segments", [])]
+
+
+def _write_at(f, offset: int, data: bytes):
+    f.seek(offset)
+    f.write(data)
+    f.flush()  # Make the bytes visible to the digest's catch-up reads
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class DownloadEngine:
+    """Runs BrowserManager downloads over one shared HTTP session."""
+
+    def __init__(self, db: AsyncDatabase, max_concurrent: int = MAX_CONCURRENT_DOWNLOADS,
+                 bandwidth_limit: Optional[int] = None, max_segments: int = MAX_SEGMENTS):
+        self.db = db
+        self.max_segments = max_segments
+        self.limiter = BandwidthLimiter(bandwidth_limit)
+        self.jobs: Dict[str, DownloadJob] = {}
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=CONNECT_TIMEOUT,
+                                            sock_read=READ_TIMEOUT)
+            connector = aiohttp.TCPConnector(ttl_dns_cache=300)
+            # Byte ranges address the encoded body, so it is saved exactly as served
+            self._session = aiohttp.ClientSession(
+                timeout=timeout, connector=connector, auto_decompress=False,
+                headers={"Accept-Encoding": "identity"})
+        return self._session
+
+    def is_active(self, download_id: str) -> bool:
+        return download_id in self.jobs
+
+    def start(self, job: DownloadJob) -> bool:
+        """Queue ``job``; it starts once a concurrency slot is free."""
+        if not AIOHTTP_AVAILABLE:
+            logger.error("aiohttp is not installed; downloads are unavailable")
+            return False
+        if self.is_active(job.download_id):
+            return True
+        self.jobs[job.download_id] = job
+        job.task = asyncio.create_task(self._run(job))
+        return True
+
+    async def pause(self, download_id: str) -> bool:
+        """Stop a transfer, keeping its partial file for a later resume."""
+        job = await self._stop(download_id)
+        if job is None:
+            return False
+        await self._save(job, "paused")
+        return True
+
+    async def cancel(self, download_id: str, file_path: str):
+        """Stop a transfer if it is running and discard its partial file."""
+        await self._stop(download_id)
+        await asyncio.get_running_loop().run_in_executor(None, _remove, file_path + PART_SUFFIX)
+        await self.db.execute('''
+            UPDATE downloads SET status = 'cancelled', end_time = CURRENT_TIMESTAMP, resume_state = NULL
+            WHERE download_id = ?
+        ''', (download_id,))
+
+    async def close(self):
+        """Stop every transfer, recording where each one got to, and close the session."""
+        for download_id in list(self.jobs):
+            job = await self._stop(download_id)
+            if job is not None:
+                await self._save(job, job.info.get("status", "pending"))
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _stop(self, download_id: str) -> Optional[DownloadJob]:
+        job = self.jobs.get(download_id)
+        if job is None:
+            return None
+        job.task.cancel()
+        await asyncio.gather(job.task, return_exceptions=True)
+        return job
+
+    # Transfer
+
+    async def _run(self, job: DownloadJob):
+        try:
+            async with self._slots:
+                await self._save(job, "downloading")
+                for attempt in range(MAX_ATTEMPTS):
+                    try:
+                        await self._transfer(job)
+                        break
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        if attempt == MAX_ATTEMPTS - 1:
+                            raise
+                        delay = random.uniform(0, RETRY_BACKOFF * 2 ** attempt)
+                        logger.warning(f"Download {job.download_id} interrupted ({e}), "
+                                       f"resuming in {delay:.1f}s")
+                        self._report(job, force=True)
+                        await asyncio.sleep(delay)
+                await self._complete(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Download {job.download_id} failed: {e}")
+            await self._save(job, "failed")
+        finally:
+            self.jobs.pop(job.download_id, None)
+
+    async def _transfer(self, job: DownloadJob):
+        session = self._get_session()
+        if not job.segments:
+            await self._plan(session, job)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._prepare_part, job)
+        if job.digest is None:
+            job.digest = StreamingDigest(job.algorithm)
+        await job.digest.catch_up(job.part_path, job.contiguous_end)
+
+        try:
+            await self._fetch_segments(session, job)
+        except _RangeIgnored:
+            logger.info(f"{job.url} ignored a range request; downloading it as one stream")
+            job.segments = [Segment(0, job.total_size)]
+            job.digest = StreamingDigest(job.algorithm)
+            await self._fetch_segments(session, job)
+
+    async def _plan(self, session, job: DownloadJob):
+        """Probe size, range support and validator, then choose segments."""
+        size, ranges, validator = -1, False, None
+        try:
+            async with session.head(job.url, allow_redirects=True) as response:
+                if response.status < 400:
+                    size = response.content_length if response.content_length is not None else -1
+                    ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+                    validator = self._validator(response)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"HEAD {job.url} failed, falling back to a single stream: {e}")
+
+        job.validator = validator
+        job.total_size = size if size > 0 else -1
+        count = 1
+        if ranges and size >= SEGMENT_MIN_SIZE:
+            count = min(self.max_segments, size // SEGMENT_MIN_SIZE)
+        job.segments = plan_segments(job.total_size, count)
+
+    @staticmethod
+    def _validator(response) -> Optional[str]:
+        etag = response.headers.get("ETag")
+        if etag and not etag.startswith("W/"):  # If-Range requires a strong validator
+            return etag
+        return response.headers.get("Last-Modified")
+
+    @staticmethod
+    def _prepare_part(job: DownloadJob):
+        path = job.part_path
+        if not os.path.exists(path):
+            for segment in job.segments:
+                segment.done = 0
+            job.digest = None
+            open(path, "wb").close()
+        elif len(job.segments) == 1:
+            # A single stream writes sequentially, so the file size is its progress
+            segment = job.segments[0]
+            size = os.path.getsize(path)
+            if segment.end >= 0 and size > segment.end:
+                os.truncate(path, segment.end)
+                size = segment.end
+            segment.done = size
+            if job.digest is not None and job.digest.offset > size:
+                job.digest = None
+
+        if len(job.segments) > 1 and os.path.getsize(path) < job.total_size:
+            os.truncate(path, job.total_size)  # Sparse, so segments can write anywhere
+
+    async def _fetch_segments(self, session, job: DownloadJob):
+        tasks = [asyncio.create_task(self._fetch_segment(session, job, segment))
+                 for segment in job.segments if not segment.complete]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _fetch_segment(self, session, job: DownloadJob, segment: Segment):
+        headers = {}
+        needs_range = segment.position > 0 or segment.end != job.total_size
+        if needs_range:
+            last = "" if segment.end < 0 else str(segment.end - 1)
+            headers["Range"] = f"bytes={segment.position}-{last}"
+            if job.validator:
+                headers["If-Range"] = job.validator
+
+        loop = asyncio.get_running_loop()
+        async with session.get(job.url, headers=headers) as response:
+            if response.status >= 400:
+                if response.status in RETRY_STATUSES:
+                    response.raise_for_status()
+                raise DownloadError(f"Server returned {response.status} for {job.url}")
+
+            if needs_range and response.status != 206:
+                if len(job.segments) > 1:
+                    raise _RangeIgnored()
+                # The file changed or ranges are unsupported: start over from this body
+                segment.done = 0
+                job.digest = StreamingDigest(job.algorithm)
+                await loop.run_in_executor(None, os.truncate, job.part_path, 0)
+            elif response.status == 206:
+                self._check_content_range(response, segment)
+
+            if job.total_size < 0 and response.status == 200 and response.content_length:
+                job.total_size = segment.end = response.content_length
+            if job.validator is None:
+                job.validator = self._validator(response)
+
+            with open(job.part_path, "r+b") as f:
+                async for data in response.content.iter_chunked(CHUNK_SIZE):
+                    if segment.end >= 0:
+                        data = data[:segment.end - segment.position]
+                    offset = segment.position
+                    await loop.run_in_executor(None, _write_at, f, offset, data)
+                    segment.done += len(data)
+                    await job.digest.feed(offset, data)
+                    self._report(job)
+                    await self.limiter.consume(len(data))
+                    if segment.complete:
+                        break
+
+        if segment.end < 0:
+            # Unknown length: the stream ending is the end of the file
+            segment.end = job.total_size = segment.position
+        elif not segment.complete:
+            raise aiohttp.ClientPayloadError(
+                f"Connection closed at byte {segment.position} of {segment.end}")
+        await job.digest.catch_up(job.part_path, job.contiguous_end)
+
+    @staticmethod
+    def _check_content_range(response, segment: Segment):
+        content_range = response.headers.get("Content-Range", "")
+        try:
+            start = int(content_range.split()[1].split("-")[0])
+        except (IndexError, ValueError):
+            raise DownloadError(f"Malformed Content-Range: {content_range!r}")
+        if start != segment.position:
+            raise DownloadError(f"Asked for byte {segment.position}, server sent {start}")
+
+    async def _complete(self, job: DownloadJob):
+        await job.digest.catch_up(job.part_path, job.contiguous_end)
+        checksum = f"{job.digest.algorithm}:{job.digest.hexdigest()}"
+
+        loop = asyncio.get_running_loop()
+        if job.expected_checksum and parse_checksum(job.expected_checksum)[1] != job.digest.hexdigest():
+            # The partial file is unusable, so a retry starts from scratch
+            await loop.run_in_executor(None, _remove, job.part_path)
+            job.segments, job.digest = [], None
+            raise DownloadError(f"Checksum mismatch for {job.file_path}: got {checksum}, "
+                                f"expected {job.expected_checksum}")
+
+        await loop.run_in_executor(None, os.replace, job.part_path, job.file_path)
+        self._report(job)
+        job.info["status"] = "completed"
+        job.info["checksum"] = checksum
+        await self.db.execute('''
+            UPDATE downloads SET status = 'completed', downloaded_bytes = ?, file_size = ?,
+                end_time = CURRENT_TIMESTAMP, checksum = ?, resume_state = NULL
+            WHERE download_id = ?
+        ''', (job.downloaded, job.total_size, checksum, job.download_id))
+        logger.info(f"Completed download {job.download_id}: {job.file_path} ({checksum})")
+
+    # Progress
+
+    def _report(self, job: DownloadJob, force: bool = False):
+        """Update the in-memory record and, at most once per interval, the database."""
+        downloaded = job.downloaded
+        job.info["downloaded_bytes"] = downloaded
+        job.info["file_size"] = max(job.total_size, 0)
+        job.info["progress"] = downloaded / job.total_size * 100 if job.total_size > 0 else 0
+
+        now = time.monotonic()
+        if force or now - job.last_flush >= PROGRESS_FLUSH_INTERVAL:
+            job.last_flush = now
+            self.db.execute_nowait(UPDATE_PROGRESS_SQL, (
+                downloaded, max(job.total_size, 0), job.resume_state(), job.download_id))
+
+    async def _save(self, job: DownloadJob, status: str):
+        self._report(job)
+        job.info["status"] = status
+        await self.db.execute('''
+            UPDATE downloads SET status = ?, downloaded_bytes = ?, file_size = ?, resume_state = ?
+            WHERE download_id = ?
+        ''', (status, job.downloaded, max(job.total_size, 0), job.resume_state(), job.download_id))
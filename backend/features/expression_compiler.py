@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Expression Compiler for the Westfall Personal Assistant calculator
+
+Parses calculator input to a Python AST once, checks every node against a
+whitelist and turns the tree into nested closures, so there is no eval and
+repeated input costs a cache lookup. Compiled expressions evaluate against
+a namespace of functions and constants; the NumPy namespace makes the same
+expression run over whole arrays for sweeps, tables and plots.
+"""
+
+import ast
+import math
+import operator
+import re
+from dataclasses import dataclass
+from functools import lru_cache, reduce
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional
+
+# Optional dependencies
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+EXPRESSION_CACHE_SIZE = 512
+MAX_EXPRESSION_LENGTH = 2000
+
+# Integer results above this many bits are refused, so input like 9**9**9
+# fails fast instead of hanging the calculator
+MAX_RESULT_BITS = 1_000_000
+MAX_FACTORIAL = 10_000
+
+MAX_SWEEP_POINTS = 1_000_000
+DEFAULT_SWEEP_POINTS = 101
+
+
+class ExpressionError(ValueError):
+    """The expression is malformed or uses something that is not allowed."""
+
+
+# Guarded operations
+
+def checked_pow(base, exponent, modulo=None):
+    if modulo is not None:
+        return pow(base, exponent, modulo)
+    if (isinstance(base, int) and isinstance(exponent, int) and exponent > 0
+            and exponent * abs(base).bit_length() > MAX_RESULT_BITS):
+        raise ExpressionError("Result is too large")
+    return operator.pow(base, exponent)
+
+
+def checked_lshift(value, shift):
+    if isinstance(value, int) and isinstance(shift, int) and value.bit_length() + shift > MAX_RESULT_BITS:
+        raise ExpressionError("Result is too large")
+    return operator.lshift(value, shift)
+
+
+def checked_factorial(n):
+    if isinstance(n, float):
+        # Sweep points and results of float arithmetic arrive as floats
+        if not n.is_integer():
+            raise ValueError("factorial() only accepts integral values")
+        n = int(n)
+    if n > MAX_FACTORIAL:
+        raise ExpressionError(f"factorial() is limited to {MAX_FACTORIAL}")
+    return math.factorial(n)
+
+
+def _factorial_point(x):
+    """Elementwise factorial: nan outside its domain, like the other array functions."""
+    try:
+        return float(checked_factorial(float(x)))
+    except ValueError:
+        return math.nan
+    except OverflowError:
+        return math.inf
+
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+    ast.Pow: checked_pow, ast.BitAnd: operator.and_, ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor, ast.LShift: checked_lshift, ast.RShift: operator.rshift,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos, ast.USub: operator.neg, ast.Invert: operator.invert,
+}
+
+
+# Tokenizing and implicit multiplication
+
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<number>0[xX][0-9a-fA-F_]+|0[bB][01_]+|0[oO][0-7_]+
+                  |(?:\d[\d_]*\.?\d*|\.\d+)(?:[eE][+-]?\d+)?j?)
+      | (?P<name>[A-Za-z_]\w*)
+      | (?P<op>\*\*|//|<<|>>|[-+*/%&|^~(),\[\]])
+    )''', re.VERBOSE)
+
+# "2x3" reads as 2 * 3
+_TIMES_NAME_RE = re.compile(r'x(\d[\d.]*)$')
+
+
+def _tokenize(expression: str) -> List[tuple]:
+    tokens = []
+    position = 0
+    while position < len(expression):
+        match = _TOKEN_RE.match(expression, position)
+        if not match or match.end() == position:
+            if expression[position:].strip():
+                raise ExpressionError(f"Unexpected character: {expression[position:].strip()[0]!r}")
+            break
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+def normalize(expression: str) -> str:
+    """Spell out calculator shorthand: 2(3+4), (1+2)(3+4), 2pi and 2x3."""
+    tokens = []
+    for kind, text in _tokenize(expression):
+        if tokens:
+            previous_kind, previous_text = tokens[-1]
+            after_value = previous_kind == "number" or previous_text == ")"
+            if previous_kind == "number" and kind == "name":
+                times = _TIMES_NAME_RE.match(text)
+                if times:
+                    tokens.extend([("op", "*"), ("number", times.group(1))])
+                    continue
+            if after_value and (kind in ("name", "number") or text == "("):
+                if not (previous_kind == "number" and kind == "number"):
+                    tokens.append(("op", "*"))
+        tokens.append((kind, text))
+    return " ".join(text for _, text in tokens)
+
+
+# Compilation
+
+def _constant(value) -> Callable[[Dict], Any]:
+    fn = lambda env: value
+    fn.constant = value
+    return fn
+
+
+class _Compiler:
+    """Turns a validated AST into closures taking the evaluation namespace."""
+
+    def __init__(self):
+        self.names = set()
+        self.calls = set()
+
+    def compile(self, node, allow_sequence: bool = False) -> Callable[[Dict], Any]:
+        if isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float, complex):
+                raise ExpressionError(f"Unsupported literal: {node.value!r}")
+            return _constant(node.value)
+
+        if isinstance(node, ast.Name):
+            name = node.id
+            self.names.add(name)
+            return lambda env: env[name]
+
+        if isinstance(node, ast.BinOp):
+            op = _BINARY_OPERATORS.get(type(node.op))
+            if op is None:
+                raise ExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+            left, right = self.compile(node.left), self.compile(node.right)
+            if hasattr(left, "constant") and hasattr(right, "constant"):
+                try:
+                    return _constant(op(left.constant, right.constant))
+                except ExpressionError:
+                    raise
+                except Exception:
+                    pass  # e.g. 1/0: reported when evaluated
+            return lambda env: op(left(env), right(env))
+
+        if isinstance(node, ast.UnaryOp):
+            op = _UNARY_OPERATORS.get(type(node.op))
+            if op is None:
+                raise ExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+            operand = self.compile(node.operand)
+            if hasattr(operand, "constant"):
+                try:
+                    return _constant(op(operand.constant))
+                except Exception:
+                    pass
+            return lambda env: op(operand(env))
+
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.keywords:
+                raise ExpressionError("Only plain function calls are allowed")
+            name = node.func.id
+            self.calls.add(name)
+            args = [self.compile(arg, allow_sequence=True) for arg in node.args]
+            if len(args) == 1:
+                arg = args[0]
+                return lambda env: env[name](arg(env))
+            return lambda env: env[name](*[arg(env) for arg in args])
+
+        if allow_sequence and isinstance(node, (ast.List, ast.Tuple)):
+            items = [self.compile(item) for item in node.elts]
+            return lambda env: [item(env) for item in items]
+
+        raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    """A parsed, validated expression ready to evaluate against a namespace."""
+    source: str
+    names: FrozenSet[str]
+    calls: FrozenSet[str]
+    function: Callable[[Dict], Any]
+
+    def check(self, namespace: Dict, variables: Iterable[str] = ()):
+        """Raise ExpressionError if a name is not provided by ``namespace``."""
+        for name in self.names:
+            if name not in namespace and name not in variables:
+                raise ExpressionError(f"Unknown name: {name}")
+        for name in self.calls:
+            if not callable(namespace.get(name)):
+                raise ExpressionError(f"{name} is not a function")
+
+    def evaluate(self, namespace: Dict) -> Any:
+        return self.function(namespace)
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Parse, validate and compile ``expression``; results are cached."""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError("Expression is too long")
+    source = normalize(expression)
+    if not source:
+        raise ExpressionError("Empty expression")
+    try:
+        tree = ast.parse(source, mode="eval")
+    except (SyntaxError, RecursionError) as e:
+        raise ExpressionError(f"Invalid syntax: {getattr(e, 'msg', e)}")
+
+    compiler = _Compiler()
+    function = compiler.compile(tree.body)
+    return CompiledExpression(expression, frozenset(compiler.names), frozenset(compiler.calls), function)
+
+
+# Namespaces
+
+def _log(x, base=None):
+    return math.log(x) if base is None else math.log(x, base)
+
+
+STANDARD_FUNCTIONS = {
+    "abs": abs, "round": round, "max": max, "min": min, "sum": sum, "pow": checked_pow,
+}
+
+SCIENTIFIC_FUNCTIONS = {
+    **STANDARD_FUNCTIONS,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan,
+    "sinh": math.sinh, "cosh": math.cosh, "tanh": math.tanh,
+    "log": _log, "log10": math.log10, "log2": math.log2,
+    "exp": math.exp, "sqrt": math.sqrt, "factorial": checked_factorial,
+    "degrees": math.degrees, "radians": math.radians,
+    "floor": math.floor, "ceil": math.ceil,
+}
+
+PROGRAMMER_FUNCTIONS = {
+    "abs": abs, "pow": checked_pow,
+    "xor": operator.xor, "lshift": checked_lshift, "rshift": operator.rshift,
+}
+
+MODE_FUNCTIONS = {
+    "standard": STANDARD_FUNCTIONS,
+    "scientific": SCIENTIFIC_FUNCTIONS,
+    "programmer": PROGRAMMER_FUNCTIONS,
+}
+
+_TRIG_FUNCTIONS = ("sin", "cos", "tan")
+
+
+def _numpy_functions() -> Dict[str, Callable]:
+    """Array counterparts of the scalar functions, elementwise where it matters."""
+    def reducing(ufunc):
+        def apply(*args):
+            if len(args) == 1:
+                args = args[0]
+                if not isinstance(args, (list, tuple)):
+                    return ufunc.reduce(np.ravel(args))
+            return reduce(ufunc, args)
+        return apply
+
+    def log(x, base=None):
+        return np.log(x) if base is None else np.log(x) / np.log(base)
+
+    return {
+        "abs": np.abs, "round": np.round, "max": reducing(np.maximum),
+        "min": reducing(np.minimum), "sum": reducing(np.add), "pow": np.power,
+        "sin": np.sin, "cos": np.cos, "tan": np.tan,
+        "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan,
+        "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+        "log": log, "log10": np.log10, "log2": np.log2,
+        "exp": np.exp, "sqrt": np.sqrt,
+        "factorial": np.vectorize(_factorial_point, otypes=[float]),
+        "degrees": np.degrees, "radians": np.radians,
+        "floor": np.floor, "ceil": np.ceil,
+        "xor": np.bitwise_xor, "lshift": np.left_shift, "rshift": np.right_shift,
+    }
+
+
+def build_namespace(mode: str, angle_mode: str = "radians", constants: Optional[Dict] = None,
+                    vectorized: bool = False) -> Dict[str, Any]:
+    """Functions and constants available to expressions in ``mode``."""
+    functions = dict(MODE_FUNCTIONS.get(mode, STANDARD_FUNCTIONS))
+    if vectorized and NUMPY_AVAILABLE:
+        array_functions = _numpy_functions()
+        functions = {name: array_functions.get(name, fn) for name, fn in functions.items()}
+
+    if angle_mode == "degrees":
+        # Trig functions take degrees; their inverses still return radians
+        for name in _TRIG_FUNCTIONS:
+            if name in functions:
+                fn, to_radians = functions[name], functions.get("radians", math.radians)
+                functions[name] = lambda value, fn=fn, to_radians=to_radians: fn(to_radians(value))
+
+    return {**(constants or {}), **functions}
+
+
+# Sweeps
+
+_SWEEP_RE = re.compile(r'''
+    ^\s*(?P<expression>.+?)
+    \s+for\s+(?P<variable>[A-Za-z_]\w*)
+    \s+in\s+(?P<start>.+?)\s*\.\.\s*(?P<stop>.+?)
+    (?:\s+step\s+(?P<step>.+?))?\s*$''', re.VERBOSE)
+
+
+@dataclass(frozen=True)
+class Sweep:
+    """``expression for variable in start..stop [step step]``; bounds are expressions."""
+    expression: str
+    variable: str
+    start: str
+    stop: str
+    step: Optional[str] = None
+
+
+def parse_sweep(text: str) -> Optional[Sweep]:
+    match = _SWEEP_RE.match(text)
+    if not match:
+        return None
+    return Sweep(**match.groupdict())
+
+
+def sweep_points(start: float, stop: float, step: Optional[float] = None):
+    """Points from ``start`` to ``stop`` inclusive, as an array when NumPy is available."""
+    if step is None:
+        count = DEFAULT_SWEEP_POINTS
+        step = (stop - start) / (count - 1)
+    else:
+        if step == 0 or (stop - start) / step < 0:
+            raise ExpressionError("Step must move from start towards stop")
+        # The small tolerance keeps stop itself despite float rounding
+        count = math.floor((stop - start) / step + 1e-9) + 1
+    if count > MAX_SWEEP_POINTS:
+        raise ExpressionError(f"Sweeps are limited to {MAX_SWEEP_POINTS:,} points")
+
+    if NUMPY_AVAILABLE:
+        return start + np.arange(count) * step
+    return [start + i * step for i in range(count)]
+
+
+def evaluate_many(compiled: CompiledExpression, namespace: Dict, variable: str, values):
+    """Evaluate ``compiled`` at every value of ``variable``.
+
+    With NumPy the whole array goes through one evaluation using an array
+    namespace from build_namespace(..., vectorized=True); points that are
+    out of domain become nan either way.
+    """
+    compiled.check(namespace, (variable,))
+    if NUMPY_AVAILABLE:
+        values = np.asarray(values, dtype=float)
+        with np.errstate(all="ignore"):
+            result = compiled.evaluate({**namespace, variable: values})
+        return np.broadcast_to(np.asarray(result, dtype=float), values.shape)
+
+    env = dict(namespace)
+    results = []
+    for value in values:
+        env[variable] = value
+        try:
+            results.append(compiled.evaluate(env))
+        except (ArithmeticError, ValueError):
+            results.append(float("nan"))
+    return results
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Music Library Indexer for Westfall Personal Assistant
+
+Walks a music folder once with os.scandir, skips files whose size and mtime
+already match the library, reads tags for the rest in a process pool and
+upserts them in batched transactions. Tracks whose files are gone are removed.
+Watch mode re-indexes only files that changed, using watchdog events when
+available and cheap rescans otherwise.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .async_database import AsyncDatabase
+from .navigation_system import NavigationManager
+
+# Optional dependencies
+try:
+    from mutagen import File as MutagenFile
+    MUTAGEN_AVAILABLE = True
+except ImportError:
+    MUTAGEN_AVAILABLE = False
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Files per tag-extraction task and per write transaction
+BATCH_SIZE = 200
+
+# Below this many changed files a process pool costs more than it saves
+PARALLEL_MIN_FILES = 64
+
+UPSERT_TRACK_SQL = '''
+    INSERT INTO tracks
+    (file_path, title, artist, album, genre, duration, track_number,
+     year, file_size, bitrate, sample_rate, file_mtime)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(file_path) DO UPDATE SET
+        title = excluded.title, artist = excluded.artist, album = excluded.album,
+        genre = excluded.genre, duration = excluded.duration,
+        track_number = excluded.track_number, year = excluded.year,
+        file_size = excluded.file_size, bitrate = excluded.bitrate,
+        sample_rate = excluded.sample_rate, file_mtime = excluded.file_mtime
+'''
+
+PLAYLIST_STATS_SQL = '''
+    UPDATE playlists 
+    SET track_count = (
+        SELECT COUNT(*) FROM playlist_tracks WHERE playlist_id = ?
+    ),
+    total_duration = (
+        SELECT COALESCE(SUM(t.duration), 0) 
+        FROM playlist_tracks pt
+        JOIN tracks t ON pt.track_id = t.id
+        WHERE pt.playlist_id = ?
+    ),
+    updated_at = ?
+    WHERE id = ?
+'''
+
+FileStat = Tuple[str, int, float]  # (path, size, mtime)
+
+
+def _placeholders(values: List) -> str:
+    return ",".join("?" * len(values))
+
+
+def iter_audio_files(root: str, extensions: Iterable[str], recursive: bool = True) -> Iterator[FileStat]:
+    """Yield (path, size, mtime) for audio files under ``root`` in one walk."""
+    extensions = {e.lower() for e in extensions}
+    stack = [root]
+
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                stack.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in extensions:
+                            stat = entry.stat()
+                            # Linked files are stored by their target, as single adds always were
+                            path = os.path.realpath(entry.path) if entry.is_symlink() else entry.path
+                            yield path, stat.st_size, stat.st_mtime
+                    except OSError as e:
+                        logger.debug(f"Skipping {entry.path}: {e}")
+        except OSError as e:
+            logger.warning(f"Cannot read directory {directory}: {e}")
+
+
+def _get_tag_value(tags, tag_keys: list) -> str:
+    """Get tag value from multiple possible keys."""
+    for key in tag_keys:
+        if key in tags:
+            value = tags[key]
+            if isinstance(value, list) and value:
+                return str(value[0])
+            return str(value)
+    return ""
+
+
+def extract_metadata(file_path: str) -> Dict:
+    """Read an audio file's tags and stream info; the unit of work for pool workers."""
+    metadata = {}
+    if not MUTAGEN_AVAILABLE:
+        metadata["duration"] = 0.0
+        metadata["title"] = Path(file_path).stem
+        return metadata
+
+    try:
+        audio_file = MutagenFile(file_path)
+
+        if audio_file is not None:
+            info = getattr(audio_file, "info", None)
+            metadata["duration"] = getattr(info, "length", 0.0) or 0.0
+            metadata["bitrate"] = getattr(info, "bitrate", 0) or 0
+            metadata["sample_rate"] = getattr(info, "sample_rate", 0) or 0
+
+            # Extract tags
+            if audio_file.tags:
+                tags = audio_file.tags
+                metadata["title"] = _get_tag_value(tags, ["TIT2", "TITLE", "\xa9nam"])
+                metadata["artist"] = _get_tag_value(tags, ["TPE1", "ARTIST", "\xa9ART"])
+                metadata["album"] = _get_tag_value(tags, ["TALB", "ALBUM", "\xa9alb"])
+                metadata["genre"] = _get_tag_value(tags, ["TCON", "GENRE", "\xa9gen"])
+                metadata["year"] = _get_tag_value(tags, ["TDRC", "DATE", "\xa9day"])
+                metadata["track_number"] = _get_tag_value(tags, ["TRCK", "TRACKNUMBER", "trkn"])
+
+    except Exception as e:
+        logger.error(f"Failed to extract metadata from {file_path}: {e}")
+
+    return metadata
+
+
+def build_track_rows(files: List[FileStat]) -> List[tuple]:
+    """Extract metadata for a batch of files and build upsert rows."""
+    rows = []
+    for path, size, mtime in files:
+        metadata = extract_metadata(path)
+        rows.append((
+            path,
+            metadata.get("title") or Path(path).stem,
+            metadata.get("artist") or "Unknown Artist",
+            metadata.get("album") or "Unknown Album",
+            metadata.get("genre") or "Unknown",
+            metadata.get("duration", 0.0),
+            metadata.get("track_number", 0),
+            metadata.get("year", 0),
+            size,
+            metadata.get("bitrate", 0),
+            metadata.get("sample_rate", 0),
+            mtime
+        ))
+    return rows
+
+
+class LibraryIndexer:
+    """Incremental, parallel indexer for the music library tracks table."""
+
+    def __init__(self, db: AsyncDatabase, extensions: Iterable[str], max_workers: Optional[int] = None,
+                 search_index: Optional[NavigationManager] = None):
+        self.db = db
+        self.extensions = list(extensions)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.search_index = search_index
+        self._watch_task: Optional[asyncio.Task] = None
+
+    async def scan(self, directory: str, recursive: bool = True) -> Dict[str, int]:
+        """Index new and changed files under ``directory`` and drop tracks whose files are gone."""
+        root = os.path.realpath(os.path.expanduser(directory))
+        stats = {"files": 0, "added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        if not os.path.isdir(root):
+            logger.error(f"Directory does not exist: {directory}")
+            return stats
+
+        loop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(
+            None, lambda: list(iter_audio_files(root, self.extensions, recursive)))
+        known = await self._known_files(root, [path for path, _, _ in files])
+        stats["files"] = len(files)
+
+        changed = []
+        for path, size, mtime in files:
+            previous = known.get(path)
+            if previous is None:
+                stats["added"] += 1
+            elif previous != (size, mtime):
+                stats["updated"] += 1
+            else:
+                stats["unchanged"] += 1
+                continue
+            changed.append((path, size, mtime))
+
+        # Rows the walk didn't reach may sit in subdirectories of a non-recursive scan
+        seen = {path for path, _, _ in files}
+        gone = [path for path in known if path not in seen and not os.path.exists(path)]
+        stats["removed"] = await self.remove_files(gone)
+
+        await self.index_files(changed)
+        logger.info(f"Scanned {stats['files']} files in {directory}: {stats['added']} added, "
+                    f"{stats['updated']} updated, {stats['unchanged']} unchanged, "
+                    f"{stats['removed']} removed")
+        return stats
+
+    async def index_files(self, files: List[FileStat]):
+        """Extract tags for ``files`` and upsert them batch by batch."""
+        if not files:
+            return
+
+        batches = [files[i:i + BATCH_SIZE] for i in range(0, len(files), BATCH_SIZE)]
+        loop = asyncio.get_running_loop()
+
+        if len(files) < PARALLEL_MIN_FILES or self.max_workers == 1:
+            for batch in batches:
+                rows = await loop.run_in_executor(None, build_track_rows, batch)
+                await self._write_rows(rows)
+            return
+
+        # Spawned workers: forking a process that runs the db and event loop threads is unsafe
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(batches)),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            pending = [loop.run_in_executor(pool, build_track_rows, batch) for batch in batches]
+            for next_rows in asyncio.as_completed(pending):
+                await self._write_rows(await next_rows)
+
+    async def _write_rows(self, rows: List[tuple]):
+        await self.db.executemany(UPSERT_TRACK_SQL, rows)
+        if self.search_index is None:
+            return
+
+        paths = [row[0] for row in rows]
+        tracks = await self.db.fetchall(
+            f"SELECT id, title, artist, album, genre FROM tracks "
+            f"WHERE file_path IN ({','.join('?' * len(paths))})", paths)
+        await self.search_index.index_items({
+            "id": track_id,
+            "type": "track",
+            "title": title,
+            "description": f"{artist} - {album}",
+            "keywords": [artist, album, genre],
+            "metadata": {"track_id": track_id}
+        } for track_id, title, artist, album, genre in tracks)
+
+    async def remove_files(self, paths: List[str]) -> int:
+        """Delete the tracks for ``paths``, their playlist entries and search items."""
+        removed = []
+        for i in range(0, len(paths), BATCH_SIZE):
+            batch = paths[i:i + BATCH_SIZE]
+
+            def remove(conn):
+                ids = [row[0] for row in conn.execute(
+                    f"SELECT id FROM tracks WHERE file_path IN ({_placeholders(batch)})", batch)]
+                if not ids:
+                    return ids
+                in_ids = f"IN ({_placeholders(ids)})"
+                playlists = [row[0] for row in conn.execute(
+                    f"SELECT DISTINCT playlist_id FROM playlist_tracks WHERE track_id {in_ids}", ids)]
+                conn.execute(f"DELETE FROM playlist_tracks WHERE track_id {in_ids}", ids)
+                conn.execute(f"DELETE FROM tracks WHERE id {in_ids}", ids)
+                now = datetime.now().isoformat()
+                conn.executemany(PLAYLIST_STATS_SQL, [(pid, pid, now, pid) for pid in playlists])
+                return ids
+
+            removed.extend(await self.db.run_write(remove))
+
+        if removed and self.search_index is not None:
+            await self.search_index.remove_items("track", removed)
+        return len(removed)
+
+    async def _known_files(self, root: str, paths: List[str]) -> Dict[str, Tuple[int, float]]:
+        """Library rows under ``root``, plus those for ``paths`` that resolved outside it."""
+        prefix = root.rstrip(os.sep) + os.sep
+        rows = await self.db.fetchall(
+            "SELECT file_path, file_size, file_mtime FROM tracks WHERE substr(file_path, 1, ?) = ?",
+            (len(prefix), prefix))
+        outside = [path for path in paths if not path.startswith(prefix)]
+        for i in range(0, len(outside), BATCH_SIZE):
+            batch = outside[i:i + BATCH_SIZE]
+            rows += await self.db.fetchall(
+                f"SELECT file_path, file_size, file_mtime FROM tracks "
+                f"WHERE file_path IN ({_placeholders(batch)})", batch)
+        return {path: (size, mtime) for path, size, mtime in rows}
+
+    # Watch mode
+
+    def start_watching(self, directory: str, interval: float = 30.0, recursive: bool = True):
+        """Keep the library in sync with ``directory`` until stop_watching()."""
+        self.stop_watching()
+        self._watch_task = asyncio.create_task(self._watch(directory, interval, recursive))
+
+    def stop_watching(self):
+        if self._watch_task:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def _watch(self, directory: str, interval: float, recursive: bool):
+        root = os.path.realpath(os.path.expanduser(directory))
+        if not WATCHDOG_AVAILABLE:
+            # Rescans only stat files, so polling stays cheap
+            while True:
+                await asyncio.sleep(interval)
+                await self.scan(root, recursive)
+
+        changed: Set[str] = set()
+        extensions = {e.lower() for e in self.extensions}
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                for path in (event.src_path, getattr(event, "dest_path", None)):
+                    if path and os.path.splitext(path)[1].lower() in extensions:
+                        changed.add(path)
+
+        observer = Observer()
+        observer.schedule(_Handler(), root, recursive=recursive)
+        observer.start()
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                if not changed:
+                    continue
+                paths = list(changed)
+                changed.difference_update(paths)
+                await self.sync_paths(paths)
+        finally:
+            observer.stop()
+            observer.join()
+
+    async def sync_paths(self, paths: List[str]):
+        """Bring the tracks for changed ``paths`` up to date: re-index or remove each."""
+        files, missing = [], []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                missing.append(os.path.realpath(path))  # Deleted, or the source of a move
+                continue
+            files.append((os.path.realpath(path), stat.st_size, stat.st_mtime))
+        await self.remove_files(missing)
+        await self.index_files(files)
@@ -18,13 +18,18 @@ from typing import Dict, List, Optional, Any, Callable
 from pathlib import Path
 import mimetypes
 
+from .async_database import get_database
+from .music_library import PLAYLIST_STATS_SQL, LibraryIndexer, extract_metadata
+from .navigation_system import NavigationManager
+
 logger = logging.getLogger(__name__)
 
 
 class MusicPlayer:
     """Advanced music player with playlist management and format support."""
     
-    def __init__(self, config_dir: str = None, db_path: str = None):
+    def __init__(self, config_dir: str = None, db_path: str = None,
+                 search_index: Optional[NavigationManager] = None):
         self.config_dir = config_dir or "~/.westfall_assistant"
         self.db_path = db_path or f"{self.config_dir}/music.db"
         
@@ -52,6 +57,8 @@ class MusicPlayer:
         
         # Initialize components
         self._init_database()
+        self.db = get_database(self.db_path)
+        self.library = LibraryIndexer(self.db, self.supported_formats, search_index=search_index)
         self._init_audio_engine()
     
     def _init_database(self):
@@ -121,6 +128,12 @@ class MusicPlayer:
                     )
                 ''')
                 
+                # mtime lets rescans skip unchanged files; added after the
+                # original schema, so older databases get the column here
+                cursor.execute('PRAGMA table_info(tracks)')
+                if 'file_mtime' not in {row[1] for row in cursor.fetchall()}:
+                    cursor.execute('ALTER TABLE tracks ADD COLUMN file_mtime REAL')
+                
                 conn.commit()
                 logger.info("Music database initialized successfully")
                 
@@ -166,37 +179,26 @@ class MusicPlayer:
         self.audio_engine_type = "none"
     
     async def scan_music_directory(self, directory: str, recursive: bool = True) -> int:
-        """Scan directory for music files and add them to library."""
-        added_count = 0
+        """Scan directory for music files and add them to library.
         
+        Only new or changed files (by size and mtime) are read; returns the
+        number of newly added tracks.
+        """
         try:
-            directory_path = Path(directory).expanduser()
-            if not directory_path.exists():
-                logger.error(f"Directory does not exist: {directory}")
-                return 0
-            
-            # Get all music files
-            music_files = []
-            if recursive:
-                for ext in self.supported_formats:
-                    music_files.extend(directory_path.rglob(f"*{ext}"))
-            else:
-                for ext in self.supported_formats:
-                    music_files.extend(directory_path.glob(f"*{ext}"))
-            
-            logger.info(f"Found {len(music_files)} music files in {directory}")
-            
-            # Process each file
-            for file_path in music_files:
-                if await self._add_track_to_library(str(file_path)):
-                    added_count += 1
-            
-            logger.info(f"Added {added_count} new tracks to library")
+            stats = await self.library.scan(directory, recursive)
+            logger.info(f"Added {stats['added']} new tracks to library")
+            return stats["added"]
             
         except Exception as e:
             logger.error(f"Failed to scan music directory: {e}")
-        
-        return added_count
+            return 0
+    
+    def watch_music_directory(self, directory: str, interval: float = 30.0, recursive: bool = True):
+        """Keep the library in sync with a directory, indexing only changed files."""
+        self.library.start_watching(directory, interval, recursive)
+    
+    def stop_watching_music_directory(self):
+        self.library.stop_watching()
     
     async def _add_track_to_library(self, file_path: str) -> bool:
         """Add a single track to the music library."""
@@ -204,38 +206,11 @@ class MusicPlayer:
             file_path = Path(file_path).resolve()
             
             # Check if file already exists
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT id FROM tracks WHERE file_path = ?', (str(file_path),))
-                if cursor.fetchone():
-                    return False  # Already exists
-            
-            # Extract metadata
-            metadata = await self._extract_metadata(file_path)
-            
-            # Insert into database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO tracks 
-                    (file_path, title, artist, album, genre, duration, track_number, 
-                     year, file_size, bitrate, sample_rate)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    str(file_path),
-                    metadata.get("title", file_path.stem),
-                    metadata.get("artist", "Unknown Artist"),
-                    metadata.get("album", "Unknown Album"),
-                    metadata.get("genre", "Unknown"),
-                    metadata.get("duration", 0.0),
-                    metadata.get("track_number", 0),
-                    metadata.get("year", 0),
-                    file_path.stat().st_size,
-                    metadata.get("bitrate", 0),
-                    metadata.get("sample_rate", 0)
-                ))
-                conn.commit()
+            if await self.db.fetchone('SELECT id FROM tracks WHERE file_path = ?', (str(file_path),)):
+                return False  # Already exists
             
+            stat = file_path.stat()
+            await self.library.index_files([(str(file_path), stat.st_size, stat.st_mtime)])
             return True
             
         except Exception as e:
@@ -243,49 +218,9 @@ class MusicPlayer:
             return False
     
     async def _extract_metadata(self, file_path: Path) -> Dict:
-        """Extract metadata from audio file."""
-        metadata = {}
-        
-        try:
-            # Try mutagen first (best metadata support)
-            try:
-                from mutagen import File
-                audio_file = File(str(file_path))
-                
-                if audio_file is not None:
-                    metadata["duration"] = getattr(audio_file, "info", {}).length or 0.0
-                    metadata["bitrate"] = getattr(audio_file, "info", {}).bitrate or 0
-                    metadata["sample_rate"] = getattr(audio_file, "info", {}).sample_rate or 0
-                    
-                    # Extract tags
-                    if audio_file.tags:
-                        metadata["title"] = self._get_tag_value(audio_file.tags, ["TIT2", "TITLE", "\xa9nam"])
-                        metadata["artist"] = self._get_tag_value(audio_file.tags, ["TPE1", "ARTIST", "\xa9ART"])
-                        metadata["album"] = self._get_tag_value(audio_file.tags, ["TALB", "ALBUM", "\xa9alb"])
-                        metadata["genre"] = self._get_tag_value(audio_file.tags, ["TCON", "GENRE", "\xa9gen"])
-                        metadata["year"] = self._get_tag_value(audio_file.tags, ["TDRC", "DATE", "\xa9day"])
-                        metadata["track_number"] = self._get_tag_value(audio_file.tags, ["TRCK", "TRACKNUMBER", "trkn"])
-            
-            except ImportError:
-                logger.warning("mutagen not available for metadata extraction")
-                # Fallback to basic file info
-                metadata["duration"] = 0.0
-                metadata["title"] = file_path.stem
-                
-        except Exception as e:
-            logger.error(f"Failed to extract metadata from {file_path}: {e}")
-        
-        return metadata
-    
-    def _get_tag_value(self, tags: dict, tag_keys: list) -> str:
-        """Get tag value from multiple possible keys."""
-        for key in tag_keys:
-            if key in tags:
-                value = tags[key]
-                if isinstance(value, list) and value:
-                    return str(value[0])
-                return str(value)
-        return ""
+        """Extract metadata from audio file without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, extract_metadata, str(file_path))
     
     async def play_track(self, track_id: int) -> bool:
         """Play a specific track."""
@@ -436,15 +371,12 @@ class MusicPlayer:
     async def get_track(self, track_id: int) -> Optional[Dict]:
         """Get track information."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT * FROM tracks WHERE id = ?', (track_id,))
-                row = cursor.fetchone()
-                
-                if row:
-                    return self._format_track(row)
-                return None
-                
+            row = await self.db.fetchone('SELECT * FROM tracks WHERE id = ?', (track_id,))
+            
+            if row:
+                return self._format_track(row)
+            return None
+            
         except Exception as e:
             logger.error(f"Failed to get track {track_id}: {e}")
             return None
@@ -454,37 +386,33 @@ class MusicPlayer:
                         artist: str = None, album: str = None) -> List[Dict]:
         """Get tracks with optional filtering."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                query = 'SELECT * FROM tracks WHERE 1=1'
-                params = []
-                
-                if search:
-                    query += ' AND (title LIKE ? OR artist LIKE ? OR album LIKE ?)'
-                    search_param = f'%{search}%'
-                    params.extend([search_param, search_param, search_param])
-                
-                if genre:
-                    query += ' AND genre = ?'
-                    params.append(genre)
-                
-                if artist:
-                    query += ' AND artist = ?'
-                    params.append(artist)
-                
-                if album:
-                    query += ' AND album = ?'
-                    params.append(album)
-                
-                query += ' ORDER BY artist, album, track_number LIMIT ? OFFSET ?'
-                params.extend([limit, offset])
-                
-                cursor.execute(query, params)
-                results = cursor.fetchall()
-                
-                return [self._format_track(row) for row in results]
-                
+            query = 'SELECT * FROM tracks WHERE 1=1'
+            params = []
+            
+            if search:
+                query += ' AND (title LIKE ? OR artist LIKE ? OR album LIKE ?)'
+                search_param = f'%{search}%'
+                params.extend([search_param, search_param, search_param])
+            
+            if genre:
+                query += ' AND genre = ?'
+                params.append(genre)
+            
+            if artist:
+                query += ' AND artist = ?'
+                params.append(artist)
+            
+            if album:
+                query += ' AND album = ?'
+                params.append(album)
+            
+            query += ' ORDER BY artist, album, track_number LIMIT ? OFFSET ?'
+            params.extend([limit, offset])
+            
+            results = await self.db.fetchall(query, params)
+            
+            return [self._format_track(row) for row in results]
+            
         except Exception as e:
             logger.error(f"Failed to get tracks: {e}")
             return []
@@ -513,15 +441,12 @@ class MusicPlayer:
     async def create_playlist(self, name: str, description: str = "") -> Optional[int]:
         """Create a new playlist."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO playlists (name, description)
-                    VALUES (?, ?)
-                ''', (name, description))
-                conn.commit()
-                return cursor.lastrowid
-                
+            result = await self.db.execute('''
+                INSERT INTO playlists (name, description)
+                VALUES (?, ?)
+            ''', (name, description))
+            return result.lastrowid
+            
         except Exception as e:
             logger.error(f"Failed to create playlist {name}: {e}")
             return None
@@ -529,28 +454,26 @@ class MusicPlayer:
     async def add_track_to_playlist(self, playlist_id: int, track_id: int) -> bool:
         """Add track to playlist."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
+            def add_track(conn):
                 # Get next position
-                cursor.execute(
+                position = conn.execute(
                     'SELECT COALESCE(MAX(position), 0) + 1 FROM playlist_tracks WHERE playlist_id = ?',
                     (playlist_id,)
-                )
-                position = cursor.fetchone()[0]
+                ).fetchone()[0]
                 
                 # Add track
-                cursor.execute('''
+                conn.execute('''
                     INSERT OR REPLACE INTO playlist_tracks (playlist_id, track_id, position)
                     VALUES (?, ?, ?)
                 ''', (playlist_id, track_id, position))
                 
-                # Update playlist stats
-                await self._update_playlist_stats(playlist_id)
-                
-                conn.commit()
-                return True
-                
+                # Update playlist stats in the same transaction
+                conn.execute(PLAYLIST_STATS_SQL,
+                             (playlist_id, playlist_id, datetime.now().isoformat(), playlist_id))
+            
+            await self.db.run_write(add_track)
+            return True
+            
         except Exception as e:
             logger.error(f"Failed to add track to playlist: {e}")
             return False
@@ -558,37 +481,20 @@ class MusicPlayer:
     async def _update_play_stats(self, track_id: int):
         """Update play statistics for a track."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE tracks 
-                    SET play_count = play_count + 1, last_played = ?
-                    WHERE id = ?
-                ''', (datetime.now().isoformat(), track_id))
-                conn.commit()
+            # Usage record: rides along with the next group commit
+            self.db.execute_nowait('''
+                UPDATE tracks 
+                SET play_count = play_count + 1, last_played = ?
+                WHERE id = ?
+            ''', (datetime.now().isoformat(), track_id))
         except Exception as e:
             logger.error(f"Failed to update play stats: {e}")
     
     async def _update_playlist_stats(self, playlist_id: int):
         """Update playlist statistics."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE playlists 
-                    SET track_count = (
-                        SELECT COUNT(*) FROM playlist_tracks WHERE playlist_id = ?
-                    ),
-                    total_duration = (
-                        SELECT COALESCE(SUM(t.duration), 0) 
-                        FROM playlist_tracks pt
-                        JOIN tracks t ON pt.track_id = t.id
-                        WHERE pt.playlist_id = ?
-                    ),
-                    updated_at = ?
-                    WHERE id = ?
-                ''', (playlist_id, playlist_id, datetime.now().isoformat(), playlist_id))
-                conn.commit()
+            await self.db.execute(PLAYLIST_STATS_SQL,
+                                  (playlist_id, playlist_id, datetime.now().isoformat(), playlist_id))
         except Exception as e:
             logger.error(f"Failed to update playlist stats: {e}")
     
@@ -4,18 +4,79 @@ Navigation System for Westfall Personal Assistant
 
 Provides navigation management, breadcrumb trails, command palette,
 and global search functionality.
+
+Global search runs on an FTS5 index over the search_index table. Modules
+upsert their own items incrementally; queries match word prefixes, fall back
+to close spellings from the index vocabulary, and rank BM25 relevance
+boosted by how often each item is used.
 """
 
 import asyncio
+import bisect
+import difflib
 import logging
 import json
+import math
 import sqlite3
+import unicodedata
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any
 import re
 
+from .async_database import get_database
+
 logger = logging.getLogger(__name__)
 
+# Content other modules index: item_type -> (module, default action)
+CONTENT_TYPES = {
+    "conversation": ("ai_chat", "open_conversation"),
+    "task": ("dashboard", "open_task"),
+    "note": ("dashboard", "open_note"),
+    "client": ("dashboard", "open_client"),
+    "invoice": ("dashboard", "open_invoice"),
+    "article": ("news", "open_article"),
+    "track": ("music", "play_track"),
+}
+
+UPSERT_SEARCH_ITEM_SQL = '''
+    INSERT INTO search_index
+    (item_id, item_type, title, description, keywords, module, action, metadata, search_weight)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(item_type, item_id) DO UPDATE SET
+        title = excluded.title, description = excluded.description,
+        keywords = excluded.keywords, module = excluded.module, action = excluded.action,
+        metadata = excluded.metadata, search_weight = excluded.search_weight,
+        updated_at = CURRENT_TIMESTAMP
+'''
+
+# BM25 column weights for title, description, keywords
+BM25_WEIGHTS = (10.0, 2.0, 5.0)
+
+# Ranking multipliers on log(1 + n) of an item's static weight and usage count
+WEIGHT_BOOST = 0.25
+USAGE_BOOST = 0.5
+
+# Candidates fetched by BM25 per requested result before usage re-ranking
+CANDIDATE_FACTOR = 4
+
+# Fuzzy matching: minimum term length, similarity cutoff and alternatives per term
+FUZZY_MIN_LENGTH = 3
+FUZZY_CUTOFF = 0.75
+FUZZY_ALTERNATIVES = 5
+
+# A lone term shorter than this only matches the start of a title; as a bare
+# prefix it would match (and rank) nearly every row
+SHORT_QUERY_LENGTH = 2
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into terms the way the unicode61 tokenizer does."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _TOKEN_RE.findall(text)
+
 
 class NavigationManager:
     """Navigation system with breadcrumbs, history, and search."""
@@ -80,9 +141,14 @@ class NavigationManager:
         
         # Initialize database
         self._init_database()
+        self.db = get_database(self.db_path)
         
         # Build search index will be called later
         self._search_index_built = False
+        
+        # Sorted index vocabulary for fuzzy matching, loaded on demand
+        self._vocabulary: Optional[List[str]] = None
+        self._fuzzy_cache: Dict[str, List[str]] = {}
     
     def _init_database(self):
         """Initialize SQLite database for navigation data."""
@@ -137,6 +203,8 @@ class NavigationManager:
                     )
                 ''')
                 
+                self._init_search_fts(cursor)
+                
                 # Create breadcrumb templates table
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS breadcrumb_templates (
@@ -155,6 +223,67 @@ class NavigationManager:
             logger.error(f"Failed to initialize navigation database: {e}")
             raise
     
+    def _init_search_fts(self, cursor):
+        """Add upsert keys, usage counts and the FTS5 index to search_index."""
+        cursor.execute('PRAGMA table_info(search_index)')
+        if 'usage_count' not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute('ALTER TABLE search_index ADD COLUMN usage_count INTEGER DEFAULT 0')
+            cursor.execute('''
+                UPDATE search_index SET usage_count = COALESCE(
+                    (SELECT frequency FROM quick_actions WHERE action_id = search_index.item_id), 0)
+            ''')
+        
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_search_index_item'")
+        if cursor.fetchone() is None:
+            # The index used to be rebuilt wholesale; keep the newest copy of each item
+            cursor.execute('''
+                DELETE FROM search_index WHERE id NOT IN (
+                    SELECT MAX(id) FROM search_index GROUP BY item_type, item_id
+                )
+            ''')
+            cursor.execute('''
+                CREATE UNIQUE INDEX idx_search_index_item ON search_index(item_type, item_id)
+            ''')
+        
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'search_fts'")
+        fts_exists = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+                title, description, keywords,
+                content='search_index', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+            )
+        ''')
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_vocab USING fts5vocab(search_fts, 'row')
+        ''')
+        
+        # Keep the FTS index in step with search_index; usage bumps skip it
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS search_index_ai AFTER INSERT ON search_index BEGIN
+                INSERT INTO search_fts(rowid, title, description, keywords)
+                VALUES (new.id, new.title, new.description, new.keywords);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS search_index_ad AFTER DELETE ON search_index BEGIN
+                INSERT INTO search_fts(search_fts, rowid, title, description, keywords)
+                VALUES ('delete', old.id, old.title, old.description, old.keywords);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS search_index_au
+            AFTER UPDATE OF title, description, keywords ON search_index BEGIN
+                INSERT INTO search_fts(search_fts, rowid, title, description, keywords)
+                VALUES ('delete', old.id, old.title, old.description, old.keywords);
+                INSERT INTO search_fts(rowid, title, description, keywords)
+                VALUES (new.id, new.title, new.description, new.keywords);
+            END
+        ''')
+        
+        if not fts_exists:
+            cursor.execute("INSERT INTO search_fts(search_fts) VALUES ('rebuild')")
+    
     async def navigate_to(self, module: str, path: List[str] = None, context: Dict = None) -> bool:
         """Navigate to a specific module and path."""
         try:
@@ -177,14 +306,11 @@ class NavigationManager:
             # Generate title for history
             title = self._generate_title(module, path, context)
             
-            # Store in database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO navigation_history (module, path, context, title)
-                    VALUES (?, ?, ?, ?)
-                ''', (module, json.dumps(path or []), json.dumps(context or {}), title))
-                conn.commit()
+            # Store in database; history rides along with the next group commit
+            self.db.execute_nowait('''
+                INSERT INTO navigation_history (module, path, context, title)
+                VALUES (?, ?, ?, ?)
+            ''', (module, json.dumps(path or []), json.dumps(context or {}), title))
             
             logger.info(f"Navigated to: {module} -> {'/'.join(path or [])}")
             return True
@@ -268,57 +394,42 @@ class NavigationManager:
                 await self._build_search_index()
                 self._search_index_built = True
             
-            if not query.strip():
+            match = await self._build_match_query(query)
+            if not match:
                 return []
             
+            weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+            db_results = await self.db.fetchall(f'''
+                SELECT s.*, bm25(search_fts, {weights}) AS rank
+                FROM search_fts JOIN search_index s ON s.id = search_fts.rowid
+                WHERE search_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            ''', (match, limit * CANDIDATE_FACTOR))
+            
             results = []
             
-            # Search in indexed content
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Fuzzy search in search index
-                search_terms = query.lower().split()
-                search_conditions = []
-                search_params = []
-                
-                for term in search_terms:
-                    search_conditions.append(
-                        '(LOWER(title) LIKE ? OR LOWER(description) LIKE ? OR LOWER(keywords) LIKE ?)'
-                    )
-                    search_params.extend([f'%{term}%', f'%{term}%', f'%{term}%'])
-                
-                search_query = f'''
-                    SELECT * FROM search_index 
-                    WHERE {' AND '.join(search_conditions)}
-                    ORDER BY search_weight DESC, title ASC
-                    LIMIT ?
-                '''
-                search_params.append(limit)
-                
-                cursor.execute(search_query, search_params)
-                db_results = cursor.fetchall()
-                
-                for row in db_results:
-                    result = {
-                        "id": row[1],
-                        "type": row[2],
-                        "title": row[3],
-                        "description": row[4],
-                        "keywords": row[5].split(',') if row[5] else [],
-                        "module": row[6],
-                        "action": row[7],
-                        "metadata": json.loads(row[8]) if row[8] else {},
-                        "weight": row[9]
-                    }
-                    results.append(result)
-            
-            # Search in modules and actions
-            module_results = self._search_modules(query)
-            results.extend(module_results)
+            for row in db_results:
+                weight, usage, rank = row[9], row[11] or 0, row[12]
+                result = {
+                    "id": row[1],
+                    "type": row[2],
+                    "title": row[3],
+                    "description": row[4],
+                    "keywords": row[5].split(',') if row[5] else [],
+                    "module": row[6],
+                    "action": row[7],
+                    "metadata": json.loads(row[8]) if row[8] else {},
+                    "weight": weight,
+                    "usage_count": usage,
+                    # bm25() is lower for better matches
+                    "score": -rank * (1 + WEIGHT_BOOST * math.log1p(weight or 0)
+                                      + USAGE_BOOST * math.log1p(usage))
+                }
+                results.append(result)
             
             # Sort by relevance
-            results.sort(key=lambda x: x.get("weight", 1), reverse=True)
+            results.sort(key=lambda x: x["score"], reverse=True)
             
             return results[:limit]
             
@@ -326,42 +437,134 @@ class NavigationManager:
             logger.error(f"Global search failed: {e}")
             return []
     
-    def _search_modules(self, query: str) -> List[Dict]:
-        """Search in modules and actions."""
-        results = []
-        query_lower = query.lower()
+    async def _build_match_query(self, query: str) -> str:
+        """Turn typed text into an FTS5 query: every term must match as a
+        prefix or, failing that, as a close spelling of an indexed word."""
+        terms = tokenize(query)
+        if not terms:
+            return ""
         
-        for module_id, module_info in self.modules.items():
-            # Search module name
-            if query_lower in module_info["name"].lower():
-                results.append({
-                    "id": f"module_{module_id}",
-                    "type": "module",
-                    "title": module_info["name"],
-                    "description": f"Navigate to {module_info['name']}",
-                    "keywords": [module_id, module_info["name"]],
-                    "module": module_id,
-                    "action": "navigate",
-                    "metadata": {"target_module": module_id},
-                    "weight": 10
-                })
-            
-            # Search actions
-            for action in module_info["actions"]:
-                if query_lower in action.lower():
-                    results.append({
-                        "id": f"action_{module_id}_{action}",
-                        "type": "action",
-                        "title": self._format_path_segment(action),
-                        "description": f"{action.replace('_', ' ').title()} in {module_info['name']}",
-                        "keywords": [action, module_info["name"]],
-                        "module": module_id,
-                        "action": action,
-                        "metadata": {"target_module": module_id, "target_action": action},
-                        "weight": 5
-                    })
+        if self._vocabulary is None:
+            rows = await self.db.fetchall('SELECT term FROM search_vocab ORDER BY term')
+            self._vocabulary = [row[0] for row in rows]
+            self._fuzzy_cache.clear()
+        
+        if len(terms) == 1 and len(terms[0]) < SHORT_QUERY_LENGTH:
+            return f'title : ^"{terms[0]}"*'
         
-        return results
+        clauses = []
+        for term in terms:
+            alternatives = [f'"{term}"*']
+            if not self._has_prefix(term):
+                alternatives.extend(f'"{word}"' for word in self._fuzzy_matches(term))
+            clauses.append(f"({' OR '.join(alternatives)})")
+        return " AND ".join(clauses)
+    
+    def _has_prefix(self, term: str) -> bool:
+        i = bisect.bisect_left(self._vocabulary, term)
+        return i < len(self._vocabulary) and self._vocabulary[i].startswith(term)
+    
+    def _fuzzy_matches(self, term: str) -> List[str]:
+        """Indexed words whose beginning is a close spelling of ``term``."""
+        if len(term) < FUZZY_MIN_LENGTH:
+            return []
+        cached = self._fuzzy_cache.get(term)
+        if cached is not None:
+            return cached
+        
+        # Typos rarely hit the first letter, which keeps the scan to one slice
+        lo = bisect.bisect_left(self._vocabulary, term[0])
+        hi = bisect.bisect_left(self._vocabulary, chr(ord(term[0]) + 1))
+        matcher = difflib.SequenceMatcher(b=term, autojunk=False)
+        scored = []
+        for word in self._vocabulary[lo:hi]:
+            if len(word) < len(term) - 1:
+                continue
+            matcher.set_seq1(word[:len(term)])
+            if (matcher.real_quick_ratio() >= FUZZY_CUTOFF and matcher.quick_ratio() >= FUZZY_CUTOFF
+                    and matcher.ratio() >= FUZZY_CUTOFF):
+                scored.append((matcher.ratio(), word))
+        
+        matches = [word for _, word in sorted(scored, reverse=True)[:FUZZY_ALTERNATIVES]]
+        self._fuzzy_cache[term] = matches
+        return matches
+    
+    @staticmethod
+    def _search_rows(items: Iterable[Dict]) -> List[tuple]:
+        """Rows for UPSERT_SEARCH_ITEM_SQL from items as index_items takes them."""
+        rows = []
+        for item in items:
+            default_module, default_action = CONTENT_TYPES.get(item["type"], (None, None))
+            keywords = item.get("keywords") or ""
+            if not isinstance(keywords, str):
+                keywords = ",".join(keywords)
+            rows.append((
+                str(item["id"]),
+                item["type"],
+                item["title"],
+                item.get("description") or "",
+                keywords,
+                item.get("module") or default_module or "dashboard",
+                item.get("action") or default_action or "open",
+                json.dumps(item["metadata"]) if item.get("metadata") else None,
+                item.get("weight", 1)
+            ))
+        return rows
+    
+    async def index_items(self, items: Iterable[Dict]) -> int:
+        """Add or update searchable items.
+        
+        Each item needs ``id``, ``type`` and ``title``; ``description``,
+        ``keywords`` (list or comma-separated string), ``module``,
+        ``action``, ``metadata`` and ``weight`` are optional. Types in
+        CONTENT_TYPES get their module and action filled in.
+        """
+        rows = self._search_rows(items)
+        if not rows:
+            return 0
+        
+        try:
+            await self.db.executemany(UPSERT_SEARCH_ITEM_SQL, rows)
+            self._vocabulary = None
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to index {len(rows)} search items: {e}")
+            return 0
+    
+    def index_items_nowait(self, items: Iterable[Dict]):
+        """Queue items for index_items without waiting, for synchronous callers.
+        
+        The upsert joins the next group commit; failures are logged.
+        """
+        rows = self._search_rows(items)
+        if not rows:
+            return
+        
+        def write(conn):
+            conn.executemany(UPSERT_SEARCH_ITEM_SQL, rows)
+            self._vocabulary = None
+        self.db.run_write_nowait(write)
+    
+    async def remove_items(self, item_type: str, item_ids: Iterable[str]) -> int:
+        """Drop items from the search index, e.g. when their source is deleted."""
+        try:
+            result = await self.db.executemany(
+                'DELETE FROM search_index WHERE item_type = ? AND item_id = ?',
+                [(item_type, str(item_id)) for item_id in item_ids])
+            self._vocabulary = None
+            return result.rowcount
+        except Exception as e:
+            logger.error(f"Failed to remove search items: {e}")
+            return 0
+    
+    def remove_items_nowait(self, item_type: str, item_ids: Iterable[str]):
+        """Queue a remove_items without waiting, for synchronous callers."""
+        params = [(item_type, str(item_id)) for item_id in item_ids]
+        
+        def write(conn):
+            conn.executemany('DELETE FROM search_index WHERE item_type = ? AND item_id = ?', params)
+            self._vocabulary = None
+        self.db.run_write_nowait(write)
     
     async def get_command_palette_suggestions(self, query: str = "") -> List[Dict]:
         """Get suggestions for command palette."""
@@ -380,36 +583,33 @@ class NavigationManager:
     async def _get_frequent_actions(self) -> List[Dict]:
         """Get frequently used actions."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT * FROM quick_actions 
-                    WHERE enabled = TRUE
-                    ORDER BY frequency DESC, last_used DESC
-                    LIMIT 10
-                ''')
-                
-                results = cursor.fetchall()
-                actions = []
-                
-                for row in results:
-                    action = {
-                        "id": row[1],
-                        "type": "quick_action",
-                        "title": row[2],
-                        "description": row[3],
-                        "keywords": [],
-                        "module": row[4],
-                        "action": row[5],
-                        "icon": row[6],
-                        "shortcut": row[7],
-                        "metadata": {"frequency": row[8]},
-                        "weight": row[8]
-                    }
-                    actions.append(action)
-                
-                return actions
-                
+            results = await self.db.fetchall('''
+                SELECT * FROM quick_actions 
+                WHERE enabled = TRUE
+                ORDER BY frequency DESC, last_used DESC
+                LIMIT 10
+            ''')
+            
+            actions = []
+            
+            for row in results:
+                action = {
+                    "id": row[1],
+                    "type": "quick_action",
+                    "title": row[2],
+                    "description": row[3],
+                    "keywords": [],
+                    "module": row[4],
+                    "action": row[5],
+                    "icon": row[6],
+                    "shortcut": row[7],
+                    "metadata": {"frequency": row[8]},
+                    "weight": row[8]
+                }
+                actions.append(action)
+            
+            return actions
+            
         except Exception as e:
             logger.error(f"Failed to get frequent actions: {e}")
             return []
@@ -428,14 +628,16 @@ class NavigationManager:
                 success = await self.navigate_to(target_module)
                 
                 if success:
+                    await self._record_action_usage(action_data.get("id", f"module_{target_module}"),
+                                                    action_type or "module")
                     return {"status": "success", "message": f"Navigated to {target_module}"}
                 else:
                     return {"status": "error", "message": "Navigation failed"}
             
-            elif action_type == "action":
+            elif action_type in ("action", "quick_action"):
                 # Execute specific action
                 # This would integrate with the appropriate module
-                await self._record_action_usage(action_data["id"])
+                await self._record_action_usage(action_data["id"], action_type)
                 
                 return {
                     "status": "success", 
@@ -443,6 +645,16 @@ class NavigationManager:
                     "action_data": action_data
                 }
             
+            elif action_type in CONTENT_TYPES:
+                # Opening indexed content is up to its module
+                await self._record_action_usage(action_data["id"], action_type)
+                
+                return {
+                    "status": "success",
+                    "message": f"Opening {action_type} in {module}",
+                    "action_data": action_data
+                }
+            
             else:
                 return {"status": "error", "message": "Unknown action type"}
                 
@@ -450,82 +662,90 @@ class NavigationManager:
             logger.error(f"Action execution failed: {e}")
             return {"status": "error", "message": str(e)}
     
-    async def _record_action_usage(self, action_id: str):
-        """Record action usage for frequency tracking."""
+    async def _record_action_usage(self, action_id: str, item_type: str):
+        """Record action usage for frequency tracking and search ranking."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
+            def record(conn):
+                conn.execute('''
                     UPDATE quick_actions 
                     SET frequency = frequency + 1, last_used = ?
                     WHERE action_id = ?
                 ''', (datetime.now().isoformat(), action_id))
-                conn.commit()
+                conn.execute('''
+                    UPDATE search_index SET usage_count = usage_count + 1
+                    WHERE item_id = ? AND item_type = ?
+                ''', (str(action_id), item_type))
+            
+            # Usage record: rides along with the next group commit
+            self.db.run_write_nowait(record)
         except Exception as e:
             logger.error(f"Failed to record action usage: {e}")
     
     async def _build_search_index(self):
-        """Build search index for fast searching."""
+        """Upsert modules, module actions and quick actions into the search index."""
         try:
-            # This would be expanded to index content from all modules
-            # For now, just index modules and actions
+            items = []
             
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Clear existing index
-                cursor.execute('DELETE FROM search_index')
-                
-                # Index modules
-                for module_id, module_info in self.modules.items():
-                    cursor.execute('''
-                        INSERT INTO search_index 
-                        (item_id, item_type, title, description, keywords, module, action, search_weight)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        f"module_{module_id}",
-                        "module",
-                        module_info["name"],
-                        f"Navigate to {module_info['name']}",
-                        module_id,
-                        module_id,
-                        "navigate",
-                        10
-                    ))
-                
-                # Index quick actions
-                quick_actions = [
-                    ("new_tab", "New Tab", "Open a new browser tab", "browser", "new_tab", "web"),
-                    ("new_chat", "New Chat", "Start a new AI conversation", "ai_chat", "new_chat", "smart_toy"),
-                    ("play_music", "Play Music", "Play or resume music", "music", "play", "music_note"),
-                    ("fetch_news", "Fetch News", "Fetch latest news articles", "news", "fetch_articles", "newspaper"),
-                    ("calculate", "Calculator", "Open calculator", "calculator", "calculate", "calculate"),
-                ]
-                
-                for action_id, title, description, module, action, icon in quick_actions:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO quick_actions
-                        (action_id, title, description, module, action, icon, enabled)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (action_id, title, description, module, action, icon, True))
-                    
-                    cursor.execute('''
-                        INSERT INTO search_index 
-                        (item_id, item_type, title, description, keywords, module, action, search_weight)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        action_id,
-                        "quick_action",
-                        title,
-                        description,
-                        f"{action_id},{title.lower()}",
-                        module,
-                        action,
-                        5
-                    ))
-                
-                conn.commit()
-                logger.info("Search index built successfully")
+            # Index modules and their actions
+            for module_id, module_info in self.modules.items():
+                items.append({
+                    "id": f"module_{module_id}",
+                    "type": "module",
+                    "title": module_info["name"],
+                    "description": f"Navigate to {module_info['name']}",
+                    "keywords": [module_id],
+                    "module": module_id,
+                    "action": "navigate",
+                    "metadata": {"target_module": module_id},
+                    "weight": 10
+                })
+                for action in module_info["actions"]:
+                    items.append({
+                        "id": f"action_{module_id}_{action}",
+                        "type": "action",
+                        "title": self._format_path_segment(action),
+                        "description": f"{action.replace('_', ' ').title()} in {module_info['name']}",
+                        "keywords": [action, module_info["name"]],
+                        "module": module_id,
+                        "action": action,
+                        "metadata": {"target_module": module_id, "target_action": action},
+                        "weight": 5
+                    })
+            
+            # Index quick actions
+            quick_actions = [
+                ("new_tab", "New Tab", "Open a new browser tab", "browser", "new_tab", "web"),
+                ("new_chat", "New Chat", "Start a new AI conversation", "ai_chat", "new_chat", "smart_toy"),
+                ("play_music", "Play Music", "Play or resume music", "music", "play", "music_note"),
+                ("fetch_news", "Fetch News", "Fetch latest news articles", "news", "fetch_articles", "newspaper"),
+                ("calculate", "Calculator", "Open calculator", "calculator", "calculate", "calculate"),
+            ]
+            
+            for action_id, title, description, module, action, icon in quick_actions:
+                items.append({
+                    "id": action_id,
+                    "type": "quick_action",
+                    "title": title,
+                    "description": description,
+                    "keywords": [action_id, title.lower()],
+                    "module": module,
+                    "action": action,
+                    "weight": 5
+                })
+            
+            def upsert_quick_actions(conn):
+                # Upsert rather than replace, so usage frequencies survive restarts
+                conn.executemany('''
+                    INSERT INTO quick_actions (action_id, title, description, module, action, icon, enabled)
+                    VALUES (?, ?, ?, ?, ?, ?, TRUE)
+                    ON CONFLICT(action_id) DO UPDATE SET
+                        title = excluded.title, description = excluded.description,
+                        module = excluded.module, action = excluded.action, icon = excluded.icon
+                ''', quick_actions)
+            
+            await self.db.run_write(upsert_quick_actions)
+            await self.index_items(items)
+            logger.info("Search index built successfully")
                 
         except Exception as e:
             logger.error(f"Failed to build search index: {e}")
@@ -550,7 +770,7 @@ class NavigationManager:
     async def get_navigation_stats(self) -> Dict:
         """Get navigation usage statistics."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            def read_stats(conn):
                 cursor = conn.cursor()
                 
                 # Most visited modules
@@ -581,14 +801,18 @@ class NavigationManager:
                     for row in cursor.fetchall()
                 ]
                 
-                return {
-                    "current_location": self.current_location,
-                    "popular_modules": popular_modules,
-                    "recent_navigations": recent_navigations,
-                    "popular_actions": popular_actions,
-                    "available_modules": list(self.modules.keys())
-                }
-                
+                return popular_modules, recent_navigations, popular_actions
+            
+            popular_modules, recent_navigations, popular_actions = await self.db.run_read(read_stats)
+            
+            return {
+                "current_location": self.current_location,
+                "popular_modules": popular_modules,
+                "recent_navigations": recent_navigations,
+                "popular_actions": popular_actions,
+                "available_modules": list(self.modules.keys())
+            }
+            
         except Exception as e:
             logger.error(f"Failed to get navigation stats: {e}")
             return {}
\ No newline at end of file
@@ -7,32 +7,63 @@ offline reading mode, and search functionality.
 """
 
 import asyncio
+import hashlib
 import logging
 import aiohttp
 import feedparser
 import json
 import sqlite3
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from urllib.parse import urljoin, urlparse
 import xml.etree.ElementTree as ET
 
+from .async_database import get_database
+from .navigation_system import NavigationManager
+
 logger = logging.getLogger(__name__)
 
+# Feeds fetched at once during a refresh
+MAX_CONCURRENT_FETCHES = 16
+FEED_TIMEOUT_SECONDS = 30
+
+
+def article_hash(entry_id: str) -> str:
+    """Stable dedup key for an entry, from its GUID or URL."""
+    return hashlib.sha1(entry_id.encode('utf-8')).hexdigest()
+
 
 class NewsReader:
     """Advanced news reader with RSS feeds, multiple sources, and offline capabilities."""
     
-    def __init__(self, config_dir: str = None, db_path: str = None):
+    # Existing articles keep their id and read/archived state
+    INSERT_ARTICLE_SQL = '''
+        INSERT OR IGNORE INTO articles 
+        (source_id, title, url, summary, author, published_date, category, tags, guid_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    def __init__(self, config_dir: str = None, db_path: str = None,
+                 max_concurrent_fetches: int = MAX_CONCURRENT_FETCHES,
+                 search_index: Optional[NavigationManager] = None):
         self.config_dir = config_dir or "~/.westfall_assistant"
         self.db_path = db_path or f"{self.config_dir}/news.db"
         self.sources = []
         self.cached_articles = []
         self.categories = ["general", "technology", "science", "business", "sports", "health"]
+        self.max_concurrent_fetches = max_concurrent_fetches
+        
+        # Global search: stored articles are upserted into it as they arrive
+        self.search_index = search_index
+        
+        # feedparser is CPU-bound; keep it off the event loop
+        self._parse_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="feed-parse")
         
         # Initialize database
         self._init_database()
+        self.db = get_database(self.db_path)
         
         # Load default sources
         self._load_default_sources()
@@ -79,6 +110,15 @@ class NewsReader:
                     )
                 ''')
                 
+                # Dedup key from each entry's GUID (or URL); added after the
+                # original schema, so older databases get the column here
+                cursor.execute('PRAGMA table_info(articles)')
+                if 'guid_hash' not in {row[1] for row in cursor.fetchall()}:
+                    cursor.execute('ALTER TABLE articles ADD COLUMN guid_hash TEXT')
+                cursor.execute('''
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_guid_hash ON articles(guid_hash)
+                ''')
+                
                 # Create full-text search index
                 cursor.execute('''
                     CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
@@ -96,7 +136,11 @@ class NewsReader:
             raise
     
     def _load_default_sources(self):
-        """Load default news sources."""
+        """Add the default news sources that are not in the database yet.
+        
+        Existing rows are left alone so their ids, last_fetched and stored
+        ETag/Last-Modified validators survive a restart.
+        """
         default_sources = [
             {
                 "name": "BBC Technology",
@@ -118,114 +162,201 @@ class NewsReader:
             }
         ]
         
-        for source in default_sources:
-            asyncio.run(self.add_source(**source))
+        asyncio.run(self.db.executemany('''
+            INSERT OR IGNORE INTO news_sources (name, url, category, active, metadata)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(source["name"], source["url"], source["category"], source["active"], "{}")
+              for source in default_sources]))
     
     async def add_source(self, name: str, url: str, category: str = "general", 
                         source_type: str = "rss", active: bool = True, 
                         refresh_interval: int = 3600) -> bool:
-        """Add a new news source."""
+        """Add a new news source, or update the settings of an existing one.
+        
+        Re-adding a URL keeps its id, fetch time and cached validators.
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT OR REPLACE INTO news_sources 
-                    (name, url, source_type, category, active, refresh_interval, metadata)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (name, url, source_type, category, active, refresh_interval, "{}"))
-                
-                conn.commit()
-                logger.info(f"Added news source: {name}")
-                return True
-                
+            await self.db.execute('''
+                INSERT INTO news_sources 
+                (name, url, source_type, category, active, refresh_interval, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    name = excluded.name, source_type = excluded.source_type,
+                    category = excluded.category, active = excluded.active,
+                    refresh_interval = excluded.refresh_interval
+            ''', (name, url, source_type, category, active, refresh_interval, "{}"))
+            
+            logger.info(f"Added news source: {name}")
+            return True
+            
         except Exception as e:
             logger.error(f"Failed to add news source {name}: {e}")
             return False
     
     async def fetch_articles(self, source_id: int = None, force_refresh: bool = False) -> List[Dict]:
-        """Fetch articles from RSS feeds."""
+        """Refresh due feeds concurrently and return the newly stored articles.
+        
+        Every due source is fetched through one shared session with at most
+        ``max_concurrent_fetches`` requests in flight. Requests carry the
+        feed's ETag/Last-Modified validators, so unchanged feeds cost a 304.
+        New articles from all feeds are inserted in a single transaction.
+        """
         articles = []
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Get active sources
-                if source_id:
-                    cursor.execute('SELECT * FROM news_sources WHERE id = ? AND active = TRUE', (source_id,))
-                else:
-                    cursor.execute('SELECT * FROM news_sources WHERE active = TRUE')
-                
-                sources = cursor.fetchall()
-                
-                for source in sources:
-                    source_id, name, url, source_type, category, active, refresh_interval, last_fetched, metadata, created_at = source
-                    
-                    # Check if refresh is needed
-                    if not force_refresh and last_fetched:
-                        last_fetch_time = datetime.fromisoformat(last_fetched)
-                        if datetime.now() - last_fetch_time < timedelta(seconds=refresh_interval):
-                            logger.info(f"Skipping {name} - refresh interval not reached")
-                            continue
-                    
-                    logger.info(f"Fetching articles from: {name}")
-                    
-                    try:
-                        if source_type == "rss":
-                            source_articles = await self._fetch_rss_articles(source_id, name, url, category)
-                            articles.extend(source_articles)
-                        
-                        # Update last fetched time
-                        cursor.execute(
-                            'UPDATE news_sources SET last_fetched = ? WHERE id = ?',
-                            (datetime.now().isoformat(), source_id)
-                        )
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to fetch from {name}: {e}")
-                        continue
-                
-                conn.commit()
+            # Get active sources
+            if source_id:
+                sources = await self.db.fetchall(
+                    'SELECT * FROM news_sources WHERE id = ? AND active = TRUE', (source_id,))
+            else:
+                sources = await self.db.fetchall('SELECT * FROM news_sources WHERE active = TRUE')
+            
+            due_sources = [source for source in sources if force_refresh or self._is_due(source)]
+            if not due_sources:
+                return articles
+            
+            semaphore = asyncio.Semaphore(self.max_concurrent_fetches)
+            connector = aiohttp.TCPConnector(limit=self.max_concurrent_fetches, ttl_dns_cache=300)
+            timeout = aiohttp.ClientTimeout(total=FEED_TIMEOUT_SECONDS)
+            
+            async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+                results = await asyncio.gather(*[
+                    self._refresh_source(session, semaphore, source) for source in due_sources
+                ])
+            
+            articles = await self._store_refresh([result for result in results if result])
+            
+            not_modified = sum(1 for result in results if result and result["not_modified"])
+            logger.info(f"Refreshed {len(due_sources)} sources: {len(articles)} new articles, "
+                        f"{not_modified} unchanged")
                 
         except Exception as e:
             logger.error(f"Failed to fetch articles: {e}")
         
         return articles
     
-    async def _fetch_rss_articles(self, source_id: int, source_name: str, url: str, category: str) -> List[Dict]:
-        """Fetch articles from RSS feed."""
-        articles = []
+    def _is_due(self, source) -> bool:
+        """Check if a source's refresh interval has elapsed."""
+        name, refresh_interval, last_fetched = source[1], source[6], source[7]
+        if not last_fetched:
+            return True
+        
+        last_fetch_time = datetime.fromisoformat(last_fetched)
+        if datetime.now() - last_fetch_time < timedelta(seconds=refresh_interval):
+            logger.info(f"Skipping {name} - refresh interval not reached")
+            return False
+        return True
+    
+    async def _refresh_source(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                              source) -> Optional[Dict]:
+        """Conditionally fetch one feed and parse it off the event loop.
+        
+        Returns the source's new validators and parsed articles, or None if
+        the fetch failed (the source stays due and is retried next refresh).
+        """
+        source_id, name, url, source_type, category, active, refresh_interval, last_fetched, metadata, created_at = source
         
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        feed = feedparser.parse(content)
-                        
-                        for entry in feed.entries:
-                            article = {
-                                "source_id": source_id,
-                                "source_name": source_name,
-                                "title": entry.get("title", "No Title"),
-                                "url": entry.get("link", ""),
-                                "summary": self._clean_html(entry.get("summary", "")),
-                                "author": entry.get("author", ""),
-                                "published_date": self._parse_date(entry.get("published", "")),
-                                "category": category,
-                                "tags": self._extract_tags(entry)
-                            }
-                            
-                            # Store in database
-                            await self._store_article(article)
-                            articles.append(article)
+            metadata = json.loads(metadata) if metadata else {}
+        except ValueError:
+            metadata = {}
+        
+        result = {"source_id": source_id, "metadata": metadata, "articles": [], "not_modified": False}
+        if source_type != "rss":
+            return result
+        
+        headers = {}
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+        
+        try:
+            async with semaphore:
+                logger.info(f"Fetching articles from: {name}")
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304:
+                        result["not_modified"] = True
+                        return result
+                    
+                    if response.status != 200:
+                        logger.error(f"Failed to fetch RSS from {url}: HTTP {response.status}")
+                        return None
                     
+                    content = await response.read()
+                    for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified")):
+                        if response.headers.get(header):
+                            metadata[key] = response.headers[header]
+                        else:
+                            metadata.pop(key, None)
+            
+            loop = asyncio.get_running_loop()
+            result["articles"] = await loop.run_in_executor(
+                self._parse_executor, self._parse_feed, content, source_id, name, category)
+            return result
+            
         except Exception as e:
-            logger.error(f"Failed to fetch RSS from {url}: {e}")
+            logger.error(f"Failed to fetch from {name}: {e}")
+            return None
+    
+    def _parse_feed(self, content: bytes, source_id: int, source_name: str, category: str) -> List[Dict]:
+        """Parse a feed document into article dictionaries (runs in the parse pool)."""
+        feed = feedparser.parse(content)
+        articles = []
+        
+        for entry in feed.entries:
+            link = entry.get("link", "")
+            guid = entry.get("id") or link or entry.get("title", "")
+            articles.append({
+                "source_id": source_id,
+                "source_name": source_name,
+                "title": entry.get("title", "No Title"),
+                "url": link,
+                "summary": self._clean_html(entry.get("summary", "")),
+                "author": entry.get("author", ""),
+                "published_date": self._parse_date(entry.get("published", "")),
+                "category": category,
+                "tags": self._extract_tags(entry),
+                "guid_hash": article_hash(guid)
+            })
         
         return articles
     
+    async def _store_refresh(self, results: List[Dict]) -> List[Dict]:
+        """Insert new articles and source bookkeeping in one transaction."""
+        fetched_at = datetime.now().isoformat()
+        
+        def store(conn):
+            new_articles = []
+            seen_guids, seen_urls = set(), set()
+            
+            for result in results:
+                for article in result["articles"]:
+                    # Same story syndicated by several feeds in this refresh;
+                    # entries without a link are told apart by GUID alone
+                    url = article["url"]
+                    if article["guid_hash"] in seen_guids or (url and url in seen_urls):
+                        continue
+                    seen_guids.add(article["guid_hash"])
+                    if url:
+                        seen_urls.add(url)
+                    
+                    cursor = conn.execute(self.INSERT_ARTICLE_SQL, self._article_params(article))
+                    if cursor.rowcount:
+                        article["id"] = cursor.lastrowid
+                        new_articles.append(article)
+                
+                conn.execute(
+                    'UPDATE news_sources SET last_fetched = ?, metadata = ? WHERE id = ?',
+                    (fetched_at, json.dumps(result["metadata"]), result["source_id"])
+                )
+            
+            return new_articles
+        
+        new_articles = await self.db.run_write(store)
+        await self._index_articles(new_articles)
+        return new_articles
+    
     def _clean_html(self, text: str) -> str:
         """Remove HTML tags from text."""
         import re
@@ -261,30 +392,45 @@ class NewsReader:
         
         return json.dumps(tags) if tags else "[]"
     
+    def _article_params(self, article: Dict) -> tuple:
+        guid_hash = article.get("guid_hash") or article_hash(article["url"])
+        return (
+            article["source_id"],
+            article["title"],
+            # url is UNIQUE NOT NULL, so linkless entries get a stand-in from their GUID
+            article["url"] or f"urn:article:{guid_hash}",
+            article["summary"],
+            article["author"],
+            article["published_date"],
+            article["category"],
+            article["tags"],
+            guid_hash
+        )
+    
+    async def _index_articles(self, articles: List[Dict]):
+        """Upsert newly stored articles into global search."""
+        if self.search_index is None or not articles:
+            return
+        
+        await self.search_index.index_items({
+            "id": article["id"],
+            "type": "article",
+            "title": article["title"],
+            "description": article["summary"][:300],
+            "keywords": [k for k in (article["category"], article.get("source_name"), article["author"]) if k],
+            "metadata": {"article_id": article["id"], "url": article["url"]}
+        } for article in articles)
+    
     async def _store_article(self, article: Dict) -> bool:
-        """Store article in database."""
+        """Store article in database; returns False if it was already stored."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT OR REPLACE INTO articles 
-                    (source_id, title, url, summary, author, published_date, category, tags)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    article["source_id"],
-                    article["title"],
-                    article["url"],
-                    article["summary"],
-                    article["author"],
-                    article["published_date"],
-                    article["category"],
-                    article["tags"]
-                ))
-                
-                conn.commit()
-                return True
-                
+            result = await self.db.execute(self.INSERT_ARTICLE_SQL, self._article_params(article))
+            if not result.rowcount:
+                return False
+            
+            await self._index_articles([dict(article, id=result.lastrowid)])
+            return True
+            
         except Exception as e:
             logger.error(f"Failed to store article: {e}")
             return False
@@ -293,27 +439,23 @@ class NewsReader:
                           limit: int = 50, offset: int = 0) -> List[Dict]:
         """Get articles with optional filtering."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                query = 'SELECT * FROM articles WHERE 1=1'
-                params = []
-                
-                if category:
-                    query += ' AND category = ?'
-                    params.append(category)
-                
-                if read_status is not None:
-                    query += ' AND read_status = ?'
-                    params.append(read_status)
-                
-                query += ' ORDER BY published_date DESC LIMIT ? OFFSET ?'
-                params.extend([limit, offset])
-                
-                cursor.execute(query, params)
-                results = cursor.fetchall()
-                return self._format_articles(results)
-                
+            query = 'SELECT * FROM articles WHERE 1=1'
+            params = []
+            
+            if category:
+                query += ' AND category = ?'
+                params.append(category)
+            
+            if read_status is not None:
+                query += ' AND read_status = ?'
+                params.append(read_status)
+            
+            query += ' ORDER BY published_date DESC LIMIT ? OFFSET ?'
+            params.extend([limit, offset])
+            
+            results = await self.db.fetchall(query, params)
+            return self._format_articles(results)
+            
         except Exception as e:
             logger.error(f"Failed to get articles: {e}")
             return []
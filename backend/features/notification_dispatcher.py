@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Notification Dispatcher for Westfall Personal Assistant
+
+Sits between NotificationManager.send_notification and delivery. Callers
+enqueue and return at once; one background task drains the queue in
+priority order, folds repeats of a notification into the first one, groups
+similar notifications into a single popup, writes rows and history with one
+executemany per batch, and paces popups with a token bucket.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds a notification absorbs identical ones (same module, type, title and message)
+COALESCE_WINDOW = 10.0
+
+# Seconds between dispatch passes while there is work; urgent items wake it at once
+FLUSH_INTERVAL = 0.05
+
+# OS popups: sustained rate per second and burst size. Urgent popups are not paced.
+POPUP_RATE = 1.0
+POPUP_BURST = 3
+
+# Popup groups waiting for a token; the lowest-priority extras stay in-app only
+MAX_PENDING_POPUPS = 20
+
+URGENT_PRIORITY = 4
+
+INSERT_NOTIFICATION_SQL = '''
+    INSERT INTO notifications
+    (notification_id, title, message, type, priority, module, action_data,
+     scheduled_for, delivered_at, status, persistent, sound_enabled, duration, occurrences)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def _notification_row(notification: Dict) -> tuple:
+    scheduled_for, delivered_at = notification["scheduled_for"], notification["delivered_at"]
+    return (
+        notification["id"], notification["title"], notification["message"],
+        notification["type"], notification["priority"], notification["module"],
+        json.dumps(notification["action_data"] or {}),
+        scheduled_for.isoformat() if scheduled_for else None,
+        delivered_at.isoformat() if delivered_at else None,
+        notification["status"], notification["persistent"], notification["sound_enabled"],
+        notification["duration"], notification["occurrences"]
+    )
+
+
+class NotificationDispatcher:
+    """Non-blocking delivery pipeline owned by a NotificationManager."""
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.db = manager.db
+
+        self._queue: List[Tuple[int, int, Dict]] = []  # (-priority, sequence, notification)
+        self._sequence = itertools.count()
+        self._recent: Dict[tuple, Dict] = {}  # Coalescing key -> first notification
+        self._popups: Dict[tuple, List[Dict]] = {}  # Group key -> notifications awaiting a popup
+        self._expiries: List[Tuple[float, str]] = []  # (monotonic deadline, notification_id)
+
+        self._popup_tokens = float(POPUP_BURST)
+        self._popup_refilled = time.monotonic()
+
+        # Buffered writes, flushed as one job per pass
+        self._rows: List[tuple] = []
+        self._occurrences: Dict[str, int] = {}
+        self._dismissals: List[tuple] = []
+        self._history: List[tuple] = []
+
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    # Intake
+
+    def submit(self, notification: Dict) -> str:
+        """Queue ``notification``; returns its id, or the id it was folded into."""
+        now = time.monotonic()
+        key = (notification["module"], notification["type"], notification["title"],
+               notification["message"], notification["status"])
+        first = self._recent.get(key)
+        if first is not None and now - first["_first_seen"] < COALESCE_WINDOW and self._showing(first):
+            first["occurrences"] += 1
+            self._occurrences[first["id"]] = first["occurrences"]
+            self.record_history(first["id"], "coalesced", {"occurrences": first["occurrences"]})
+            return first["id"]
+
+        notification["occurrences"] = 1
+        notification["_first_seen"] = now
+        notification["_queued"] = True
+        self._recent[key] = notification
+        heapq.heappush(self._queue, (-notification["priority"], next(self._sequence), notification))
+
+        self._ensure_running()
+        if notification["priority"] >= URGENT_PRIORITY:
+            self._wakeup.set()
+        return notification["id"]
+
+    def _showing(self, notification: Dict) -> bool:
+        """Whether a repeat of ``notification`` would still be seen as the same one."""
+        return (notification["_queued"] or notification["status"] != "delivered"
+                or notification["id"] in self.manager.active_notifications)
+
+    def record_history(self, notification_id: str, action: str, action_data: Dict = None):
+        self._history.append((notification_id, action, json.dumps(action_data or {})))
+        self._ensure_running()
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        elif not self._busy():
+            self._wakeup.set()  # The loop is parked waiting for work
+
+    def _busy(self) -> bool:
+        return bool(self._queue or self._popups or self._expiries or self._history or self._rows)
+
+    # Dispatch loop
+
+    async def _run(self):
+        while True:
+            if self._busy():
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=FLUSH_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await self._wakeup.wait()
+            self._wakeup.clear()
+
+            try:
+                await self.dispatch()
+            except Exception as e:
+                logger.error(f"Notification dispatch failed: {e}")
+
+    async def dispatch(self):
+        """Run one pass: drain the queue, show popups, expire and write."""
+        self._drain()
+        await self._show_popups()
+        self._expire()
+        self._prune_recent()
+        self.flush_writes()
+
+    def _drain(self):
+        manager = self.manager
+        while self._queue:
+            _, _, notification = heapq.heappop(self._queue)
+            notification["_queued"] = False
+            self._rows.append(notification)
+            self.record_history(notification["id"], "created", {"status": notification["status"]})
+
+            if notification["status"] != "delivered":
+                continue
+            manager.active_notifications[notification["id"]] = notification
+            if not notification["persistent"]:
+                deadline = time.monotonic() + notification["duration"] / 1000
+                heapq.heappush(self._expiries, (deadline, notification["id"]))
+            # Urgent notifications are never folded into a group popup
+            if notification["priority"] >= URGENT_PRIORITY:
+                group = (notification["id"],)
+            else:
+                group = (notification["module"], notification["type"])
+            self._popups.setdefault(group, []).append(notification)
+
+    async def _show_popups(self):
+        if not self._popups:
+            return
+
+        now = time.monotonic()
+        self._popup_tokens = min(POPUP_BURST, self._popup_tokens + (now - self._popup_refilled) * POPUP_RATE)
+        self._popup_refilled = now
+
+        groups = sorted(self._popups.items(),
+                        key=lambda item: max(n["priority"] for n in item[1]), reverse=True)
+        for key, notifications in groups[MAX_PENDING_POPUPS:]:
+            del self._popups[key]  # Still active and in history, just no popup
+
+        active = self.manager.active_notifications
+        for key, notifications in groups[:MAX_PENDING_POPUPS]:
+            notifications = [n for n in notifications if n["id"] in active]
+            if not notifications:
+                del self._popups[key]
+                continue
+            urgent = any(n["priority"] >= URGENT_PRIORITY for n in notifications)
+            if not urgent:
+                if self._popup_tokens < 1:
+                    break
+                self._popup_tokens -= 1
+            del self._popups[key]
+
+            # One popup per group: the latest notification, plus how many it stands for
+            popup = {k: v for k, v in notifications[-1].items() if not k.startswith("_")}
+            if len(notifications) > 1:
+                popup["group_count"] = len(notifications)
+                popup["grouped_ids"] = [n["id"] for n in notifications]
+            await self.manager._trigger_notification_callbacks(popup)
+
+    def _expire(self):
+        now = time.monotonic()
+        active = self.manager.active_notifications
+        timestamp = datetime.now().isoformat()
+        while self._expiries and self._expiries[0][0] <= now:
+            _, notification_id = heapq.heappop(self._expiries)
+            if active.pop(notification_id, None) is not None:
+                self._dismissals.append((timestamp, notification_id))
+                self.record_history(notification_id, "dismissed")
+
+    def _prune_recent(self):
+        cutoff = time.monotonic() - COALESCE_WINDOW
+        if self._recent and next(iter(self._recent.values()))["_first_seen"] < cutoff:
+            self._recent = {key: n for key, n in self._recent.items() if n["_first_seen"] >= cutoff}
+
+    # Writes
+
+    def flush_writes(self):
+        """Queue everything buffered as one database job.
+
+        Writes are ordered on the database's writer thread, so a caller that
+        flushes before its own statement sees the buffered rows committed.
+        """
+        if not (self._rows or self._occurrences or self._dismissals or self._history):
+            return
+        rows = [_notification_row(n) for n in self._rows]
+        occurrences = [(count, notification_id) for notification_id, count in self._occurrences.items()]
+        dismissals, history = self._dismissals, self._history
+        self._rows, self._occurrences, self._dismissals, self._history = [], {}, [], []
+
+        def write(conn):
+            conn.executemany(INSERT_NOTIFICATION_SQL, rows)
+            conn.executemany('UPDATE notifications SET occurrences = ? WHERE notification_id = ?',
+                             occurrences)
+            conn.executemany('''
+                UPDATE notifications SET dismissed_at = ?, status = 'dismissed'
+                WHERE notification_id = ?
+            ''', dismissals)
+            conn.executemany('''
+                INSERT INTO notification_history (notification_id, action, action_data)
+                VALUES (?, ?, ?)
+            ''', history)
+
+        self.db.run_write_nowait(write)
+
+    async def flush(self):
+        """Deliver and write everything queued so far, waiting for the commit."""
+        self._drain()
+        self.flush_writes()
+        await self.db.run_write(lambda conn: None)
@@ -6,7 +6,6 @@ System for managing notifications, alerts, and in-app messaging with
 priority levels, history, and do-not-disturb functionality.
 """
 
-import asyncio
 import logging
 import json
 import sqlite3
@@ -15,6 +14,9 @@ from typing import Dict, List, Optional, Any, Callable
 from enum import Enum
 import uuid
 
+from .async_database import get_database
+from .notification_dispatcher import NotificationDispatcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -55,8 +57,13 @@ class NotificationManager:
         self.sound_enabled = True
         self.system_tray_enabled = True
         
+        # notification_settings rows keyed by (module, notification_type), loaded on first use
+        self._settings_cache: Optional[Dict] = None
+        
         # Initialize database
         self._init_database()
+        self.db = get_database(self.db_path)
+        self.dispatcher = NotificationDispatcher(self)
     
     def _init_database(self):
         """Initialize SQLite database for notifications."""
@@ -87,6 +94,11 @@ class NotificationManager:
                     )
                 ''')
                 
+                # Added after the original schema, so older databases get the column here
+                cursor.execute('PRAGMA table_info(notifications)')
+                if 'occurrences' not in {row[1] for row in cursor.fetchall()}:
+                    cursor.execute('ALTER TABLE notifications ADD COLUMN occurrences INTEGER DEFAULT 1')
+                
                 # Create notification settings table
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS notification_settings (
@@ -161,7 +173,8 @@ class NotificationManager:
                 return None
             
             # Check do not disturb
-            if self._is_do_not_disturb_active() and priority.value < NotificationPriority.URGENT.value:
+            if (self._is_do_not_disturb_active() or self._setting_for(notification_type, module)[2]) \
+                    and priority.value < NotificationPriority.URGENT.value:
                 # Schedule for later or store as pending
                 status = "do_not_disturb"
                 delivered_at = None
@@ -187,36 +200,11 @@ class NotificationManager:
                 "duration": duration
             }
             
-            # Store in database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO notifications 
-                    (notification_id, title, message, type, priority, module, action_data,
-                     scheduled_for, delivered_at, status, persistent, sound_enabled, duration)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    notification_id, title, message, notification_type.value, priority.value,
-                    module, json.dumps(action_data or {}), 
-                    scheduled_for.isoformat() if scheduled_for else None,
-                    delivered_at.isoformat() if delivered_at else None,
-                    status, persistent, sound_enabled, duration
-                ))
-                conn.commit()
-            
-            # If delivered, add to active notifications and trigger callbacks
-            if status == "delivered":
-                self.active_notifications[notification_id] = notification
-                await self._trigger_notification_callbacks(notification)
-                
-                # Auto-dismiss after duration (if not persistent)
-                if not persistent:
-                    asyncio.create_task(self._auto_dismiss(notification_id, duration))
-            
-            # Record history
-            await self._record_history(notification_id, "created", {"status": status})
+            # Storage, popups and auto-dismiss happen on the dispatcher's next pass;
+            # a repeat of a recent notification returns the id it was folded into
+            notification_id = self.dispatcher.submit(notification)
             
-            logger.info(f"Notification created: {notification_id} - {title}")
+            logger.debug(f"Notification queued: {notification_id} - {title}")
             return notification_id
             
         except Exception as e:
@@ -262,15 +250,13 @@ class NotificationManager:
                 # Remove from active
                 del self.active_notifications[notification_id]
                 
-                # Update database
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        UPDATE notifications 
-                        SET dismissed_at = ?, status = 'dismissed'
-                        WHERE notification_id = ?
-                    ''', (datetime.now().isoformat(), notification_id))
-                    conn.commit()
+                # Update database, after any buffered insert of this notification
+                self.dispatcher.flush_writes()
+                await self.db.execute('''
+                    UPDATE notifications 
+                    SET dismissed_at = ?, status = 'dismissed'
+                    WHERE notification_id = ?
+                ''', (datetime.now().isoformat(), notification_id))
                 
                 # Record history
                 await self._record_history(notification_id, "dismissed")
@@ -287,14 +273,12 @@ class NotificationManager:
     async def mark_as_read(self, notification_id: str) -> bool:
         """Mark notification as read."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE notifications 
-                    SET read_at = ?
-                    WHERE notification_id = ?
-                ''', (datetime.now().isoformat(), notification_id))
-                conn.commit()
+            self.dispatcher.flush_writes()
+            await self.db.execute('''
+                UPDATE notifications 
+                SET read_at = ?
+                WHERE notification_id = ?
+            ''', (datetime.now().isoformat(), notification_id))
             
             # Record history
             await self._record_history(notification_id, "read")
@@ -305,14 +289,6 @@ class NotificationManager:
             logger.error(f"Failed to mark notification as read: {e}")
             return False
     
-    async def _auto_dismiss(self, notification_id: str, duration: int):
-        """Auto-dismiss notification after duration."""
-        try:
-            await asyncio.sleep(duration / 1000)  # Convert to seconds
-            await self.dismiss_notification(notification_id)
-        except Exception as e:
-            logger.error(f"Auto-dismiss failed for {notification_id}: {e}")
-    
     async def set_do_not_disturb(self, enabled: bool, until: datetime = None):
         """Set do not disturb mode."""
         self.do_not_disturb = enabled
@@ -339,39 +315,67 @@ class NotificationManager:
                                      module: str, priority: NotificationPriority) -> bool:
         """Check if notification is enabled based on settings."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Check module-specific settings
-                if module:
-                    cursor.execute('''
-                        SELECT enabled, priority_threshold FROM notification_settings
-                        WHERE module = ? AND notification_type = ?
-                    ''', (module, notification_type.value))
-                    
-                    result = cursor.fetchone()
-                    if result:
-                        enabled, threshold = result
-                        return enabled and priority.value >= threshold
-                
-                # Check general settings
-                cursor.execute('''
-                    SELECT enabled, priority_threshold FROM notification_settings
-                    WHERE module IS NULL AND notification_type = ?
-                ''', (notification_type.value,))
-                
-                result = cursor.fetchone()
-                if result:
-                    enabled, threshold = result
-                    return enabled and priority.value >= threshold
-                
-                # Default: enabled
-                return True
-                
+            if self._settings_cache is None:
+                await self._load_settings()
+            
+            enabled, threshold, _ = self._setting_for(notification_type, module)
+            return enabled and priority.value >= threshold
+            
         except Exception as e:
             logger.error(f"Failed to check notification settings: {e}")
             return True
     
+    def _setting_for(self, notification_type: NotificationType, module: str) -> tuple:
+        """(enabled, priority_threshold, do_not_disturb) from the cached settings."""
+        settings = self._settings_cache or {}
+        
+        # Module-specific settings win over general ones; default is enabled
+        if module and (module, notification_type.value) in settings:
+            return settings[(module, notification_type.value)]
+        return settings.get((None, notification_type.value), (True, 1, False))
+    
+    async def _load_settings(self):
+        """Read notification_settings into memory."""
+        rows = await self.db.fetchall('''
+            SELECT module, notification_type, enabled, priority_threshold, do_not_disturb_enabled
+            FROM notification_settings ORDER BY id
+        ''')
+        self._settings_cache = {
+            (module, notification_type): (bool(enabled), threshold or 1, bool(dnd))
+            for module, notification_type, enabled, threshold, dnd in rows
+        }
+    
+    async def update_notification_settings(self, notification_type: NotificationType, module: str = None,
+                                          enabled: bool = True, priority_threshold: int = 1,
+                                          sound_enabled: bool = True,
+                                          do_not_disturb_enabled: bool = False) -> bool:
+        """Set enablement for a notification type, optionally scoped to one module."""
+        try:
+            def write(conn):
+                params = (enabled, sound_enabled, priority_threshold, do_not_disturb_enabled,
+                          module, notification_type.value)
+                cursor = conn.execute('''
+                    UPDATE notification_settings
+                    SET enabled = ?, sound_enabled = ?, priority_threshold = ?,
+                        do_not_disturb_enabled = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE module IS ? AND notification_type = ?
+                ''', params)
+                if cursor.rowcount == 0:
+                    conn.execute('''
+                        INSERT INTO notification_settings
+                        (enabled, sound_enabled, priority_threshold, do_not_disturb_enabled,
+                         module, notification_type)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', params)
+            
+            await self.db.run_write(write)
+            await self._load_settings()
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to update notification settings: {e}")
+            return False
+    
     async def _trigger_notification_callbacks(self, notification: Dict):
         """Trigger registered notification callbacks."""
         try:
@@ -397,28 +401,25 @@ class NotificationManager:
                                      module: str = None) -> List[Dict]:
         """Get notification history."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                query = 'SELECT * FROM notifications WHERE 1=1'
-                params = []
-                
-                if notification_type:
-                    query += ' AND type = ?'
-                    params.append(notification_type)
-                
-                if module:
-                    query += ' AND module = ?'
-                    params.append(module)
-                
-                query += ' ORDER BY created_at DESC LIMIT ?'
-                params.append(limit)
-                
-                cursor.execute(query, params)
-                results = cursor.fetchall()
-                
-                return self._format_notifications(results)
-                
+            query = 'SELECT * FROM notifications WHERE 1=1'
+            params = []
+            
+            if notification_type:
+                query += ' AND type = ?'
+                params.append(notification_type)
+            
+            if module:
+                query += ' AND module = ?'
+                params.append(module)
+            
+            query += ' ORDER BY created_at DESC LIMIT ?'
+            params.append(limit)
+            
+            await self.dispatcher.flush()
+            results = await self.db.fetchall(query, params)
+            
+            return self._format_notifications(results)
+            
         except Exception as e:
             logger.error(f"Failed to get notification history: {e}")
             return []
@@ -445,7 +446,8 @@ class NotificationManager:
                 "status": row[13],
                 "persistent": bool(row[14]),
                 "sound_enabled": bool(row[15]),
-                "duration": row[16]
+                "duration": row[16],
+                "occurrences": row[17]
             }
             notifications.append(notification)
         
@@ -455,30 +457,28 @@ class NotificationManager:
                                 module: str = None, older_than_days: int = None) -> int:
         """Clear notifications based on criteria."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                query = 'DELETE FROM notifications WHERE 1=1'
-                params = []
-                
-                if notification_type:
-                    query += ' AND type = ?'
-                    params.append(notification_type)
-                
-                if module:
-                    query += ' AND module = ?'
-                    params.append(module)
-                
-                if older_than_days:
-                    query += ' AND created_at < datetime("now", "-{} days")'.format(older_than_days)
-                
-                cursor.execute(query, params)
-                deleted_count = cursor.rowcount
-                conn.commit()
-                
-                logger.info(f"Cleared {deleted_count} notifications")
-                return deleted_count
-                
+            query = 'DELETE FROM notifications WHERE 1=1'
+            params = []
+            
+            if notification_type:
+                query += ' AND type = ?'
+                params.append(notification_type)
+            
+            if module:
+                query += ' AND module = ?'
+                params.append(module)
+            
+            if older_than_days:
+                query += " AND created_at < datetime('now', ?)"
+                params.append(f'-{int(older_than_days)} days')
+            
+            self.dispatcher.flush_writes()
+            result = await self.db.execute(query, params)
+            deleted_count = result.rowcount
+            
+            logger.info(f"Cleared {deleted_count} notifications")
+            return deleted_count
+            
         except Exception as e:
             logger.error(f"Failed to clear notifications: {e}")
             return 0
@@ -489,18 +489,15 @@ class NotificationManager:
                             variables: List[str] = None) -> bool:
         """Create notification template."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO notification_templates
-                    (template_id, title_template, message_template, type, priority, module, variables)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    template_id, title_template, message_template,
-                    notification_type.value, priority.value, module,
-                    json.dumps(variables or [])
-                ))
-                conn.commit()
+            await self.db.execute('''
+                INSERT OR REPLACE INTO notification_templates
+                (template_id, title_template, message_template, type, priority, module, variables)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                template_id, title_template, message_template,
+                notification_type.value, priority.value, module,
+                json.dumps(variables or [])
+            ))
             
             logger.info(f"Created notification template: {template_id}")
             return True
@@ -512,28 +509,25 @@ class NotificationManager:
     async def _get_template(self, template_id: str) -> Optional[Dict]:
         """Get notification template."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT * FROM notification_templates WHERE template_id = ?
-                ''', (template_id,))
-                
-                row = cursor.fetchone()
-                if row:
-                    return {
-                        "id": row[0],
-                        "template_id": row[1],
-                        "title_template": row[2],
-                        "message_template": row[3],
-                        "type": row[4],
-                        "priority": row[5],
-                        "module": row[6],
-                        "variables": json.loads(row[7]) if row[7] else [],
-                        "created_at": row[8]
-                    }
-                
-                return None
-                
+            row = await self.db.fetchone('''
+                SELECT * FROM notification_templates WHERE template_id = ?
+            ''', (template_id,))
+            
+            if row:
+                return {
+                    "id": row[0],
+                    "template_id": row[1],
+                    "title_template": row[2],
+                    "message_template": row[3],
+                    "type": row[4],
+                    "priority": row[5],
+                    "module": row[6],
+                    "variables": json.loads(row[7]) if row[7] else [],
+                    "created_at": row[8]
+                }
+            
+            return None
+            
         except Exception as e:
             logger.error(f"Failed to get template: {e}")
             return None
@@ -541,20 +535,17 @@ class NotificationManager:
     async def _record_history(self, notification_id: str, action: str, action_data: Dict = None):
         """Record notification action in history."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO notification_history (notification_id, action, action_data)
-                    VALUES (?, ?, ?)
-                ''', (notification_id, action, json.dumps(action_data or {})))
-                conn.commit()
+            # History is written in batches by the dispatcher
+            self.dispatcher.record_history(notification_id, action, action_data)
         except Exception as e:
             logger.error(f"Failed to record notification history: {e}")
     
     async def get_statistics(self) -> Dict:
         """Get notification statistics."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            await self.dispatcher.flush()
+            
+            def read_stats(conn):
                 cursor = conn.cursor()
                 
                 # Total notifications
@@ -590,16 +581,22 @@ class NotificationManager:
                 ''')
                 unread_notifications = cursor.fetchone()[0]
                 
-                return {
-                    "total_notifications": total_notifications,
-                    "notifications_by_type": type_counts,
-                    "notifications_by_module": module_counts,
-                    "recent_notifications": recent_notifications,
-                    "unread_notifications": unread_notifications,
-                    "active_notifications": len(self.active_notifications),
-                    "do_not_disturb": self._is_do_not_disturb_active()
-                }
-                
+                return (total_notifications, type_counts, module_counts,
+                        recent_notifications, unread_notifications)
+            
+            (total_notifications, type_counts, module_counts,
+             recent_notifications, unread_notifications) = await self.db.run_read(read_stats)
+            
+            return {
+                "total_notifications": total_notifications,
+                "notifications_by_type": type_counts,
+                "notifications_by_module": module_counts,
+                "recent_notifications": recent_notifications,
+                "unread_notifications": unread_notifications,
+                "active_notifications": len(self.active_notifications),
+                "do_not_disturb": self._is_do_not_disturb_active()
+            }
+            
         except Exception as e:
             logger.error(f"Failed to get notification statistics: {e}")
             return {}
\ No newline at end of file
@@ -6,15 +6,64 @@ Manages global and context-specific keyboard shortcuts with customization.
 """
 
 import asyncio
+import atexit
 import logging
 import json
 import sqlite3
-from datetime import datetime
+import time
+import weakref
+from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any, Callable
 import re
 
+from .async_database import get_database
+
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for the next chord of a sequence such as "Ctrl+K Ctrl+S"
+SEQUENCE_TIMEOUT = 1.5
+
+# Seconds usage counts are held in memory before being written in one batch
+USAGE_FLUSH_INTERVAL = 30.0
+
+# Raw key strings whose normalized form is remembered
+MAX_NORMALIZED_KEYS = 4096
+
+# Managers whose pending usage counts are written at exit, unless close() ran first
+_open_managers: "weakref.WeakSet[ShortcutManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_managers():
+    """Registered after the shared databases' own hook, so it runs before they close."""
+    for manager in list(_open_managers):
+        manager._flush_usage()
+
+
+class _DispatchNode:
+    """One chord in a context's dispatch trie."""
+    
+    __slots__ = ("action", "context", "children")
+    
+    def __init__(self):
+        self.action = None
+        self.context = None
+        self.children = {}
+    
+    def insert(self, sequence: str, context: str, action: str):
+        node = self
+        for chord in sequence.split(" "):
+            node = node.children.setdefault(chord, _DispatchNode())
+        node.action, node.context = action, context
+    
+    def walk(self, sequence: str) -> Optional["_DispatchNode"]:
+        node = self
+        for chord in sequence.split(" "):
+            node = node.children.get(chord)
+            if node is None:
+                return None
+        return node
+
 
 class ShortcutManager:
     """Keyboard shortcuts management with customization support."""
@@ -27,6 +76,19 @@ class ShortcutManager:
         self.shortcuts = {}
         self.context_shortcuts = {}
         
+        # Compiled dispatch tries per context and the sequence being typed, if any
+        self._dispatch: Dict[str, _DispatchNode] = {}
+        self._pending_sequence = None  # (node, context, deadline, keys so far)
+        self._normalized_keys: Dict[str, str] = {}
+        
+        # Rejected registrations keyed by (shortcut, existing context, new context)
+        self._conflicts: Dict[tuple, Dict] = {}
+        
+        # Usage counts per (shortcut, context, action) awaiting the next flush
+        self._usage_counts: Dict[tuple, int] = {}
+        self._usage_flush: Optional[asyncio.TimerHandle] = None
+        _open_managers.add(self)
+        
         # Action callbacks
         self.action_callbacks = {}
         
@@ -122,6 +184,7 @@ class ShortcutManager:
         
         # Initialize database
         self._init_database()
+        self.db = get_database(self.db_path)
         
         # Load shortcuts will be called later
         self._shortcuts_loaded = False
@@ -160,6 +223,11 @@ class ShortcutManager:
                     )
                 ''')
                 
+                # Added after the original schema, so older databases get the column here
+                cursor.execute('PRAGMA table_info(shortcut_usage)')
+                if 'use_count' not in {row[1] for row in cursor.fetchall()}:
+                    cursor.execute('ALTER TABLE shortcut_usage ADD COLUMN use_count INTEGER DEFAULT 1')
+                
                 # Create shortcut conflicts table
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS shortcut_conflicts (
@@ -185,68 +253,67 @@ class ShortcutManager:
     async def _load_shortcuts(self):
         """Load shortcuts from database or initialize with defaults."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT COUNT(*) FROM shortcuts')
-                count = cursor.fetchone()[0]
-                
-                if count == 0:
-                    # Initialize with default shortcuts
-                    await self._initialize_default_shortcuts()
-                else:
-                    # Load existing shortcuts
-                    await self._load_existing_shortcuts()
-                    
+            count = (await self.db.fetchone('SELECT COUNT(*) FROM shortcuts'))[0]
+            
+            if count == 0:
+                # Initialize with default shortcuts
+                await self._initialize_default_shortcuts()
+            else:
+                # Load existing shortcuts
+                await self._load_existing_shortcuts()
+            
+            await self._load_conflicts()
+            
         except Exception as e:
             logger.error(f"Failed to load shortcuts: {e}")
     
     async def _initialize_default_shortcuts(self):
         """Initialize database with default shortcuts."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                for context, context_shortcuts in self.default_shortcuts.items():
-                    for shortcut_key, shortcut_info in context_shortcuts.items():
-                        cursor.execute('''
-                            INSERT INTO shortcuts (shortcut_key, context, action, description, is_custom)
-                            VALUES (?, ?, ?, ?, ?)
-                        ''', (
-                            shortcut_key,
-                            context,
-                            shortcut_info["action"],
-                            shortcut_info["description"],
-                            False
-                        ))
-                        
-                        # Register in memory
-                        self._register_shortcut(shortcut_key, context, shortcut_info["action"])
-                
-                conn.commit()
-                logger.info("Default shortcuts initialized")
-                
+            rows = []
+            for context, context_shortcuts in self.default_shortcuts.items():
+                for shortcut_key, shortcut_info in context_shortcuts.items():
+                    rows.append((
+                        shortcut_key,
+                        context,
+                        shortcut_info["action"],
+                        shortcut_info["description"],
+                        False
+                    ))
+            
+            await self.db.executemany('''
+                INSERT INTO shortcuts (shortcut_key, context, action, description, is_custom)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+            
+            # Register in memory
+            for shortcut_key, context, action, _, _ in rows:
+                self._register_shortcut(shortcut_key, context, action)
+            self._compile_dispatch()
+            
+            logger.info("Default shortcuts initialized")
+            
         except Exception as e:
             logger.error(f"Failed to initialize default shortcuts: {e}")
     
     async def _load_existing_shortcuts(self):
         """Load existing shortcuts from database."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT shortcut_key, context, action FROM shortcuts
-                    WHERE is_enabled = TRUE
-                ''')
-                
-                for shortcut_key, context, action in cursor.fetchall():
-                    self._register_shortcut(shortcut_key, context, action)
-                    
+            rows = await self.db.fetchall('''
+                SELECT shortcut_key, context, action FROM shortcuts
+                WHERE is_enabled = TRUE
+            ''')
+            
+            for shortcut_key, context, action in rows:
+                self._register_shortcut(shortcut_key, context, action)
+            self._compile_dispatch()
+            
         except Exception as e:
             logger.error(f"Failed to load existing shortcuts: {e}")
     
     def _register_shortcut(self, shortcut_key: str, context: str, action: str):
         """Register shortcut in memory."""
-        normalized_key = self._normalize_shortcut_key(shortcut_key)
+        normalized_key = self._normalize_sequence(shortcut_key)
         
         if context == "global":
             self.shortcuts[normalized_key] = action
@@ -255,6 +322,31 @@ class ShortcutManager:
                 self.context_shortcuts[context] = {}
             self.context_shortcuts[context][normalized_key] = action
     
+    def _compile_dispatch(self):
+        """Build one dispatch trie per context, with the global shortcuts underneath.
+        
+        Keypresses then resolve with one dict lookup per chord instead of
+        checking the context table and falling back to the global one.
+        """
+        dispatch = {"global": _DispatchNode()}
+        for context in self.context_shortcuts:
+            dispatch[context] = _DispatchNode()
+        
+        for root in dispatch.values():
+            for sequence, action in self.shortcuts.items():
+                root.insert(sequence, "global", action)
+        for context, context_shortcuts in self.context_shortcuts.items():
+            for sequence, action in context_shortcuts.items():
+                dispatch[context].insert(sequence, context, action)
+        
+        self._dispatch = dispatch
+        self._pending_sequence = None
+    
+    def _normalize_sequence(self, shortcut_key: str) -> str:
+        """Normalize a chord or a space-separated chord sequence ("Ctrl+K Ctrl+S")."""
+        chords = re.sub(r'\s*\+\s*', '+', shortcut_key.strip()).split()
+        return ' '.join(self._normalize_shortcut_key(chord) for chord in chords)
+    
     def _normalize_shortcut_key(self, shortcut_key: str) -> str:
         """Normalize shortcut key for consistent matching."""
         # Convert to lowercase and standardize modifier order
@@ -289,24 +381,40 @@ class ShortcutManager:
         logger.info(f"Registered callback for action: {action}")
     
     async def handle_shortcut(self, shortcut_key: str, context: str = "global") -> Dict:
-        """Handle shortcut key press."""
+        """Handle shortcut key press.
+        
+        ``shortcut_key`` is one chord or a whole sequence. A chord that only
+        starts a sequence returns "pending" until the next chord completes it;
+        the sequence is dropped after SEQUENCE_TIMEOUT seconds.
+        """
         try:
-            normalized_key = self._normalize_shortcut_key(shortcut_key)
-            
-            # Check context-specific shortcuts first
-            if context != "global" and context in self.context_shortcuts:
-                if normalized_key in self.context_shortcuts[context]:
-                    action = self.context_shortcuts[context][normalized_key]
-                    result = await self._execute_action(action, context, shortcut_key)
-                    return result
-            
-            # Check global shortcuts
-            if normalized_key in self.shortcuts:
-                action = self.shortcuts[normalized_key]
-                result = await self._execute_action(action, "global", shortcut_key)
-                return result
-            
-            return {"status": "not_found", "message": f"No action for shortcut: {shortcut_key}"}
+            sequence = self._normalized_keys.get(shortcut_key)
+            if sequence is None:
+                sequence = self._normalize_sequence(shortcut_key)
+                if len(self._normalized_keys) < MAX_NORMALIZED_KEYS:
+                    self._normalized_keys[shortcut_key] = sequence
+            
+            # Continue a sequence in progress if this chord extends it
+            node = None
+            pending = self._pending_sequence
+            self._pending_sequence = None
+            if pending and pending[1] == context and time.monotonic() < pending[2]:
+                node = pending[0].walk(sequence)
+                if node is not None:
+                    shortcut_key = f"{pending[3]} {shortcut_key}"
+            if node is None:
+                root = self._dispatch.get(context) or self._dispatch.get("global")
+                node = root.walk(sequence) if root else None
+            
+            if node is None:
+                return {"status": "not_found", "message": f"No action for shortcut: {shortcut_key}"}
+            
+            if node.action is None:
+                self._pending_sequence = (node, context, time.monotonic() + SEQUENCE_TIMEOUT, shortcut_key)
+                return {"status": "pending", "sequence": shortcut_key,
+                        "message": f"Waiting for the next key in: {shortcut_key}"}
+            
+            return await self._execute_action(node.action, node.context, shortcut_key)
             
         except Exception as e:
             logger.error(f"Failed to handle shortcut {shortcut_key}: {e}")
@@ -316,7 +424,7 @@ class ShortcutManager:
         """Execute action for shortcut."""
         try:
             # Record usage
-            await self._record_usage(shortcut_key, context, action)
+            self._record_usage(shortcut_key, context, action)
             
             # Execute callback if registered
             if action in self.action_callbacks:
@@ -336,40 +444,65 @@ class ShortcutManager:
             logger.error(f"Failed to execute action {action}: {e}")
             return {"status": "error", "action": action, "message": str(e)}
     
-    async def _record_usage(self, shortcut_key: str, context: str, action: str):
-        """Record shortcut usage for statistics."""
+    def _record_usage(self, shortcut_key: str, context: str, action: str):
+        """Count shortcut usage in memory; counts are written in batches."""
+        key = (shortcut_key, context, action)
+        self._usage_counts[key] = self._usage_counts.get(key, 0) + 1
+        
+        if self._usage_flush is None:
+            loop = asyncio.get_running_loop()
+            self._usage_flush = loop.call_later(USAGE_FLUSH_INTERVAL, self._flush_usage)
+    
+    def _flush_usage(self):
+        """Queue the aggregated usage counts as one write."""
+        if self._usage_flush is not None:
+            self._usage_flush.cancel()
+            self._usage_flush = None
+        if not self._usage_counts:
+            return
+        
+        rows = [(shortcut_key, context, action, count)
+                for (shortcut_key, context, action), count in self._usage_counts.items()]
+        self._usage_counts = {}
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO shortcut_usage (shortcut_key, context, action)
-                    VALUES (?, ?, ?)
-                ''', (shortcut_key, context, action))
-                conn.commit()
+            self.db.run_write_nowait(lambda conn: conn.executemany('''
+                INSERT INTO shortcut_usage (shortcut_key, context, action, use_count)
+                VALUES (?, ?, ?, ?)
+            ''', rows))
         except Exception as e:
             logger.error(f"Failed to record shortcut usage: {e}")
     
+    async def flush_usage(self):
+        """Write pending usage counts and wait for them to commit."""
+        self._flush_usage()
+        await self.db.run_write(lambda conn: None)
+    
+    async def close(self):
+        """Write usage counts still held in memory before shutting down."""
+        _open_managers.discard(self)
+        await self.flush_usage()
+    
     async def add_custom_shortcut(self, shortcut_key: str, context: str, action: str, description: str = "") -> bool:
         """Add custom shortcut."""
         try:
             # Check for conflicts
-            conflicts = await self._check_conflicts(shortcut_key, context)
+            conflicts = self._check_conflicts(shortcut_key, context)
             if conflicts:
                 logger.warning(f"Shortcut conflict detected: {shortcut_key} in {context}")
+                await self._record_conflicts(shortcut_key, context, action, conflicts)
                 return False
             
             # Add to database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO shortcuts 
-                    (shortcut_key, context, action, description, is_custom, is_enabled)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (shortcut_key, context, action, description, True, True))
-                conn.commit()
+            await self.db.execute('''
+                INSERT OR REPLACE INTO shortcuts
+                (shortcut_key, context, action, description, is_custom, is_enabled)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (shortcut_key, context, action, description, True, True))
             
             # Register in memory
             self._register_shortcut(shortcut_key, context, action)
+            self._compile_dispatch()
+            await self._resolve_conflicts(shortcut_key, context)
             
             logger.info(f"Added custom shortcut: {shortcut_key} -> {action} in {context}")
             return True
@@ -381,22 +514,20 @@ class ShortcutManager:
     async def remove_shortcut(self, shortcut_key: str, context: str) -> bool:
         """Remove shortcut."""
         try:
-            normalized_key = self._normalize_shortcut_key(shortcut_key)
+            normalized_key = self._normalize_sequence(shortcut_key)
             
             # Remove from database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE shortcuts SET is_enabled = FALSE
-                    WHERE shortcut_key = ? AND context = ?
-                ''', (shortcut_key, context))
-                conn.commit()
+            await self.db.execute('''
+                UPDATE shortcuts SET is_enabled = FALSE
+                WHERE shortcut_key = ? AND context = ?
+            ''', (shortcut_key, context))
             
             # Remove from memory
             if context == "global" and normalized_key in self.shortcuts:
                 del self.shortcuts[normalized_key]
             elif context in self.context_shortcuts and normalized_key in self.context_shortcuts[context]:
                 del self.context_shortcuts[context][normalized_key]
+            self._compile_dispatch()
             
             logger.info(f"Removed shortcut: {shortcut_key} from {context}")
             return True
@@ -405,18 +536,19 @@ class ShortcutManager:
             logger.error(f"Failed to remove shortcut: {e}")
             return False
     
-    async def _check_conflicts(self, shortcut_key: str, context: str) -> List[Dict]:
-        """Check for shortcut conflicts."""
+    def _check_conflicts(self, shortcut_key: str, context: str) -> List[Dict]:
+        """Check for shortcut conflicts against the in-memory tables."""
         try:
             conflicts = []
-            normalized_key = self._normalize_shortcut_key(shortcut_key)
+            normalized_key = self._normalize_sequence(shortcut_key)
             
             # Check global shortcuts
             if context != "global" and normalized_key in self.shortcuts:
                 conflicts.append({
                     "existing_context": "global",
                     "existing_action": self.shortcuts[normalized_key],
-                    "new_context": context
+                    "new_context": context,
+                    "type": "key"
                 })
             
             # Check context shortcuts
@@ -425,95 +557,141 @@ class ShortcutManager:
                     conflicts.append({
                         "existing_context": ctx,
                         "existing_action": ctx_shortcuts[normalized_key],
-                        "new_context": context
+                        "new_context": context,
+                        "type": "key"
                     })
             
+            # A sequence can't share its first chords with a shorter shortcut that is
+            # dispatched in the same place: one of the two could never fire
+            if context == "global":
+                scopes = [("global", self.shortcuts)] + list(self.context_shortcuts.items())
+            else:
+                scopes = [("global", self.shortcuts), (context, self.context_shortcuts.get(context, {}))]
+            for ctx, ctx_shortcuts in scopes:
+                for existing_key, existing_action in ctx_shortcuts.items():
+                    if existing_key.startswith(normalized_key + " ") or normalized_key.startswith(existing_key + " "):
+                        conflicts.append({
+                            "existing_context": ctx,
+                            "existing_action": existing_action,
+                            "existing_shortcut": existing_key,
+                            "new_context": context,
+                            "type": "prefix"
+                        })
+            
             return conflicts
             
         except Exception as e:
             logger.error(f"Failed to check conflicts: {e}")
             return []
     
+    async def _record_conflicts(self, shortcut_key: str, context: str, action: str, conflicts: List[Dict]):
+        """Remember rejected registrations so get_shortcut_conflicts can report them."""
+        normalized_key = self._normalize_sequence(shortcut_key)
+        for conflict in conflicts:
+            key = (normalized_key, conflict["existing_context"], context)
+            if key in self._conflicts:
+                continue
+            
+            result = await self.db.execute('''
+                INSERT INTO shortcut_conflicts (shortcut_key, context1, context2, action1, action2)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (shortcut_key, conflict["existing_context"], context, conflict["existing_action"], action))
+            
+            self._conflicts[key] = {
+                "id": result.lastrowid,
+                "shortcut_key": shortcut_key,
+                "context1": conflict["existing_context"],
+                "context2": context,
+                "action1": conflict["existing_action"],
+                "action2": action,
+                "created_at": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+            }
+    
+    async def _resolve_conflicts(self, shortcut_key: str, context: str):
+        """Mark conflicts for a shortcut resolved once it registers cleanly."""
+        normalized_key = self._normalize_sequence(shortcut_key)
+        resolved = [key for key in self._conflicts if key[0] == normalized_key and key[2] == context]
+        if not resolved:
+            return
+        
+        ids = [(self._conflicts.pop(key)["id"],) for key in resolved]
+        await self.db.executemany('''
+            UPDATE shortcut_conflicts SET resolved = TRUE, resolution = 'registered'
+            WHERE id = ?
+        ''', ids)
+    
+    async def _load_conflicts(self):
+        """Load unresolved conflicts into memory."""
+        rows = await self.db.fetchall('''
+            SELECT id, shortcut_key, context1, context2, action1, action2, created_at
+            FROM shortcut_conflicts
+            WHERE resolved = FALSE
+        ''')
+        
+        for conflict_id, shortcut_key, context1, context2, action1, action2, created_at in rows:
+            self._conflicts[(self._normalize_sequence(shortcut_key), context1, context2)] = {
+                "id": conflict_id,
+                "shortcut_key": shortcut_key,
+                "context1": context1,
+                "context2": context2,
+                "action1": action1,
+                "action2": action2,
+                "created_at": created_at
+            }
+    
     async def get_shortcuts(self, context: str = None) -> Dict:
         """Get shortcuts, optionally filtered by context."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                if context:
-                    cursor.execute('''
-                        SELECT shortcut_key, context, action, description, is_custom
-                        FROM shortcuts 
-                        WHERE context = ? AND is_enabled = TRUE
-                        ORDER BY shortcut_key
-                    ''', (context,))
-                else:
-                    cursor.execute('''
-                        SELECT shortcut_key, context, action, description, is_custom
-                        FROM shortcuts 
-                        WHERE is_enabled = TRUE
-                        ORDER BY context, shortcut_key
-                    ''')
-                
-                shortcuts = {}
-                for row in cursor.fetchall():
-                    shortcut_key, ctx, action, description, is_custom = row
-                    
-                    if ctx not in shortcuts:
-                        shortcuts[ctx] = []
-                    
-                    shortcuts[ctx].append({
-                        "key": shortcut_key,
-                        "action": action,
-                        "description": description,
-                        "is_custom": bool(is_custom)
-                    })
+            if context:
+                rows = await self.db.fetchall('''
+                    SELECT shortcut_key, context, action, description, is_custom
+                    FROM shortcuts 
+                    WHERE context = ? AND is_enabled = TRUE
+                    ORDER BY shortcut_key
+                ''', (context,))
+            else:
+                rows = await self.db.fetchall('''
+                    SELECT shortcut_key, context, action, description, is_custom
+                    FROM shortcuts 
+                    WHERE is_enabled = TRUE
+                    ORDER BY context, shortcut_key
+                ''')
+            
+            shortcuts = {}
+            for row in rows:
+                shortcut_key, ctx, action, description, is_custom = row
                 
-                return shortcuts
+                if ctx not in shortcuts:
+                    shortcuts[ctx] = []
                 
+                shortcuts[ctx].append({
+                    "key": shortcut_key,
+                    "action": action,
+                    "description": description,
+                    "is_custom": bool(is_custom)
+                })
+            
+            return shortcuts
+            
         except Exception as e:
             logger.error(f"Failed to get shortcuts: {e}")
             return {}
     
     async def get_shortcut_conflicts(self) -> List[Dict]:
         """Get unresolved shortcut conflicts."""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT * FROM shortcut_conflicts
-                    WHERE resolved = FALSE
-                    ORDER BY created_at DESC
-                ''')
-                
-                conflicts = []
-                for row in cursor.fetchall():
-                    conflict = {
-                        "id": row[0],
-                        "shortcut_key": row[1],
-                        "context1": row[2],
-                        "context2": row[3],
-                        "action1": row[4],
-                        "action2": row[5],
-                        "created_at": row[7]
-                    }
-                    conflicts.append(conflict)
-                
-                return conflicts
-                
-        except Exception as e:
-            logger.error(f"Failed to get shortcut conflicts: {e}")
-            return []
+        return sorted(self._conflicts.values(), key=lambda conflict: conflict["created_at"], reverse=True)
     
     async def get_usage_statistics(self) -> Dict:
         """Get shortcut usage statistics."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            await self.flush_usage()
+            
+            def read_stats(conn):
                 cursor = conn.cursor()
                 
                 # Most used shortcuts
                 cursor.execute('''
-                    SELECT shortcut_key, context, action, COUNT(*) as usage_count
+                    SELECT shortcut_key, context, action, SUM(use_count) as usage_count
                     FROM shortcut_usage
                     GROUP BY shortcut_key, context, action
                     ORDER BY usage_count DESC
@@ -531,7 +709,7 @@ class ShortcutManager:
                 
                 # Usage by context
                 cursor.execute('''
-                    SELECT context, COUNT(*) as usage_count
+                    SELECT context, SUM(use_count) as usage_count
                     FROM shortcut_usage
                     GROUP BY context
                     ORDER BY usage_count DESC
@@ -541,18 +719,22 @@ class ShortcutManager:
                 
                 # Recent usage
                 cursor.execute('''
-                    SELECT COUNT(*) FROM shortcut_usage
+                    SELECT COALESCE(SUM(use_count), 0) FROM shortcut_usage
                     WHERE used_at > datetime('now', '-1 day')
                 ''')
                 recent_usage = cursor.fetchone()[0]
                 
-                return {
-                    "popular_shortcuts": popular_shortcuts,
-                    "context_usage": context_usage,
-                    "recent_usage": recent_usage,
-                    "total_shortcuts": len(self.shortcuts) + sum(len(ctx) for ctx in self.context_shortcuts.values())
-                }
-                
+                return popular_shortcuts, context_usage, recent_usage
+            
+            popular_shortcuts, context_usage, recent_usage = await self.db.run_read(read_stats)
+            
+            return {
+                "popular_shortcuts": popular_shortcuts,
+                "context_usage": context_usage,
+                "recent_usage": recent_usage,
+                "total_shortcuts": len(self.shortcuts) + sum(len(ctx) for ctx in self.context_shortcuts.values())
+            }
+            
         except Exception as e:
             logger.error(f"Failed to get usage statistics: {e}")
             return {}
@@ -586,7 +768,7 @@ class ShortcutManager:
                     description = shortcut_info.get("description", "")
                     
                     # Check for conflicts
-                    shortcut_conflicts = await self._check_conflicts(shortcut_key, context)
+                    shortcut_conflicts = self._check_conflicts(shortcut_key, context)
                     if shortcut_conflicts:
                         conflicts.append({
                             "shortcut": shortcut_key,
@@ -616,20 +798,19 @@ class ShortcutManager:
     async def reset_to_defaults(self) -> bool:
         """Reset shortcuts to default configuration."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
+            def clear_all(conn):
                 # Clear all shortcuts
-                cursor.execute('DELETE FROM shortcuts')
+                conn.execute('DELETE FROM shortcuts')
                 
                 # Clear usage history
-                cursor.execute('DELETE FROM shortcut_usage')
-                
-                conn.commit()
+                conn.execute('DELETE FROM shortcut_usage')
+            
+            await self.db.run_write(clear_all)
             
             # Clear memory
             self.shortcuts.clear()
             self.context_shortcuts.clear()
+            self._usage_counts.clear()
             
             # Reinitialize defaults
             await self._initialize_default_shortcuts()
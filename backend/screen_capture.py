@@ -5,11 +5,13 @@ This module provides cross-platform screen capture capabilities with OCR
 and error detection features. All processing is done locally for privacy.
 """
 
-import os
 import sys
 import logging
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Tuple, Union
 import asyncio
 import time
 
@@ -35,17 +37,114 @@ except ImportError:
     PIL_AVAILABLE = False
     print("Warning: PIL not available. Some image processing features disabled.")
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    print("Warning: NumPy not available. Change-gated monitoring disabled.")
+
+try:
+    import mss
+    MSS_AVAILABLE = True
+except ImportError:
+    MSS_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+
+class ScreenFrame:
+    """An in-memory screen capture backed by a NumPy RGB array.
+    
+    Frames flow from capture straight into OCR, error detection and UI
+    detection without being encoded to PNG or written to disk. Derived views
+    such as the grayscale image are computed once and shared by detectors.
+    """
+    
+    def __init__(self, pixels, monitor: int = 0, timestamp: float = None):
+        self.pixels = pixels
+        self.monitor = monitor
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self._gray = None
+    
+    @classmethod
+    def from_bgra(cls, buffer, width: int, height: int, monitor: int = 0) -> "ScreenFrame":
+        """Wrap a raw BGRA buffer (as returned by mss) with a single copy to RGB."""
+        bgra = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 4)
+        return cls(np.ascontiguousarray(bgra[..., 2::-1]), monitor=monitor)
+    
+    @classmethod
+    def from_image(cls, image, monitor: int = 0) -> "ScreenFrame":
+        """Wrap a PIL image."""
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return cls(np.asarray(image), monitor=monitor)
+    
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+    
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+    
+    @property
+    def dimensions(self) -> Tuple[int, int]:
+        return (self.width, self.height)
+    
+    @property
+    def nbytes(self) -> int:
+        return self.pixels.nbytes
+    
+    def gray(self):
+        """Grayscale view for OpenCV detectors, computed on first use."""
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.pixels, cv2.COLOR_RGB2GRAY)
+        return self._gray
+    
+    def region(self, x: int, y: int, width: int, height: int):
+        """Zero-copy view of part of the frame."""
+        return self.pixels[y:y + height, x:x + width]
+    
+    def copy(self) -> "ScreenFrame":
+        """Detach the frame from a reused capture buffer."""
+        return ScreenFrame(self.pixels.copy(), monitor=self.monitor, timestamp=self.timestamp)
+    
+    def to_image(self):
+        """Convert to a PIL image (only needed for persistence or display)."""
+        return Image.fromarray(self.pixels)
+
+
 class ScreenCaptureEngine:
     """Handles screen capture and analysis functionality"""
     
     def __init__(self, capture_dir: str = "/tmp/westfall_captures"):
+        # Created lazily: the analysis path never touches disk
         self.capture_dir = Path(capture_dir)
-        self.capture_dir.mkdir(exist_ok=True)
+        self._persist_executor = None
         self.monitoring = False
         self.last_capture = None
         
+        # Change-gated monitoring state
+        self.tile_size = 256
+        self.ocr_cache_size = 128
+        # Every pytesseract call starts a tesseract process, so changed tiles are
+        # OCRed as merged regions, padded so words crossing an edge are read
+        # whole. Past this share of changed tiles, or this many separate
+        # regions, one full-frame pass is cheaper.
+        self.ocr_margin = 32
+        self.full_frame_ocr_fraction = 0.5
+        self.max_ocr_regions = 4
+        self._frame_buffer = None
+        self._tile_hashes: Dict[Tuple[int, int], str] = {}
+        # Words per tile as (line key, word), kept for tiles that did not change
+        self._tile_words: Dict[Tuple[int, int], List[Tuple[tuple, Dict[str, Any]]]] = {}
+        self._ocr_passes = 0
+        self._ui_elements: Dict[str, List[Dict]] = {"buttons": [], "windows": []}
+        self._ocr_region_cache: "OrderedDict[str, List[Tuple[tuple, Dict[str, Any]]]]" = OrderedDict()
+        self.monitor_stats = {"frames": 0, "static_frames": 0, "tiles_analyzed": 0,
+                              "ocr_calls": 0, "ocr_cache_hits": 0}
+        
         # Error patterns for detection
         self.error_patterns = [
             "error", "exception", "failed", "crash", "abort",
@@ -53,35 +152,35 @@ class ScreenCaptureEngine:
             "null pointer", "memory error", "timeout", "connection failed"
         ]
     
-    def capture_screen(self, monitor: int = 0) -> Optional[Dict[str, Any]]:
-        """Capture the current screen"""
-        if not PIL_AVAILABLE:
+    def capture_screen(self, monitor: int = 0, persist: bool = False) -> Optional[Dict[str, Any]]:
+        """Capture the current screen into an in-memory frame.
+        
+        Args:
+            monitor: mss monitor index; 0 is the union of all monitors.
+            persist: Also write a PNG to ``capture_dir``. The write happens on
+                a background thread; ``filepath`` names the file it will land in.
+        """
+        if not NUMPY_AVAILABLE or not (MSS_AVAILABLE or PIL_AVAILABLE):
             return {
                 "success": False,
-                "message": "PIL not available for screen capture"
+                "message": "NumPy and mss or PIL are required for screen capture"
             }
         
         try:
-            # Capture screenshot
-            screenshot = ImageGrab.grab()
-            
-            # Generate filename with timestamp
-            timestamp = int(time.time())
-            filename = f"capture_{timestamp}.png"
-            filepath = self.capture_dir / filename
-            
-            # Save screenshot
-            screenshot.save(filepath)
+            frame = self._grab_frame(monitor)
             
             self.last_capture = {
                 "success": True,
-                "filepath": str(filepath),
-                "timestamp": timestamp,
-                "size": os.path.getsize(filepath),
-                "dimensions": screenshot.size
+                "frame": frame,
+                "timestamp": int(frame.timestamp),
+                "size": frame.nbytes,
+                "dimensions": frame.dimensions
             }
             
-            logger.info(f"Screen captured: {filepath}")
+            if persist:
+                self.last_capture["filepath"] = self.persist_frame(frame)[0]
+            
+            logger.info(f"Screen captured: {frame.width}x{frame.height}")
             return self.last_capture
             
         except Exception as e:
@@ -91,8 +190,44 @@ class ScreenCaptureEngine:
                 "message": f"Capture failed: {str(e)}"
             }
     
-    def extract_text(self, image_path: str) -> Optional[Dict[str, Any]]:
-        """Extract text from image using OCR"""
+    def _grab_pixels(self, monitor: int = 0):
+        """Grab the screen as an RGB array view, without any encoding step."""
+        if MSS_AVAILABLE:
+            with mss.mss() as sct:
+                shot = sct.grab(sct.monitors[monitor])
+                bgra = np.frombuffer(shot.bgra, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+                return bgra[..., 2::-1]
+        screenshot = ImageGrab.grab()
+        return np.asarray(screenshot if screenshot.mode == "RGB" else screenshot.convert("RGB"))
+    
+    def _grab_frame(self, monitor: int = 0) -> ScreenFrame:
+        """Grab the screen into a new frame."""
+        return ScreenFrame(np.ascontiguousarray(self._grab_pixels(monitor)), monitor=monitor)
+    
+    def persist_frame(self, frame: ScreenFrame) -> Tuple[str, Future]:
+        """Write a frame to disk as PNG on a background thread.
+        
+        Returns:
+            The target path and a future that resolves to it once written.
+        """
+        if self._persist_executor is None:
+            self.capture_dir.mkdir(parents=True, exist_ok=True)
+            self._persist_executor = ThreadPoolExecutor(max_workers=1,
+                                                        thread_name_prefix="capture-writer")
+        
+        filepath = self.capture_dir / f"capture_{int(frame.timestamp * 1000)}.png"
+        # Copy so a reused capture buffer can be overwritten while we encode
+        detached = frame.copy()
+        
+        def _write() -> str:
+            detached.to_image().save(filepath)
+            logger.info(f"Screen capture saved: {filepath}")
+            return str(filepath)
+        
+        return str(filepath), self._persist_executor.submit(_write)
+    
+    def extract_text(self, image: Union[str, ScreenFrame]) -> Optional[Dict[str, Any]]:
+        """Extract text from a frame or image file using OCR"""
         if not TESSERACT_AVAILABLE or not PIL_AVAILABLE:
             return {
                 "success": False,
@@ -100,14 +235,12 @@ class ScreenCaptureEngine:
             }
         
         try:
-            # Load image
-            image = Image.open(image_path)
-            
-            # Extract text using Tesseract
-            text = pytesseract.image_to_string(image)
+            # Frames are handed to Tesseract as arrays; only paths are decoded
+            source = image.pixels if isinstance(image, ScreenFrame) else Image.open(image)
             
-            # Get detailed data (bounding boxes, confidence)
-            data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+            # One OCR pass: text is rebuilt from the word boxes
+            data = pytesseract.image_to_data(source, output_type=pytesseract.Output.DICT)
+            text = self._text_from_data(data)
             
             return {
                 "success": True,
@@ -148,7 +281,7 @@ class ScreenCaptureEngine:
             "severity": self._assess_error_severity(detected_errors)
         }
     
-    def analyze_ui_elements(self, image_path: str) -> Dict[str, Any]:
+    def analyze_ui_elements(self, image: Union[str, ScreenFrame]) -> Dict[str, Any]:
         """Analyze UI elements in the captured image"""
         if not OPENCV_AVAILABLE:
             return {
@@ -157,9 +290,10 @@ class ScreenCaptureEngine:
             }
         
         try:
-            # Load image
-            image = cv2.imread(image_path)
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if isinstance(image, ScreenFrame):
+                gray = image.gray()
+            else:
+                gray = cv2.cvtColor(cv2.imread(image), cv2.COLOR_BGR2GRAY)
             
             # Detect buttons (rectangles)
             button_contours = self._detect_rectangles(gray)
@@ -184,15 +318,15 @@ class ScreenCaptureEngine:
                 "message": f"UI analysis failed: {str(e)}"
             }
     
-    def full_analysis(self, image_path: str) -> Dict[str, Any]:
-        """Perform comprehensive analysis of a captured image"""
+    def full_analysis(self, image: Union[str, ScreenFrame]) -> Dict[str, Any]:
+        """Perform comprehensive analysis of a captured frame or image file"""
         results = {
-            "image_path": image_path,
+            "image_path": image if isinstance(image, str) else None,
             "timestamp": time.time()
         }
         
         # Extract text
-        ocr_result = self.extract_text(image_path)
+        ocr_result = self.extract_text(image)
         results["ocr"] = ocr_result
         
         # Detect errors if OCR was successful
@@ -201,28 +335,39 @@ class ScreenCaptureEngine:
             results["error_detection"] = error_analysis
         
         # Analyze UI elements
-        ui_analysis = self.analyze_ui_elements(image_path)
+        ui_analysis = self.analyze_ui_elements(image)
         results["ui_analysis"] = ui_analysis
         
         return results
     
-    async def start_monitoring(self, interval: int = 30):
-        """Start continuous screen monitoring"""
+    async def start_monitoring(self, interval: int = 30, save_captures: bool = False):
+        """Start continuous screen monitoring.
+        
+        Each frame is split into tiles and compared to the previous frame by
+        tile hash; OCR and UI detection only run on tiles that changed, so a
+        static screen costs one capture and a hash pass per interval.
+        """
         self.monitoring = True
         logger.info(f"Starting screen monitoring with {interval}s interval")
+        loop = asyncio.get_running_loop()
         
         while self.monitoring:
             try:
-                # Capture screen
-                capture_result = self.capture_screen()
+                if not NUMPY_AVAILABLE or not (MSS_AVAILABLE or PIL_AVAILABLE):
+                    logger.error("Screen monitoring requires NumPy and mss or PIL")
+                    self.monitoring = False
+                    break
                 
-                if capture_result and capture_result.get("success"):
-                    # Perform analysis
-                    analysis = self.full_analysis(capture_result["filepath"])
-                    
-                    # Check for errors
-                    if analysis.get("error_detection", {}).get("has_errors"):
-                        logger.warning(f"Errors detected in screen capture: {analysis['error_detection']}")
+                frame = await loop.run_in_executor(None, self.capture_frame)
+                analysis = await loop.run_in_executor(None, self.analyze_frame_changes, frame)
+                
+                # Only keep a PNG on disk when something actually changed
+                if save_captures and analysis.get("changed_tiles"):
+                    self.persist_frame(frame)
+                
+                # Check for errors
+                if analysis.get("error_detection", {}).get("has_errors"):
+                    logger.warning(f"Errors detected in screen capture: {analysis['error_detection']}")
                 
                 await asyncio.sleep(interval)
                 
@@ -230,6 +375,237 @@ class ScreenCaptureEngine:
                 logger.error(f"Monitoring error: {e}")
                 await asyncio.sleep(interval)
     
+    def capture_frame(self, monitor: int = 0) -> ScreenFrame:
+        """Capture the screen into a reused in-memory RGB buffer.
+        
+        The returned frame is overwritten by the next call; use
+        ``ScreenFrame.copy()`` to keep it.
+        """
+        pixels = self._grab_pixels(monitor)
+        if self._frame_buffer is None or self._frame_buffer.shape != pixels.shape:
+            self._frame_buffer = np.empty(pixels.shape, dtype=np.uint8)
+        np.copyto(self._frame_buffer, pixels)
+        return ScreenFrame(self._frame_buffer, monitor=monitor)
+    
+    def _tile_grid(self, frame) -> List[Tuple[Tuple[int, int], Tuple[int, int, int, int]]]:
+        """Split a frame into (row, col) tiles with their (x, y, w, h) boxes."""
+        height, width = frame.shape[:2]
+        tiles = []
+        for row, y in enumerate(range(0, height, self.tile_size)):
+            for col, x in enumerate(range(0, width, self.tile_size)):
+                tiles.append(((row, col), (x, y, min(self.tile_size, width - x),
+                                           min(self.tile_size, height - y))))
+        return tiles
+    
+    @staticmethod
+    def _tile_hash(tile) -> str:
+        """Cheap block hash: subsample every 4th pixel and drop the low bits.
+        
+        Quantizing makes the hash ignore compression and dithering noise while
+        still catching any visible change such as new text.
+        """
+        sample = np.ascontiguousarray(tile[::4, ::4] >> 3)
+        return hashlib.blake2b(sample.tobytes(), digest_size=12).hexdigest()
+    
+    def analyze_frame_changes(self, frame: Optional[ScreenFrame] = None) -> Dict[str, Any]:
+        """Analyze only the tiles that changed since the previous frame.
+        
+        Returns an analysis shaped like full_analysis, plus ``changed_tiles``.
+        Adjacent changed tiles are OCRed together (see ``_ocr_changed_tiles``)
+        and results are cached by content, so a region that reappears (for
+        example after switching back to a window) is not OCRed again.
+        """
+        if frame is None:
+            frame = self.capture_frame()
+        frame = frame.pixels
+        self.monitor_stats["frames"] += 1
+        
+        grid = self._tile_grid(frame)
+        changed = []
+        current_hashes = {}
+        for key, (x, y, w, h) in grid:
+            tile_hash = self._tile_hash(frame[y:y + h, x:x + w])
+            current_hashes[key] = tile_hash
+            if self._tile_hashes.get(key) != tile_hash:
+                changed.append((key, (x, y, w, h)))
+        
+        # Drop tiles that no longer exist (resolution change)
+        for key in set(self._tile_hashes) - set(current_hashes):
+            self._tile_words.pop(key, None)
+        self._tile_hashes = current_hashes
+        
+        results = {
+            "timestamp": time.time(),
+            "dimensions": (frame.shape[1], frame.shape[0]),
+            "total_tiles": len(grid),
+            "changed_tiles": len(changed)
+        }
+        
+        if not changed:
+            self.monitor_stats["static_frames"] += 1
+            return results
+        
+        self.monitor_stats["tiles_analyzed"] += len(changed)
+        
+        if TESSERACT_AVAILABLE:
+            self._ocr_changed_tiles(frame, [key for key, _ in changed], len(grid))
+            text, words = self._text_from_tiles()
+            results["ocr"] = {
+                "success": True,
+                "text": text,
+                "word_count": len(text.split()),
+                "detected_words": words
+            }
+            if text:
+                results["error_detection"] = self.detect_errors(text)
+        
+        if OPENCV_AVAILABLE:
+            results["ui_analysis"] = self._analyze_changed_region(frame, [box for _, box in changed])
+        
+        return results
+    
+    @staticmethod
+    def _tile_regions(keys: List[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
+        """Group tiles into regions of neighbours (including diagonals)."""
+        remaining = set(keys)
+        regions = []
+        while remaining:
+            stack = [remaining.pop()]
+            region = []
+            while stack:
+                row, col = stack.pop()
+                region.append((row, col))
+                for neighbour in [(row + dr, col + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)]:
+                    if neighbour in remaining:
+                        remaining.remove(neighbour)
+                        stack.append(neighbour)
+            regions.append(sorted(region))
+        return sorted(regions)
+    
+    def _ocr_changed_tiles(self, frame, keys: List[Tuple[int, int]], total_tiles: int):
+        """Re-read the words of changed tiles with as few OCR calls as possible.
+        
+        Each region of adjacent changed tiles is OCRed once over its bounding
+        box plus ``ocr_margin``; words are then assigned to the tile holding
+        their centre, and words centred in unchanged tiles are ignored since
+        those tiles keep their earlier words. With too many changed tiles or
+        regions the whole frame is OCRed in one call instead.
+        """
+        height, width = frame.shape[:2]
+        regions = self._tile_regions(keys)
+        if (len(keys) >= self.full_frame_ocr_fraction * total_tiles or
+                len(regions) > self.max_ocr_regions):
+            regions = [sorted(self._tile_hashes)]
+            boxes = [(0, 0, width, height)]
+        else:
+            boxes = []
+            for region in regions:
+                rows = [row for row, _ in region]
+                cols = [col for _, col in region]
+                left = max(0, min(cols) * self.tile_size - self.ocr_margin)
+                top = max(0, min(rows) * self.tile_size - self.ocr_margin)
+                right = min(width, (max(cols) + 1) * self.tile_size + self.ocr_margin)
+                bottom = min(height, (max(rows) + 1) * self.tile_size + self.ocr_margin)
+                boxes.append((left, top, right - left, bottom - top))
+        
+        for region, box in zip(regions, boxes):
+            targets = set(region)
+            for key in targets:
+                self._tile_words[key] = []
+            self._ocr_passes += 1
+            x, y = box[0], box[1]
+            for line, word in self._ocr_region(frame, box):
+                # Line keys are made unique per pass so lines never merge across passes
+                word = dict(word, x=word["x"] + x, y=word["y"] + y)
+                key = ((word["y"] + word["height"] // 2) // self.tile_size,
+                       (word["x"] + word["width"] // 2) // self.tile_size)
+                if key in targets:
+                    self._tile_words[key].append(((self._ocr_passes,) + line, word))
+    
+    def _ocr_region(self, frame, box: Tuple[int, int, int, int]) -> List[Tuple[tuple, Dict[str, Any]]]:
+        """OCR one box, reusing the cached result for identical content.
+        
+        Returns (line key, word) pairs with box-relative word positions.
+        """
+        x, y, w, h = box
+        region = frame[y:y + h, x:x + w]
+        content_hash = f"{w}x{h}:{self._tile_hash(region)}"
+        cached = self._ocr_region_cache.get(content_hash)
+        if cached is not None:
+            self._ocr_region_cache.move_to_end(content_hash)
+            self.monitor_stats["ocr_cache_hits"] += 1
+            return cached
+        
+        data = pytesseract.image_to_data(region, output_type=pytesseract.Output.DICT)
+        self.monitor_stats["ocr_calls"] += 1
+        lines = [(data['block_num'][i], data['par_num'][i], data['line_num'][i])
+                 for i, word in enumerate(data['text']) if word.strip()]
+        cached = list(zip(lines, self._extract_words_with_positions(data)))
+        self._ocr_region_cache[content_hash] = cached
+        while len(self._ocr_region_cache) > self.ocr_cache_size:
+            self._ocr_region_cache.popitem(last=False)
+        return cached
+    
+    def _text_from_tiles(self) -> Tuple[str, List[Dict[str, Any]]]:
+        """Rebuild screen text and word list from the per-tile words, top to bottom."""
+        lines: Dict[tuple, List[Dict[str, Any]]] = {}
+        for key in sorted(self._tile_words):
+            for line, word in self._tile_words[key]:
+                lines.setdefault(line, []).append(word)
+        ordered = sorted(lines.values(), key=lambda words: (min(w["y"] for w in words),
+                                                            min(w["x"] for w in words)))
+        text_lines = []
+        words = []
+        for line_words in ordered:
+            line_words.sort(key=lambda w: w["x"])
+            text_lines.append(" ".join(w["text"] for w in line_words))
+            words.extend(line_words)
+        return "\n".join(text_lines), words
+    
+    def _analyze_changed_region(self, frame, boxes: List[Tuple[int, int, int, int]]) -> Dict[str, Any]:
+        """Re-run UI detection over the bounding box of the changed tiles.
+        
+        Elements found earlier outside that box are kept, so the result still
+        describes the whole screen.
+        """
+        left = min(x for x, _, _, _ in boxes)
+        top = min(y for _, y, _, _ in boxes)
+        right = max(x + w for x, _, w, _ in boxes)
+        bottom = max(y + h for _, y, _, h in boxes)
+        
+        gray = cv2.cvtColor(frame[top:bottom, left:right], cv2.COLOR_RGB2GRAY)
+        
+        def _outside(element):
+            return (element["x"] + element["width"] <= left or element["x"] >= right or
+                    element["y"] + element["height"] <= top or element["y"] >= bottom)
+        
+        for kind, detector in (("buttons", self._detect_rectangles),
+                               ("windows", self._detect_windows)):
+            found = [dict(element, x=element["x"] + left, y=element["y"] + top)
+                     for element in detector(gray)]
+            self._ui_elements[kind] = [e for e in self._ui_elements[kind] if _outside(e)] + found
+        
+        return {
+            "success": True,
+            "buttons_detected": len(self._ui_elements["buttons"]),
+            "windows_detected": len(self._ui_elements["windows"]),
+            "ui_elements": {
+                "buttons": list(self._ui_elements["buttons"]),
+                "windows": list(self._ui_elements["windows"])
+            }
+        }
+    
+    @staticmethod
+    def _text_from_data(tesseract_data: dict) -> str:
+        """Rebuild plain text from image_to_data output, one line per OCR line."""
+        lines: "OrderedDict[Tuple[int, int, int], List[str]]" = OrderedDict()
+        for i, word in enumerate(tesseract_data['text']):
+            if word.strip():
+                line_key = (tesseract_data['block_num'][i], tesseract_data['par_num'][i],
+                            tesseract_data['line_num'][i])
+                lines.setdefault(line_key, []).append(word)
+        return "\n".join(" ".join(words) for words in lines.values())
+    
     def stop_monitoring(self):
         """Stop continuous screen monitoring"""
         self.monitoring = False
@@ -241,6 +617,9 @@ class ScreenCaptureEngine:
             current_time = time.time()
             max_age_seconds = max_age_hours * 3600
             
+            if not self.capture_dir.exists():
+                return
+            
             for file_path in self.capture_dir.glob("capture_*.png"):
                 file_age = current_time - file_path.stat().st_mtime
                 if file_age > max_age_seconds:
@@ -7,6 +7,8 @@ Provides AES-256 encryption for sensitive data using cryptography library.
 
 import os
 import base64
+from concurrent.futures import Executor
+from typing import List, Optional, Sequence
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -15,6 +17,11 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Fernet tokens are urlsafe base64 of a 0x80 version byte followed by a
+# timestamp, so every token starts with this prefix. Values written before the
+# storage format change were base64-encoded a second time and never do.
+FERNET_TOKEN_PREFIX = "gAAAAA"
+
 
 class EncryptionManager:
     """Handles AES-256 encryption for sensitive data."""
@@ -44,26 +51,52 @@ class EncryptionManager:
         self._fernet = Fernet(key)
     
     def encrypt(self, data: str) -> str:
-        """Encrypt string data."""
+        """Encrypt string data.
+        
+        Returns the Fernet token as text. The token is already urlsafe base64,
+        so it is stored as-is rather than wrapped in another base64 layer.
+        """
         if not self._fernet:
             raise ValueError("Encryption key not set")
         
-        encrypted_data = self._fernet.encrypt(data.encode())
-        return base64.urlsafe_b64encode(encrypted_data).decode()
+        return self._fernet.encrypt(data.encode()).decode()
     
     def decrypt(self, encrypted_data: str) -> str:
-        """Decrypt string data."""
+        """Decrypt string data (current or legacy double-base64 format)."""
         if not self._fernet:
             raise ValueError("Encryption key not set")
         
         try:
-            decoded_data = base64.urlsafe_b64decode(encrypted_data.encode())
-            decrypted_data = self._fernet.decrypt(decoded_data)
+            if encrypted_data.startswith(FERNET_TOKEN_PREFIX):
+                token = encrypted_data.encode()
+            else:
+                token = base64.urlsafe_b64decode(encrypted_data.encode())
+            decrypted_data = self._fernet.decrypt(token)
             return decrypted_data.decode()
         except Exception as e:
             logger.error(f"Decryption failed: {e}")
             raise ValueError("Failed to decrypt data")
     
+    def decrypt_many(self, encrypted_items: Sequence[str],
+                     executor: Optional[Executor] = None) -> List[Optional[str]]:
+        """Decrypt a batch of values, optionally fanned out over an executor.
+        
+        Items that fail to decrypt come back as None instead of aborting the
+        whole batch. The OpenSSL primitives behind Fernet release the GIL, so a
+        thread pool gives real parallelism on large batches.
+        """
+        def _safe_decrypt(item):
+            if item is None:
+                return None
+            try:
+                return self.decrypt(item)
+            except ValueError:
+                return None
+        
+        if executor is None or len(encrypted_items) < 2:
+            return [_safe_decrypt(item) for item in encrypted_items]
+        return list(executor.map(_safe_decrypt, encrypted_items))
+    
     def encrypt_file(self, file_path: str, output_path: str = None):
         """Encrypt a file."""
         if not self._fernet:
@@ -10,8 +10,10 @@ import os
 import hashlib
 import json
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Callable, Dict, List, Optional, Union
 from urllib.parse import urlparse
 from datetime import datetime
 
@@ -33,15 +35,33 @@ try:
 except ImportError:
     logger.info("GPG not available - signature verification disabled")
 
+# Large reads keep hashlib (which releases the GIL) busy instead of the interpreter
+HASH_BUFFER_SIZE = 4 * 1024 * 1024
+# Segment size for tree hashing; each segment is hashed independently
+TREE_SEGMENT_SIZE = 64 * 1024 * 1024
+# Tree checksums differ from a plain SHA-256 of the file, so they are tagged
+TREE_CHECKSUM_PREFIX = "sha256-tree:"
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class ChecksumCancelled(Exception):
+    """Raised when a checksum calculation is cancelled before completion."""
+
 
 class ModelSecurityManager:
     """Manages model security including checksum verification and signature validation."""
     
-    def __init__(self, config_dir: str):
+    def __init__(self, config_dir: str, tree_hash_new_models: bool = False):
         self.config_dir = Path(config_dir)
         self.trusted_sources_file = self.config_dir / "trusted_model_sources.json"
         self.checksums_file = self.config_dir / "model_checksums.json"
+        # Machine-local (path, size, mtime, inode) -> checksum results. Kept out of
+        # model_checksums.json so exported known-good checksums stay portable.
+        self.checksum_cache_file = self.config_dir / "model_checksum_cache.json"
         self.signatures_dir = self.config_dir / "model_signatures"
+        # Use the parallel tree hash for models without a published checksum
+        self.tree_hash_new_models = tree_hash_new_models
         
         # Ensure directories exist
         self.config_dir.mkdir(parents=True, exist_ok=True)
@@ -50,6 +70,9 @@ class ModelSecurityManager:
         # Load configuration
         self.trusted_sources = self._load_trusted_sources()
         self.model_checksums = self._load_model_checksums()
+        self._cache_lock = threading.Lock()
+        self.checksum_cache = self._load_checksum_cache()
+        self._hash_executor = None
         
         # GPG context for signature verification
         self.gpg_context = None
@@ -135,25 +158,220 @@ class ModelSecurityManager:
         except Exception as e:
             logger.error(f"Failed to save model checksums: {e}")
     
-    def calculate_file_checksum(self, file_path: Union[str, Path]) -> str:
-        """Calculate SHA-256 checksum of a file."""
-        sha256_hash = hashlib.sha256()
-        file_path = Path(file_path)
+    def _load_checksum_cache(self) -> Dict:
+        """Load cached checksum results."""
+        if self.checksum_cache_file.exists():
+            try:
+                with open(self.checksum_cache_file, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"Failed to load checksum cache: {e}")
+        return {}
+    
+    def _save_checksum_cache(self):
+        """Save cached checksum results."""
+        try:
+            with self._cache_lock:
+                snapshot = json.dumps(self.checksum_cache, indent=2)
+            tmp_path = self.checksum_cache_file.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.checksum_cache_file)
+        except Exception as e:
+            logger.error(f"Failed to save checksum cache: {e}")
+    
+    @staticmethod
+    def _file_fingerprint(file_path: Path) -> Dict:
+        """Identify a file version by size, modification time and inode."""
+        stat = file_path.stat()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "inode": stat.st_ino}
+    
+    def _cache_entry(self, file_path: Path, fingerprint: Dict) -> Optional[Dict]:
+        """Return the cache entry for a file if it still matches the fingerprint."""
+        with self._cache_lock:
+            entry = self.checksum_cache.get(str(file_path))
+        if entry and all(entry.get(k) == v for k, v in fingerprint.items()):
+            return entry
+        return None
+    
+    def _update_cache_entry(self, file_path: Path, fingerprint: Dict, **fields):
+        """Merge fields into a file's cache entry, resetting it if the file changed."""
+        with self._cache_lock:
+            entry = self.checksum_cache.get(str(file_path))
+            if not entry or any(entry.get(k) != v for k, v in fingerprint.items()):
+                entry = dict(fingerprint)
+            entry.update(fields)
+            entry["cached_at"] = datetime.now().isoformat()
+            self.checksum_cache[str(file_path)] = entry
+        self._save_checksum_cache()
+    
+    def calculate_file_checksum(self, file_path: Union[str, Path], tree: bool = False,
+                                use_cache: bool = True,
+                                progress_callback: Optional[ProgressCallback] = None,
+                                cancel_event: Optional[threading.Event] = None) -> str:
+        """Calculate SHA-256 checksum of a file.
+        
+        Results are cached by (path, size, mtime, inode), so an unchanged file
+        is never rehashed.
+        
+        Args:
+            file_path: File to hash.
+            tree: Hash fixed-size segments in parallel and combine their
+                digests. The result is prefixed with ``sha256-tree:`` since it
+                differs from a plain SHA-256. Interrupted tree hashes resume
+                from the last completed segments.
+            use_cache: Consult and update the checksum cache.
+            progress_callback: Called with (bytes_done, total_bytes).
+            cancel_event: Set to abort; raises ChecksumCancelled.
+        """
+        file_path = Path(file_path).resolve()
         
         try:
-            with open(file_path, "rb") as f:
-                # Read in chunks to handle large files
-                for chunk in iter(lambda: f.read(8192), b""):
-                    sha256_hash.update(chunk)
+            fingerprint = self._file_fingerprint(file_path)
+            cache_field = "tree_checksum" if tree else "checksum"
+            
+            if use_cache:
+                entry = self._cache_entry(file_path, fingerprint)
+                if entry and entry.get(cache_field):
+                    logger.debug(f"Using cached checksum for {file_path.name}")
+                    if progress_callback:
+                        progress_callback(fingerprint["size"], fingerprint["size"])
+                    return entry[cache_field]
+            
+            if tree:
+                checksum = self._hash_file_tree(file_path, fingerprint, use_cache,
+                                                progress_callback, cancel_event)
+            else:
+                checksum = self._hash_file_linear(file_path, fingerprint["size"],
+                                                  progress_callback, cancel_event)
+            
+            # Only cache if the file did not change underneath us
+            if use_cache and self._file_fingerprint(file_path) == fingerprint:
+                self._update_cache_entry(file_path, fingerprint, **{cache_field: checksum})
             
-            checksum = sha256_hash.hexdigest()
             logger.debug(f"Calculated checksum for {file_path.name}: {checksum}")
             return checksum
+        except ChecksumCancelled:
+            logger.info(f"Checksum calculation cancelled for {file_path.name}")
+            raise
         except Exception as e:
             logger.error(f"Failed to calculate checksum for {file_path}: {e}")
             raise
     
-    def verify_model_checksum(self, model_path: Union[str, Path], expected_checksum: str = None) -> bool:
+    def calculate_file_checksum_async(self, file_path: Union[str, Path], tree: bool = False,
+                                      progress_callback: Optional[ProgressCallback] = None,
+                                      cancel_event: Optional[threading.Event] = None) -> Future:
+        """Calculate a checksum on a background thread.
+        
+        Returns:
+            Future resolving to the checksum string.
+        """
+        if self._hash_executor is None:
+            self._hash_executor = ThreadPoolExecutor(max_workers=1,
+                                                     thread_name_prefix="model-checksum")
+        return self._hash_executor.submit(self.calculate_file_checksum, file_path, tree,
+                                          True, progress_callback, cancel_event)
+    
+    @staticmethod
+    def _hash_file_linear(file_path: Path, total: int,
+                          progress_callback: Optional[ProgressCallback],
+                          cancel_event: Optional[threading.Event]) -> str:
+        """Plain streaming SHA-256 using one reusable buffer."""
+        sha256_hash = hashlib.sha256()
+        buffer = bytearray(HASH_BUFFER_SIZE)
+        view = memoryview(buffer)
+        done = 0
+        
+        with open(file_path, "rb", buffering=0) as f:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ChecksumCancelled(str(file_path))
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                sha256_hash.update(view[:read])
+                done += read
+                if progress_callback:
+                    progress_callback(done, total)
+        
+        return sha256_hash.hexdigest()
+    
+    @staticmethod
+    def _hash_segment(file_path: Path, offset: int, length: int,
+                      cancel_event: Optional[threading.Event]) -> str:
+        """SHA-256 of one segment of a file."""
+        sha256_hash = hashlib.sha256()
+        buffer = bytearray(min(HASH_BUFFER_SIZE, max(length, 1)))
+        view = memoryview(buffer)
+        remaining = length
+        
+        with open(file_path, "rb", buffering=0) as f:
+            f.seek(offset)
+            while remaining > 0:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ChecksumCancelled(str(file_path))
+                read = f.readinto(view[:min(len(buffer), remaining)])
+                if not read:
+                    break
+                sha256_hash.update(view[:read])
+                remaining -= read
+        
+        return sha256_hash.hexdigest()
+    
+    def _hash_file_tree(self, file_path: Path, fingerprint: Dict, use_cache: bool,
+                        progress_callback: Optional[ProgressCallback],
+                        cancel_event: Optional[threading.Event]) -> str:
+        """Hash segments across cores and combine them into a root digest."""
+        total = fingerprint["size"]
+        segment_count = max(1, -(-total // TREE_SEGMENT_SIZE))
+        
+        segments: Dict[int, str] = {}
+        if use_cache:
+            entry = self._cache_entry(file_path, fingerprint)
+            if entry and entry.get("tree_segment_size") == TREE_SEGMENT_SIZE:
+                segments = {int(k): v for k, v in entry.get("tree_segments", {}).items()}
+        
+        progress_lock = threading.Lock()
+        done = [sum(min(TREE_SEGMENT_SIZE, total - i * TREE_SEGMENT_SIZE) for i in segments)]
+        
+        def _run(index: int) -> str:
+            offset = index * TREE_SEGMENT_SIZE
+            length = min(TREE_SEGMENT_SIZE, total - offset)
+            digest = self._hash_segment(file_path, offset, length, cancel_event)
+            with progress_lock:
+                segments[index] = digest
+                done[0] += length
+                if progress_callback:
+                    progress_callback(done[0], total)
+            return digest
+        
+        pending = [i for i in range(segment_count) if i not in segments]
+        try:
+            with ThreadPoolExecutor(max_workers=min(len(pending), os.cpu_count() or 1) or 1,
+                                    thread_name_prefix="model-tree-hash") as pool:
+                for future in [pool.submit(_run, i) for i in pending]:
+                    future.result()
+        except ChecksumCancelled:
+            if use_cache and segments:
+                # Keep finished segments so the next attempt resumes from here
+                self._update_cache_entry(file_path, fingerprint,
+                                         tree_segment_size=TREE_SEGMENT_SIZE,
+                                         tree_segments={str(k): v for k, v in segments.items()})
+            raise
+        
+        root = hashlib.sha256(
+            "".join(segments[i] for i in range(segment_count)).encode()).hexdigest()
+        return TREE_CHECKSUM_PREFIX + root
+    
+    @staticmethod
+    def _expected_checksum_value(entry: Union[str, Dict, None]) -> Optional[str]:
+        """Known checksums are stored either as plain strings or as entry dicts."""
+        if isinstance(entry, dict):
+            return entry.get("checksum")
+        return entry
+    
+    def verify_model_checksum(self, model_path: Union[str, Path], expected_checksum: str = None,
+                              progress_callback: Optional[ProgressCallback] = None) -> bool:
         """Verify model file checksum against known good checksum."""
         model_path = Path(model_path)
         
@@ -161,20 +379,25 @@ class ModelSecurityManager:
             logger.error(f"Model file not found: {model_path}")
             return False
         
-        # Calculate actual checksum
-        actual_checksum = self.calculate_file_checksum(model_path)
-        
         # Use provided checksum or look up in database
         if expected_checksum is None:
             model_name = model_path.name
-            expected_checksum = self.model_checksums.get(model_name)
+            expected_checksum = self._expected_checksum_value(self.model_checksums.get(model_name))
             
             if expected_checksum is None:
                 logger.warning(f"No known checksum for model {model_name}")
                 # Store the calculated checksum for future reference
+                actual_checksum = self.calculate_file_checksum(
+                    model_path, tree=self.tree_hash_new_models,
+                    progress_callback=progress_callback)
                 self.store_model_checksum(model_name, actual_checksum)
                 return True  # Allow unknown models but store their checksum
         
+        # Calculate actual checksum (served from cache for unchanged files)
+        actual_checksum = self.calculate_file_checksum(
+            model_path, tree=expected_checksum.startswith(TREE_CHECKSUM_PREFIX),
+            progress_callback=progress_callback)
+        
         # Verify checksum
         is_valid = actual_checksum == expected_checksum
         
@@ -288,7 +511,8 @@ class ModelSecurityManager:
             logger.info(f"Removed trusted source: {domain}")
     
     def validate_model_before_load(self, model_path: Union[str, Path], source_url: str = None, 
-                                 publisher: str = None, expected_checksum: str = None) -> Dict:
+                                 publisher: str = None, expected_checksum: str = None,
+                                 progress_callback: Optional[ProgressCallback] = None) -> Dict:
         """Comprehensive model validation before loading."""
         model_path = Path(model_path)
         results = {
@@ -308,7 +532,8 @@ class ModelSecurityManager:
         
         # Verify checksum
         try:
-            results["checksum_valid"] = self.verify_model_checksum(model_path, expected_checksum)
+            results["checksum_valid"] = self.verify_model_checksum(model_path, expected_checksum,
+                                                                  progress_callback)
             if not results["checksum_valid"]:
                 results["errors"].append("Model checksum verification failed")
                 results["valid"] = False
@@ -341,6 +566,7 @@ class ModelSecurityManager:
         return {
             "trusted_sources_count": len(self.trusted_sources),
             "known_checksums_count": len(self.model_checksums),
+            "cached_file_checksums": len(self.checksum_cache),
             "gpg_available": self.gpg_context is not None,
             "trusted_sources": list(self.trusted_sources.keys()),
             "config_dir": str(self.config_dir)
@@ -13,7 +13,10 @@ import os
 import sqlite3
 import json
 import hashlib
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from contextlib import contextmanager
 from typing import Any, Dict, List, Optional, Union
@@ -31,16 +34,85 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+class DecryptionCache:
+    """Bounded, lock-guarded LRU of decrypted values.
+    
+    Entries are keyed by (table, row id, column) and carry a version derived
+    from the stored ciphertext. Fernet tokens are never reused, so any write to
+    a row invalidates its entry without explicit bookkeeping.
+    """
+    
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def version_of(ciphertext: str) -> str:
+        """Cheap fingerprint of a stored ciphertext."""
+        return hashlib.blake2b(ciphertext.encode(), digest_size=8).hexdigest()
+    
+    def get(self, key: tuple, version: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: tuple, version: str, value: str):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, table: str, row_id: Any = None):
+        """Drop cached plaintext for one row, or for a whole table."""
+        with self._lock:
+            for key in [k for k in self._entries
+                        if k[0] == table and (row_id is None or k[1] == row_id)]:
+                del self._entries[key]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
 class SecureStorage:
     """Enhanced encrypted SQLite database wrapper with security features."""
-    
+
+    # Tables covered by row-level integrity tracking
+    TRACKED_TABLES = ('secure_settings', 'password_entries', 'api_keys', 'conversation_history')
+    # Leaves are grouped into this many buckets per table; a bucket hash is the
+    # Merkle node above its rows, so a write only rehashes one bucket.
+    INTEGRITY_BUCKETS = 64
+    # Batches smaller than this are decrypted inline; the pool hop costs more
+    PARALLEL_DECRYPT_THRESHOLD = 16
+
     def __init__(self, db_path: str, encryption_manager: EncryptionManager):
         self.db_path = db_path
         self.encryption_manager = encryption_manager
         self.integrity_file = db_path + ".integrity"
         self.key_rotation_interval = timedelta(days=90)  # Rotate keys every 90 days
+        # Startup checks are O(changed rows); every row is rehashed this often
+        self.full_integrity_interval = timedelta(days=7)
         self.last_integrity_check = None
         
+        # One connection for the lifetime of the store, serialized by a lock
+        self._conn = None
+        self._conn_lock = threading.RLock()
+        # (table, rowid) -> leaf hash before this connection's current transaction
+        # first wrote the row (None if it did not exist); see _capture_own_write
+        self._own_writes: Dict[tuple, Optional[str]] = {}
+        self._table_columns: Dict[str, List[str]] = {}
+        self.decryption_cache = DecryptionCache()
+        self._decrypt_executor = None
+        
         self._ensure_database_exists()
         self._initialize_integrity_tracking()
         self._check_key_rotation()
@@ -127,108 +199,435 @@ class SecureStorage:
                     metadata TEXT
                 )
             ''')
-            
+
+            # Create secure_settings table (integrity triggers attach to it below)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS secure_settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Per-row leaf hashes and per-bucket Merkle nodes
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS integrity_rows (
+                    table_name TEXT NOT NULL,
+                    row_id INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    row_hash TEXT NOT NULL,
+                    PRIMARY KEY (table_name, row_id)
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_integrity_rows_bucket
+                ON integrity_rows (table_name, bucket)
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS integrity_buckets (
+                    table_name TEXT NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    bucket_hash TEXT NOT NULL,
+                    PRIMARY KEY (table_name, bucket)
+                )
+            ''')
+
+            # Rows touched since the last integrity update. Writes made through
+            # this class drain it in the same transaction, so anything left here
+            # was modified behind our back.
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS integrity_dirty (
+                    table_name TEXT NOT NULL,
+                    row_id INTEGER NOT NULL,
+                    PRIMARY KEY (table_name, row_id)
+                )
+            ''')
+
+            for table in self.TRACKED_TABLES:
+                for event, refs in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")),
+                                    ("DELETE", ("OLD",))):
+                    body = "".join(
+                        f"INSERT OR IGNORE INTO integrity_dirty (table_name, row_id) "
+                        f"VALUES ('{table}', {ref}.rowid);"
+                        for ref in refs
+                    )
+                    cursor.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS integrity_{table}_{event.lower()}
+                        AFTER {event} ON {table}
+                        BEGIN {body} END
+                    ''')
+
             conn.commit()
             logger.info("Enhanced database schema initialized successfully")
     
     def _initialize_integrity_tracking(self):
         """Initialize database integrity tracking."""
         try:
-            if not Path(self.integrity_file).exists():
+            integrity_data = self._load_integrity_file()
+            if not integrity_data or "merkle_root" not in integrity_data:
+                # No baseline yet, or a baseline from the old whole-file format
                 self._create_integrity_baseline()
             else:
-                self._verify_database_integrity()
+                last_full = integrity_data.get("last_full_verified")
+                full = (last_full is None or
+                        datetime.now() - datetime.fromisoformat(last_full) > self.full_integrity_interval)
+                self._verify_database_integrity(full=full)
         except Exception as e:
             logger.warning(f"Integrity tracking initialization failed: {e}")
     
+    def _load_integrity_file(self) -> Optional[Dict]:
+        """Load the integrity anchor stored next to the database."""
+        if not Path(self.integrity_file).exists():
+            return None
+        with open(self.integrity_file, 'r') as f:
+            return json.load(f)
+    
+    def _save_integrity_file(self, integrity_data: Dict):
+        """Atomically write the integrity anchor."""
+        tmp_path = self.integrity_file + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(integrity_data, f, indent=2)
+        os.replace(tmp_path, self.integrity_file)
+    
     def _create_integrity_baseline(self):
-        """Create initial integrity baseline for the database."""
+        """Create initial integrity baseline for the database.
+        
+        This is the only path that hashes every row; afterwards leaves are
+        maintained incrementally by the write methods.
+        """
         try:
-            db_hash = self._calculate_database_hash()
-            integrity_data = {
-                "created_at": datetime.now().isoformat(),
-                "last_verified": datetime.now().isoformat(),
-                "database_hash": db_hash,
-                "table_hashes": self._calculate_table_hashes()
-            }
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('DELETE FROM integrity_rows')
+                cursor.execute('DELETE FROM integrity_buckets')
+                cursor.execute('DELETE FROM integrity_dirty')
+                
+                for table in self.TRACKED_TABLES:
+                    leaves = self._scan_table_leaves(conn, table)
+                    cursor.executemany('''
+                        INSERT INTO integrity_rows (table_name, row_id, bucket, row_hash)
+                        VALUES (?, ?, ?, ?)
+                    ''', [(table, row_id, self._bucket_for(row_id), row_hash)
+                          for row_id, row_hash in leaves.items()])
+                    for bucket in {self._bucket_for(row_id) for row_id in leaves}:
+                        self._rehash_bucket(conn, table, bucket)
+                
+                conn.commit()
+                table_roots = self._calculate_table_hashes(conn)
             
-            with open(self.integrity_file, 'w') as f:
-                json.dump(integrity_data, f, indent=2)
+            now = datetime.now().isoformat()
+            self._save_integrity_file({
+                "created_at": now,
+                "last_verified": now,
+                "last_full_verified": now,
+                "merkle_root": self._combine_roots(table_roots),
+                "table_hashes": table_roots
+            })
             
             logger.info("Database integrity baseline created")
         except Exception as e:
             logger.error(f"Failed to create integrity baseline: {e}")
     
-    def _calculate_database_hash(self) -> str:
-        """Calculate SHA-256 hash of the entire database file."""
-        sha256_hash = hashlib.sha256()
+    def _bucket_for(self, row_id: int) -> int:
+        """Map a row to its Merkle bucket."""
+        return row_id % self.INTEGRITY_BUCKETS
+    
+    @staticmethod
+    def _hash_row(row: sqlite3.Row) -> str:
+        """Calculate the leaf hash for a single row."""
+        row_content = json.dumps(dict(row), sort_keys=True, default=str)
+        return hashlib.sha256(row_content.encode()).hexdigest()
+    
+    def _scan_table_leaves(self, conn, table: str) -> Dict[int, str]:
+        """Hash every row of a table, keyed by rowid."""
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT rowid AS _rowid, * FROM {table}")
+        leaves = {}
+        for row in cursor.fetchall():
+            row_id = row['_rowid']
+            leaves[row_id] = self._hash_row(self._strip_rowid(row))
+        return leaves
+    
+    @staticmethod
+    def _recorded_leaf(conn, table: str, row_id: int) -> Optional[str]:
+        """The leaf hash the tree holds for a row, or None if it has none."""
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT row_hash FROM integrity_rows WHERE table_name = ? AND row_id = ?
+        ''', (table, row_id))
+        row = cursor.fetchone()
+        return row['row_hash'] if row else None
+    
+    def _read_row_hash(self, conn, table: str, row_id: int) -> Optional[str]:
+        """Hash the current contents of one row, or None if it no longer exists."""
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM {table} WHERE rowid = ?", (row_id,))
+        row = cursor.fetchone()
+        return self._hash_row(row) if row else None
+    
+    @staticmethod
+    def _strip_rowid(row: sqlite3.Row) -> Dict:
+        """Drop the helper rowid column so scans hash the same bytes as point reads."""
+        data = dict(row)
+        data.pop('_rowid', None)
+        return data
+    
+    @staticmethod
+    def _merkle_hash(parts: List[str]) -> str:
+        """Hash an ordered list of child nodes into their parent."""
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+    
+    def _rehash_bucket(self, conn, table: str, bucket: int):
+        """Recompute one bucket node from its leaves."""
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT row_id, row_hash FROM integrity_rows
+            WHERE table_name = ? AND bucket = ? ORDER BY row_id
+        ''', (table, bucket))
+        leaves = [f"{row['row_id']}:{row['row_hash']}" for row in cursor.fetchall()]
+        
+        if leaves:
+            cursor.execute('''
+                INSERT OR REPLACE INTO integrity_buckets (table_name, bucket, bucket_hash)
+                VALUES (?, ?, ?)
+            ''', (table, bucket, self._merkle_hash(leaves)))
+        else:
+            cursor.execute('''
+                DELETE FROM integrity_buckets WHERE table_name = ? AND bucket = ?
+            ''', (table, bucket))
+    
+    def _calculate_table_hashes(self, conn) -> Dict[str, str]:
+        """Calculate the Merkle root of each tracked table from its bucket nodes."""
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT table_name, bucket, bucket_hash FROM integrity_buckets
+            ORDER BY table_name, bucket
+        ''')
+        nodes: Dict[str, List[str]] = {table: [] for table in self.TRACKED_TABLES}
+        for row in cursor.fetchall():
+            nodes.setdefault(row['table_name'], []).append(
+                f"{row['bucket']}:{row['bucket_hash']}")
+        return {table: self._merkle_hash(parts) for table, parts in nodes.items()}
+    
+    def _combine_roots(self, table_roots: Dict[str, str]) -> str:
+        """Roll per-table roots up into the database root."""
+        return self._merkle_hash([f"{table}:{table_roots[table]}"
+                                  for table in sorted(table_roots)])
+    
+    def _capture_own_write(self, table: str, row_id: int, existed: int, *values):
+        """Record a row's leaf hash before this connection first changes it.
+        
+        Called by the connection's TEMP triggers, which other connections
+        don't have, so only writes made through this class are recorded.
+        """
+        key = (table, row_id)
+        if key not in self._own_writes:
+            self._own_writes[key] = (
+                self._hash_row(dict(zip(self._table_columns[table], values))) if existed else None)
+    
+    def _install_write_capture(self, conn):
+        """Attach connection-local triggers that feed _capture_own_write."""
+        conn.create_function("integrity_capture", -1, self._capture_own_write)
+        for table in self.TRACKED_TABLES:
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+            self._table_columns[table] = columns
+            old_row = ", ".join(f"OLD.{column}" for column in columns)
+            for event, body in (
+                    ("INSERT", f"SELECT integrity_capture('{table}', NEW.rowid, 0);"),
+                    ("UPDATE", f"SELECT integrity_capture('{table}', OLD.rowid, 1, {old_row});"
+                               f"SELECT integrity_capture('{table}', NEW.rowid, 0);"),
+                    ("DELETE", f"SELECT integrity_capture('{table}', OLD.rowid, 1, {old_row});")):
+                conn.execute(f'''
+                    CREATE TEMP TRIGGER IF NOT EXISTS own_write_{table}_{event.lower()}
+                    AFTER {event} ON main.{table}
+                    BEGIN {body} END
+                ''')
+    
+    def _update_integrity(self, conn) -> Optional[Dict[str, str]]:
+        """Fold rows written by the current transaction into the Merkle tree.
+        
+        Must be called on the writing connection before commit, so the dirty
+        log is drained atomically with the write itself. Only rows this
+        transaction wrote, and whose contents before the write still matched
+        their recorded leaf, are folded in. Anything else in the dirty log was
+        changed by another connection; it stays there as tamper evidence for
+        verify_integrity rather than being approved by an unrelated write.
+        
+        Returns the new table roots, or None if nothing was folded; the anchor
+        file is only written once the transaction has committed (see
+        ``_commit_tracked``).
+        """
+        own_writes, self._own_writes = self._own_writes, {}
+        cursor = conn.cursor()
+        cursor.execute('SELECT table_name, row_id FROM integrity_dirty')
+        dirty = cursor.fetchall()
+        
+        folded = []
+        touched_buckets = set()
+        for row in dirty:
+            table, row_id = row['table_name'], row['row_id']
+            key = (table, row_id)
+            if key not in own_writes:
+                continue
+            if own_writes[key] != self._recorded_leaf(conn, table, row_id):
+                logger.warning(f"Row {row_id} of {table} was changed outside SecureStorage "
+                               f"before being rewritten; leaving it flagged")
+                continue
+            row_hash = self._read_row_hash(conn, table, row_id)
+            bucket = self._bucket_for(row_id)
+            if row_hash is None:
+                cursor.execute('''
+                    DELETE FROM integrity_rows WHERE table_name = ? AND row_id = ?
+                ''', (table, row_id))
+            else:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO integrity_rows (table_name, row_id, bucket, row_hash)
+                    VALUES (?, ?, ?, ?)
+                ''', (table, row_id, bucket, row_hash))
+            touched_buckets.add((table, bucket))
+            folded.append(key)
+        
+        if not folded:
+            return None
+        for table, bucket in touched_buckets:
+            self._rehash_bucket(conn, table, bucket)
+        cursor.executemany('DELETE FROM integrity_dirty WHERE table_name = ? AND row_id = ?', folded)
+        return self._calculate_table_hashes(conn)
+        
+    def _commit_tracked(self, conn):
+        """Commit a write to tracked tables, then move the anchor to match it.
+        
+        The anchor is written after the commit, so a failed commit never
+        leaves it describing data that isn't in the database.
+        """
+        table_roots = self._update_integrity(conn)
+        conn.commit()
+        if table_roots is None:
+            return
         try:
-            with open(self.db_path, "rb") as f:
-                for chunk in iter(lambda: f.read(8192), b""):
-                    sha256_hash.update(chunk)
-            return sha256_hash.hexdigest()
+            integrity_data = self._load_integrity_file() or {
+                "created_at": datetime.now().isoformat()}
+            integrity_data["merkle_root"] = self._combine_roots(table_roots)
+            integrity_data["table_hashes"] = table_roots
+            self._save_integrity_file(integrity_data)
         except Exception as e:
-            logger.error(f"Failed to calculate database hash: {e}")
-            return ""
+            logger.error(f"Failed to update integrity anchor: {e}")
     
-    def _calculate_table_hashes(self) -> Dict[str, str]:
-        """Calculate hash for each table's content."""
-        table_hashes = {}
+    def verify_integrity(self, full: bool = False) -> Dict:
+        """Check the database against its Merkle tree.
         
-        try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
+        The default check costs O(changed rows): the anchor file is compared
+        with the root of ``integrity_buckets``, and every row in the dirty log
+        (rows changed by anything but this class) is compared with its
+        recorded leaf.
+        
+        ``full=True`` also catches edits whose dirty log entries were deleted
+        or whose integrity tables were rewritten. It rehashes every live row,
+        rebuilds each table root from ``integrity_rows`` and compares both
+        with the anchor. Startup runs it every ``full_integrity_interval``.
+        
+        Returns:
+            Dict with ``valid``, ``checked_rows`` and ``tampered_rows``; each
+            tampered row names its table, rowid and whether it was modified,
+            added or deleted.
+        """
+        result = {"valid": True, "full": full, "checked_rows": 0, "tampered_rows": [], "issues": []}
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            integrity_data = self._load_integrity_file() or {}
+            
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                           "AND name LIKE 'integrity_%'")
+            if len(cursor.fetchall()) < len(self.TRACKED_TABLES) * 3:
+                result["issues"].append("integrity_triggers_missing")
+            
+            if not full:
+                if integrity_data.get("merkle_root") != self._combine_roots(self._calculate_table_hashes(conn)):
+                    result["issues"].append("merkle_root_mismatch")
                 
-                # Get all table names
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                tables = [row[0] for row in cursor.fetchall()]
+                cursor.execute('SELECT table_name, row_id FROM integrity_dirty ORDER BY table_name, row_id')
+                for row in cursor.fetchall():
+                    table, row_id = row['table_name'], row['row_id']
+                    current = self._read_row_hash(conn, table, row_id)
+                    recorded = self._recorded_leaf(conn, table, row_id)
+                    result["checked_rows"] += 1
+                    result["tampered_rows"].extend(self._diff_leaves(
+                        table, {row_id: current} if current else {}, {row_id: recorded} if recorded else {}))
+            else:
+                # Rebuild the tree from the recorded leaves instead of trusting
+                # integrity_buckets, which could have been rewritten to match
+                recorded = self._load_recorded_leaves(conn)
+                recorded_roots = {table: self._leaves_root(recorded[table]) for table in self.TRACKED_TABLES}
+                if integrity_data.get("merkle_root") != self._combine_roots(recorded_roots):
+                    result["issues"].append("merkle_root_mismatch")
                 
-                for table in tables:
-                    try:
-                        cursor.execute(f"SELECT * FROM {table} ORDER BY rowid")
-                        table_data = cursor.fetchall()
-                        
-                        # Create hash of table content
-                        table_content = json.dumps([dict(row) for row in table_data], 
-                                                 sort_keys=True, default=str)
-                        table_hash = hashlib.sha256(table_content.encode()).hexdigest()
-                        table_hashes[table] = table_hash
-                        
-                    except Exception as e:
-                        logger.warning(f"Failed to hash table {table}: {e}")
-                        table_hashes[table] = ""
+                for table in self.TRACKED_TABLES:
+                    current = self._scan_table_leaves(conn, table)
+                    result["checked_rows"] += len(current)
+                    result["tampered_rows"].extend(self._diff_leaves(table, current, recorded[table]))
         
-        except Exception as e:
-            logger.error(f"Failed to calculate table hashes: {e}")
+        result["valid"] = not result["tampered_rows"] and not result["issues"]
+        return result
+    
+    def _load_recorded_leaves(self, conn) -> Dict[str, Dict[int, str]]:
+        """Recorded leaf hashes of every tracked table, keyed by rowid."""
+        cursor = conn.cursor()
+        cursor.execute('SELECT table_name, row_id, row_hash FROM integrity_rows')
+        leaves: Dict[str, Dict[int, str]] = {table: {} for table in self.TRACKED_TABLES}
+        for row in cursor.fetchall():
+            leaves.setdefault(row['table_name'], {})[row['row_id']] = row['row_hash']
+        return leaves
         
-        return table_hashes
+    def _leaves_root(self, leaves: Dict[int, str]) -> str:
+        """Table root over a set of leaves, computed as the bucket nodes would be."""
+        buckets: Dict[int, List[str]] = {}
+        for row_id in sorted(leaves):
+            buckets.setdefault(self._bucket_for(row_id), []).append(f"{row_id}:{leaves[row_id]}")
+        return self._merkle_hash([f"{bucket}:{self._merkle_hash(buckets[bucket])}"
+                                  for bucket in sorted(buckets)])
+    
+    @staticmethod
+    def _diff_leaves(table: str, current: Dict[int, str], recorded: Dict[int, str]) -> List[Dict]:
+        """Describe every row whose live hash differs from its recorded leaf."""
+        tampered = []
+        for row_id in sorted(set(current) | set(recorded)):
+            if row_id not in recorded:
+                tampered.append({"table": table, "row_id": row_id, "change": "added"})
+            elif row_id not in current:
+                tampered.append({"table": table, "row_id": row_id, "change": "deleted"})
+            elif recorded[row_id] != current[row_id]:
+                tampered.append({"table": table, "row_id": row_id, "change": "modified"})
+        return tampered
     
-    def _verify_database_integrity(self) -> bool:
+    def _verify_database_integrity(self, full: bool = False) -> bool:
         """Verify database integrity against stored baseline."""
         try:
             if not Path(self.integrity_file).exists():
                 logger.warning("No integrity baseline found")
                 return False
             
-            with open(self.integrity_file, 'r') as f:
-                stored_integrity = json.load(f)
-            
-            current_hash = self._calculate_database_hash()
-            stored_hash = stored_integrity.get("database_hash", "")
-            
-            if current_hash != stored_hash:
-                logger.error("Database integrity check failed - file hash mismatch")
-                self._log_security_event("integrity_violation", "database", 
-                                        metadata={"expected": stored_hash, "actual": current_hash})
+            result = self.verify_integrity(full=full)
+            if not result["valid"]:
+                logger.error(f"Database integrity check failed - "
+                             f"{len(result['tampered_rows'])} tampered rows, "
+                             f"issues: {result['issues']}")
+                self._log_security_event("integrity_violation", "database",
+                                        metadata={"tampered_rows": result["tampered_rows"][:100],
+                                                  "issues": result["issues"]})
                 return False
             
             # Update last verified timestamp
+            stored_integrity = self._load_integrity_file()
             stored_integrity["last_verified"] = datetime.now().isoformat()
-            with open(self.integrity_file, 'w') as f:
-                json.dump(stored_integrity, f, indent=2)
+            if full:
+                stored_integrity["last_full_verified"] = stored_integrity["last_verified"]
+            self._save_integrity_file(stored_integrity)
             
             self.last_integrity_check = datetime.now()
-            logger.info("Database integrity verified successfully")
+            logger.info(f"Database integrity verified successfully "
+                        f"({result['checked_rows']} rows checked)")
             return True
             
         except Exception as e:
@@ -347,20 +746,40 @@ class SecureStorage:
     
     @contextmanager
     def _get_connection(self):
-        """Get database connection with proper error handling."""
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            yield conn
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            logger.error(f"Database error: {e}")
-            raise
-        finally:
-            if conn:
-                conn.close()
+        """Get the persistent database connection with proper error handling."""
+        with self._conn_lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.row_factory = sqlite3.Row
+                # Make REPLACE fire delete triggers so replaced rows reach the dirty log
+                self._conn.execute('PRAGMA recursive_triggers = ON')
+                self._install_write_capture(self._conn)
+            try:
+                yield self._conn
+            except Exception as e:
+                self._conn.rollback()
+                self._own_writes.clear()
+                logger.error(f"Database error: {e}")
+                raise
+    
+    def close(self):
+        """Close the connection and drop all cached plaintext."""
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self.decryption_cache.clear()
+        if self._decrypt_executor is not None:
+            self._decrypt_executor.shutdown(wait=False)
+            self._decrypt_executor = None
+    
+    def _get_decrypt_executor(self) -> ThreadPoolExecutor:
+        """Lazily create the thread pool used for batch decryption."""
+        if self._decrypt_executor is None:
+            self._decrypt_executor = ThreadPoolExecutor(
+                max_workers=min(4, os.cpu_count() or 1),
+                thread_name_prefix="secure-storage-decrypt")
+        return self._decrypt_executor
     
     def _encrypt_data(self, data: Any) -> str:
         """Encrypt data for storage."""
@@ -382,6 +801,81 @@ class SecureStorage:
             logger.error(f"Failed to decrypt data: {e}")
             return None
     
+    def _decrypt_cached(self, table: str, row_id: Any, column: str, encrypted_data: str,
+                        is_json: bool = False) -> Any:
+        """Decrypt a single column value through the decryption cache."""
+        if encrypted_data is None:
+            return None
+        
+        key = (table, row_id, column)
+        version = self.decryption_cache.version_of(encrypted_data)
+        decrypted = self.decryption_cache.get(key, version)
+        if decrypted is None:
+            try:
+                decrypted = self.encryption_manager.decrypt(encrypted_data)
+            except Exception as e:
+                logger.error(f"Failed to decrypt data: {e}")
+                return None
+            self.decryption_cache.put(key, version, decrypted)
+        
+        if not is_json:
+            return decrypted
+        try:
+            return json.loads(decrypted)
+        except ValueError as e:
+            logger.error(f"Failed to decode {table}.{column} for row {row_id}: {e}")
+            return None
+    
+    def _decrypt_rows(self, table: str, rows: List[sqlite3.Row], id_column: str,
+                      columns: Dict[str, bool]) -> List[Dict[str, Any]]:
+        """Decrypt several columns across a page of rows in one batch.
+        
+        Cached values are served directly; the remaining ciphertexts are
+        decrypted together, on the thread pool when the batch is large enough.
+        
+        Args:
+            columns: Column name -> whether the plaintext is JSON.
+        
+        Returns:
+            One dict per row mapping column name to decrypted value.
+        """
+        results = [dict.fromkeys(columns) for _ in rows]
+        pending = []  # (row index, column, cache key, version, ciphertext)
+        
+        for index, row in enumerate(rows):
+            for column in columns:
+                encrypted_data = row[column]
+                if encrypted_data is None:
+                    continue
+                key = (table, row[id_column], column)
+                version = self.decryption_cache.version_of(encrypted_data)
+                cached = self.decryption_cache.get(key, version)
+                if cached is None:
+                    pending.append((index, column, key, version, encrypted_data))
+                else:
+                    results[index][column] = cached
+        
+        if pending:
+            executor = (self._get_decrypt_executor()
+                        if len(pending) >= self.PARALLEL_DECRYPT_THRESHOLD else None)
+            decrypted = self.encryption_manager.decrypt_many(
+                [item[4] for item in pending], executor=executor)
+            for (index, column, key, version, _), plaintext in zip(pending, decrypted):
+                if plaintext is None:
+                    logger.error(f"Failed to decrypt {table}.{column} for row {key[1]}")
+                    continue
+                self.decryption_cache.put(key, version, plaintext)
+                results[index][column] = plaintext
+        
+        for result in results:
+            for column, is_json in columns.items():
+                if is_json and result[column] is not None:
+                    try:
+                        result[column] = json.loads(result[column])
+                    except ValueError:
+                        result[column] = None
+        return results
+    
     # Settings Management
     def set_setting(self, key: str, value: Any):
         """Store an encrypted setting."""
@@ -393,7 +887,7 @@ class SecureStorage:
                 INSERT OR REPLACE INTO secure_settings (key, value, updated_at)
                 VALUES (?, ?, CURRENT_TIMESTAMP)
             ''', (key, encrypted_value))
-            conn.commit()
+            self._commit_tracked(conn)
     
     def get_setting(self, key: str, default: Any = None) -> Any:
         """Retrieve and decrypt a setting."""
@@ -403,7 +897,8 @@ class SecureStorage:
             row = cursor.fetchone()
             
             if row:
-                return self._decrypt_data(row['value'], is_json=True)
+                return self._decrypt_cached('secure_settings', key, 'value', row['value'],
+                                            is_json=True)
             return default
     
     def delete_setting(self, key: str):
@@ -411,7 +906,8 @@ class SecureStorage:
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM secure_settings WHERE key = ?', (key,))
-            conn.commit()
+            self._commit_tracked(conn)
+        self.decryption_cache.invalidate('secure_settings', key)
     
     def list_settings(self) -> List[str]:
         """List all setting keys."""
@@ -434,7 +930,7 @@ class SecureStorage:
                 (service, username, password, url, notes, updated_at)
                 VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             ''', (service, username, encrypted_password, url, encrypted_notes))
-            conn.commit()
+            self._commit_tracked(conn)
     
     def get_password(self, service: str, username: str = None) -> Optional[Dict]:
         """Retrieve and decrypt a password entry."""
@@ -458,9 +954,11 @@ class SecureStorage:
                     'id': row['id'],
                     'service': row['service'],
                     'username': row['username'],
-                    'password': self._decrypt_data(row['password']),
+                    'password': self._decrypt_cached('password_entries', row['id'],
+                                                     'password', row['password']),
                     'url': row['url'],
-                    'notes': self._decrypt_data(row['notes']),
+                    'notes': self._decrypt_cached('password_entries', row['id'],
+                                                  'notes', row['notes']),
                     'created_at': row['created_at'],
                     'updated_at': row['updated_at']
                 }
@@ -491,7 +989,8 @@ class SecureStorage:
                     DELETE FROM password_entries WHERE service = ?
                 ''', (service,))
             
-            conn.commit()
+            self._commit_tracked(conn)
+        self.decryption_cache.invalidate('password_entries')
     
     # Conversation History
     def store_conversation(self, conversation_id: str, message_type: str, 
@@ -507,31 +1006,37 @@ class SecureStorage:
                 (conversation_id, message_type, content, thinking_mode, metadata)
                 VALUES (?, ?, ?, ?, ?)
             ''', (conversation_id, message_type, encrypted_content, thinking_mode, encrypted_metadata))
-            conn.commit()
+            self._commit_tracked(conn)
     
     def get_conversation_history(self, conversation_id: str, limit: int = 100) -> List[Dict]:
-        """Retrieve and decrypt conversation history."""
+        """Retrieve and decrypt conversation history.
+        
+        The page is fetched with a single query and decrypted as one batch.
+        """
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT * FROM conversation_history 
                 WHERE conversation_id = ? 
-                ORDER BY timestamp DESC LIMIT ?
+                ORDER BY timestamp DESC, id DESC LIMIT ?
             ''', (conversation_id, limit))
-            
-            history = []
-            for row in cursor.fetchall():
-                history.append({
-                    'id': row['id'],
-                    'conversation_id': row['conversation_id'],
-                    'message_type': row['message_type'],
-                    'content': self._decrypt_data(row['content']),
-                    'thinking_mode': row['thinking_mode'],
-                    'timestamp': row['timestamp'],
-                    'metadata': self._decrypt_data(row['metadata'], is_json=True)
-                })
-            
-            return list(reversed(history))  # Return in chronological order
+            rows = cursor.fetchall()
+        
+        decrypted = self._decrypt_rows('conversation_history', rows, 'id',
+                                       {'content': False, 'metadata': True})
+        history = []
+        for row, values in zip(reversed(rows), reversed(decrypted)):  # Chronological order
+            history.append({
+                'id': row['id'],
+                'conversation_id': row['conversation_id'],
+                'message_type': row['message_type'],
+                'content': values['content'],
+                'thinking_mode': row['thinking_mode'],
+                'timestamp': row['timestamp'],
+                'metadata': values['metadata']
+            })
+        
+        return history
     
     def delete_conversation_history(self, conversation_id: str = None):
         """Delete conversation history."""
@@ -545,7 +1050,8 @@ class SecureStorage:
             else:
                 cursor.execute('DELETE FROM conversation_history')
             
-            conn.commit()
+            self._commit_tracked(conn)
+        self.decryption_cache.invalidate('conversation_history')
     
     # Data Export/Import
     def export_data(self) -> Dict:
@@ -41,11 +41,14 @@ except ImportError:
 class FinanceWindow(QMainWindow):
     """Main finance management window for entrepreneurs"""
     
-    def __init__(self):
+    def __init__(self, search_index=None):
         super().__init__()
         self.setWindowTitle("Financial Management - Westfall Assistant")
         self.setMinimumSize(1000, 700)
         
+        # Optional NavigationManager that invoices and clients are indexed in
+        self.search_index = search_index
+        
         # Initialize database and error handler
         self.init_database()
         self.error_handler = get_error_handler(self) if HAS_ERROR_HANDLER else None
@@ -607,6 +610,7 @@ class FinanceWindow(QMainWindow):
         """)
         
         invoices = cursor.fetchall()
+        self.index_invoices(invoices)
         self.invoices_table.setRowCount(len(invoices))
         
         for row, invoice in enumerate(invoices):
@@ -634,6 +638,34 @@ class FinanceWindow(QMainWindow):
             
             self.invoices_table.setCellWidget(row, 7, actions_widget)
 
+    def index_invoices(self, invoices):
+        """Upsert invoices and the clients they bill into global search"""
+        if self.search_index is None:
+            return
+        
+        items = []
+        clients = {}
+        for number, client_name, total, date_due, status, _, _, invoice_id in invoices:
+            items.append({
+                "id": invoice_id,
+                "type": "invoice",
+                "title": f"Invoice {number} - {client_name}",
+                "description": f"${total:.2f} due {date_due} ({status})",
+                "keywords": [client_name, status],
+                "metadata": {"invoice_id": invoice_id}
+            })
+            clients.setdefault(client_name.strip().lower(), []).append(client_name)
+        
+        for client_id, names in clients.items():
+            items.append({
+                "id": client_id,
+                "type": "client",
+                "title": names[0],
+                "description": f"{len(names)} invoices",
+                "metadata": {"client_name": names[0]}
+            })
+        self.search_index.index_items_nowait(items)
+
     def load_expenses(self):
         """Load expenses into the table"""
         cursor = self.conn.cursor()
@@ -1345,9 +1377,9 @@ class TimeEntryDialog(QDialog):
 class FinanceWidget(QWidget):
     """Widget wrapper for the finance window"""
     
-    def __init__(self):
+    def __init__(self, search_index=None):
         super().__init__()
-        self.finance_window = FinanceWindow()
+        self.finance_window = FinanceWindow(search_index=search_index)
         
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -15,6 +15,7 @@ from .network import (
     NetworkManager, NetworkError, get_network_manager, 
     with_network_retry, safe_request_get, safe_request_post
 )
+from .http_client import HTTPClient, get_http_client
 
 __all__ = [
     'ErrorHandler', 
@@ -41,5 +42,7 @@ __all__ = [
     'get_network_manager',
     'with_network_retry',
     'safe_request_get',
-    'safe_request_post'
+    'safe_request_post',
+    'HTTPClient',
+    'get_http_client'
 ]
\ No newline at end of file
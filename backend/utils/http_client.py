@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Client for Westfall Personal Assistant
+
+One pooled, keep-alive requests.Session for every outbound call, a small
+worker pool for background requests, retries with exponential backoff and
+full jitter, coalescing of identical in-flight GETs, and passive
+online/offline detection from recent request outcomes (no probe requests).
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class ConnectivityMonitor:
+    """Infers connectivity from real traffic instead of probing.
+
+    Any HTTP response (whatever its status) proves the network works; only
+    requests that fail at the connection level, after their retries, count
+    against it. One dead host says nothing about the others, so we only
+    report offline once ``failure_threshold`` distinct hosts have failed with
+    no success in between, and then let one request through every
+    ``recheck_interval`` seconds so recovery is noticed.
+    """
+
+    def __init__(self, failure_threshold: int = 3, recheck_interval: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recheck_interval = recheck_interval
+        self.consecutive_failures = 0
+        self.last_success: Optional[float] = None
+        self.last_failure: Optional[float] = None
+        self._failing_hosts: Dict[str, int] = {}  # host -> failed requests since the last success
+        self._last_recheck = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_online(self) -> bool:
+        return len(self._failing_hosts) < self.failure_threshold
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self._failing_hosts.clear()
+            self.last_success = time.time()
+
+    def record_failure(self, host: str):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._failing_hosts[host] = self._failing_hosts.get(host, 0) + 1
+            self.last_failure = time.time()
+
+    def should_attempt(self) -> bool:
+        """True while online, and once per recheck interval while offline."""
+        if self.is_online:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_recheck >= self.recheck_interval:
+                self._last_recheck = now
+                return True
+            return False
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            failing_hosts = dict(self._failing_hosts)
+        return {
+            'online': len(failing_hosts) < self.failure_threshold,
+            'consecutive_failures': self.consecutive_failures,
+            'failing_hosts': failing_hosts,
+            'last_success': self.last_success,
+            'last_failure': self.last_failure
+        }
+
+
+class OfflineError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while connectivity is known to be down."""
+    pass
+
+
+class HTTPClient:
+    """Pooled keep-alive HTTP client shared by all network layers."""
+
+    def __init__(self,
+                 pool_connections: int = 16,
+                 pool_maxsize: int = 32,
+                 max_workers: int = 8,
+                 default_timeout: float = 30,
+                 max_retries: int = 3,
+                 base_delay: float = 0.5,
+                 max_delay: float = 30.0):
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.connectivity = ConnectivityMonitor()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="http")
+        self._in_flight: Dict[Tuple, Future] = {}
+        self._in_flight_lock = threading.Lock()
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Exponential backoff with full jitter, honouring Retry-After seconds."""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def request(self, method: str, url: str, max_retries: Optional[int] = None,
+                backoff: Optional[Callable[[int], float]] = None,
+                **kwargs) -> requests.Response:
+        """Send a request on the pooled session, retrying transient failures.
+
+        Connection errors, timeouts, 429 and 5xx responses are retried; the
+        final response is returned without raise_for_status(), and the final
+        exception is re-raised. ``backoff`` maps an attempt number to a delay
+        for callers with their own retry policy.
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        backoff = backoff or self.backoff_delay
+        kwargs.setdefault('timeout', self.default_timeout)
+
+        if not self.connectivity.should_attempt():
+            raise OfflineError("No internet connection available")
+
+        host = urlsplit(url).netloc
+        for attempt in range(max_retries + 1):
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == max_retries:
+                    # One failure per request, however many attempts it took
+                    self.connectivity.record_failure(host)
+                    raise
+                delay = backoff(attempt)
+                logger.warning(f"{method.upper()} {url} failed (attempt {attempt + 1}/{max_retries + 1}), "
+                               f"retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                continue
+
+            self.connectivity.record_success()
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == max_retries:
+                return response
+
+            retry_after = response.headers.get('Retry-After')
+            delay = self.backoff_delay(attempt, retry_after) if retry_after else backoff(attempt)
+            logger.warning(f"{method.upper()} {url} returned {response.status_code} "
+                           f"(attempt {attempt + 1}/{max_retries + 1}), retrying in {delay:.1f}s")
+            response.close()
+            time.sleep(delay)
+
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            **kwargs) -> requests.Response:
+        """GET that shares one round-trip among identical concurrent calls.
+
+        Streaming GETs are never coalesced since their body can be read once.
+        """
+        if kwargs.get('stream'):
+            return self.request('get', url, params=params, headers=headers, **kwargs)
+
+        key = (url, self._freeze(params), self._freeze(headers), self._freeze(kwargs))
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            response = self.request('get', url, params=params, headers=headers, **kwargs)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(key, None)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('post', url, **kwargs)
+
+    def submit(self, method: str, url: str, **kwargs) -> Future:
+        """Run a request on the shared worker pool."""
+        if method.lower() == 'get':
+            return self._executor.submit(self.get, url, **kwargs)
+        return self._executor.submit(self.request, method, url, **kwargs)
+
+    def submit_task(self, fn: Callable, *args, **kwargs) -> Future:
+        """Run an arbitrary network-bound callable on the shared worker pool."""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    @staticmethod
+    def _freeze(value) -> Any:
+        if isinstance(value, dict):
+            return tuple(sorted((k, HTTPClient._freeze(v)) for k, v in value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(HTTPClient._freeze(v) for v in value)
+        return value
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+# Global HTTP client instance
+_global_http_client: Optional[HTTPClient] = None
+_global_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """Get or create the shared HTTP client."""
+    global _global_http_client
+
+    if _global_http_client is None:
+        with _global_http_client_lock:
+            if _global_http_client is None:
+                _global_http_client = HTTPClient()
+
+    return _global_http_client
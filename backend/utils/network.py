@@ -6,6 +6,7 @@ Provides robust network operations with retry logic, exponential backoff, and gr
 """
 
 import asyncio
+import random
 import time
 import logging
 from typing import Optional, Dict, Any, Callable, Union
@@ -13,6 +14,8 @@ from functools import wraps
 import requests
 from datetime import datetime, timedelta
 
+from .http_client import HTTPClient, OfflineError, get_http_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,58 +32,63 @@ class NetworkManager:
                  max_retries: int = 3,
                  base_delay: float = 1.0,
                  max_delay: float = 60.0,
-                 backoff_factor: float = 2.0):
+                 backoff_factor: float = 2.0,
+                 http_client: Optional[HTTPClient] = None):
         self.default_timeout = default_timeout
         self.max_retries = max_retries
         self.base_delay = base_delay
         self.max_delay = max_delay
         self.backoff_factor = backoff_factor
-        self.is_offline = False
-        self.last_connection_check = None
-        self.connection_check_interval = 300  # 5 minutes
+        # Pooled session shared with every other network layer
+        self.http_client = http_client or get_http_client()
         
     def _calculate_delay(self, attempt: int) -> float:
-        """Calculate delay for exponential backoff."""
+        """Calculate delay for exponential backoff with full jitter."""
         delay = self.base_delay * (self.backoff_factor ** attempt)
-        return min(delay, self.max_delay)
+        return random.uniform(0, min(delay, self.max_delay))
     
     def _is_retryable_error(self, error: Exception) -> bool:
         """Determine if an error is retryable."""
+        if isinstance(error, OfflineError):
+            return False
         if isinstance(error, requests.exceptions.Timeout):
             return True
         if isinstance(error, requests.exceptions.ConnectionError):
             return True
         if isinstance(error, requests.exceptions.RequestException):
-            if hasattr(error, 'response') and error.response:
+            if getattr(error, 'response', None) is not None:
                 # Retry on 5xx server errors and 429 (rate limit)
                 status_code = error.response.status_code
                 return status_code >= 500 or status_code == 429
             return True
         return False
     
-    def _check_internet_connection(self) -> bool:
-        """Check if internet connection is available."""
-        try:
-            # Quick connection test to a reliable host
-            response = requests.get('https://httpbin.org/status/200', timeout=5)
-            return response.status_code == 200
-        except:
-            return False
-    
     def is_online(self) -> bool:
-        """Check if we're currently online with caching."""
-        current_time = datetime.now()
-        
-        # Use cached result if recent
-        if (self.last_connection_check and 
-            (current_time - self.last_connection_check).total_seconds() < self.connection_check_interval):
-            return not self.is_offline
-        
-        # Perform actual check
-        self.is_offline = not self._check_internet_connection()
-        self.last_connection_check = current_time
+        """Whether recent requests suggest we are online.
         
-        return not self.is_offline
+        Inferred from the outcome of real traffic through the shared client
+        rather than a probe request.
+        """
+        return self.http_client.connectivity.is_online
+    
+    def _send(self, method: str, url: str, max_retries: int, **kwargs) -> requests.Response:
+        """Send through the pooled client and raise NetworkError on failure."""
+        try:
+            if method == 'get':
+                response = self.http_client.get(url, max_retries=max_retries,
+                                                backoff=self._calculate_delay, **kwargs)
+            else:
+                response = self.http_client.request(method, url, max_retries=max_retries,
+                                                    backoff=self._calculate_delay, **kwargs)
+            response.raise_for_status()
+            return response
+        except OfflineError:
+            raise NetworkError("No internet connection available")
+        except requests.exceptions.RequestException as e:
+            label = "Request" if method == 'get' else f"{method.upper()} request"
+            error_msg = f"{label} failed after {max_retries + 1} attempts: {str(e)}"
+            logger.error(error_msg)
+            raise NetworkError(error_msg)
     
     def get_with_retry(self, 
                       url: str, 
@@ -91,6 +99,8 @@ class NetworkManager:
         """
         Perform GET request with retry logic.
         
+        Identical concurrent GETs share one round-trip on the pooled session.
+        
         Args:
             url: URL to request
             headers: Optional headers
@@ -106,44 +116,8 @@ class NetworkManager:
         """
         timeout = timeout or self.default_timeout
         max_retries = max_retries or self.max_retries
-        last_error = None
-        
-        # Check if we're offline
-        if not self.is_online():
-            raise NetworkError("No internet connection available")
         
-        for attempt in range(max_retries + 1):
-            try:
-                response = requests.get(
-                    url,
-                    headers=headers,
-                    params=params,
-                    timeout=timeout
-                )
-                response.raise_for_status()
-                return response
-                
-            except Exception as e:
-                last_error = e
-                
-                if attempt == max_retries:
-                    # Last attempt failed
-                    break
-                
-                if not self._is_retryable_error(e):
-                    # Non-retryable error
-                    break
-                
-                # Calculate delay and wait
-                delay = self._calculate_delay(attempt)
-                logger.warning(f"Request failed (attempt {attempt + 1}/{max_retries + 1}), "
-                             f"retrying in {delay:.1f}s: {str(e)}")
-                time.sleep(delay)
-        
-        # All retries failed
-        error_msg = f"Request failed after {max_retries + 1} attempts: {str(last_error)}"
-        logger.error(error_msg)
-        raise NetworkError(error_msg)
+        return self._send('get', url, max_retries, headers=headers, params=params, timeout=timeout)
     
     def post_with_retry(self,
                        url: str,
@@ -171,40 +145,9 @@ class NetworkManager:
         """
         timeout = timeout or self.default_timeout
         max_retries = max_retries or self.max_retries
-        last_error = None
-        
-        if not self.is_online():
-            raise NetworkError("No internet connection available")
-        
-        for attempt in range(max_retries + 1):
-            try:
-                response = requests.post(
-                    url,
-                    data=data,
-                    json=json,
-                    headers=headers,
-                    timeout=timeout
-                )
-                response.raise_for_status()
-                return response
-                
-            except Exception as e:
-                last_error = e
-                
-                if attempt == max_retries:
-                    break
-                
-                if not self._is_retryable_error(e):
-                    break
-                
-                delay = self._calculate_delay(attempt)
-                logger.warning(f"POST request failed (attempt {attempt + 1}/{max_retries + 1}), "
-                             f"retrying in {delay:.1f}s: {str(e)}")
-                time.sleep(delay)
         
-        error_msg = f"POST request failed after {max_retries + 1} attempts: {str(last_error)}"
-        logger.error(error_msg)
-        raise NetworkError(error_msg)
+        return self._send('post', url, max_retries, data=data, json=json,
+                          headers=headers, timeout=timeout)
     
     def with_retry(self, 
                    max_retries: int = None,
@@ -224,7 +167,7 @@ class NetworkManager:
                 _max_retries = max_retries or self.max_retries
                 last_error = None
                 
-                if handle_offline and not self.is_online():
+                if handle_offline and not self.http_client.connectivity.should_attempt():
                     raise NetworkError("No internet connection available")
                 
                 for attempt in range(_max_retries + 1):
@@ -294,12 +237,15 @@ class NetworkManager:
     
     def get_network_status(self) -> Dict[str, Any]:
         """Get comprehensive network status information."""
-        is_online = self.is_online()
+        connectivity = self.http_client.connectivity.get_status()
         
         return {
-            'online': is_online,
-            'last_check': self.last_connection_check.isoformat() if self.last_connection_check else None,
-            'check_interval_seconds': self.connection_check_interval,
+            'online': connectivity['online'],
+            'consecutive_failures': connectivity['consecutive_failures'],
+            'last_success': (datetime.fromtimestamp(connectivity['last_success']).isoformat()
+                             if connectivity['last_success'] else None),
+            'last_failure': (datetime.fromtimestamp(connectivity['last_failure']).isoformat()
+                             if connectivity['last_failure'] else None),
             'retry_config': {
                 'max_retries': self.max_retries,
                 'base_delay': self.base_delay,
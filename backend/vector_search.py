@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+Local Vector Search for Westfall Personal Assistant
+
+Provides CPU-only, offline embedding and approximate nearest-neighbour search:
+embedders backed by a GGUF model (llama.cpp embedding mode), a small
+sentence-transformers model, or a model-free hashing fallback; a growable
+memory-mapped vector matrix (float32 or int8); and an IVF index on top of it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+# Optional dependencies
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from llama_cpp import Llama
+    LLAMA_CPP_AVAILABLE = True
+except ImportError:
+    LLAMA_CPP_AVAILABLE = False
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def _normalize_rows(vectors: "np.ndarray") -> "np.ndarray":
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class Embedder:
+    """Base class for text embedders; vectors are L2-normalized float32."""
+
+    model_id = "base"
+    dim = 0
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        """Embed one batch of texts into an (n, dim) array."""
+        raise NotImplementedError
+
+    def embed_batched(self, texts: Sequence[str], batch_size: int = 32) -> "np.ndarray":
+        """Embed any number of texts, ``batch_size`` at a time."""
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        batches = [self.embed(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+        return np.vstack(batches)
+
+
+class LlamaCppEmbedder(Embedder):
+    """Embeddings from a GGUF model running in llama.cpp embedding mode on CPU.
+
+    llama.cpp only exposes embeddings on a context created with
+    ``embedding=True``, so this opens its own CPU instance of the model file
+    rather than reusing the generation instance.
+    """
+
+    def __init__(self, model_path: str, n_ctx: int = 512, threads: Optional[int] = None):
+        if not LLAMA_CPP_AVAILABLE:
+            raise RuntimeError("llama-cpp-python not available")
+
+        self.model_id = f"llama_cpp:{Path(model_path).name}"
+        self.llm = Llama(
+            model_path=model_path,
+            embedding=True,
+            n_ctx=n_ctx,
+            n_gpu_layers=0,
+            n_threads=threads or os.cpu_count(),
+            verbose=False
+        )
+        self.dim = self.llm.n_embd()
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        response = self.llm.create_embedding(list(texts))
+        return _normalize_rows([item['embedding'] for item in response['data']])
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """Embeddings from a small local sentence-transformers model on CPU."""
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL):
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            raise RuntimeError("sentence-transformers not available")
+
+        self.model_id = f"sentence_transformers:{model_name}"
+        # Never reach out to the model hub; use what is cached locally
+        self.model = SentenceTransformer(model_name, device="cpu", local_files_only=True)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        vectors = self.model.encode(list(texts), batch_size=len(texts), convert_to_numpy=True,
+                                    normalize_embeddings=True, show_progress_bar=False)
+        return vectors.astype(np.float32, copy=False)
+
+
+class HashingEmbedder(Embedder):
+    """Model-free fallback: signed feature hashing of word unigrams and bigrams.
+
+    Not semantic, but it needs no model files and still gives the hybrid
+    search a usable lexical-similarity signal.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.model_id = f"hashing:{dim}"
+
+    def _features(self, text: str) -> Iterable[str]:
+        tokens = _TOKEN_RE.findall(text.lower())
+        yield from tokens
+        yield from (f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'little')
+                vectors[row, digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        return _normalize_rows(vectors)
+
+
+def available_embedding_providers() -> List[str]:
+    """Embedding backends usable in this environment, best first."""
+    if not NUMPY_AVAILABLE:
+        return []
+
+    providers = []
+    if SENTENCE_TRANSFORMERS_AVAILABLE:
+        providers.append('sentence_transformers')
+    if LLAMA_CPP_AVAILABLE:
+        providers.append('llama_cpp')
+    providers.append('hashing')
+    return providers
+
+
+def get_default_embedder(model_path: Optional[str] = None) -> Embedder:
+    """Pick the best offline embedder: a given GGUF model, then sentence-transformers,
+    then the hashing fallback."""
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("numpy is required for vector search")
+
+    if model_path and LLAMA_CPP_AVAILABLE:
+        try:
+            return LlamaCppEmbedder(model_path)
+        except Exception as e:
+            logger.warning(f"GGUF embedding mode unavailable for {model_path}: {e}")
+
+    if SENTENCE_TRANSFORMERS_AVAILABLE:
+        try:
+            return SentenceTransformerEmbedder()
+        except Exception as e:
+            logger.warning(f"Local sentence-transformers model unavailable: {e}")
+
+    logger.info("Using hashing embedder; install sentence-transformers for semantic search")
+    return HashingEmbedder()
+
+
+class VectorMatrix:
+    """Growable (rows, dim) vector matrix, memory-mapped when given a path.
+
+    int8 storage keeps one float32 scale per row; rows are dequantized on
+    read, so scores stay comparable with float32 storage at a quarter of the
+    size.
+    """
+
+    def __init__(self, dim: int, dtype: str = 'float32', path: Optional[Path] = None,
+                 count: int = 0, capacity: int = 1024):
+        if dtype not in ('float32', 'int8'):
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+
+        self.dim = dim
+        self.dtype = dtype
+        self.path = Path(path) if path else None
+        self.count = count
+        self.capacity = 0
+        self._data = None
+        self._scales = None
+        self._allocate(max(capacity, count, 1))
+
+    def _open(self, name: str, dtype, shape):
+        file_path = self.path / name
+        needed = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(file_path, 'ab') as f:
+            if f.tell() < needed:
+                f.truncate(needed)
+        return np.memmap(file_path, dtype=dtype, mode='r+', shape=shape)
+
+    def _allocate(self, capacity: int):
+        storage_dtype = np.int8 if self.dtype == 'int8' else np.float32
+
+        if self.path:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.flush()
+            # Growing the backing files keeps existing rows in place
+            self._data = self._open(f"vectors.{self.dtype}", storage_dtype, (capacity, self.dim))
+            if self.dtype == 'int8':
+                self._scales = self._open("scales.float32", np.float32, (capacity,))
+        else:
+            data = np.zeros((capacity, self.dim), dtype=storage_dtype)
+            if self._data is not None:
+                data[:self.count] = self._data[:self.count]
+            self._data = data
+            if self.dtype == 'int8':
+                scales = np.zeros(capacity, dtype=np.float32)
+                if self._scales is not None:
+                    scales[:self.count] = self._scales[:self.count]
+                self._scales = scales
+
+        self.capacity = capacity
+
+    def append(self, vectors: "np.ndarray") -> "np.ndarray":
+        """Append rows and return their row numbers."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        start, end = self.count, self.count + len(vectors)
+        if end > self.capacity:
+            self._allocate(max(end, self.capacity * 2))
+
+        if self.dtype == 'int8':
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self._data[start:end] = np.round(vectors / scales[:, None]).astype(np.int8)
+            self._scales[start:end] = scales
+        else:
+            self._data[start:end] = vectors
+
+        self.count = end
+        return np.arange(start, end)
+
+    def rows(self, indices=None) -> "np.ndarray":
+        """Dequantized float32 rows (all rows when ``indices`` is None)."""
+        if indices is None:
+            indices = slice(0, self.count)
+        data = self._data[indices]
+        if self.dtype == 'int8':
+            return data.astype(np.float32) * self._scales[indices][:, None]
+        return np.asarray(data)
+
+    def dot(self, query: "np.ndarray", indices=None) -> "np.ndarray":
+        """Inner products of ``query`` with the selected rows."""
+        if indices is None:
+            indices = slice(0, self.count)
+        if self.dtype == 'int8':
+            return (self._data[indices].astype(np.float32) @ query) * self._scales[indices]
+        return self._data[indices] @ query
+
+    def compact(self, keep: "np.ndarray"):
+        """Keep only the rows numbered in ``keep`` (ascending), moved to the front."""
+        self._data[:len(keep)] = self._data[keep]
+        if self._scales is not None:
+            self._scales[:len(keep)] = self._scales[keep]
+        self.count = len(keep)
+
+    def flush(self):
+        for array in (self._data, self._scales):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+
+class IVFIndex:
+    """Inverted-file ANN index: k-means centroids with a row list per centroid."""
+
+    def __init__(self, nlist: int = 0, nprobe: int = 8, train_iterations: int = 10):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iterations = train_iterations
+        self.centroids: Optional["np.ndarray"] = None
+        self.lists: List[List[int]] = []
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, vectors: "np.ndarray", seed: int = 0):
+        """Fit centroids with a few rounds of spherical k-means."""
+        rng = np.random.default_rng(seed)
+        nlist = self.nlist or max(1, int(np.sqrt(len(vectors))))
+        nlist = min(nlist, len(vectors))
+
+        centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+        for _ in range(self.train_iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = vectors[assignments == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _normalize_rows(centroids)
+
+        self.nlist = nlist
+        self.centroids = centroids
+        self.lists = [[] for _ in range(nlist)]
+
+    def assign(self, vectors: "np.ndarray") -> "np.ndarray":
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def add(self, rows: Iterable[int], assignments: Iterable[int]):
+        for row, list_id in zip(rows, assignments):
+            self.lists[int(list_id)].append(int(row))
+
+    def probe(self, query: "np.ndarray", nprobe: Optional[int] = None) -> "np.ndarray":
+        """Rows in the ``nprobe`` lists whose centroids are closest to ``query``."""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        nearest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = [self.lists[c] for c in nearest if self.lists[c]]
+        return np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+
+
+class VectorIndex:
+    """Id-addressed vector store with brute-force search that switches to IVF
+    once it holds ``train_threshold`` vectors.
+
+    Not thread-safe for writers; callers serialize add/remove against search.
+    Removed vectors are tombstoned and reclaimed by compact(), which runs on
+    save() and whenever tombstones pass ``COMPACT_RATIO`` of the rows.
+    """
+
+    META_FILE = "index.json"
+    COMPACT_RATIO = 0.25
+
+    def __init__(self, dim: int, path: Optional[Union[str, Path]] = None, dtype: str = 'float32',
+                 model_id: str = "", train_threshold: int = 4096, nprobe: int = 8):
+        self.dim = dim
+        self.path = Path(path) if path else None
+        self.model_id = model_id
+        self.train_threshold = train_threshold
+        self.matrix = VectorMatrix(dim, dtype, self.path)
+        self.ivf = IVFIndex(nprobe=nprobe)
+        self.row_ids: List[Optional[str]] = []
+        self.id_rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.id_rows)
+
+    def add(self, ids: Sequence[str], vectors: "np.ndarray"):
+        """Insert or replace vectors for ``ids``."""
+        if not len(ids):
+            return
+
+        vectors = _normalize_rows(vectors)
+        for item_id in ids:
+            self._tombstone(item_id)
+
+        rows = self.matrix.append(vectors)
+        for item_id, row in zip(ids, rows):
+            self.row_ids.append(item_id)
+            self.id_rows[item_id] = int(row)
+
+        if self.ivf.trained:
+            self.ivf.add(rows, self.ivf.assign(vectors))
+        elif len(self.id_rows) >= self.train_threshold:
+            self._train()
+        self._maybe_compact()
+
+    def remove(self, item_id: str) -> bool:
+        """Tombstone a vector; its row is skipped by every search."""
+        removed = self._tombstone(item_id)
+        if removed:
+            self._maybe_compact()
+        return removed
+
+    def _tombstone(self, item_id: str) -> bool:
+        row = self.id_rows.pop(item_id, None)
+        if row is None:
+            return False
+        self.row_ids[row] = None
+        return True
+
+    def _maybe_compact(self):
+        dead = len(self.row_ids) - len(self.id_rows)
+        if dead and dead >= self.COMPACT_RATIO * len(self.row_ids):
+            self.compact()
+
+    def compact(self) -> int:
+        """Drop tombstoned rows from the matrix and IVF lists; returns how many."""
+        dead = len(self.row_ids) - len(self.id_rows)
+        if not dead:
+            return 0
+
+        keep = np.fromiter((row for row, item_id in enumerate(self.row_ids) if item_id is not None),
+                           dtype=np.int64)
+        new_rows = np.full(len(self.row_ids), -1, dtype=np.int64)
+        new_rows[keep] = np.arange(len(keep))
+
+        self.matrix.compact(keep)
+        self.row_ids = [self.row_ids[row] for row in keep]
+        self.id_rows = {item_id: row for row, item_id in enumerate(self.row_ids)}
+        if self.ivf.trained:
+            self.ivf.lists = [[int(new_rows[row]) for row in rows if new_rows[row] >= 0]
+                              for rows in self.ivf.lists]
+        return dead
+
+    def _train(self):
+        live_rows = np.fromiter(self.id_rows.values(), dtype=np.int64)
+        vectors = self.matrix.rows(live_rows)
+        sample = vectors
+        if len(vectors) > 50000:
+            sample = vectors[np.random.default_rng(0).choice(len(vectors), 50000, replace=False)]
+
+        self.ivf.train(sample)
+        self.ivf.add(live_rows, self.ivf.assign(vectors))
+        logger.info(f"Trained IVF index with {self.ivf.nlist} lists over {len(live_rows)} vectors")
+
+    def search(self, query: "np.ndarray", k: int = 10,
+               allowed_ids: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """Top ``k`` (id, cosine similarity) pairs for ``query``.
+
+        With ``allowed_ids`` only those vectors are scored, exactly; otherwise
+        IVF probing is used once the index is trained.
+        """
+        if not self.id_rows or k <= 0:
+            return []
+
+        query = _normalize_rows(query)[0]
+        if allowed_ids is not None:
+            rows = np.fromiter((self.id_rows[i] for i in allowed_ids if i in self.id_rows), dtype=np.int64)
+        elif self.ivf.trained:
+            rows = self.ivf.probe(query)
+        else:
+            rows = np.fromiter(self.id_rows.values(), dtype=np.int64)
+
+        if not len(rows):
+            return []
+
+        scores = self.matrix.dot(query, rows)
+        if len(rows) > k:
+            # Over-select a little so tombstoned rows do not leave gaps
+            keep = np.argpartition(-scores, min(len(rows) - 1, k * 2))[:k * 2]
+            rows, scores = rows[keep], scores[keep]
+
+        order = np.argsort(-scores)
+        results = []
+        for i in order:
+            item_id = self.row_ids[rows[i]]
+            if item_id is not None:
+                results.append((item_id, float(scores[i])))
+                if len(results) == k:
+                    break
+        return results
+
+    def save(self):
+        """Flush vectors and write ids and IVF state next to them."""
+        if not self.path:
+            raise ValueError("VectorIndex has no path")
+
+        self.compact()
+        self.matrix.flush()
+        meta = {
+            'dim': self.dim,
+            'dtype': self.matrix.dtype,
+            'model_id': self.model_id,
+            'count': self.matrix.count,
+            'capacity': self.matrix.capacity,
+            'row_ids': self.row_ids,
+            'nlist': self.ivf.nlist if self.ivf.trained else 0
+        }
+        if self.ivf.trained:
+            np.save(self.path / "centroids.npy", self.ivf.centroids)
+
+        tmp_path = self.path / (self.META_FILE + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.path / self.META_FILE)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], **kwargs) -> Optional["VectorIndex"]:
+        """Reopen an index written by save(), or None if there is none."""
+        path = Path(path)
+        try:
+            with open(path / cls.META_FILE, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        index = cls.__new__(cls)
+        index.dim = meta['dim']
+        index.path = path
+        index.model_id = meta.get('model_id', "")
+        index.train_threshold = kwargs.get('train_threshold', 4096)
+        index.matrix = VectorMatrix(meta['dim'], meta['dtype'], path,
+                                    count=meta['count'], capacity=meta['capacity'])
+        index.ivf = IVFIndex(nprobe=kwargs.get('nprobe', 8))
+        index.row_ids = meta['row_ids']
+        index.id_rows = {item_id: row for row, item_id in enumerate(index.row_ids) if item_id is not None}
+
+        if meta.get('nlist'):
+            index.ivf.centroids = np.load(path / "centroids.npy")
+            index.ivf.nlist = len(index.ivf.centroids)
+            index.ivf.lists = [[] for _ in range(index.ivf.nlist)]
+            live_rows = np.fromiter(index.id_rows.values(), dtype=np.int64)
+            if len(live_rows):
+                index.ivf.add(live_rows, index.ivf.assign(index.matrix.rows(live_rows)))
+        return index
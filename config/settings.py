@@ -80,6 +80,10 @@ class VoiceSettings:
     tts_speed: float = 1.0
     tts_volume: float = 0.8
     
+    # Synthesized sentences are cached on disk, least recently used evicted first
+    tts_cache_enabled: bool = True
+    tts_cache_size_mb: int = 64
+    
     # Speech recognition
     stt_enabled: bool = False
     stt_language: str = "en-US"
@@ -88,6 +92,7 @@ class VoiceSettings:
     # Voice activation
     wake_word_enabled: bool = False
     wake_word: str = "assistant"
+    wake_word_templates_file: str = "data/wake_words.json"  # Spotter templates from enrollment
 
 
 @dataclass
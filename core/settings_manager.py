@@ -8,11 +8,11 @@ a unified interface for the settings UI.
 import os
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional, Union
-import requests
+from typing import Dict, Any, List, Optional, Union
 
 # Import existing infrastructure
 from config.settings import get_settings, save_settings
+from backend.utils.http_client import get_http_client
 try:
     from backend.security.api_key_vault import APIKeyVault
     from backend.security.auth_manager import AuthManager
@@ -73,6 +73,8 @@ class SettingsManager:
         
         # Feature toggles
         settings_dict['ENABLE_VOICE'] = str(self.settings.voice.tts_enabled).lower()
+        settings_dict['WAKE_WORD_ENABLED'] = str(self.settings.voice.wake_word_enabled).lower()
+        settings_dict['WAKE_WORD'] = self.settings.voice.wake_word
         settings_dict['BUSINESS_FEATURES_ENABLED'] = str(self.settings.features.business_dashboard_enabled).lower()
         settings_dict['SCREEN_CAPTURE_ENABLED'] = str(self.settings.features.screen_capture_enabled).lower()
         settings_dict['WEB_SEARCH_ENABLED'] = str(self.settings.features.web_search_enabled).lower()
@@ -133,6 +135,12 @@ class SettingsManager:
             elif key == 'ENABLE_VOICE':
                 self.settings.voice.tts_enabled = value.lower() == 'true'
                 
+            elif key == 'WAKE_WORD_ENABLED':
+                self.settings.voice.wake_word_enabled = value.lower() == 'true'
+                
+            elif key == 'WAKE_WORD':
+                self.settings.voice.wake_word = value.lower()
+                
             elif key == 'BUSINESS_FEATURES_ENABLED':
                 self.settings.features.business_dashboard_enabled = value.lower() == 'true'
                 
@@ -204,6 +212,29 @@ class SettingsManager:
             logger.error(f"Failed to update .env file: {e}")
             raise
     
+    def enroll_wake_word(self, wav_paths: List[str], wake_word: Optional[str] = None) -> bool:
+        """
+        Enroll recordings of the wake word with the voice control spotter.
+        
+        Args:
+            wav_paths: Three to five 16-bit WAV clips of the wake word
+            wake_word: Wake word spoken in the clips (defaults to the configured one)
+            
+        Returns:
+            True if the wake word was enrolled and saved, False otherwise
+        """
+        from utils.voice_control import get_voice_manager
+        
+        wake_word = (wake_word or self.settings.voice.wake_word).lower()
+        if not get_voice_manager().enroll_wake_word(wake_word, wav_paths):
+            return False
+        
+        self.settings.voice.wake_word = wake_word
+        self.settings.voice.wake_word_enabled = True
+        save_settings()
+        logger.info(f"Wake word '{wake_word}' enrolled from {len(wav_paths)} recordings")
+        return True
+    
     def test_api_key(self, service: str, api_key: Optional[str] = None) -> bool:
         """
         Test if an API key is valid for the specified service.
@@ -238,10 +269,11 @@ class SettingsManager:
         if not api_key:
             return False
         try:
-            response = requests.get(
+            response = get_http_client().get(
                 "https://api.openweathermap.org/data/2.5/weather",
                 params={"q": "London", "appid": api_key},
-                timeout=10
+                timeout=10,
+                max_retries=1
             )
             return response.status_code == 200
         except Exception:
@@ -252,11 +284,12 @@ class SettingsManager:
         if not api_key:
             return False
         try:
-            response = requests.get(
+            response = get_http_client().get(
                 "https://newsapi.org/v2/top-headlines",
                 params={"country": "us", "pageSize": 1},
                 headers={"X-API-Key": api_key},
-                timeout=10
+                timeout=10,
+                max_retries=1
             )
             return response.status_code == 200
         except Exception:
@@ -267,10 +300,11 @@ class SettingsManager:
         if not api_key:
             return False
         try:
-            response = requests.get(
+            response = get_http_client().get(
                 "https://api.openai.com/v1/models",
                 headers={"Authorization": f"Bearer {api_key}"},
-                timeout=10
+                timeout=10,
+                max_retries=1
             )
             return response.status_code == 200
         except Exception:
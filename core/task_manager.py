@@ -44,10 +44,30 @@ class Task:
 class TaskManager:
     """Manages tasks for the personal assistant."""
 
-    def __init__(self):
-        """Initialize the task manager."""
+    def __init__(self, search_index=None):
+        """
+        Initialize the task manager.
+
+        Args:
+            search_index: Optional NavigationManager that tasks are indexed in
+                for global search
+        """
         self.tasks: List[Task] = []
         self._task_counter = 0
+        self.search_index = search_index
+
+    def _index_task(self, task: Task):
+        """Upsert a task into global search, if a search index is attached."""
+        if self.search_index is None:
+            return
+        self.search_index.index_items_nowait([{
+            "id": task.id,
+            "type": "task",
+            "title": task.title,
+            "description": task.description[:300],
+            "keywords": task.tags + [task.priority, "completed" if task.completed else "open"],
+            "metadata": {"task_id": task.id}
+        }])
 
     def add_task(self, task: Dict[str, Any]) -> str:
         """
@@ -146,6 +166,7 @@ class TaskManager:
             )
 
             self.tasks.append(new_task)
+            self._index_task(new_task)
             logger.info("Added task: %s", task_id)
 
             return task_id
@@ -335,6 +356,7 @@ class TaskManager:
                         else:
                             setattr(task, field, value)
 
+                    self._index_task(task)
                     logger.info("Updated task: %s", task_id)
                     return True
 
@@ -359,6 +381,8 @@ class TaskManager:
             for i, task in enumerate(self.tasks):
                 if task.id == task_id:
                     removed_task = self.tasks.pop(i)
+                    if self.search_index is not None:
+                        self.search_index.remove_items_nowait("task", [task_id])
                     logger.info("Removed task: %s", task_id)
                     return removed_task.to_dict()
 
@@ -5,6 +5,8 @@ Provides API endpoints for settings management with authentication.
 """
 
 import logging
+import os
+import tempfile
 from flask import Blueprint, jsonify, request, render_template
 from functools import wraps
 
@@ -135,6 +137,37 @@ def test_api_key(service):
         }), 500
 
 
+@settings_bp.route('/api/settings/wake-word/enroll', methods=['POST'])
+def enroll_wake_word():
+    """Enroll uploaded WAV recordings of the wake word."""
+    try:
+        clips = request.files.getlist('clips')
+        if not clips:
+            return jsonify({'success': False, 'error': 'No recordings provided'}), 400
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            wav_paths = []
+            for index, clip in enumerate(clips):
+                path = os.path.join(temp_dir, f"clip{index}.wav")
+                clip.save(path)
+                wav_paths.append(path)
+            
+            settings_manager = get_settings_manager()
+            enrolled = settings_manager.enroll_wake_word(wav_paths, request.form.get('wake_word') or None)
+        
+        if not enrolled:
+            return jsonify({'success': False, 'error': 'Could not enroll the wake word from these recordings'}), 400
+        
+        return jsonify({
+            'success': True,
+            'message': f'Wake word enrolled from {len(wav_paths)} recordings'
+        })
+        
+    except Exception as e:
+        logger.error(f"Error enrolling wake word: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @settings_bp.route('/api/settings/reset', methods=['POST'])
 @require_valid_request
 def reset_settings():
@@ -0,0 +1,303 @@
+"""
+Parallel multi-monitor capture and analysis engine for WestfallPersonalAssistant
+
+Monitors are grabbed concurrently, each on a capture thread that keeps its own
+persistent mss handle. OCR and OpenCV work runs in a process pool so it never
+competes with the UI thread for the GIL. Finished analyses land in a bounded
+queue; when analysis falls behind, stale frames are dropped instead of piling up.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+# Optional dependencies with fallbacks
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    import mss
+    HAS_MSS = True
+except ImportError:
+    HAS_MSS = False
+
+logger = logging.getLogger(__name__)
+
+ERROR_KEYWORDS = [
+    'error', 'exception', 'failed', 'denied', 'invalid',
+    'undefined', 'null', 'crash', 'fatal', 'warning'
+]
+
+
+def analyze_capture(monitor_id: int, pixels, captured_at: float) -> Dict[str, Any]:
+    """OCR and UI analysis for one monitor; runs inside a worker process."""
+    result = {
+        'monitor_id': monitor_id,
+        'captured_at': captured_at,
+        'text': '',
+        'issues': [],
+        'ui_regions': 0
+    }
+
+    try:
+        import pytesseract
+        result['text'] = pytesseract.image_to_string(pixels)
+        text_lower = result['text'].lower()
+        result['issues'] = [keyword for keyword in ERROR_KEYWORDS if keyword in text_lower]
+    except ImportError:
+        result['error'] = 'pytesseract not available'
+
+    try:
+        import cv2
+        gray = cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY)
+        edges = cv2.Canny(gray, 50, 150, apertureSize=3)
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        result['ui_regions'] = len(contours)
+    except ImportError:
+        pass
+
+    result['analyzed_at'] = time.time()
+    return result
+
+
+def extract_text(pixels) -> str:
+    """OCR a single frame; runs inside a worker process."""
+    import pytesseract
+    return pytesseract.image_to_string(pixels)
+
+
+def _warm_up() -> int:
+    """No-op task that makes a worker process start (and import) ahead of use."""
+    return os.getpid()
+
+
+class ParallelCaptureEngine:
+    """Captures monitors in parallel and analyzes them off the UI thread."""
+
+    def __init__(self, analysis_workers: Optional[int] = None, result_queue_size: int = 4):
+        self.analysis_workers = analysis_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.results: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=result_queue_size)
+        self.stats = {'captures': 0, 'analyses': 0, 'dropped_frames': 0, 'dropped_results': 0}
+
+        self._local = threading.local()
+        self._handles: List[Any] = []  # Every capture thread's mss handle, closed on shutdown
+        self._capture_pool: Optional[ThreadPoolExecutor] = None
+        self._dispatch_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._monitors: Optional[List[Dict[str, int]]] = None
+
+    def _sct(self):
+        """Persistent mss handle for the current thread (mss is not thread-safe)."""
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+            with self._lock:
+                self._handles.append(sct)
+        return sct
+
+    @property
+    def monitors(self) -> List[Dict[str, int]]:
+        """mss monitor list; index 0 is the union of all monitors."""
+        if self._monitors is None:
+            with mss.mss() as sct:
+                self._monitors = [dict(m) for m in sct.monitors]
+        return self._monitors
+
+    def _get_capture_pool(self) -> ThreadPoolExecutor:
+        if self._capture_pool is None:
+            self._capture_pool = ThreadPoolExecutor(
+                max_workers=max(1, len(self.monitors) - 1),
+                thread_name_prefix="monitor-capture")
+        return self._capture_pool
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            # Spawn rather than fork: forking a threaded Qt process can copy
+            # locks held by other threads into the workers and deadlock them
+            self._process_pool = ProcessPoolExecutor(max_workers=self.analysis_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+        return self._process_pool
+
+    def _capture_one(self, index: int) -> Dict[str, Any]:
+        monitor = self.monitors[index]
+        shot = self._sct().grab(monitor)
+        bgra = np.frombuffer(shot.bgra, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        return {
+            'monitor_id': index,
+            'pixels': np.ascontiguousarray(bgra[..., 2::-1]),
+            'dimensions': (monitor['width'], monitor['height']),
+            'position': (monitor['left'], monitor['top']),
+            'captured_at': time.time()
+        }
+
+    def capture_all(self, monitor_indices=None) -> List[Dict[str, Any]]:
+        """Grab the given monitors (default: all physical ones) concurrently.
+
+        Each capture holds RGB pixels as a NumPy array in ``pixels``.
+        """
+        if not HAS_MSS or not HAS_NUMPY:
+            raise RuntimeError("mss and numpy are required for multi-monitor capture")
+
+        indices = [i for i in (monitor_indices or range(1, len(self.monitors)))
+                   if 0 <= i < len(self.monitors)]
+        pool = self._get_capture_pool()
+        captures = list(pool.map(self._capture_one, indices))
+        self.stats['captures'] += len(captures)
+        return captures
+
+    def _publish(self, result: Dict[str, Any]):
+        """Queue a result, evicting the oldest one if the consumer is behind."""
+        while True:
+            try:
+                self.results.put_nowait(result)
+                return
+            except queue.Full:
+                try:
+                    self.results.get_nowait()
+                    self.stats['dropped_results'] += 1
+                except queue.Empty:
+                    pass
+
+    def _on_analysis_done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+        try:
+            self._publish(future.result())
+            self.stats['analyses'] += 1
+        except Exception as e:
+            logger.error(f"Screen analysis failed: {e}")
+
+    def submit_analysis(self, captures: List[Dict[str, Any]]) -> bool:
+        """Hand captures to the process pool.
+
+        Returns False (and drops the frames) when every worker is still busy
+        with earlier frames; newer frames will be along shortly.
+        """
+        with self._lock:
+            if self._in_flight >= self.analysis_workers:
+                self.stats['dropped_frames'] += len(captures)
+                return False
+            self._in_flight += len(captures)
+
+        pool = self._get_process_pool()
+        for capture in captures:
+            future = pool.submit(analyze_capture, capture['monitor_id'], capture['pixels'],
+                                 capture['captured_at'])
+            future.add_done_callback(self._on_analysis_done)
+        return True
+
+    def request_analysis(self, monitor_indices=None) -> bool:
+        """Capture and analyze in the background without blocking the caller."""
+        with self._lock:
+            if self._in_flight >= self.analysis_workers:
+                self.stats['dropped_frames'] += 1
+                return False
+
+        def _dispatch():
+            try:
+                self.submit_analysis(self.capture_all(monitor_indices))
+            except Exception as e:
+                logger.error(f"Capture for analysis failed: {e}")
+
+        self._get_dispatch_pool().submit(_dispatch)
+        return True
+
+    def warm_up(self):
+        """Start the analysis worker processes in the background.
+        
+        Spawned workers take a moment to boot; doing it ahead of the first
+        OCR request keeps that cost out of the first result.
+        """
+        def _start():
+            pool = self._get_process_pool()
+            for _ in range(self.analysis_workers):
+                pool.submit(_warm_up)
+        self._get_dispatch_pool().submit(_start)
+
+    def _get_dispatch_pool(self) -> ThreadPoolExecutor:
+        if self._dispatch_pool is None:
+            self._dispatch_pool = ThreadPoolExecutor(max_workers=1,
+                                                     thread_name_prefix="capture-dispatch")
+        return self._dispatch_pool
+
+    def submit_text_extraction(self, captures: List[Dict[str, Any]]) -> Future:
+        """OCR several captures across the process pool without blocking.
+        
+        Returns a Future resolving to {monitor_id: text} once every capture is
+        done. Submission happens on the dispatch thread, so a UI thread calling
+        this never waits for worker processes to start; attach a done callback
+        (for example one that emits a Qt signal) to receive the texts.
+        """
+        outcome: Future = Future()
+        outcome.set_running_or_notify_cancel()
+
+        def _submit():
+            try:
+                pool = self._get_process_pool()
+                futures = {c['monitor_id']: pool.submit(extract_text, c['pixels']) for c in captures}
+            except Exception as e:
+                outcome.set_exception(e)
+                return
+            remaining = [len(futures)]
+            lock = threading.Lock()
+
+            def _done(_):
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0]:
+                        return
+                try:
+                    outcome.set_result({monitor_id: future.result() for monitor_id, future in futures.items()})
+                except Exception as e:
+                    outcome.set_exception(e)
+
+            if not futures:
+                outcome.set_result({})
+            for future in futures.values():
+                future.add_done_callback(_done)
+
+        self._get_dispatch_pool().submit(_submit)
+        return outcome
+
+    def extract_text_parallel(self, captures: List[Dict[str, Any]]) -> Dict[int, str]:
+        """OCR several captures at once and wait for them (not for use on the UI thread)."""
+        return self.submit_text_extraction(captures).result()
+
+    def drain_results(self) -> List[Dict[str, Any]]:
+        """Return all finished analyses without blocking."""
+        drained = []
+        while True:
+            try:
+                drained.append(self.results.get_nowait())
+            except queue.Empty:
+                return drained
+
+    def shutdown(self):
+        """Stop all pools and close the capture handles; pending analyses are abandoned."""
+        for pool in (self._dispatch_pool, self._capture_pool):
+            if pool is not None:
+                # Let grabs in progress finish so their mss handles can be closed
+                pool.shutdown(wait=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
+        self._dispatch_pool = self._capture_pool = self._process_pool = None
+
+        with self._lock:
+            handles, self._handles = self._handles, []
+        for sct in handles:
+            try:
+                sct.close()
+            except Exception as e:
+                logger.debug(f"Closing mss handle failed: {e}")
+        self._local = threading.local()
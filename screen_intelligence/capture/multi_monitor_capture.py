@@ -16,9 +16,11 @@ from io import BytesIO
 from datetime import datetime
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import Qt, pyqtSignal, QThread
-from PyQt5.QtGui import QPixmap, QImage
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QColor
 import json
 
+from .capture_engine import ParallelCaptureEngine
+
 # Optional dependencies with fallbacks
 try:
     import mss
@@ -42,8 +44,9 @@ class ScreenCaptureWorker(QThread):
     screenshot_ready = pyqtSignal(list)
     error_occurred = pyqtSignal(str)
     
-    def __init__(self, monitor_indices=None):
+    def __init__(self, engine, monitor_indices=None):
         super().__init__()
+        self.engine = engine
         self.monitor_indices = monitor_indices
     
     def run(self):
@@ -52,48 +55,32 @@ class ScreenCaptureWorker(QThread):
                 self.error_occurred.emit("MSS library not available. Install with: pip install mss")
                 return
             
-            if not HAS_PIL:
-                self.error_occurred.emit("PIL library not available. Install with: pip install Pillow")
+            if not HAS_NUMPY:
+                self.error_occurred.emit("NumPy library not available. Install with: pip install numpy")
                 return
-                
-            captures = []
-            with mss.mss() as sct:
-                monitors = sct.monitors
-                
-                # Capture specified monitors or all
-                indices = self.monitor_indices or range(1, len(monitors))
-                
-                for i in indices:
-                    if i < len(monitors):
-                        monitor = monitors[i]
-                        screenshot = sct.grab(monitor)
-                        
-                        # Convert to PIL Image
-                        img = Image.frombytes('RGB', screenshot.size, screenshot.bgra, 'raw', 'BGRX')
-                        
-                        # Add monitor info overlay
-                        draw = ImageDraw.Draw(img)
-                        text = f"Monitor {i}: {monitor['width']}x{monitor['height']}"
-                        draw.rectangle([0, 0, 300, 30], fill='black')
-                        draw.text((10, 5), text, fill='white')
-                        
-                        captures.append({
-                            'monitor_id': i,
-                            'image': img,
-                            'dimensions': (monitor['width'], monitor['height']),
-                            'position': (monitor['left'], monitor['top'])
-                        })
-                
-                self.screenshot_ready.emit(captures)
+            
+            # Monitors are grabbed concurrently on the engine's capture threads;
+            # the overlay is painted on the scaled preview, not the full frame
+            self.screenshot_ready.emit(self.engine.capture_all(self.monitor_indices))
         except Exception as e:
             self.error_occurred.emit(str(e))
 
 class MultiMonitorCapture(QWidget):
+    # OCR finishes on a worker thread; (purpose, captures, texts or exception)
+    # is delivered back to the UI thread through this signal
+    text_ready = pyqtSignal(str, object, object)
+    
     def __init__(self):
         super().__init__()
         self.captures = []
+        self.engine = ParallelCaptureEngine()
+        self.text_ready.connect(self.on_text_ready)
         self.init_ui()
     
+    def closeEvent(self, event):
+        self.engine.shutdown()
+        super().closeEvent(event)
+    
     def init_ui(self):
         self.setWindowTitle("Screen Intelligence - Multi-Monitor Capture")
         self.setGeometry(100, 100, 1200, 800)
@@ -151,15 +138,18 @@ class MultiMonitorCapture(QWidget):
                               "MSS library not available. Please install with:\npip install mss")
             return
         
-        if not HAS_PIL:
+        if not HAS_NUMPY:
             QMessageBox.warning(self, "Missing Dependency", 
-                              "PIL library not available. Please install with:\npip install Pillow")
+                              "NumPy library not available. Please install with:\npip install numpy")
             return
             
-        self.worker = ScreenCaptureWorker()
+        self.worker = ScreenCaptureWorker(self.engine)
         self.worker.screenshot_ready.connect(self.display_captures)
         self.worker.error_occurred.connect(self.show_error)
         self.worker.start()
+        if HAS_PYTESSERACT:
+            # Boot the OCR workers while the capture runs
+            self.engine.warm_up()
         
         self.results_text.append(f"[{datetime.now().strftime('%H:%M:%S')}] Capturing all monitors...")
     
@@ -179,17 +169,22 @@ class MultiMonitorCapture(QWidget):
             monitor_widget = QWidget()
             monitor_layout = QVBoxLayout()
             
-            # Convert PIL Image to QPixmap
-            img = capture['image']
-            img_byte_arr = BytesIO()
-            img.save(img_byte_arr, format='PNG')
-            img_byte_arr = img_byte_arr.getvalue()
-            
-            pixmap = QPixmap()
-            pixmap.loadFromData(img_byte_arr)
+            # Wrap the RGB pixels directly; no PNG round-trip
+            pixels = capture['pixels']
+            height, width = pixels.shape[:2]
+            image = QImage(pixels.data, width, height, pixels.strides[0], QImage.Format_RGB888)
             
             # Scale to fit
-            scaled_pixmap = pixmap.scaled(800, 600, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            scaled_pixmap = QPixmap.fromImage(
+                image.scaled(800, 600, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            
+            # Add monitor info overlay on the preview only
+            painter = QPainter(scaled_pixmap)
+            painter.fillRect(0, 0, 300, 30, QColor('black'))
+            painter.setPen(QColor('white'))
+            painter.drawText(10, 20, f"Monitor {capture['monitor_id']}: "
+                                     f"{capture['dimensions'][0]}x{capture['dimensions'][1]}")
+            painter.end()
             
             img_label = QLabel()
             img_label.setPixmap(scaled_pixmap)
@@ -220,12 +215,30 @@ class MultiMonitorCapture(QWidget):
         
         self.results_text.append(f"[{datetime.now().strftime('%H:%M:%S')}] Analyzing screens for errors...")
         
+        # OCR every monitor at once across the engine's process pool; the
+        # report is written by report_errors once the texts arrive
+        self.request_text('errors')
+    
+    def request_text(self, purpose):
+        """OCR the current captures off the UI thread; results arrive via text_ready."""
+        captures = list(self.captures)
+        future = self.engine.submit_text_extraction(captures)
+        future.add_done_callback(
+            lambda f: self.text_ready.emit(purpose, captures, f.exception() or f.result()))
+    
+    def on_text_ready(self, purpose, captures, texts):
+        if isinstance(texts, Exception):
+            self.show_error(f"Text extraction failed: {texts}")
+        elif purpose == 'errors':
+            self.report_errors(captures, texts)
+        elif purpose == 'ai_help':
+            self.send_ai_context(captures, texts)
+    
+    def report_errors(self, captures, texts):
         errors_found = []
         
-        for capture in self.captures:
-            # Extract text using OCR
-            img = capture['image']
-            text = pytesseract.image_to_string(img)
+        for capture in captures:
+            text = texts[capture['monitor_id']]
             
             # Common error patterns
             error_patterns = [
@@ -306,33 +319,43 @@ class MultiMonitorCapture(QWidget):
             
             # Create or get AI chat instance
             if hasattr(self.parent(), 'ai_chat'):
-                ai_chat = self.parent().ai_chat
-                
-                # Prepare context with screen information
-                context = "I need help with what's on my screen. "
-                
-                for capture in self.captures:
-                    # Extract text from image if possible
-                    if HAS_PYTESSERACT:
-                        text = pytesseract.image_to_string(capture['image'])
-                        if text.strip():
-                            context += f"\nMonitor {capture['monitor_id']} shows: {text[:500]}..."
-                    else:
-                        context += f"\nMonitor {capture['monitor_id']}: Screenshot captured but text extraction requires pytesseract library"
-                
-                # Send to AI
-                ai_chat.show()
-                if hasattr(ai_chat, 'input_field'):
-                    ai_chat.input_field.setText(context)
-                    if hasattr(ai_chat, 'send_message'):
-                        ai_chat.send_message()
-                
-                self.results_text.append(f"[{datetime.now().strftime('%H:%M:%S')}] Sent screen context to AI Assistant")
+                # Screen text is extracted in the background; send_ai_context
+                # finishes the request when it arrives
+                if HAS_PYTESSERACT:
+                    self.results_text.append(f"[{datetime.now().strftime('%H:%M:%S')}] Reading screen text for AI Assistant...")
+                    self.request_text('ai_help')
+                else:
+                    self.send_ai_context(self.captures, {})
             else:
                 QMessageBox.information(self, "AI Help", "AI Assistant will analyze your screens and provide guidance")
         except ImportError:
             QMessageBox.information(self, "AI Help", "AI Assistant module not available")
     
+    def send_ai_context(self, captures, texts):
+        ai_chat = getattr(self.parent(), 'ai_chat', None)
+        if ai_chat is None:
+            return
+        
+        # Prepare context with screen information
+        context = "I need help with what's on my screen. "
+        for capture in captures:
+            # Extract text from image if possible
+            if HAS_PYTESSERACT:
+                text = texts.get(capture['monitor_id'], '')
+                if text.strip():
+                    context += f"\nMonitor {capture['monitor_id']} shows: {text[:500]}..."
+            else:
+                context += f"\nMonitor {capture['monitor_id']}: Screenshot captured but text extraction requires pytesseract library"
+        
+        # Send to AI
+        ai_chat.show()
+        if hasattr(ai_chat, 'input_field'):
+            ai_chat.input_field.setText(context)
+            if hasattr(ai_chat, 'send_message'):
+                ai_chat.send_message()
+        
+        self.results_text.append(f"[{datetime.now().strftime('%H:%M:%S')}] Sent screen context to AI Assistant")
+    
     def show_error(self, error):
         self.results_text.append(f"❌ Error: {error}")
         QMessageBox.critical(self, "Error", f"Failed to capture screens: {error}")
@@ -12,7 +12,11 @@ except ImportError:
     HAS_PIL = False
 
 import re
-from typing import List, Dict, Tuple
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional
 
 # Optional dependencies with fallbacks
 try:
@@ -27,7 +31,80 @@ try:
 except ImportError:
     HAS_PYTESSERACT = False
 
+class OCRResult:
+    """Words, boxes and confidences from a single Tesseract pass.
+    
+    Built from ``image_to_data`` output and shared by every text-based
+    detector, so a full analysis costs one OCR run.
+    """
+    
+    def __init__(self, data: Dict):
+        self.words = []
+        lines: "OrderedDict[Tuple[int, int, int], List[Dict]]" = OrderedDict()
+        
+        for i, word in enumerate(data['text']):
+            if not word.strip():
+                continue
+            entry = {
+                'text': word,
+                'x': data['left'][i],
+                'y': data['top'][i],
+                'width': data['width'][i],
+                'height': data['height'][i],
+                'confidence': float(data['conf'][i])
+            }
+            self.words.append(entry)
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, []).append(entry)
+        
+        self.lines = list(lines.values())
+        self.text = self._layout_text(lines)
+        self._lower_text = None
+    
+    @property
+    def lower_text(self) -> str:
+        if self._lower_text is None:
+            self._lower_text = self.text.lower()
+        return self._lower_text
+    
+    @property
+    def confidence(self) -> float:
+        confidences = [w['confidence'] for w in self.words if w['confidence'] > 0]
+        return sum(confidences) / len(confidences) if confidences else 0.0
+    
+    @staticmethod
+    def _layout_text(lines) -> str:
+        """Rebuild text, restoring indentation from word positions.
+        
+        Code detection relies on leading whitespace, which the word list does
+        not carry; each line is indented by its offset from the leftmost line
+        in its block, measured in average character widths.
+        """
+        block_left: Dict[int, int] = {}
+        char_widths = []
+        for key, words in lines.items():
+            block_left[key[0]] = min(block_left.get(key[0], words[0]['x']), words[0]['x'])
+            for word in words:
+                char_widths.append(word['width'] / max(len(word['text']), 1))
+        char_width = sorted(char_widths)[len(char_widths) // 2] if char_widths else 0
+        
+        output = []
+        previous_block = None
+        for key, words in lines.items():
+            if previous_block is not None and key[0] != previous_block:
+                output.append('')
+            previous_block = key[0]
+            indent = 0
+            if char_width > 0:
+                indent = int(round((words[0]['x'] - block_left[key[0]]) / char_width))
+            output.append(' ' * indent + ' '.join(w['text'] for w in words))
+        return '\n'.join(output)
+
+
 class ScreenAnalyzer:
+    # OCR results are memoized for the last few distinct images
+    OCR_CACHE_SIZE = 8
+    
     def __init__(self):
         self.code_patterns = {
             'python': r'(def |class |import |from |if |for |while |try:|except:)',
@@ -50,8 +127,51 @@ class ScreenAnalyzer:
             'unity': ['Unity', 'Unity Editor'],
             'unreal': ['Unreal Engine', 'UE4', 'UE5']
         }
+        
+        self._ocr_cache: "OrderedDict[str, OCRResult]" = OrderedDict()
+        self._ocr_lock = threading.Lock()
+        self._executor = None
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Lazily create the pool that runs detectors concurrently."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=3,
+                                                thread_name_prefix="screen-analyzer")
+        return self._executor
+    
+    @staticmethod
+    def _image_hash(image) -> str:
+        """Content hash used to memoize OCR per image."""
+        digest = hashlib.blake2b(digest_size=16)
+        if HAS_NUMPY and isinstance(image, np.ndarray):
+            digest.update(repr(image.shape).encode())
+            digest.update(np.ascontiguousarray(image).tobytes())
+        else:
+            digest.update(f"{image.mode}{image.size}".encode())
+            digest.update(image.tobytes())
+        return digest.hexdigest()
     
-    def detect_code_on_screen(self, image: "Image.Image") -> Dict:
+    def run_ocr(self, image) -> Optional[OCRResult]:
+        """Run Tesseract once per distinct image and share the result."""
+        if not HAS_PYTESSERACT:
+            return None
+        
+        key = self._image_hash(image)
+        with self._ocr_lock:
+            cached = self._ocr_cache.get(key)
+            if cached is not None:
+                self._ocr_cache.move_to_end(key)
+                return cached
+        
+        result = OCRResult(pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT))
+        
+        with self._ocr_lock:
+            self._ocr_cache[key] = result
+            while len(self._ocr_cache) > self.OCR_CACHE_SIZE:
+                self._ocr_cache.popitem(last=False)
+        return result
+    
+    def detect_code_on_screen(self, image: "Image.Image", ocr: Optional[OCRResult] = None) -> Dict:
         """Detect and extract code from screenshot"""
         if not HAS_PYTESSERACT:
             return {
@@ -61,7 +181,7 @@ class ScreenAnalyzer:
                 'error': 'PyTesseract not available'
             }
         
-        text = pytesseract.image_to_string(image)
+        text = (ocr or self.run_ocr(image)).text
         
         detected_languages = []
         code_blocks = []
@@ -99,7 +219,7 @@ class ScreenAnalyzer:
             'has_code': len(code_blocks) > 0
         }
     
-    def detect_ide(self, image: "Image.Image") -> Dict:
+    def detect_ide(self, image: "Image.Image", ocr: Optional[OCRResult] = None) -> Dict:
         """Detect which IDE or editor is visible"""
         if not HAS_PYTESSERACT:
             return {
@@ -108,13 +228,13 @@ class ScreenAnalyzer:
                 'error': 'PyTesseract not available'
             }
             
-        text = pytesseract.image_to_string(image)
+        text_lower = (ocr or self.run_ocr(image)).lower_text
         
         detected_ides = []
         
         for ide, patterns in self.ide_patterns.items():
             for pattern in patterns:
-                if pattern.lower() in text.lower():
+                if pattern.lower() in text_lower:
                     detected_ides.append(ide)
                     break
         
@@ -199,18 +319,35 @@ class ScreenAnalyzer:
         return ui_elements
     
     def analyze_screen_context(self, image: "Image.Image") -> Dict:
-        """Comprehensive screen analysis"""
+        """Comprehensive screen analysis
+        
+        OCR runs once and its result feeds every text detector. UI detection
+        does not need OCR, so it runs on the pool alongside it.
+        """
+        executor = self._get_executor()
+        ui_future = executor.submit(self.detect_ui_elements, image)
+        
+        ocr = self.run_ocr(image)
+        if ocr is not None:
+            code_future = executor.submit(self.detect_code_on_screen, image, ocr)
+            ide_future = executor.submit(self.detect_ide, image, ocr)
+            code_analysis, ide_detection = code_future.result(), ide_future.result()
+        else:
+            code_analysis = self.detect_code_on_screen(image)
+            ide_detection = self.detect_ide(image)
+        
         analysis = {
-            'code_analysis': self.detect_code_on_screen(image),
-            'ide_detection': self.detect_ide(image),
-            'ui_elements': self.detect_ui_elements(image),
+            'code_analysis': code_analysis,
+            'ide_detection': ide_detection,
+            'ui_elements': ui_future.result(),
             'text_content': '',
             'suggestions': []
         }
         
         # Get text content if available
-        if HAS_PYTESSERACT:
-            analysis['text_content'] = pytesseract.image_to_string(image)
+        if ocr is not None:
+            analysis['text_content'] = ocr.text
+            analysis['ocr_confidence'] = ocr.confidence
         else:
             analysis['text_content'] = 'Text extraction requires pytesseract library'
         
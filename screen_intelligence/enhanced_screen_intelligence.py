@@ -18,6 +18,14 @@ except ImportError:
     CAPTURE_AVAILABLE = False
     MultiMonitorCapture = None
 
+try:
+    from backend.screen_capture import ScreenFrame, screen_engine
+    FRAME_CAPTURE_AVAILABLE = True
+except ImportError:
+    FRAME_CAPTURE_AVAILABLE = False
+    ScreenFrame = None
+    screen_engine = None
+
 try:
     from ..ai_assistant.core.screen_analysis import ScreenAnalysisThread, get_component_registry
     from ..ai_assistant.core.model_manager import get_model_manager
@@ -30,7 +38,7 @@ class EnhancedScreenIntelligence(QObject):
     """Enhanced screen intelligence with AI integration"""
     
     analysis_completed = pyqtSignal(dict)  # analysis_result
-    capture_completed = pyqtSignal(bytes)  # screenshot_data
+    capture_completed = pyqtSignal(object)  # ScreenFrame
     status_updated = pyqtSignal(str)  # status_message
     
     def __init__(self, parent=None):
@@ -111,21 +119,27 @@ class EnhancedScreenIntelligence(QObject):
             }
         return None
     
-    def capture_screen(self, monitor_id: Optional[int] = None) -> Optional[bytes]:
-        """Capture screen from specified monitor"""
-        if not self.monitor_capture:
+    def capture_screen(self, monitor_id: Optional[int] = None) -> Optional["ScreenFrame"]:
+        """Capture screen from specified monitor as an in-memory frame.
+        
+        The frame holds raw pixels; nothing is encoded or written to disk
+        unless a caller persists it explicitly.
+        """
+        if not self.monitor_capture or not FRAME_CAPTURE_AVAILABLE:
             self.status_updated.emit("Screen capture not available")
             return None
         
         try:
             self.status_updated.emit("Capturing screen...")
             
-            # Capture screen (placeholder implementation)
-            screenshot_data = b"mock_screenshot_data"  # Would be actual capture
+            capture = screen_engine.capture_screen(monitor_id or 0)
+            if not capture or not capture.get("success"):
+                raise RuntimeError(capture.get("message", "unknown error") if capture else "no result")
+            frame = capture["frame"]
             
-            self.capture_completed.emit(screenshot_data)
+            self.capture_completed.emit(frame)
             self.status_updated.emit("Screen captured successfully")
-            return screenshot_data
+            return frame
             
         except Exception as e:
             error_msg = f"Screen capture failed: {e}"
@@ -141,7 +155,7 @@ class EnhancedScreenIntelligence(QObject):
         
         # Capture screen first
         screenshot_data = self.capture_screen(monitor_id)
-        if not screenshot_data:
+        if screenshot_data is None:
             return False
         
         try:
@@ -329,9 +343,9 @@ class ScreenIntelligenceWidget(QWidget):
         if "completed" in status.lower() or "failed" in status.lower():
             self.hide_progress()
     
-    def on_capture_completed(self, screenshot_data: bytes):
+    def on_capture_completed(self, frame):
         """Handle completed screen capture"""
-        self.results_text.append(f"📸 Screen captured: {len(screenshot_data)} bytes")
+        self.results_text.append(f"📸 Screen captured: {frame.width}x{frame.height}")
         self.hide_progress()
     
     def display_analysis_results(self, results: Dict[str, Any]):
@@ -2,13 +2,13 @@
 Live AI-powered screen monitoring and interaction system for WestfallPersonalAssistant
 """
 
+import importlib.util
 import time
 import threading
 from datetime import datetime
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread
 from PyQt5.QtGui import QPixmap, QImage
-from io import BytesIO
 import json
 
 try:
@@ -18,24 +18,17 @@ try:
 except ImportError:
     MSS_AVAILABLE = False
 
-try:
-    import numpy as np
-    from PIL import Image, ImageDraw
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-
-try:
-    import cv2
-    CV2_AVAILABLE = True
-except ImportError:
-    CV2_AVAILABLE = False
+# OCR and UI detection run in the capture engine's worker processes; the UI
+# thread only needs to know whether those libraries are installed
+PIL_AVAILABLE = importlib.util.find_spec("PIL") is not None
+CV2_AVAILABLE = importlib.util.find_spec("cv2") is not None
+PYTESSERACT_AVAILABLE = importlib.util.find_spec("pytesseract") is not None
 
 try:
-    import pytesseract
-    PYTESSERACT_AVAILABLE = True
+    from .capture.capture_engine import ParallelCaptureEngine
+    CAPTURE_ENGINE_AVAILABLE = True
 except ImportError:
-    PYTESSERACT_AVAILABLE = False
+    CAPTURE_ENGINE_AVAILABLE = False
 
 try:
     import pyautogui
@@ -49,12 +42,21 @@ except ImportError:
 class LiveScreenIntelligence(QWidget):
     """Live AI-powered screen monitoring and interaction system"""
     
+    # Live view frame pacing: render time is kept to about a quarter of the
+    # frame budget, between ~30 fps and 2 fps
+    PREVIEW_MIN_INTERVAL_MS = 33
+    PREVIEW_MAX_INTERVAL_MS = 500
+    PREVIEW_RENDER_BUDGET = 0.25
+    
     def __init__(self):
         super().__init__()
         self.monitoring = False
+        self._sct = None
+        self._render_ms = 0.0
         self.ai_control_enabled = False
         self.current_screens = []
         self.interaction_history = []
+        self.analysis_engine = ParallelCaptureEngine() if CAPTURE_ENGINE_AVAILABLE else None
         self.init_ui()
         
         # Live monitoring timer
@@ -264,13 +266,16 @@ class LiveScreenIntelligence(QWidget):
             
             self.monitoring = True
             self.monitor_btn.setText("⏸️ Stop Monitoring")
-            self.monitor_timer.start(100)  # Update every 100ms for smooth live view
+            self._sct = mss.mss()
+            self._render_ms = 0.0
+            self.monitor_timer.start(self.PREVIEW_MIN_INTERVAL_MS)  # Adapted to render time
             self.status_label.setText("Status: Live monitoring active")
             self.log_action("Started live screen monitoring")
         else:
             self.monitoring = False
             self.monitor_btn.setText("▶️ Start Live Monitoring")
             self.monitor_timer.stop()
+            self._close_capture_handle()
             self.status_label.setText("Status: Monitoring stopped")
             self.log_action("Stopped screen monitoring")
     
@@ -313,75 +318,76 @@ class LiveScreenIntelligence(QWidget):
             self.status_label.setText("Status: AI control disabled")
             self.log_action("AI control disabled")
     
+    def _close_capture_handle(self):
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+    
     def capture_screens(self):
-        """Capture all screens in real-time"""
-        if not MSS_AVAILABLE:
+        """Capture the primary screen for the live view
+        
+        The mss BGRA buffer is wrapped in a QImage without copying (it has the
+        same layout as Format_RGB32 on little-endian machines) and downscaled
+        once, straight to the widget size. The timer interval then follows
+        the measured render time so slow machines drop frames rather than
+        saturating the UI thread.
+        """
+        if not MSS_AVAILABLE or self._sct is None:
             return
             
         try:
-            with mss.mss() as sct:
-                # Capture primary monitor for live view
-                monitor = sct.monitors[1]  # Primary monitor
-                screenshot = sct.grab(monitor)
-                
-                if PIL_AVAILABLE:
-                    # Convert to QPixmap for display
-                    img = Image.frombytes('RGB', screenshot.size, screenshot.bgra, 'raw', 'BGRX')
-                    
-                    # Resize for display
-                    img.thumbnail((800, 600), Image.Resampling.LANCZOS)
-                    
-                    # Convert to QPixmap
-                    buffer = BytesIO()
-                    img.save(buffer, format='PNG')
-                    buffer.seek(0)
-                    
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(buffer.read())
-                    
-                    # Update live view
-                    self.live_view.setPixmap(pixmap.scaled(
-                        self.live_view.size(), 
-                        Qt.KeepAspectRatio, 
-                        Qt.SmoothTransformation
-                    ))
-                    
-                    # Store for AI analysis
-                    self.current_screens = [(monitor, img)]
-                else:
-                    self.live_view.setText("PIL not available - cannot display screen capture")
+            started = time.perf_counter()
+            monitor = self._sct.monitors[1]  # Primary monitor
+            screenshot = self._sct.grab(monitor)
+            
+            frame = QImage(screenshot.bgra, screenshot.width, screenshot.height,
+                           screenshot.width * 4, QImage.Format_RGB32)
+            # scaled() detaches from the mss buffer, so nothing outlives the grab
+            preview = frame.scaled(self.live_view.size(), Qt.KeepAspectRatio,
+                                   Qt.FastTransformation)
+            self.live_view.setPixmap(QPixmap.fromImage(preview))
+            
+            # Store for AI analysis
+            self.current_screens = [(monitor, preview)]
+            
+            self._adapt_frame_rate((time.perf_counter() - started) * 1000)
                 
         except Exception as e:
             self.log_action(f"Error capturing screen: {str(e)}")
     
+    def _adapt_frame_rate(self, render_ms):
+        """Retune the live view timer from a moving average of render time."""
+        self._render_ms = render_ms if not self._render_ms else 0.8 * self._render_ms + 0.2 * render_ms
+        interval = int(self._render_ms / self.PREVIEW_RENDER_BUDGET)
+        interval = max(self.PREVIEW_MIN_INTERVAL_MS, min(self.PREVIEW_MAX_INTERVAL_MS, interval))
+        if abs(interval - self.monitor_timer.interval()) > 5:
+            self.monitor_timer.setInterval(interval)
+    
     def ai_analyze_screens(self):
-        """AI analyzes current screens for issues"""
-        if not self.current_screens or not PYTESSERACT_AVAILABLE:
+        """AI analyzes current screens for issues
+        
+        Capture and OCR of every monitor run on the analysis engine; this timer
+        tick only collects finished results and requests the next round, so the
+        UI thread never waits on Tesseract.
+        """
+        if not self.analysis_engine or not MSS_AVAILABLE or not PYTESSERACT_AVAILABLE:
             return
         
         try:
-            for monitor, img in self.current_screens:
-                # Extract text using OCR
-                text = pytesseract.image_to_string(img)
-                
-                # Look for error indicators
-                error_keywords = [
-                    'error', 'exception', 'failed', 'denied', 'invalid',
-                    'undefined', 'null', 'crash', 'fatal', 'warning'
-                ]
-                
-                found_issues = []
-                for keyword in error_keywords:
-                    if keyword.lower() in text.lower():
-                        found_issues.append(keyword)
+            for result in self.analysis_engine.drain_results():
+                text = result['text']
+                found_issues = result['issues']
                 
                 if found_issues:
-                    analysis = f"⚠️ Potential issues detected: {', '.join(found_issues)}\n"
+                    analysis = f"⚠️ Monitor {result['monitor_id']} - potential issues detected: {', '.join(found_issues)}\n"
                     analysis += f"Screen text sample:\n{text[:500]}"
                     self.analysis_text.append(analysis)
                     
                     if self.ai_control_enabled:
                         self.ai_respond_to_error(text, found_issues)
+            
+            # Skipped automatically if the previous round is still being analyzed
+            self.analysis_engine.request_analysis()
                 
         except Exception as e:
             self.log_action(f"Analysis error: {str(e)}")
@@ -431,6 +437,9 @@ class LiveScreenIntelligence(QWidget):
         self.monitoring = False
         self.monitor_timer.stop()
         self.ai_timer.stop()
+        self._close_capture_handle()
+        if self.analysis_engine:
+            self.analysis_engine.shutdown()
         
         # Move mouse to corner (failsafe) if pyautogui is available
         if PYAUTOGUI_AVAILABLE:
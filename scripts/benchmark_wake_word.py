@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Replay WAV recordings through the wake-word front end and report its cost
+
+Shows how much audio each stage sees (energy gate, keyword spotter,
+recognizer), CPU time per second of audio, and when the wake word fired.
+
+    python scripts/benchmark_wake_word.py room.wav --enroll hey1.wav hey2.wav hey3.wav --wake-end 4.2
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.voice_frontend import (
+    EnergyVAD, KeywordSpotter, StreamingRecognizer, VoiceFrontEnd, VoskStreamingRecognizer,
+    frame_rms, read_wav, split_frames
+)
+
+# The old listen loop waited this long after speech before recognizing
+OLD_PAUSE_SECONDS = 0.8
+
+
+class CountingRecognizer(StreamingRecognizer):
+    """Stands in for real recognition; reports how much audio it was given"""
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.samples = 0
+
+    def accept(self, frame):
+        self.samples += len(frame) // 2
+
+    def finish(self):
+        return f"<{self.samples / self.sample_rate:.2f}s of audio>"
+
+
+def speech_seconds(pcm, sample_rate, frame_samples):
+    """Audio the old loop would have sent to the recognizer: everything the gate calls speech"""
+    vad = EnergyVAD()
+    frames = sum(vad.update(frame_rms(frame)) for frame in split_frames(pcm, frame_samples))
+    return frames * frame_samples / sample_rate
+
+
+def benchmark(path, args, spotter):
+    pcm, sample_rate = read_wav(path)
+    if args.vosk_model:
+        def recognizer_factory():
+            return VoskStreamingRecognizer(args.vosk_model, sample_rate)
+    else:
+        def recognizer_factory():
+            return CountingRecognizer(sample_rate)
+
+    spotter = spotter.for_rate(sample_rate) if spotter else None
+    front_end = VoiceFrontEnd(recognizer_factory, sample_rate, spotter=spotter, wake_words=[args.keyword])
+    frames = list(split_frames(pcm, front_end.frame_samples))
+    audio_seconds = len(frames) * front_end.frame_samples / sample_rate
+
+    events = []
+    started = time.process_time()
+    for frame in frames:
+        events.extend(front_end.process(frame))
+    cpu_seconds = time.process_time() - started
+
+    stats = front_end.stats
+    frame_seconds = front_end.frame_ms / 1000
+    print(f"\n=== {path} ===")
+    print(f"Audio:               {audio_seconds:.1f}s at {sample_rate} Hz")
+    print(f"CPU:                 {cpu_seconds * 1000:.1f} ms "
+          f"({cpu_seconds / audio_seconds * 1000:.2f} ms per audio second)")
+    print(f"Passed energy gate:  {stats.speech_frames * frame_seconds:.1f}s "
+          f"({stats.speech_frames / max(stats.frames, 1):.0%})")
+    print(f"Keyword spotter:     {stats.spotter_frames * frame_seconds:.1f}s")
+    print(f"Recognizer:          {stats.recognizer_frames * frame_seconds:.1f}s in {stats.recognitions} utterances "
+          f"(old loop: {speech_seconds(pcm, sample_rate, front_end.frame_samples):.1f}s)")
+
+    wakes = [event for event in events if event.kind == "wake"]
+    for event in events:
+        print(f"  {event.time:7.2f}s  {event.kind:8} {event.text}")
+    if not wakes:
+        print("  no wake word detected")
+
+    for wake_end in args.wake_end:
+        detected = [event.time for event in wakes if event.time >= wake_end - 1.0]
+        if detected:
+            print(f"Wake word ending at {wake_end:.2f}s: detected after {detected[0] - wake_end:+.2f}s "
+                  f"(old loop: +{OLD_PAUSE_SECONDS:.2f}s plus recognition of the whole phrase)")
+        else:
+            print(f"Wake word ending at {wake_end:.2f}s: missed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the wake-word front end on recorded audio')
+    parser.add_argument('recordings', nargs='+', help='16-bit WAV files to replay')
+    parser.add_argument('--enroll', nargs='*', default=[], help='WAV clips of the wake word for the spotter')
+    parser.add_argument('--keyword', default='computer', help='Name of the wake word')
+    parser.add_argument('--threshold', type=float, help='Override the enrolled match threshold')
+    parser.add_argument('--wake-end', type=float, nargs='*', default=[],
+                        help='Seconds where the wake word ends, to measure detection latency')
+    parser.add_argument('--vosk-model', help='Recognize commands with this Vosk model instead of counting audio')
+    args = parser.parse_args()
+
+    spotter = None
+    if args.enroll:
+        examples = [read_wav(path) for path in args.enroll]
+        spotter = KeywordSpotter(examples[0][1])
+        for pcm, sample_rate in examples:
+            if sample_rate != examples[0][1]:
+                parser.error("enrollment clips must share one sample rate")
+        spotter.enroll(args.keyword, [pcm for pcm, _ in examples], threshold=args.threshold)
+        print(f"Enrolled '{args.keyword}' from {len(examples)} clips, "
+              f"threshold {spotter.keywords[args.keyword]['threshold']:.3f}")
+    else:
+        print("No enrollment clips: utterances are recognized and searched for the wake word")
+
+    for path in args.recordings:
+        benchmark(path, args, spotter)
+
+
+if __name__ == "__main__":
+    main()
@@ -289,6 +289,8 @@ class SettingsManager {
             
             // Feature toggles
             ENABLE_VOICE: this.getChecked('enable-voice') ? 'true' : 'false',
+            WAKE_WORD_ENABLED: this.getChecked('wake-word-enabled') ? 'true' : 'false',
+            WAKE_WORD: this.getValue('wake-word'),
             BUSINESS_FEATURES_ENABLED: this.getChecked('business-features') ? 'true' : 'false',
             SCREEN_CAPTURE_ENABLED: this.getChecked('screen-capture') ? 'true' : 'false',
             WEB_SEARCH_ENABLED: this.getChecked('web-search') ? 'true' : 'false',
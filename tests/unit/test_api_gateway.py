@@ -0,0 +1,138 @@
+"""
+Tests for API gateway rate limiting and circuit breaking.
+"""
+
+import unittest
+import asyncio
+import gc
+import threading
+import time
+import weakref
+import sys
+import os
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from utils.api_gateway import (
+    APIGateway, RateLimiter, CircuitBreaker, CircuitBreakerOpenError
+)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for the token-bucket rate limiter."""
+
+    def test_bucket_empties_and_refills(self):
+        """A full bucket allows ``limit`` requests, then refills over the window."""
+        limiter = RateLimiter()
+
+        self.assertTrue(limiter.is_allowed('svc', 2, window_seconds=0.2))
+        self.assertTrue(limiter.is_allowed('svc', 2, window_seconds=0.2))
+        self.assertFalse(limiter.is_allowed('svc', 2, window_seconds=0.2))
+        self.assertEqual(limiter.get_remaining_requests('svc', 2, window_seconds=0.2), 0)
+
+        time.sleep(0.12)
+        self.assertTrue(limiter.is_allowed('svc', 2, window_seconds=0.2))
+
+    def test_memory_is_constant_per_key(self):
+        """Each key stores a token count and timestamp, not one entry per request."""
+        limiter = RateLimiter()
+        for _ in range(500):
+            limiter.is_allowed('svc', 1000)
+
+        self.assertEqual(len(limiter.buckets['svc']), 2)
+        self.assertEqual(limiter.get_remaining_requests('svc', 1000), 500)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for the circuit breaker."""
+
+    def test_calls_run_in_parallel(self):
+        """The breaker does not hold its lock while the call runs."""
+        breaker = CircuitBreaker()
+        threads = [threading.Thread(target=breaker.call, args=(time.sleep, 0.2)) for _ in range(4)]
+
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLess(time.time() - start, 0.6)
+
+    def test_half_open_allows_limited_probes(self):
+        """After the timeout only one probe gets through until it succeeds."""
+        breaker = CircuitBreaker(failure_threshold=1, timeout_seconds=0)
+
+        def fail():
+            raise RuntimeError("down")
+
+        with self.assertRaises(RuntimeError):
+            breaker.call(fail)
+        self.assertEqual(breaker.state, "OPEN")
+
+        time.sleep(0.01)
+        probe_started = threading.Event()
+        release_probe = threading.Event()
+
+        def slow_probe():
+            probe_started.set()
+            release_probe.wait(1)
+            return "ok"
+
+        probe = threading.Thread(target=breaker.call, args=(slow_probe,))
+        probe.start()
+        probe_started.wait(1)
+
+        with self.assertRaises(CircuitBreakerOpenError):
+            breaker.call(lambda: "second probe")
+
+        release_probe.set()
+        probe.join()
+        self.assertEqual(breaker.state, "CLOSED")
+
+
+class TestAPIGatewayAsync(unittest.TestCase):
+    """Test cases for the async gateway path."""
+
+    def test_async_requests_run_concurrently(self):
+        """Concurrent async requests overlap instead of queueing."""
+        gateway = APIGateway()
+        gateway._execute_request = lambda *args, **kwargs: time.sleep(0.2) or {"ok": True}
+
+        async def run():
+            return await asyncio.gather(*[
+                gateway.make_request_async("weather", "weather") for _ in range(4)
+            ])
+
+        start = time.time()
+        results = asyncio.run(run())
+
+        self.assertTrue(all(r["success"] for r in results))
+        self.assertLess(time.time() - start, 0.6)
+
+    def test_semaphores_freed_with_their_loop(self):
+        """Per-loop semaphores don't keep finished event loops alive."""
+        gateway = APIGateway()
+        gateway.service_configs["weather"]["max_concurrency"] = 1
+        gateway._execute_request = lambda *args, **kwargs: time.sleep(0.01) or {"ok": True}
+        loops = []
+
+        async def run():
+            loops.append(weakref.ref(asyncio.get_running_loop()))
+            # More requests than permits, so waiters bind the semaphore to this loop
+            return await asyncio.gather(*[
+                gateway.make_request_async("weather", "weather") for _ in range(3)
+            ])
+
+        for _ in range(4):
+            self.assertTrue(all(r["success"] for r in asyncio.run(run())))
+        gc.collect()
+
+        # The last loop's entry goes at the next lookup; the earlier ones are gone
+        self.assertEqual([ref() for ref in loops[:3]], [None, None, None])
+        self.assertFalse(hasattr(loops[3](), "_api_gateway_semaphores"))
+
+
+if __name__ == '__main__':
+    unittest.main()
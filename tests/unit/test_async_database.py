@@ -0,0 +1,72 @@
+"""
+Tests for the async database layer used by the feature managers.
+"""
+
+import unittest
+import asyncio
+import sys
+import os
+import tempfile
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from backend.features.async_database import AsyncDatabase
+
+
+class TestAsyncDatabase(unittest.TestCase):
+    """Test cases for the writer thread, readers and group commits."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncDatabase(os.path.join(self.temp_dir.name, 'test.db'))
+        asyncio.run(self.db.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE)'))
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_writes_are_visible_to_readers(self):
+        """An awaited write is committed before the await returns."""
+        async def run():
+            result = await self.db.execute('INSERT INTO items (name) VALUES (?)', ('a',))
+            await self.db.executemany('INSERT INTO items (name) VALUES (?)', [('b',), ('c',)])
+            rows = await self.db.fetchall('SELECT name FROM items ORDER BY id')
+            return result, rows
+
+        result, rows = asyncio.run(run())
+
+        self.assertEqual(result.lastrowid, 1)
+        self.assertEqual(rows, [('a',), ('b',), ('c',)])
+
+    def test_failed_write_does_not_spoil_its_group(self):
+        """One failing job is rolled back alone; the rest of the batch commits."""
+        async def run():
+            results = await asyncio.gather(
+                self.db.execute('INSERT INTO items (name) VALUES (?)', ('a',)),
+                self.db.execute('INSERT INTO items (name) VALUES (?)', ('a',)),
+                self.db.execute('INSERT INTO items (name) VALUES (?)', ('b',)),
+                return_exceptions=True
+            )
+            return results, await self.db.fetchall('SELECT name FROM items ORDER BY id')
+
+        results, rows = asyncio.run(run())
+
+        self.assertEqual(sum(isinstance(r, Exception) for r in results), 1)
+        self.assertEqual(rows, [('a',), ('b',)])
+
+    def test_nowait_writes_are_ordered_before_later_writes(self):
+        """Queued background writes commit before anything awaited after them."""
+        async def run():
+            for i in range(100):
+                self.db.execute_nowait('INSERT INTO items (name) VALUES (?)', (f'item{i}',))
+            await self.db.execute('INSERT INTO items (name) VALUES (?)', ('last',))
+            return await self.db.fetchone('SELECT COUNT(*) FROM items')
+
+        self.assertEqual(asyncio.run(run())[0], 101)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Tests for ParallelCaptureEngine's frame dropping and non-blocking OCR.
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from screen_intelligence.capture import capture_engine
+from screen_intelligence.capture.capture_engine import ParallelCaptureEngine
+
+MONITORS = [
+    {'left': 0, 'top': 0, 'width': 200, 'height': 100},
+    {'left': 0, 'top': 0, 'width': 100, 'height': 100},
+    {'left': 100, 'top': 0, 'width': 100, 'height': 100},
+]
+
+
+def capture(monitor_id, frame=0):
+    return {'monitor_id': monitor_id, 'pixels': f"frame{frame}", 'captured_at': float(frame)}
+
+
+class TestParallelCaptureEngine(unittest.TestCase):
+    """Test cases for bounded analysis and OCR hand-off in ParallelCaptureEngine."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.release = threading.Event()
+        self.engine = ParallelCaptureEngine(analysis_workers=1, result_queue_size=2)
+        self.engine._monitors = MONITORS
+        # Test-local fakes can't be pickled into spawned workers; threads stand in
+        self.pool = ThreadPoolExecutor(max_workers=4)
+        self.grabs = []
+
+        def grab(index):
+            self.grabs.append(index)
+            return capture(index)
+
+        for patcher in (
+                mock.patch.object(self.engine, '_get_process_pool', return_value=self.pool),
+                mock.patch.object(self.engine, '_capture_one', side_effect=grab),
+                mock.patch.object(capture_engine, 'HAS_MSS', True),
+                mock.patch.object(capture_engine, 'HAS_NUMPY', True),
+                mock.patch.object(capture_engine, 'analyze_capture', side_effect=self.analyze),
+                mock.patch.object(capture_engine, 'extract_text', side_effect=self.extract)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.release.set()
+        self.engine.shutdown()
+        self.pool.shutdown(wait=True)
+
+    def analyze(self, monitor_id, pixels, captured_at):
+        self.release.wait(5)
+        return {'monitor_id': monitor_id, 'pixels': pixels, 'captured_at': captured_at}
+
+    def extract(self, pixels):
+        self.release.wait(5)
+        return f"text of {pixels}"
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, "timed out")
+            time.sleep(0.005)
+
+    def test_frames_dropped_while_workers_busy(self):
+        """A frame submitted while every worker is busy is dropped, not queued."""
+        self.assertTrue(self.engine.submit_analysis([capture(1, frame=1)]))
+        self.assertFalse(self.engine.submit_analysis([capture(1, frame=2)]))
+        self.assertFalse(self.engine.request_analysis())
+        self.assertEqual(self.engine.stats['dropped_frames'], 2)
+
+        self.release.set()
+        self.wait_for(lambda: self.engine.stats['analyses'] == 1)
+        self.assertEqual([r['pixels'] for r in self.engine.drain_results()], ['frame1'])
+
+        # With the worker free again new frames are accepted
+        self.assertTrue(self.engine.submit_analysis([capture(1, frame=3)]))
+
+    def test_result_queue_keeps_newest(self):
+        """When nobody drains, the oldest result is evicted for the newest."""
+        self.release.set()
+        for frame in range(1, 5):
+            self.assertTrue(self.engine.submit_analysis([capture(1, frame)]))
+            self.wait_for(lambda: self.engine.stats['analyses'] == frame)
+
+        self.assertEqual(self.engine.stats['dropped_results'], 2)
+        self.assertEqual([r['pixels'] for r in self.engine.drain_results()], ['frame3', 'frame4'])
+        self.assertEqual(self.engine.drain_results(), [])
+
+    def test_request_analysis_does_not_block(self):
+        """request_analysis grabs and submits on the dispatch thread."""
+        self.assertTrue(self.engine.request_analysis())
+
+        self.wait_for(lambda: self.engine._in_flight == 2)
+        self.assertEqual(sorted(self.grabs), [1, 2])
+        self.assertEqual(self.engine.drain_results(), [])
+
+        self.release.set()
+        self.wait_for(lambda: self.engine.stats['analyses'] == 2)
+        self.assertEqual(sorted(r['monitor_id'] for r in self.engine.drain_results()), [1, 2])
+
+    def test_text_extraction_returns_future(self):
+        """submit_text_extraction returns before OCR finishes and resolves per monitor."""
+        future = self.engine.submit_text_extraction([capture(1, frame=1), capture(2, frame=2)])
+        self.assertFalse(future.done())
+
+        self.release.set()
+        self.assertEqual(future.result(timeout=5), {1: 'text of frame1', 2: 'text of frame2'})
+        self.assertEqual(self.engine.submit_text_extraction([]).result(timeout=5), {})
+
+    def test_text_extraction_failure_reaches_future(self):
+        """An OCR error is set on the future instead of being lost on a worker."""
+        self.release.set()
+        with mock.patch.object(capture_engine, 'extract_text', side_effect=RuntimeError("no tesseract")):
+            future = self.engine.submit_text_extraction([capture(1)])
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Tests for streaming document chunking and ingestion.
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from backend.ai_integration import DocumentChunker, ChunkType, PriorityRAG
+from backend.document_ingestion import DocumentIngestor
+
+
+SAMPLE_TEXT = "\n\n".join(
+    f"Paragraph {i} talks about topic {i % 7}. It has a second sentence! And a third?"
+    for i in range(200)
+)
+
+
+class TestStreamingChunker(unittest.TestCase):
+    """Test cases for offset-based streaming chunking."""
+
+    def test_stream_matches_whole_text(self):
+        """Chunking block by block gives the same chunks as the whole string."""
+        chunker = DocumentChunker(chunk_size=300, overlap=50)
+
+        for chunk_type in (ChunkType.PARAGRAPH, ChunkType.SENTENCE):
+            whole = [(c.start_index, c.content) for c in chunker.iter_chunks([SAMPLE_TEXT], chunk_type)]
+            blocks = [SAMPLE_TEXT[i:i + 37] for i in range(0, len(SAMPLE_TEXT), 37)]
+            streamed = [(c.start_index, c.content) for c in chunker.iter_chunks(blocks, chunk_type)]
+
+            self.assertEqual(whole, streamed)
+
+    def test_offsets_slice_source(self):
+        """Chunk offsets point at the chunk's text in the source."""
+        chunks = DocumentChunker(chunk_size=200, overlap=0).chunk_by_paragraphs(SAMPLE_TEXT)
+
+        self.assertTrue(chunks)
+        for chunk in chunks:
+            self.assertEqual(SAMPLE_TEXT[chunk.start_index:chunk.end_index], chunk.content)
+            self.assertLessEqual(len(chunk.content), 200)
+
+
+class TestDocumentIngestor(unittest.TestCase):
+    """Test cases for folder ingestion."""
+
+    def test_duplicate_chunks_are_skipped(self):
+        """Identical content across files is indexed once; re-ingesting replaces."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for name in ('a.txt', 'b.md'):
+                with open(os.path.join(temp_dir, name), 'w') as f:
+                    f.write(f"shared boilerplate notice\n\nbody of {name} about gardening")
+
+            rag = PriorityRAG()
+            ingestor = DocumentIngestor(rag, chunk_size=40, overlap=0)
+
+            stats = ingestor.ingest_directory(temp_dir)
+            self.assertEqual(stats['files'], 2)
+            self.assertEqual(stats['duplicates'], 1)
+            self.assertEqual(rag.get_document_stats()['total_chunks'], 3)
+
+            ingestor.ingest_directory(temp_dir)
+            self.assertEqual(rag.get_document_stats()['total_chunks'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
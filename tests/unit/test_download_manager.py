@@ -0,0 +1,257 @@
+"""
+Tests for the download engine's segment planning and streaming checksum.
+"""
+
+import unittest
+import asyncio
+import hashlib
+import sys
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from backend.features import download_manager
+from backend.features.async_database import AsyncDatabase
+from backend.features.download_manager import (
+    AIOHTTP_AVAILABLE, DownloadEngine, DownloadJob, StreamingDigest, parse_checksum, plan_segments
+)
+
+if AIOHTTP_AVAILABLE:
+    import aiohttp
+
+DATA = bytes(range(256)) * 400  # 102400 bytes
+CHUNK = 4096
+
+
+class StubStream:
+    """Response body that can end early or stall after its first chunk."""
+
+    def __init__(self, body, cut_at=None, gate=None):
+        self.body = body[:cut_at] if cut_at is not None else body
+        self.gate = gate
+
+    async def iter_chunked(self, size):
+        for i in range(0, len(self.body), size):
+            if i and self.gate is not None:
+                await self.gate.wait()
+            yield self.body[i:i + size]
+
+
+class StubResponse:
+    def __init__(self, status, body=b'', headers=None, content_length=None, cut_at=None, gate=None):
+        self.status = status
+        self.headers = headers or {}
+        self.content_length = content_length
+        self.content = StubStream(body, cut_at, gate)
+
+    def raise_for_status(self):
+        raise aiohttp.ClientResponseError(None, (), status=self.status)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class StubSession:
+    """Serves DATA with an ETag; range requests get 206 unless ranges are ignored."""
+
+    closed = False
+
+    def __init__(self, data=DATA, ignore_ranges=False, cut_first_at=None, gate=None):
+        self.data = data
+        self.ignore_ranges = ignore_ranges
+        self.cut_first_at = cut_first_at
+        self.gate = gate
+        self.requests = []
+
+    def head(self, url, allow_redirects=True):
+        return StubResponse(200, headers={'Accept-Ranges': 'bytes', 'ETag': '"v1"'},
+                            content_length=len(self.data))
+
+    def get(self, url, headers=None):
+        headers = headers or {}
+        self.requests.append(headers.get('Range'))
+        cut_at, self.cut_first_at = self.cut_first_at, None
+        if 'Range' not in headers or self.ignore_ranges:
+            return StubResponse(200, self.data, {'ETag': '"v1"'}, len(self.data), cut_at, self.gate)
+
+        first, last = headers['Range'][len('bytes='):].split('-')
+        end = int(last) + 1 if last else len(self.data)
+        body = self.data[int(first):end]
+        return StubResponse(206, body, {'Content-Range': f"bytes {first}-{end - 1}/{len(self.data)}"},
+                            len(body), cut_at, self.gate)
+
+    async def close(self):
+        self.closed = True
+
+
+class TestDownloadManager(unittest.TestCase):
+    """Test cases for segments and out-of-order hashing."""
+
+    def test_segments_cover_the_file(self):
+        """Segments are contiguous, non-overlapping and end at the file size."""
+        segments = plan_segments(10_000_003, 4)
+
+        self.assertEqual(len(segments), 4)
+        self.assertEqual(segments[0].start, 0)
+        self.assertEqual(segments[-1].end, 10_000_003)
+        for previous, current in zip(segments, segments[1:]):
+            self.assertEqual(previous.end, current.start)
+
+        self.assertEqual(plan_segments(-1, 4)[0].end, -1)
+
+    def test_digest_matches_when_segments_finish_out_of_order(self):
+        """Bytes written ahead of the hashed prefix are picked up from disk."""
+        data = os.urandom(100_000)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            job = DownloadJob('download_1', 'http://example.com/file', os.path.join(temp_dir, 'file'), {},
+                              total_size=len(data), segments=plan_segments(len(data), 3))
+            with open(job.part_path, 'wb') as f:
+                f.truncate(len(data))
+
+            async def write(segment, f):
+                chunk = data[segment.start:segment.end]
+                f.seek(segment.start)
+                f.write(chunk)
+                f.flush()
+                segment.done = len(chunk)
+                await digest.feed(segment.start, chunk)
+                await digest.catch_up(job.part_path, job.contiguous_end)
+
+            async def run():
+                with open(job.part_path, 'r+b') as f:
+                    for segment in reversed(job.segments):
+                        await write(segment, f)
+
+            digest = StreamingDigest()
+            asyncio.run(run())
+
+        self.assertEqual(digest.offset, len(data))
+        self.assertEqual(digest.hexdigest(), hashlib.sha256(data).hexdigest())
+
+    def test_parse_checksum(self):
+        """Bare digests default to SHA-256 and unknown algorithms are rejected."""
+        self.assertEqual(parse_checksum('ABC123'), ('sha256', 'abc123'))
+        self.assertEqual(parse_checksum('SHA-1:ff'), ('sha1', 'ff'))
+        with self.assertRaises(ValueError):
+            parse_checksum('crc99:00')
+
+
+@unittest.skipUnless(AIOHTTP_AVAILABLE, "aiohttp not available")
+class TestDownloadEngine(unittest.TestCase):
+    """Test cases for transfers over a stub HTTP session."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'downloads.db')
+        with sqlite3.connect(db_path) as conn:
+            conn.execute('''
+                CREATE TABLE downloads (
+                    download_id TEXT UNIQUE NOT NULL, status TEXT, downloaded_bytes INTEGER,
+                    file_size INTEGER, end_time TIMESTAMP, checksum TEXT, resume_state TEXT
+                )
+            ''')
+            conn.execute("INSERT INTO downloads (download_id, status) VALUES ('d1', 'pending')")
+        self.db = AsyncDatabase(db_path)
+        self.file_path = os.path.join(self.temp_dir.name, 'file.bin')
+        patcher = mock.patch.multiple(download_manager, CHUNK_SIZE=CHUNK, RETRY_BACKOFF=0,
+                                      SEGMENT_MIN_SIZE=len(DATA) // 4)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def job(self, **kwargs):
+        return DownloadJob('d1', 'http://example.com/file.bin', self.file_path, {}, **kwargs)
+
+    async def download(self, session, job, max_segments=1):
+        engine = DownloadEngine(self.db, max_segments=max_segments)
+        engine._get_session = lambda: session
+        engine.start(job)
+        await job.task
+        return await self.db.fetchone(
+            "SELECT status, downloaded_bytes, checksum, resume_state FROM downloads WHERE download_id = 'd1'")
+
+    def read_file(self):
+        with open(self.file_path, 'rb') as f:
+            return f.read()
+
+    def test_resume_after_interrupt(self):
+        """A dropped connection is resumed with a Range request from the bytes on disk."""
+        session = StubSession(cut_first_at=10_000)
+        status, downloaded, checksum, resume_state = asyncio.run(self.download(session, self.job()))
+
+        self.assertEqual(session.requests, [None, f"bytes=10000-{len(DATA) - 1}"])
+        self.assertEqual(self.read_file(), DATA)
+        self.assertFalse(os.path.exists(self.file_path + '.part'))
+        self.assertEqual((status, downloaded), ('completed', len(DATA)))
+        self.assertEqual(checksum, 'sha256:' + hashlib.sha256(DATA).hexdigest())
+        self.assertIsNone(resume_state)
+
+    def test_checksum_mismatch_removes_partial_file(self):
+        """A wrong checksum fails the download and leaves no data behind."""
+        job = self.job(expected_checksum='sha256:' + hashlib.sha256(b'other').hexdigest())
+        status, _, checksum, _ = asyncio.run(self.download(StubSession(), job))
+
+        self.assertEqual(status, 'failed')
+        self.assertIsNone(checksum)
+        self.assertFalse(os.path.exists(self.file_path))
+        self.assertFalse(os.path.exists(self.file_path + '.part'))
+        self.assertEqual(job.segments, [])
+
+    def test_ignored_ranges_fall_back_to_one_stream(self):
+        """Segments answered with the whole body are replaced by a single download."""
+        session = StubSession(ignore_ranges=True)
+        job = self.job()
+        status, _, checksum, _ = asyncio.run(self.download(session, job, max_segments=4))
+
+        self.assertGreater(len(session.requests), 1)
+        self.assertIsNone(session.requests[-1])
+        self.assertEqual(len(job.segments), 1)
+        self.assertEqual(self.read_file(), DATA)
+        self.assertEqual((status, checksum), ('completed', 'sha256:' + hashlib.sha256(DATA).hexdigest()))
+
+    def test_pause_and_resume_from_saved_state(self):
+        """Segments saved on pause are reloaded and continued where they stopped."""
+        async def pause_midway():
+            session = StubSession(gate=asyncio.Event())
+            engine = DownloadEngine(self.db, max_segments=4)
+            engine._get_session = lambda: session
+            job = self.job()
+            engine.start(job)
+            while len(job.segments) < 4 or job.downloaded < 4 * CHUNK:
+                await asyncio.sleep(0.01)
+            self.assertTrue(await engine.pause('d1'))
+            return await self.db.fetchone(
+                "SELECT status, downloaded_bytes, resume_state FROM downloads WHERE download_id = 'd1'")
+
+        status, downloaded, resume_state = asyncio.run(asyncio.wait_for(pause_midway(), 5))
+        self.assertEqual((status, downloaded), ('paused', 4 * CHUNK))
+
+        job = self.job()
+        job.load_resume_state(resume_state)
+        self.assertEqual([s.done for s in job.segments], [CHUNK] * 4)
+
+        session = StubSession()
+        status, _, checksum, _ = asyncio.run(self.download(session, job, max_segments=4))
+
+        step = len(DATA) // 4
+        self.assertCountEqual(session.requests,
+                              [f"bytes={i * step + CHUNK}-{(i + 1) * step - 1}" for i in range(4)])
+        self.assertEqual(self.read_file(), DATA)
+        self.assertEqual((status, checksum), ('completed', 'sha256:' + hashlib.sha256(DATA).hexdigest()))
+
+
+if __name__ == '__main__':
+    unittest.main()
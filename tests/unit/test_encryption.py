@@ -0,0 +1,157 @@
+"""
+Tests for the encryption storage format and SecureStorage's decryption cache.
+"""
+
+import unittest
+import sys
+import os
+import base64
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+try:
+    from backend.security.encryption import EncryptionManager, FERNET_TOKEN_PREFIX
+    from backend.security.secure_storage import SecureStorage
+    SECURITY_AVAILABLE = True
+except ImportError:
+    SECURITY_AVAILABLE = False
+
+
+def baseline_encrypt(manager, data):
+    """A value as written before the format change: the Fernet token base64-encoded again."""
+    return base64.urlsafe_b64encode(manager._fernet.encrypt(data.encode())).decode()
+
+
+@unittest.skipUnless(SECURITY_AVAILABLE, "security dependencies not available")
+class TestEncryptionManager(unittest.TestCase):
+    """Test cases for the raw-token format, the legacy format and batch decryption."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.manager = EncryptionManager()
+        self.manager.set_key(EncryptionManager.generate_random_key())
+
+    def test_tokens_stored_raw(self):
+        """encrypt() returns the Fernet token itself, which decrypts back."""
+        token = self.manager.encrypt("hunter2")
+
+        self.assertTrue(token.startswith(FERNET_TOKEN_PREFIX))
+        self.assertEqual(self.manager.decrypt(token), "hunter2")
+
+    def test_decrypts_baseline_format(self):
+        """Values written in the old double-base64 format still decrypt."""
+        legacy = baseline_encrypt(self.manager, '{"mode": "dark"}')
+
+        self.assertFalse(legacy.startswith(FERNET_TOKEN_PREFIX))
+        self.assertEqual(self.manager.decrypt(legacy), '{"mode": "dark"}')
+
+    def test_wrong_key_raises(self):
+        """A token from another key fails with ValueError."""
+        other = EncryptionManager()
+        other.set_key(EncryptionManager.generate_random_key())
+
+        with self.assertRaises(ValueError):
+            other.decrypt(self.manager.encrypt("secret"))
+
+    def test_decrypt_many(self):
+        """Batches mix formats; unreadable items come back as None, inline or on a pool."""
+        items = [self.manager.encrypt("one"), baseline_encrypt(self.manager, "two"), None, "not a token"]
+        expected = ["one", "two", None, None]
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(self.manager.decrypt_many(items, executor=executor), expected)
+        self.assertEqual(self.manager.decrypt_many(items), expected)
+
+
+@unittest.skipUnless(SECURITY_AVAILABLE, "security dependencies not available")
+class TestDecryptionCache(unittest.TestCase):
+    """Test cases for cached reads through SecureStorage."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'secure.db')
+        self.encryption = EncryptionManager()
+        self.encryption.set_key(EncryptionManager.generate_random_key())
+        self.storage = SecureStorage(self.db_path, self.encryption)
+        self.cache = self.storage.decryption_cache
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.storage.close()
+        self.temp_dir.cleanup()
+
+    def test_repeat_reads_hit_cache(self):
+        """A second read of an unchanged value is served from the cache."""
+        self.storage.set_setting('theme', {'mode': 'dark'})
+        self.storage.get_setting('theme')
+        hits = self.cache.hits
+
+        self.assertEqual(self.storage.get_setting('theme'), {'mode': 'dark'})
+        self.assertEqual(self.cache.hits, hits + 1)
+
+    def test_overwrite_invalidates(self):
+        """Rewritten values are decrypted afresh, never served stale."""
+        self.storage.set_setting('theme', {'mode': 'dark'})
+        self.storage.store_password('mail', 'alice', 'old')
+        self.storage.get_setting('theme')
+        self.storage.get_password('mail', 'alice')
+
+        self.storage.set_setting('theme', {'mode': 'light'})
+        self.storage.store_password('mail', 'alice', 'new')
+
+        self.assertEqual(self.storage.get_setting('theme'), {'mode': 'light'})
+        self.assertEqual(self.storage.get_password('mail', 'alice')['password'], 'new')
+
+    def test_delete_invalidates(self):
+        """Deleted values are dropped from the cache along with their rows."""
+        self.storage.set_setting('theme', {'mode': 'dark'})
+        self.storage.store_password('mail', 'alice', 'hunter2')
+        self.storage.get_setting('theme')
+        self.storage.get_password('mail', 'alice')
+
+        self.storage.delete_setting('theme')
+        self.storage.delete_password('mail', 'alice')
+
+        self.assertEqual(self.storage.get_setting('theme', 'default'), 'default')
+        self.assertIsNone(self.storage.get_password('mail', 'alice'))
+        self.assertEqual(len(self.cache._entries), 0)
+
+    def test_batch_decrypts_conversation_page(self):
+        """A page of history is decrypted as one batch and cached for the next read."""
+        for i in range(20):
+            self.storage.store_conversation('c1', 'user', f'message {i}', metadata={'n': i})
+
+        first = self.storage.get_conversation_history('c1')
+        misses = self.cache.misses
+        second = self.storage.get_conversation_history('c1')
+
+        self.assertEqual([m['content'] for m in first], [f'message {i}' for i in range(20)])
+        self.assertEqual(second, first)
+        self.assertEqual(self.cache.misses, misses)
+
+    def test_baseline_rows_readable(self):
+        """Rows holding baseline-format ciphertext are read through the cache as before."""
+        self.storage.set_setting('theme', {'mode': 'dark'})
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE secure_settings SET value = ? WHERE key = 'theme'",
+                     (baseline_encrypt(self.encryption, '{"mode": "light"}'),))
+        conn.commit()
+        conn.close()
+
+        self.assertEqual(self.storage.get_setting('theme'), {'mode': 'light'})
+
+    def test_non_json_setting_reads_as_none(self):
+        """A stored value that isn't JSON is logged and read as None, not raised."""
+        self.storage.set_setting('name', 'plain text')
+
+        with self.assertLogs('backend.security.secure_storage', level='ERROR'):
+            self.assertIsNone(self.storage.get_setting('name'))
+
+
+if __name__ == '__main__':
+    unittest.main()
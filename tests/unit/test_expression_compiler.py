@@ -0,0 +1,75 @@
+"""
+Tests for the calculator's expression compiler.
+"""
+
+import unittest
+import math
+import sys
+import os
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from backend.features.expression_compiler import (
+    ExpressionError, build_namespace, compile_expression, evaluate_many, parse_sweep, sweep_points
+)
+
+
+def evaluate(expression, mode="scientific", angle_mode="radians"):
+    namespace = build_namespace(mode, angle_mode, {"pi": math.pi, "e": math.e})
+    compiled = compile_expression(expression)
+    compiled.check(namespace)
+    return compiled.evaluate(namespace)
+
+
+class TestExpressionCompiler(unittest.TestCase):
+    """Test cases for parsing, validation and evaluation."""
+
+    def test_calculator_shorthand(self):
+        """Implicit multiplication and number literals are understood."""
+        self.assertEqual(evaluate("2(3+4)"), 14)
+        self.assertEqual(evaluate("(1+2)(3+4)"), 21)
+        self.assertEqual(evaluate("2x3"), 6)
+        self.assertAlmostEqual(evaluate("2pi"), 2 * math.pi)
+        self.assertEqual(evaluate("0xFF & 0b1010", mode="programmer"), 10)
+
+    def test_angle_modes(self):
+        """Trig functions take degrees only in degrees mode."""
+        self.assertAlmostEqual(evaluate("sin(30)", angle_mode="degrees"), 0.5)
+        self.assertAlmostEqual(evaluate("sin(pi / 6)"), 0.5)
+
+    def test_rejects_unsafe_input(self):
+        """Anything outside the whitelist fails to compile or check."""
+        for expression in ["__import__('os')", "().__class__", "[1] * 10", "9**9**9", "lambda: 1"]:
+            with self.assertRaises(ExpressionError, msg=expression):
+                evaluate(expression)
+        with self.assertRaises(ExpressionError):
+            evaluate("sqrt(4)", mode="standard")
+
+    def test_compiled_expressions_are_cached(self):
+        """Compiling the same text twice returns the cached object."""
+        self.assertIs(compile_expression("1 + 2 * 3"), compile_expression("1 + 2 * 3"))
+
+    def test_sweep(self):
+        """A sweep evaluates its expression at every point of the range, inclusive."""
+        sweep = parse_sweep("x**2 for x in 0..1 step 0.25")
+        self.assertEqual((sweep.expression, sweep.variable, sweep.step), ("x**2", "x", "0.25"))
+
+        points = sweep_points(0.0, 1.0, 0.25)
+        namespace = build_namespace("scientific", vectorized=True)
+        results = evaluate_many(compile_expression(sweep.expression), namespace, "x", points)
+
+        self.assertEqual([round(float(v), 4) for v in results], [0.0, 0.0625, 0.25, 0.5625, 1.0])
+        self.assertIsNone(parse_sweep("2 + 2"))
+
+    def test_factorial_over_a_sweep(self):
+        """Integral float points get their factorial; the rest are out of domain."""
+        namespace = build_namespace("scientific", vectorized=True)
+        results = evaluate_many(compile_expression("factorial(x)"), namespace, "x", sweep_points(0.0, 2.0, 0.5))
+
+        self.assertEqual([float(v) for v in results[::2]], [1.0, 1.0, 2.0])
+        self.assertTrue(all(math.isnan(v) for v in results[1::2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Tests for the shared HTTP client: retries, GET coalescing and connectivity tracking.
+"""
+
+import unittest
+import sys
+import os
+import threading
+from unittest import mock
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+try:
+    import requests
+    from backend.utils.http_client import HTTPClient, OfflineError
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+
+def make_response(status_code=200, headers=None):
+    return mock.Mock(status_code=status_code, headers=headers or {})
+
+
+@unittest.skipUnless(REQUESTS_AVAILABLE, "requests not available")
+class TestHTTPClient(unittest.TestCase):
+    """Test cases for retry, coalescing and offline/recheck behaviour."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.client = HTTPClient(base_delay=0)
+        self.client.session = mock.Mock()
+        self.dead_host = requests.exceptions.ConnectionError("connection refused")
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.client.close()
+
+    def test_retries_transient_failures(self):
+        """Connection errors and 503s are retried until a response comes back."""
+        self.client.session.request.side_effect = [self.dead_host, make_response(503), make_response(200)]
+
+        response = self.client.request('get', 'https://api.example.com/items', backoff=lambda attempt: 0)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.session.request.call_count, 3)
+        self.assertTrue(self.client.connectivity.is_online)
+
+    def test_one_dead_host_does_not_take_client_offline(self):
+        """A request that exhausts its retries counts once, against its own host."""
+        self.client.session.request.side_effect = self.dead_host
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.client.request('get', 'http://127.0.0.1:9/feed', backoff=lambda attempt: 0)
+
+        status = self.client.connectivity.get_status()
+        self.assertEqual(self.client.session.request.call_count, self.client.max_retries + 1)
+        self.assertEqual(status['failing_hosts'], {'127.0.0.1:9': 1})
+        self.assertTrue(status['online'])
+
+        self.client.session.request.side_effect = None
+        self.client.session.request.return_value = make_response(200)
+        self.assertEqual(self.client.request('get', 'https://api.example.com/').status_code, 200)
+
+    def test_offline_after_several_hosts_fail_then_recheck(self):
+        """Failures on distinct hosts go offline; one recheck request gets through."""
+        self.client.session.request.side_effect = self.dead_host
+        for host in ('a.example.com', 'b.example.com', 'c.example.com'):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                self.client.request('get', f'https://{host}/', max_retries=0)
+        self.assertFalse(self.client.connectivity.is_online)
+
+        # The first request after going offline is the recheck; later ones fail fast
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.client.request('get', 'https://d.example.com/', max_retries=0)
+        calls = self.client.session.request.call_count
+        with self.assertRaises(OfflineError):
+            self.client.request('get', 'https://d.example.com/')
+        self.assertEqual(self.client.session.request.call_count, calls)
+
+        # Recheck interval elapsed: the next request is let through and brings us back online
+        self.client.connectivity._last_recheck = -self.client.connectivity.recheck_interval
+        self.client.session.request.side_effect = None
+        self.client.session.request.return_value = make_response(200)
+        self.client.request('get', 'https://d.example.com/')
+
+        self.assertTrue(self.client.connectivity.is_online)
+
+    def test_identical_gets_share_one_request(self):
+        """Concurrent identical GETs wait on the first one instead of sending their own."""
+        started, release = threading.Event(), threading.Event()
+
+        def slow_request(method, url, **kwargs):
+            started.set()
+            release.wait(5)
+            return make_response(200)
+
+        self.client.session.request.side_effect = slow_request
+        first = self.client.submit('get', 'https://api.example.com/quote', params={'s': 'X'})
+        started.wait(5)
+        second = self.client.submit('get', 'https://api.example.com/quote', params={'s': 'X'})
+        release.set()
+
+        self.assertIs(first.result(5), second.result(5))
+        self.assertEqual(self.client.session.request.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
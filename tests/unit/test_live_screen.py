@@ -0,0 +1,134 @@
+"""
+Tests for the live screen view: BGRA rendering and render-time frame pacing.
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+# Widgets are built without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+try:
+    from PyQt5.QtGui import QColor
+    from PyQt5.QtWidgets import QApplication
+    from screen_intelligence import live_screen_intelligence
+    from screen_intelligence.live_screen_intelligence import LiveScreenIntelligence
+    QT_AVAILABLE = True
+except ImportError:
+    QT_AVAILABLE = False
+
+# 8x4 screen of four 4x2 blocks in BGRA byte order, as mss returns it
+BLOCKS = [[(255, 0, 0), (0, 255, 0)],
+          [(0, 0, 255), (255, 255, 255)]]  # RGB per block
+
+
+def bgra_screen():
+    data = bytearray()
+    for y in range(4):
+        for x in range(8):
+            r, g, b = BLOCKS[y // 2][x // 4]
+            data += bytes((b, g, r, 255))
+    return data
+
+
+class FakeClock:
+    """perf_counter stand-in that only moves when a fake grab takes time"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeScreenGrab:
+    """mss handle whose grab takes ``render_ms`` on the fake clock"""
+
+    def __init__(self, clock, buffer):
+        self.clock = clock
+        self.buffer = buffer
+        self.render_ms = 0.0
+        self.monitors = [{}, {'left': 0, 'top': 0, 'width': 8, 'height': 4}]
+
+    def grab(self, monitor):
+        self.clock.now += self.render_ms / 1000
+        return mock.Mock(bgra=self.buffer, width=8, height=4)
+
+    def close(self):
+        pass
+
+
+@unittest.skipUnless(QT_AVAILABLE, "PyQt5 not available")
+class TestLiveView(unittest.TestCase):
+    """Test cases for the live view's capture path."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.clock = FakeClock()
+        self.buffer = bgra_screen()
+        self.grab = FakeScreenGrab(self.clock, self.buffer)
+        patchers = [mock.patch.object(live_screen_intelligence, 'MSS_AVAILABLE', True),
+                    mock.patch.object(live_screen_intelligence.time, 'perf_counter', self.clock)]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.widget = LiveScreenIntelligence()
+        self.widget.live_view.setFixedSize(4, 2)
+        self.widget._sct = self.grab
+        self.widget.monitor_timer.setInterval(LiveScreenIntelligence.PREVIEW_MIN_INTERVAL_MS)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.widget.monitor_timer.stop()
+        self.widget.deleteLater()
+
+    def render(self, render_ms, frames=1):
+        self.grab.render_ms = render_ms
+        for _ in range(frames):
+            self.widget.capture_screens()
+        return self.widget.monitor_timer.interval()
+
+    def test_bgra_buffer_rendered_as_rgb(self):
+        """The mss buffer is read as RGB32, scaled to the view and detached from the grab."""
+        self.render(1)
+        preview = self.widget.current_screens[0][1]
+
+        pixels = [[QColor(preview.pixel(x, y)).getRgb()[:3] for x in range(4)] for y in range(2)]
+        self.assertEqual((preview.width(), preview.height()), (4, 2))
+        self.assertEqual(pixels, [[BLOCKS[y][x // 2] for x in range(4)] for y in range(2)])
+
+        # Overwriting the grab buffer leaves the rendered frame alone
+        self.buffer[:] = bytes(len(self.buffer))
+        self.assertEqual(QColor(preview.pixel(0, 0)).getRgb()[:3], BLOCKS[0][0])
+
+    def test_interval_follows_render_time(self):
+        """The timer keeps rendering to a quarter of the frame, within its bounds."""
+        self.assertEqual(self.render(40), 160)
+        # One slow frame moves the average, not the whole interval
+        self.assertEqual(self.render(200), int((0.8 * 40 + 0.2 * 200) / 0.25))
+        self.assertEqual(self.render(200, frames=30), LiveScreenIntelligence.PREVIEW_MAX_INTERVAL_MS)
+        # Changes of 5 ms or less are left alone, so the floor is approached to within that
+        self.assertAlmostEqual(self.render(1, frames=30), LiveScreenIntelligence.PREVIEW_MIN_INTERVAL_MS,
+                               delta=5)
+
+    def test_small_render_changes_keep_interval(self):
+        """Jitter within a few milliseconds does not reprogram the timer."""
+        self.render(40)
+        with mock.patch.object(self.widget.monitor_timer, 'setInterval') as set_interval:
+            self.render(41)
+            self.render(39)
+        set_interval.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
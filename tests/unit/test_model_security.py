@@ -0,0 +1,140 @@
+"""
+Tests for ModelSecurityManager's checksum cache and tree checksums.
+"""
+
+import unittest
+import sys
+import os
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+try:
+    from backend.security import model_security
+    from backend.security.model_security import ModelSecurityManager, TREE_CHECKSUM_PREFIX
+    SECURITY_AVAILABLE = True
+except ImportError:
+    SECURITY_AVAILABLE = False
+
+SEGMENT_SIZE = 1024
+
+
+def tree_checksum(data, segment_size=SEGMENT_SIZE):
+    """Expected tree checksum: SHA-256 over the concatenated segment digests."""
+    digests = [hashlib.sha256(data[i:i + segment_size]).hexdigest()
+               for i in range(0, max(len(data), 1), segment_size)]
+    return TREE_CHECKSUM_PREFIX + hashlib.sha256("".join(digests).encode()).hexdigest()
+
+
+@unittest.skipUnless(SECURITY_AVAILABLE, "security dependencies not available")
+class TestModelChecksums(unittest.TestCase):
+    """Test cases for cached checksums and linear versus tree verification."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manager = ModelSecurityManager(os.path.join(self.temp_dir.name, 'config'))
+        self.data = bytes(range(256)) * 10  # Spans three segments
+        self.model_path = os.path.join(self.temp_dir.name, 'model.gguf')
+        self.write(self.data)
+        patcher = mock.patch.object(model_security, 'TREE_SEGMENT_SIZE', SEGMENT_SIZE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def write(self, data):
+        with open(self.model_path, 'wb') as f:
+            f.write(data)
+
+    def count_hashes(self):
+        return mock.patch.object(ModelSecurityManager, '_hash_file_linear',
+                                 side_effect=ModelSecurityManager._hash_file_linear)
+
+    def test_unchanged_file_served_from_cache(self):
+        """A second checksum of an unchanged file is not rehashed, even by a new manager."""
+        with self.count_hashes() as linear:
+            first = self.manager.calculate_file_checksum(self.model_path)
+            second = self.manager.calculate_file_checksum(self.model_path)
+            reloaded = ModelSecurityManager(self.manager.config_dir).calculate_file_checksum(self.model_path)
+
+        self.assertEqual(first, hashlib.sha256(self.data).hexdigest())
+        self.assertEqual(second, first)
+        self.assertEqual(reloaded, first)
+        self.assertEqual(linear.call_count, 1)
+
+    def test_changed_file_invalidates_cache(self):
+        """A new size or mtime makes the cached checksum stale."""
+        self.manager.calculate_file_checksum(self.model_path)
+
+        changed = b'x' + self.data[1:]
+        self.write(changed)
+        stat = os.stat(self.model_path)
+        os.utime(self.model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        same_size = self.manager.calculate_file_checksum(self.model_path)
+
+        self.write(changed + b'tail')
+        grown = self.manager.calculate_file_checksum(self.model_path)
+
+        self.assertEqual(same_size, hashlib.sha256(changed).hexdigest())
+        self.assertEqual(grown, hashlib.sha256(changed + b'tail').hexdigest())
+
+    def test_tree_checksum_verified(self):
+        """A stored sha256-tree: checksum is verified with the tree hash."""
+        expected = tree_checksum(self.data)
+        self.manager.store_model_checksum('model.gguf', expected)
+
+        with self.count_hashes() as linear:
+            self.assertTrue(self.manager.verify_model_checksum(self.model_path))
+        self.assertEqual(linear.call_count, 0)
+
+        self.write(self.data[:-1] + b'!')
+        self.assertFalse(self.manager.verify_model_checksum(self.model_path))
+
+    def test_linear_checksum_verified_when_tree_hashing_enabled(self):
+        """Stored plain SHA-256 checksums still verify when new models get tree hashes."""
+        manager = ModelSecurityManager(self.manager.config_dir, tree_hash_new_models=True)
+        manager.store_model_checksum('model.gguf', hashlib.sha256(self.data).hexdigest())
+
+        self.assertTrue(manager.verify_model_checksum(self.model_path))
+
+        # A model without a stored checksum is recorded with a tree checksum
+        other = os.path.join(self.temp_dir.name, 'other.gguf')
+        with open(other, 'wb') as f:
+            f.write(self.data[::-1])
+        self.assertTrue(manager.verify_model_checksum(other))
+        self.assertEqual(manager.model_checksums['other.gguf']['checksum'], tree_checksum(self.data[::-1]))
+
+    def test_cancelled_tree_hash_resumes(self):
+        """Segments finished before a cancel are reused by the next attempt."""
+        calls = []
+        original = ModelSecurityManager._hash_segment
+
+        def cancel_after_first(file_path, offset, length, cancel_event):
+            calls.append(offset)
+            if len(calls) > 1:
+                raise model_security.ChecksumCancelled(str(file_path))
+            return original(file_path, offset, length, cancel_event)
+
+        # One worker, so the segments run in order and the first one completes
+        with mock.patch.object(model_security, 'ThreadPoolExecutor',
+                               lambda **kwargs: ThreadPoolExecutor(max_workers=1)), \
+                mock.patch.object(ModelSecurityManager, '_hash_segment', side_effect=cancel_after_first):
+            with self.assertRaises(model_security.ChecksumCancelled):
+                self.manager.calculate_file_checksum(self.model_path, tree=True)
+
+        with mock.patch.object(ModelSecurityManager, '_hash_segment', side_effect=original) as segment:
+            checksum = self.manager.calculate_file_checksum(self.model_path, tree=True)
+
+        self.assertEqual(checksum, tree_checksum(self.data))
+        self.assertEqual(sorted(call.args[1] for call in segment.call_args_list), [SEGMENT_SIZE, 2 * SEGMENT_SIZE])
+
+
+if __name__ == '__main__':
+    unittest.main()
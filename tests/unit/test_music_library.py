@@ -0,0 +1,171 @@
+"""
+Tests for the incremental music library indexer.
+"""
+
+import unittest
+import asyncio
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from backend.features import music_library
+from backend.features.music_player import MusicPlayer
+from backend.features.navigation_system import NavigationManager
+
+
+class TestLibraryIndexer(unittest.TestCase):
+    """Test cases for incremental scans, pruning and watch mode."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.music_dir = os.path.join(self.temp_dir.name, 'music')
+        os.makedirs(os.path.join(self.music_dir, 'album'))
+        self.navigation = NavigationManager(config_dir=self.temp_dir.name,
+                                            db_path=os.path.join(self.temp_dir.name, 'navigation.db'))
+        self.player = MusicPlayer(config_dir=self.temp_dir.name,
+                                  db_path=os.path.join(self.temp_dir.name, 'music.db'),
+                                  search_index=self.navigation)
+        self.library = self.player.library
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.player.db.close()
+        self.navigation.db.close()
+        self.temp_dir.cleanup()
+
+    def write(self, *parts):
+        path = os.path.join(self.music_dir, *parts)
+        with open(path, 'wb') as f:
+            f.write(b'\0' * 64)
+        return os.path.realpath(path)
+
+    def scan(self, recursive=True):
+        return asyncio.run(self.library.scan(self.music_dir, recursive))
+
+    def tracks(self):
+        async def read():
+            return await self.player.db.fetchall('SELECT file_path, play_count FROM tracks ORDER BY file_path')
+        return dict(asyncio.run(read()))
+
+    def test_rescan_reads_only_changed_files(self):
+        """Files whose size and mtime match the library are skipped."""
+        self.write('one.mp3')
+        self.write('two.flac')
+        changed = self.write('album', 'three.ogg')
+        self.write('notes.txt')
+
+        first = self.scan()
+        second = self.scan()
+        stat = os.stat(changed)
+        os.utime(changed, (stat.st_atime, stat.st_mtime + 10))
+        third = self.scan()
+
+        self.assertEqual((first['added'], first['files']), (3, 3))
+        self.assertEqual((second['added'], second['updated'], second['unchanged']), (0, 0, 3))
+        self.assertEqual((third['updated'], third['unchanged']), (1, 2))
+
+    def test_reindex_keeps_play_count(self):
+        """Re-reading a changed file updates its row in place."""
+        path = self.write('one.mp3')
+        self.scan()
+        asyncio.run(self.player.db.execute('UPDATE tracks SET play_count = 5 WHERE file_path = ?', (path,)))
+
+        with open(path, 'ab') as f:
+            f.write(b'\0' * 64)
+        stats = self.scan()
+
+        self.assertEqual(stats['updated'], 1)
+        self.assertEqual(self.tracks(), {path: 5})
+
+    def test_missing_files_are_pruned(self):
+        """Deleted files leave the library, their playlists and global search."""
+        keep = self.write('one.mp3')
+        gone = self.write('album', 'two.mp3')
+        self.scan()
+
+        async def add_to_playlist():
+            playlist_id = await self.player.create_playlist('Mix')
+            for track_id, in await self.player.db.fetchall('SELECT id FROM tracks'):
+                await self.player.add_track_to_playlist(playlist_id, track_id)
+            return playlist_id
+        playlist_id = asyncio.run(add_to_playlist())
+
+        os.remove(gone)
+        shallow = self.scan(recursive=False)
+        self.assertEqual(shallow['removed'], 1)
+        self.assertEqual(list(self.tracks()), [keep])
+
+        async def read():
+            count = await self.player.db.fetchone('SELECT track_count FROM playlists WHERE id = ?', (playlist_id,))
+            indexed = await self.navigation.db.fetchall("SELECT title FROM search_index WHERE item_type = 'track'")
+            return count[0], indexed
+        self.assertEqual(asyncio.run(read()), (1, [('one',)]))
+
+    def test_non_recursive_scan_keeps_subdirectory_tracks(self):
+        """Tracks the walk didn't reach are kept while their files exist."""
+        nested = self.write('album', 'two.mp3')
+        self.scan()
+
+        self.assertEqual(self.scan(recursive=False)['removed'], 0)
+        self.assertIn(nested, self.tracks())
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), "symlinks not supported")
+    def test_linked_file_matches_existing_row(self):
+        """A symlinked track is stored by its target, as single adds store it."""
+        elsewhere = os.path.join(self.temp_dir.name, 'elsewhere.mp3')
+        with open(elsewhere, 'wb') as f:
+            f.write(b'\0' * 64)
+        link = os.path.join(self.music_dir, 'linked.mp3')
+        os.symlink(elsewhere, link)
+        asyncio.run(self.player._add_track_to_library(link))
+
+        stats = self.scan()
+
+        self.assertEqual((stats['added'], stats['unchanged']), (0, 1))
+        self.assertEqual(list(self.tracks()), [os.path.realpath(elsewhere)])
+
+    def test_sync_paths_applies_watch_events(self):
+        """Created, modified, deleted and moved paths from watch events are applied."""
+        old = self.write('old.mp3')
+        moved_from = self.write('before.mp3')
+        self.scan()
+        os.remove(old)
+        moved_to = os.path.join(self.music_dir, 'album', 'after.mp3')
+        os.rename(moved_from, moved_to)
+        created = self.write('new.mp3')
+
+        asyncio.run(self.library.sync_paths([old, moved_from, moved_to, created]))
+
+        self.assertEqual(sorted(self.tracks()), sorted([os.path.realpath(moved_to), created]))
+
+    def test_polling_watch_follows_directory(self):
+        """Without watchdog, watch mode rescans and picks up additions and deletions."""
+        async def paths():
+            return [row[0] for row in await self.player.db.fetchall('SELECT file_path FROM tracks')]
+
+        async def watch():
+            self.library.start_watching(self.music_dir, interval=0.05)
+            try:
+                path = self.write('one.mp3')
+                await asyncio.sleep(0.3)
+                added = await paths()
+                os.remove(path)
+                await asyncio.sleep(0.3)
+                return added, await paths()
+            finally:
+                self.library.stop_watching()
+
+        with mock.patch.object(music_library, 'WATCHDOG_AVAILABLE', False):
+            added, after_delete = asyncio.run(watch())
+
+        self.assertEqual(added, [os.path.realpath(os.path.join(self.music_dir, 'one.mp3'))])
+        self.assertEqual(after_delete, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
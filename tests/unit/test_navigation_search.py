@@ -0,0 +1,86 @@
+"""
+Tests for the FTS-backed global search in the navigation system.
+"""
+
+import unittest
+import asyncio
+import sys
+import os
+import tempfile
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from backend.features.navigation_system import NavigationManager
+
+
+class TestNavigationSearch(unittest.TestCase):
+    """Test cases for prefix, fuzzy and usage-ranked search."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manager = NavigationManager(config_dir=self.temp_dir.name,
+                                         db_path=os.path.join(self.temp_dir.name, 'navigation.db'))
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.manager.db.close()
+        self.temp_dir.cleanup()
+
+    def search(self, query):
+        return asyncio.run(self.manager.global_search(query))
+
+    def test_prefix_and_fuzzy_matching(self):
+        """Partial words and close misspellings both find indexed items."""
+        asyncio.run(self.manager.index_items([
+            {"id": "inv-1", "type": "invoice", "title": "Invoice for Acme Corporation"}
+        ]))
+
+        self.assertEqual(self.search("acme corp")[0]["id"], "inv-1")
+        self.assertEqual(self.search("invoce")[0]["id"], "inv-1")
+        self.assertEqual(self.search("invoice")[0]["module"], "dashboard")
+
+    def test_upserts_replace_items(self):
+        """Re-indexing an item updates it instead of adding a duplicate."""
+        async def run():
+            await self.manager.index_items([{"id": 7, "type": "note", "title": "Groceries"}])
+            await self.manager.index_items([{"id": 7, "type": "note", "title": "Travel plans"}])
+            return await self.manager.global_search("travel"), await self.manager.global_search("groceries")
+
+        travel, groceries = asyncio.run(run())
+
+        self.assertEqual([r["id"] for r in travel], ["7"])
+        self.assertEqual(groceries, [])
+
+    def test_usage_boosts_ranking(self):
+        """Frequently executed items rank above equally relevant ones."""
+        async def run():
+            await self.manager.index_items([
+                {"id": "a", "type": "task", "title": "Quarterly report"},
+                {"id": "b", "type": "task", "title": "Quarterly review"},
+            ])
+            for _ in range(5):
+                await self.manager.execute_action({"id": "b", "type": "task", "action": "open_task"})
+            await self.manager.db.run_write(lambda conn: None)  # Flush queued usage records
+            return await self.manager.global_search("quarterly")
+
+        self.assertEqual(asyncio.run(run())[0]["id"], "b")
+
+    def test_usage_counted_per_item_type(self):
+        """Items of different types sharing an id keep separate usage counts."""
+        async def run():
+            await self.manager.index_items([
+                {"id": 3, "type": "note", "title": "Meeting notes"},
+                {"id": 3, "type": "track", "title": "Meeting song"},
+            ])
+            await self.manager.execute_action({"id": 3, "type": "track", "module": "music"})
+            await self.manager.db.run_write(lambda conn: None)
+            return await self.manager.db.fetchall(
+                "SELECT item_type, usage_count FROM search_index WHERE item_id = '3' ORDER BY item_type")
+
+        self.assertEqual(asyncio.run(run()), [("note", 0), ("track", 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+"""
+Tests for the news reader's concurrent, conditional feed refresh.
+"""
+
+import unittest
+import asyncio
+import sys
+import os
+import json
+import tempfile
+from unittest import mock
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+try:
+    from backend.features import news_reader
+    from backend.features.news_reader import NewsReader
+    NEWS_AVAILABLE = True
+except ImportError:
+    NEWS_AVAILABLE = False
+
+FEED_A = "https://a.example.com/rss"
+FEED_B = "https://b.example.com/rss"
+
+
+def rss(*items):
+    """RSS document from (guid, link, title) items; an empty link is left out."""
+    body = "".join(
+        f"<item><title>{title}</title>{f'<link>{link}</link>' if link else ''}<guid>{guid}</guid></item>"
+        for guid, link, title in items)
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed</title>{body}</channel></rss>'.encode()
+
+
+class StubResponse:
+    def __init__(self, status, body=b"", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    async def read(self):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class StubSession:
+    """Serves canned responses per URL and records each request's headers"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append((url, dict(headers or {})))
+        response = self.responses[url]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+@unittest.skipUnless(NEWS_AVAILABLE, "aiohttp/feedparser not available")
+class TestNewsRefresh(unittest.TestCase):
+    """Test cases for validators, deduplication and refresh bookkeeping."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'news.db')
+        self.reader = NewsReader(config_dir=self.temp_dir.name, db_path=self.db_path)
+
+        async def use_test_sources():
+            # Defaults stay in place, just switched off, as a user might
+            await self.reader.db.execute('UPDATE news_sources SET active = FALSE')
+            await self.reader.add_source("Feed A", FEED_A)
+            await self.reader.add_source("Feed B", FEED_B)
+        asyncio.run(use_test_sources())
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.reader.db.close()
+        self.temp_dir.cleanup()
+
+    def fetch(self, responses, force_refresh=True):
+        self.session = StubSession(responses)
+        with mock.patch.object(news_reader.aiohttp, 'ClientSession', lambda **kwargs: self.session), \
+                mock.patch.object(news_reader.aiohttp, 'TCPConnector', mock.Mock()):
+            return asyncio.run(self.reader.fetch_articles(force_refresh=force_refresh))
+
+    def query(self, sql, params=()):
+        return asyncio.run(self.reader.db.fetchall(sql, params))
+
+    def test_unchanged_feed_costs_a_304(self):
+        """Stored ETag/Last-Modified are sent back, and a 304 stores nothing."""
+        validators = {"ETag": '"v1"', "Last-Modified": "Mon, 05 Oct 2026 10:00:00 GMT"}
+        first = self.fetch({FEED_A: StubResponse(200, rss(("a1", "https://a.example.com/1", "One")), validators),
+                            FEED_B: StubResponse(200, rss())})
+        second = self.fetch({FEED_A: StubResponse(304), FEED_B: StubResponse(304)})
+
+        sent = dict(self.session.requests)[FEED_A]
+        metadata = json.loads(self.query('SELECT metadata FROM news_sources WHERE url = ?', (FEED_A,))[0][0])
+
+        self.assertEqual([a["title"] for a in first], ["One"])
+        self.assertEqual(second, [])
+        self.assertEqual(sent, {"If-None-Match": '"v1"', "If-Modified-Since": validators["Last-Modified"]})
+        self.assertEqual(metadata, {"etag": '"v1"', "last_modified": validators["Last-Modified"]})
+        self.assertEqual(self.query('SELECT COUNT(*) FROM articles')[0][0], 1)
+
+    def test_sources_survive_restart(self):
+        """A new reader on the same database keeps source ids, settings and validators."""
+        validators = {"ETag": '"v1"'}
+        self.fetch({FEED_A: StubResponse(200, rss(("a1", "https://a.example.com/1", "One")), validators),
+                    FEED_B: StubResponse(200, rss())})
+        sources = 'SELECT id, url, active, last_fetched, metadata FROM news_sources ORDER BY id'
+        before = self.query(sources)
+
+        self.reader.db.close()
+        self.reader = NewsReader(config_dir=self.temp_dir.name, db_path=self.db_path)
+        after = self.query(sources)
+        again = self.fetch({FEED_A: StubResponse(304), FEED_B: StubResponse(304)})
+
+        self.assertEqual(after, before)
+        self.assertEqual(len(after), 5)
+        self.assertEqual(again, [])
+        self.assertEqual(dict(self.session.requests)[FEED_A], {"If-None-Match": '"v1"'})
+
+    def test_story_in_several_feeds_stored_once(self):
+        """Duplicates by GUID or link are dropped; linkless entries are kept apart by GUID."""
+        new = self.fetch({
+            FEED_A: StubResponse(200, rss(("shared", "https://a.example.com/s", "Shared story"),
+                                          ("note-1", "", "Linkless one"),
+                                          ("note-2", "", "Linkless two"))),
+            FEED_B: StubResponse(200, rss(("shared", "https://b.example.com/s", "Shared story (B)"),
+                                          ("b-own", "https://a.example.com/s", "Same link, other GUID"),
+                                          ("b-2", "https://b.example.com/2", "B only"))),
+        })
+
+        titles = sorted(a["title"] for a in new)
+        self.assertEqual(titles, ["B only", "Linkless one", "Linkless two", "Shared story"])
+        self.assertEqual(sorted(row[0] for row in self.query('SELECT title FROM articles')), titles)
+
+    def test_refetch_keeps_article_state(self):
+        """Articles seen again keep their id and read/archived flags."""
+        feed = rss(("a1", "https://a.example.com/1", "One"))
+        self.fetch({FEED_A: StubResponse(200, feed), FEED_B: StubResponse(200, rss())})
+        before = self.query('SELECT id FROM articles')
+        asyncio.run(self.reader.db.execute('UPDATE articles SET read_status = TRUE, archived = TRUE'))
+
+        again = self.fetch({FEED_A: StubResponse(200, feed), FEED_B: StubResponse(200, rss())})
+
+        self.assertEqual(again, [])
+        self.assertEqual(self.query('SELECT id, read_status, archived FROM articles'), [(before[0][0], 1, 1)])
+
+    def test_failed_fetch_leaves_source_due(self):
+        """A feed that fails keeps its old last_fetched and is retried on the next refresh."""
+        self.fetch({FEED_A: StubResponse(500), FEED_B: StubResponse(200, rss())})
+        last_fetched = dict(self.query('SELECT url, last_fetched FROM news_sources'))
+
+        self.fetch({FEED_A: ConnectionError("connection reset"), FEED_B: StubResponse(200, rss())},
+                   force_refresh=False)
+
+        self.assertIsNone(last_fetched[FEED_A])
+        self.assertIsNotNone(last_fetched[FEED_B])
+        self.assertEqual([url for url, _ in self.session.requests], [FEED_A])
+        self.assertIsNone(dict(self.query('SELECT url, last_fetched FROM news_sources'))[FEED_A])
+
+
+if __name__ == '__main__':
+    unittest.main()
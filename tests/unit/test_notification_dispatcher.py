@@ -0,0 +1,85 @@
+"""
+Tests for the batched notification dispatcher.
+"""
+
+import unittest
+import asyncio
+import sys
+import os
+import tempfile
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from backend.features.notification_manager import (
+    NotificationManager, NotificationPriority, NotificationType
+)
+
+
+class TestNotificationDispatcher(unittest.TestCase):
+    """Test cases for coalescing, grouping and cached settings."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manager = NotificationManager(config_dir=self.temp_dir.name,
+                                           db_path=os.path.join(self.temp_dir.name, 'notifications.db'))
+        self.popups = []
+
+        async def record(notification):
+            self.popups.append(notification)
+
+        asyncio.run(self.manager.register_callback("test", record))
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.manager.db.close()
+        self.temp_dir.cleanup()
+
+    def test_duplicates_are_coalesced(self):
+        """Identical notifications fold into the first one and count repeats."""
+        async def run():
+            ids = {await self.manager.send_notification("Sync failed", "Offline", module="email")
+                   for _ in range(50)}
+            return ids, await self.manager.get_notification_history()
+
+        ids, history = asyncio.run(run())
+
+        self.assertEqual(len(ids), 1)
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history[0]["occurrences"], 50)
+
+    def test_similar_notifications_share_a_popup(self):
+        """A burst from one module pops up once; urgent ones pop up on their own."""
+        async def run():
+            for i in range(10):
+                await self.manager.send_notification(f"Reminder {i}", "Due soon", module="tasks")
+            await self.manager.send_notification("Server down", "Now", module="tasks",
+                                                 priority=NotificationPriority.URGENT)
+            await self.manager.dispatcher.dispatch()
+            return await self.manager.get_statistics()
+
+        stats = asyncio.run(run())
+
+        self.assertEqual(stats["total_notifications"], 11)
+        self.assertEqual([p["title"] for p in self.popups], ["Server down", "Reminder 9"])
+        self.assertEqual(self.popups[1]["group_count"], 10)
+
+    def test_settings_are_cached(self):
+        """Disabled types are blocked without a database read per notification."""
+        async def run():
+            await self.manager.update_notification_settings(NotificationType.INFO, module="news",
+                                                            enabled=False)
+            blocked = await self.manager.send_notification("Headline", "Story", module="news")
+            allowed = await self.manager.send_notification("Headline", "Story", module="weather")
+            return blocked, allowed
+
+        blocked, allowed = asyncio.run(run())
+
+        self.assertIsNone(blocked)
+        self.assertIsNotNone(allowed)
+        self.assertEqual(self.manager._settings_cache[("news", "info")], (False, 1, False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Tests for the PriorityRAG inverted-index retrieval.
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import threading
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from backend.ai_integration import PriorityRAG, DocumentChunk, ChunkType, InvertedIndex
+from backend.vector_search import NUMPY_AVAILABLE
+
+
+def make_chunk(chunk_id, content, chunk_type=ChunkType.PARAGRAPH, priority=1.0):
+    return DocumentChunk(id=chunk_id, content=content, chunk_type=chunk_type,
+                         start_index=0, end_index=len(content), priority=priority)
+
+
+class TestPriorityRAG(unittest.TestCase):
+    """Test cases for BM25 retrieval, filters and persistence."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.rag = PriorityRAG(max_results=5)
+        self.rag.add_document('python', [
+            make_chunk('py-1', 'Python decorators wrap functions with extra behaviour'),
+            make_chunk('py-2', 'Python generators yield values lazily', ChunkType.SENTENCE)
+        ], {'type': 'notes'})
+        self.rag.add_document('cooking', [
+            make_chunk('cook-1', 'Slow roasted tomatoes with garlic and basil')
+        ], {'type': 'recipe'})
+
+    def test_retrieve_ranks_matching_chunks(self):
+        """Only chunks sharing a query term are returned, best match first."""
+        results = self.rag.retrieve('python generators')
+
+        self.assertEqual([chunk.id for chunk, _ in results], ['py-2', 'py-1'])
+        self.assertGreater(results[0][1], results[1][1])
+
+    def test_filters_use_attribute_postings(self):
+        """doc_type and chunk_type filters narrow candidates before scoring."""
+        results = self.rag.retrieve('python', filters={'chunk_type': 'sentence'})
+        self.assertEqual([chunk.id for chunk, _ in results], ['py-2'])
+
+        results = self.rag.retrieve('python garlic', filters={'doc_type': 'recipe'})
+        self.assertEqual([chunk.id for chunk, _ in results], ['cook-1'])
+
+    def test_remove_document_updates_postings(self):
+        """Removed chunks disappear from the index."""
+        self.assertTrue(self.rag.remove_document('python'))
+
+        self.assertEqual(self.rag.retrieve('python'), [])
+        self.assertNotIn('python', self.rag.index.postings)
+
+    def test_save_and_load_round_trip(self):
+        """A persisted corpus is restored by a new instance."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'rag_index.json')
+            self.rag.save(path)
+
+            restored = PriorityRAG(index_path=path)
+
+            self.assertEqual(restored.get_document_stats()['total_chunks'], 3)
+            self.assertEqual(
+                [chunk.id for chunk, _ in restored.retrieve('python generators')],
+                [chunk.id for chunk, _ in self.rag.retrieve('python generators')])
+
+    def test_changes_saved_only_on_request(self):
+        """Adds and removes stay in memory until save() or persist=True."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'rag_index.json')
+            rag = PriorityRAG(index_path=path)
+            rag.add_document('draft', [make_chunk('d-1', 'unsaved draft')])
+            self.assertFalse(os.path.exists(path))
+
+            rag.add_document('final', [make_chunk('f-1', 'saved copy')], persist=True)
+            rag.remove_document('final')
+
+            self.assertEqual(sorted(PriorityRAG(index_path=path).document_store), ['draft', 'final'])
+
+    def test_concurrent_saves_do_not_clobber(self):
+        """Saves from several threads each leave a complete index and no temp files."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'rag_index.json')
+            threads = [threading.Thread(target=self.rag.save, args=(path,)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(os.listdir(temp_dir), ['rag_index.json'])
+            self.assertEqual(PriorityRAG(index_path=path).get_document_stats()['total_chunks'], 3)
+
+
+class TestInvertedIndex(unittest.TestCase):
+    """Test cases for BM25 scoring."""
+
+    def test_rarer_terms_score_higher(self):
+        """A term found in fewer chunks carries more weight."""
+        index = InvertedIndex()
+        index.add('a', ['common', 'rare'])
+        index.add('b', ['common', 'other'])
+        index.add('c', ['common', 'other'])
+
+        scores = index.score(['common', 'rare'])
+
+        self.assertEqual(set(scores), {'a', 'b', 'c'})
+        self.assertGreater(scores['a'], scores['b'])
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not available")
+class TestHybridSearch(unittest.TestCase):
+    """Test cases for vector-backed hybrid retrieval."""
+
+    def test_hybrid_search_persists_vectors(self):
+        """Vectors are stored beside the corpus and reused after a restart."""
+        from backend.vector_search import HashingEmbedder
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'rag_index.json')
+            rag = PriorityRAG(index_path=path, embedder=HashingEmbedder(dim=64), vector_dtype='int8')
+            rag.add_document('python', [
+                make_chunk('py-1', 'python decorators wrap functions'),
+                make_chunk('py-2', 'slow roasted tomatoes with garlic')
+            ])
+            rag.save()
+
+            restored = PriorityRAG(index_path=path, embedder=HashingEmbedder(dim=64))
+            results = restored.hybrid_search('python decorators', max_results=1)
+
+            self.assertEqual(len(restored.vector_index), 2)
+            self.assertEqual(results[0][0].id, 'py-1')
+
+    def test_removed_vectors_are_compacted(self):
+        """Tombstoned rows are reclaimed and ids still map to their own vectors."""
+        import numpy as np
+        from backend.vector_search import HashingEmbedder, VectorIndex
+
+        embedder = HashingEmbedder(dim=32)
+        texts = {f'doc-{i}': f'document number {i} about topic {i % 7}' for i in range(40)}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index = VectorIndex(32, temp_dir, train_threshold=20)
+            index.add(list(texts), embedder.embed(list(texts.values())))
+            for i in range(0, 40, 2):
+                index.remove(f'doc-{i}')
+
+            self.assertEqual(index.matrix.count, len(index.row_ids))
+            self.assertLess(len(index.row_ids), 40)
+            index.save()
+            restored = VectorIndex.load(temp_dir)
+
+            self.assertEqual(restored.matrix.count, 20)
+            self.assertEqual(sum(len(rows) for rows in index.ivf.lists), 20)
+            query = embedder.embed([texts['doc-13']])[0]
+            self.assertEqual(restored.search(query, k=1)[0][0], 'doc-13')
+            self.assertTrue(np.allclose(restored.matrix.rows([restored.id_rows['doc-13']])[0], query, atol=1e-5))
+
+
+if __name__ == '__main__':
+    unittest.main()
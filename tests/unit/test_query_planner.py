@@ -0,0 +1,138 @@
+"""
+Tests for QueryPlanner's dependency scheduling, timeouts, cancellation and result cache.
+"""
+
+import unittest
+import sys
+import os
+import threading
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from backend.ai_integration import QueryPlanner, QueryStep
+
+
+def make_step(step_id, step_type, depends_on=(), timeout=None):
+    return QueryStep(step_id=step_id, step_type=step_type, description=step_id,
+                     depends_on=list(depends_on), parameters={}, timeout=timeout)
+
+
+class TestQueryPlanner(unittest.TestCase):
+    """Test cases for DAG execution order, step timeouts and plan cancellation."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.planner = QueryPlanner(max_workers=2)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.release.set()
+        if self.planner._executor is not None:
+            self.planner._executor.shutdown(wait=True)
+
+    def make_plan(self, *steps):
+        plan_id = self.planner.create_query_plan("test query")
+        self.planner.active_plans[plan_id]['steps'] = {step.step_id: step for step in steps}
+        return plan_id
+
+    def test_steps_wait_for_dependencies(self):
+        """Independent branches run concurrently; a join runs after both, with their results."""
+        both_running = threading.Barrier(2, timeout=5)
+
+        def branch(step, results):
+            both_running.wait()  # Fails unless b and c are in flight together
+            return results['a'] + step.step_id
+
+        self.planner.register_step_handler('root', lambda step, results: 'root')
+        self.planner.register_step_handler('branch', branch)
+        self.planner.register_step_handler('join', lambda step, results: sorted(results))
+
+        plan_id = self.make_plan(make_step('d', 'join', ['b', 'c']), make_step('a', 'root'),
+                                 make_step('b', 'branch', ['a']), make_step('c', 'branch', ['a']))
+        result = self.planner.execute_plan(plan_id)
+
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['results'], {'a': 'root', 'b': 'rootb', 'c': 'rootc', 'd': ['a', 'b', 'c']})
+        self.assertEqual(self.planner.get_plan_status(plan_id)['status'], 'completed')
+
+    def test_timed_out_step_does_not_block_the_plan(self):
+        """A hung step times out, is signalled, and later steps still get a worker."""
+        self.planner = QueryPlanner(max_workers=1)
+        signalled = []
+        finished = threading.Event()
+
+        def hang(step, results):
+            self.release.wait(5)  # Ignores its cancel signal
+            signalled.append(step.cancelled.is_set())
+            finished.set()
+
+        self.planner.register_step_handler('hang', hang)
+        self.planner.register_step_handler('next', lambda step, results: 'done')
+
+        plan_id = self.make_plan(make_step('slow', 'hang', timeout=0.2), make_step('after', 'next', ['slow']))
+        result = self.planner.execute_plan(plan_id)
+        self.release.set()
+
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['results'], {'slow': 'Step timed out after 0.2s', 'after': 'done'})
+        self.assertEqual(result['trace']['slow']['status'], 'timeout')
+
+        finished.wait(5)
+        self.assertEqual(signalled, [True])
+
+    def test_cancel_stops_plan_and_releases_it(self):
+        """Cancelling signals running steps, skips the rest and drops the plan from active_plans."""
+        started, finished = threading.Event(), threading.Event()
+        seen_cancel = []
+
+        def wait_for_cancel(step, results):
+            started.set()
+            seen_cancel.append(step.cancelled.wait(5))
+            finished.set()
+
+        self.planner.register_step_handler('wait', wait_for_cancel)
+        self.planner.register_step_handler('never', lambda step, results: self.fail("ran after cancel"))
+
+        plan_id = self.make_plan(make_step('a', 'wait'), make_step('b', 'never', ['a']))
+        outcome = {}
+        runner = threading.Thread(target=lambda: outcome.update(self.planner.execute_plan(plan_id)))
+        runner.start()
+        started.wait(5)
+        self.assertTrue(self.planner.cancel_plan(plan_id))
+        runner.join(5)
+
+        self.assertEqual(outcome['error'], 'Plan cancelled')
+        self.assertNotIn(plan_id, self.planner.active_plans)
+        self.assertEqual(self.planner.get_plan_status(plan_id)['status'], 'cancelled')
+        finished.wait(5)
+        self.assertEqual(seen_cancel, [True])
+
+    def test_results_cached_only_when_opted_in(self):
+        """Handlers run every time unless registered as cacheable."""
+        calls = {'fresh': 0, 'pure': 0}
+
+        def counting(step, results):
+            calls[step.step_type] += 1
+            return calls[step.step_type]
+
+        self.planner.register_step_handler('fresh', counting)
+        self.planner.register_step_handler('pure', counting, cacheable=True)
+
+        for _ in range(2):
+            self.planner.execute_plan(self.make_plan(make_step('x', 'fresh'), make_step('y', 'pure')))
+
+        self.assertEqual(calls, {'fresh': 2, 'pure': 1})
+
+    def test_failed_plan_leaves_active_plans(self):
+        """A plan that cannot run is reported as failed and no longer tracked as active."""
+        plan_id = self.make_plan(make_step('a', 'simple_query', ['missing']))
+
+        self.assertIn('error', self.planner.execute_plan(plan_id))
+        self.assertNotIn(plan_id, self.planner.active_plans)
+        self.assertEqual(self.planner.get_plan_status(plan_id)['status'], 'failed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Tests for ScreenAnalyzer's memoized OCR pass.
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from screen_intelligence.capture import screen_analyzer
+from screen_intelligence.capture.screen_analyzer import ScreenAnalyzer
+
+# One word per OCR pass, at (1, 2) relative to the image it was given
+OCR_DATA = {
+    'text': ['', 'Error'], 'left': [0, 1], 'top': [0, 2], 'width': [0, 20], 'height': [0, 8],
+    'conf': [-1, 90], 'block_num': [1, 1], 'par_num': [1, 1], 'line_num': [1, 1]
+}
+
+
+def fake_tesseract():
+    return mock.Mock(image_to_data=mock.Mock(return_value=OCR_DATA))
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not available")
+class TestOCRMemoization(unittest.TestCase):
+    """Test cases for ScreenAnalyzer's content-keyed OCR cache."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.analyzer = ScreenAnalyzer()
+        self.tesseract = fake_tesseract()
+        patcher = mock.patch.multiple(screen_analyzer, HAS_PYTESSERACT=True, HAS_CV2=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(screen_analyzer, 'pytesseract', self.tesseract, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        if self.analyzer._executor is not None:
+            self.analyzer._executor.shutdown(wait=True)
+
+    def test_equal_content_shares_result(self):
+        """The key is the image content, not the object identity."""
+        image = np.arange(72, dtype=np.uint8).reshape(4, 6, 3)
+
+        first = self.analyzer.run_ocr(image)
+        again = self.analyzer.run_ocr(image.copy())
+
+        self.assertIs(again, first)
+        self.assertEqual(first.text, 'Error')
+        self.assertEqual(self.tesseract.image_to_data.call_count, 1)
+
+    def test_key_covers_shape_and_pixels(self):
+        """Same bytes in another shape, or one changed pixel, are OCRed separately."""
+        image = np.arange(72, dtype=np.uint8).reshape(4, 6, 3)
+        edited = image.copy()
+        edited[0, 0, 0] = 255
+
+        self.analyzer.run_ocr(image)
+        self.analyzer.run_ocr(image.reshape(6, 4, 3))
+        self.analyzer.run_ocr(edited)
+
+        self.assertEqual(self.tesseract.image_to_data.call_count, 3)
+
+    def test_least_recently_used_evicted(self):
+        """Past OCR_CACHE_SIZE images, the least recently used result is dropped."""
+        self.analyzer.OCR_CACHE_SIZE = 2
+        a, b, c = (np.full((2, 2, 3), value, dtype=np.uint8) for value in (1, 2, 3))
+
+        for image in (a, b, a, c, a):
+            self.analyzer.run_ocr(image)
+        self.assertEqual(self.tesseract.image_to_data.call_count, 3)
+
+        self.analyzer.run_ocr(b)
+        self.assertEqual(self.tesseract.image_to_data.call_count, 4)
+
+    def test_context_analysis_runs_one_ocr_pass(self):
+        """Code, IDE and text detection all read the same OCR result."""
+        analysis = self.analyzer.analyze_screen_context(np.zeros((4, 4, 3), dtype=np.uint8))
+
+        self.assertEqual(self.tesseract.image_to_data.call_count, 1)
+        self.assertEqual(analysis['text_content'], 'Error')
+        self.assertEqual(analysis['ocr_confidence'], 90.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,250 @@
+"""
+Tests for change-gated screen monitoring, run on synthetic frames.
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from unittest import mock
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from backend import screen_capture
+from backend.screen_capture import ScreenCaptureEngine, ScreenFrame
+
+
+def fake_tesseract():
+    """image_to_data stand-in reporting one word, "error<n>", centred in each image it reads."""
+    calls = []
+
+    def image_to_data(image, output_type=None):
+        calls.append(image.shape[:2])
+        height, width = image.shape[:2]
+        return {
+            'text': ['', f'error{len(calls)}'], 'left': [0, width // 2 - 1], 'top': [0, height // 2 - 1],
+            'width': [0, 2], 'height': [0, 2], 'conf': [-1, 90],
+            'block_num': [1, 1], 'par_num': [1, 1], 'line_num': [1, 1]
+        }
+    return mock.Mock(image_to_data=mock.Mock(side_effect=image_to_data), calls=calls)
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not available")
+class TestFrameChanges(unittest.TestCase):
+    """Test cases for the per-tile diff and region-merged OCR."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.engine = ScreenCaptureEngine()
+        self.engine.tile_size = 8
+        # 2 rows x 3 columns of 8x8 tiles
+        self.pixels = np.zeros((16, 24, 3), dtype=np.uint8)
+        patcher = mock.patch.multiple(screen_capture, TESSERACT_AVAILABLE=False, OPENCV_AVAILABLE=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def analyze(self):
+        return self.engine.analyze_frame_changes(ScreenFrame(self.pixels.copy()))
+
+    @contextmanager
+    def tesseract(self):
+        tesseract = fake_tesseract()
+        with mock.patch.object(screen_capture, 'TESSERACT_AVAILABLE', True), \
+                mock.patch.object(screen_capture, 'pytesseract', tesseract, create=True):
+            yield tesseract
+
+    def test_only_changed_tiles_reported(self):
+        """Identical frames change nothing; an edit marks just the tiles it touches."""
+        first = self.analyze()
+        static = self.analyze()
+        self.pixels[0:4, 9:20] = 255  # Tiles (0, 1) and (0, 2)
+        edited = self.analyze()
+
+        self.assertEqual((first['total_tiles'], first['changed_tiles']), (6, 6))
+        self.assertEqual(static['changed_tiles'], 0)
+        self.assertNotIn('ocr', static)
+        self.assertEqual(edited['changed_tiles'], 2)
+        self.assertEqual(edited['dimensions'], (24, 16))
+        self.assertEqual(self.engine.monitor_stats['static_frames'], 1)
+        self.assertEqual(self.engine.monitor_stats['tiles_analyzed'], 8)
+
+    def test_low_bit_noise_ignored(self):
+        """Dithering-sized differences in sampled pixels do not count as changes."""
+        self.analyze()
+        self.pixels[0, 0] = 7
+        self.pixels[8, 16] = 3
+
+        self.assertEqual(self.analyze()['changed_tiles'], 0)
+
+    def test_resolution_change_rebuilds_grid(self):
+        """A frame of a new size is diffed against its own grid."""
+        self.analyze()
+        self.pixels = np.zeros((8, 8, 3), dtype=np.uint8)
+
+        smaller = self.analyze()
+
+        self.assertEqual((smaller['total_tiles'], smaller['changed_tiles']), (1, 0))
+        self.assertEqual(set(self.engine._tile_hashes), {(0, 0)})
+
+    def test_full_change_costs_one_ocr_call(self):
+        """A frame where most tiles changed is OCRed in a single full-frame pass."""
+        with self.tesseract() as tesseract:
+            result = self.analyze()
+
+        self.assertEqual(tesseract.calls, [(16, 24)])
+        self.assertEqual(result['ocr']['text'], 'error1')
+        self.assertEqual([(w['x'], w['y']) for w in result['ocr']['detected_words']], [(11, 7)])
+        self.assertTrue(result['error_detection']['has_errors'])
+
+    def test_adjacent_changes_share_one_padded_call(self):
+        """Neighbouring changed tiles are OCRed together, with a margin around them."""
+        self.engine.ocr_margin = 2
+        with self.tesseract() as tesseract:
+            self.analyze()
+            self.pixels[0:4, 9:20] = 255  # Tiles (0, 1) and (0, 2)
+            result = self.analyze()
+
+        # Box (6, 0)-(24, 10): left margin, clipped at the top and right edges
+        self.assertEqual(tesseract.calls, [(16, 24), (10, 18)])
+        # The new word lands in tile (0, 1); the first pass's word in (1, 1) is kept
+        self.assertEqual(result['ocr']['text'], 'error2\nerror1')
+        self.assertEqual([(w['x'], w['y']) for w in result['ocr']['detected_words']], [(14, 4), (11, 7)])
+
+    def test_unchanged_tiles_keep_their_words(self):
+        """Words in tiles that didn't change survive a re-read elsewhere, in reading order."""
+        self.pixels = np.zeros((32, 32, 3), dtype=np.uint8)  # 4 x 4 tiles
+        self.engine.ocr_margin = 0
+        with self.tesseract() as tesseract:
+            self.analyze()  # error1 at the centre, tile (2, 2)
+            self.pixels[0:8, 0:8] = 255  # Tile (0, 0)
+            result = self.analyze()
+
+        self.assertEqual(tesseract.calls, [(32, 32), (8, 8)])
+        self.assertEqual(result['ocr']['text'], 'error2\nerror1')
+
+    def test_scattered_changes_fall_back_to_full_frame(self):
+        """More separate regions than max_ocr_regions cost one full-frame call."""
+        self.pixels = np.zeros((32, 32, 3), dtype=np.uint8)
+        self.engine.max_ocr_regions = 1
+        self.engine.ocr_margin = 0
+        with self.tesseract() as tesseract:
+            self.analyze()
+            self.pixels[0:8, 0:8] = 255
+            self.analyze()  # One region
+            self.pixels[0:8, 0:8] = 0
+            self.pixels[24:32, 24:32] = 255
+            self.analyze()  # Two regions
+
+        self.assertEqual(tesseract.calls, [(32, 32), (8, 8), (32, 32)])
+
+    def test_reappearing_region_served_from_cache(self):
+        """Content OCRed before, such as a window switched back to, is not read again."""
+        self.pixels = np.zeros((32, 32, 3), dtype=np.uint8)
+        self.engine.ocr_margin = 0
+        with self.tesseract() as tesseract:
+            self.analyze()
+            self.pixels[0:8, 0:8] = 255
+            shown = self.analyze()
+            self.pixels[0:8, 0:8] = 0
+            self.analyze()
+            self.pixels[0:8, 0:8] = 255
+            again = self.analyze()
+
+        self.assertEqual(len(tesseract.calls), 3)
+        self.assertEqual(self.engine.monitor_stats['ocr_cache_hits'], 1)
+        self.assertEqual(again['ocr']['text'], shown['ocr']['text'])
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not available")
+class TestInMemoryCapture(unittest.TestCase):
+    """Test cases for analyzing captured frames without touching disk."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.capture_dir = os.path.join(self.temp_dir.name, 'captures')
+        self.engine = ScreenCaptureEngine(capture_dir=self.capture_dir)
+        self.pixels = np.arange(16 * 24 * 3, dtype=np.uint8).reshape(16, 24, 3)
+        self.image_open = mock.Mock(side_effect=AssertionError("frame decoded from disk"))
+        self.cv2 = mock.Mock(imread=mock.Mock(side_effect=AssertionError("frame read from disk")),
+                             cvtColor=mock.Mock(return_value=np.zeros((16, 24), dtype=np.uint8)))
+        for patcher in (
+                mock.patch.multiple(screen_capture, MSS_AVAILABLE=True, PIL_AVAILABLE=True,
+                                    OPENCV_AVAILABLE=True, TESSERACT_AVAILABLE=True),
+                mock.patch.object(screen_capture, 'cv2', self.cv2, create=True),
+                mock.patch.object(screen_capture, 'Image', mock.Mock(open=self.image_open), create=True),
+                mock.patch.object(self.engine, '_grab_pixels', return_value=self.pixels),
+                mock.patch.object(self.engine, '_detect_rectangles', return_value=[]),
+                mock.patch.object(self.engine, '_detect_windows', return_value=[])):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        if self.engine._persist_executor is not None:
+            self.engine._persist_executor.shutdown(wait=True)
+        self.temp_dir.cleanup()
+
+    def test_analysis_receives_frame_pixels(self):
+        """OCR and UI detection are handed the captured array, with no file in between."""
+        capture = self.engine.capture_screen()
+        frame = capture['frame']
+        tesseract = fake_tesseract()
+        with mock.patch.object(screen_capture, 'pytesseract', tesseract, create=True):
+            results = self.engine.full_analysis(frame)
+
+        self.assertIsInstance(frame, ScreenFrame)
+        self.assertNotIn('filepath', capture)
+        self.assertTrue(results['ocr']['success'])
+        self.assertTrue(results['ui_analysis']['success'])
+        self.assertIsNone(results['image_path'])
+        self.assertIs(tesseract.image_to_data.call_args.args[0], frame.pixels)
+        self.assertIs(self.cv2.cvtColor.call_args.args[0], frame.pixels)
+        self.image_open.assert_not_called()
+        self.cv2.imread.assert_not_called()
+        self.assertFalse(os.path.exists(self.capture_dir))
+        self.assertIsNone(self.engine._persist_executor)
+
+    def test_persist_writes_in_background_only_when_enabled(self):
+        """persist=True returns before the PNG is written, from a copy of the frame."""
+        release = threading.Event()
+        writes = []
+
+        def save(image_pixels, path):
+            release.wait(5)
+            writes.append((threading.current_thread().name, image_pixels.copy(), str(path)))
+
+        def to_image(frame):
+            return mock.Mock(save=lambda path: save(frame.pixels, path))
+
+        expected = self.pixels.copy()
+        with mock.patch.object(ScreenFrame, 'to_image', autospec=True, side_effect=to_image):
+            self.engine.capture_screen()
+            self.assertFalse(os.path.exists(self.capture_dir))
+
+            capture = self.engine.capture_screen(persist=True)
+            # The caller's frame may be reused straight away
+            capture['frame'].pixels[:] = 0
+            self.assertEqual(writes, [])
+            release.set()
+            self.engine._persist_executor.shutdown(wait=True)
+
+        self.assertEqual(len(writes), 1)
+        thread_name, written, path = writes[0]
+        self.assertTrue(thread_name.startswith('capture-writer'))
+        self.assertTrue(np.array_equal(written, expected))
+        self.assertEqual(path, capture['filepath'])
+        self.assertTrue(os.path.isdir(self.capture_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+"""
+Tests for SecureStorage's row-level Merkle integrity tracking.
+"""
+
+import unittest
+import sys
+import os
+import json
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+try:
+    from backend.security.encryption import EncryptionManager
+    from backend.security.secure_storage import SecureStorage
+    SECURITY_AVAILABLE = True
+except ImportError:
+    SECURITY_AVAILABLE = False
+
+
+class FailingCommit:
+    """Connection wrapper whose commit fails, as on a full disk"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def commit(self):
+        raise sqlite3.OperationalError("database or disk is full")
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+@unittest.skipUnless(SECURITY_AVAILABLE, "security dependencies not available")
+class TestSecureStorageIntegrity(unittest.TestCase):
+    """Test cases for tamper detection, the dirty log and the anchor file."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'secure.db')
+        self.encryption = EncryptionManager()
+        self.encryption.set_key(EncryptionManager.generate_random_key())
+        self.storage = SecureStorage(self.db_path, self.encryption)
+
+        self.storage.set_setting('theme', {'mode': 'dark'})
+        self.storage.store_password('mail', 'alice', 'hunter2')
+        for i in range(5):
+            self.storage.store_conversation('c1', 'user', f'message {i}')
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.storage.close()
+        self.temp_dir.cleanup()
+
+    def tamper(self, *statements):
+        conn = sqlite3.connect(self.db_path)
+        for statement in statements:
+            conn.execute(statement)
+        conn.commit()
+        conn.close()
+
+    def test_writes_through_storage_stay_valid(self):
+        """Inserts, updates and deletes made by the class keep the tree in step."""
+        self.storage.set_setting('theme', {'mode': 'light'})
+        self.storage.delete_password('mail', 'alice')
+        self.storage.delete_conversation_history('c1')
+
+        result = self.storage.verify_integrity()
+
+        self.assertTrue(result["valid"], result)
+        self.assertTrue(self.storage._verify_database_integrity())
+
+    def changes(self, result):
+        return {(row["table"], row["row_id"], row["change"]) for row in result["tampered_rows"]}
+
+    def test_direct_edit_detected_from_dirty_log(self):
+        """The default check finds rows other connections wrote by reading only the dirty log."""
+        self.tamper("UPDATE conversation_history SET content = 'forged' WHERE id = 3",
+                    "DELETE FROM secure_settings")
+
+        with mock.patch.object(self.storage, '_scan_table_leaves', side_effect=AssertionError("full scan")):
+            result = self.storage.verify_integrity()
+
+        self.assertFalse(result["valid"])
+        self.assertEqual(result["checked_rows"], 2)
+        self.assertEqual(self.changes(result), {("conversation_history", 3, "modified"),
+                                                ("secure_settings", 1, "deleted")})
+
+    def test_external_edit_not_approved_by_later_write(self):
+        """A legitimate write doesn't fold rows another connection changed into the tree."""
+        self.tamper("UPDATE conversation_history SET content = 'forged' WHERE id = 3",
+                    "UPDATE password_entries SET password = 'forged'")
+
+        self.storage.set_setting('theme', {'mode': 'light'})
+        self.storage.store_password('mail', 'alice', 'rewritten')
+        self.storage.store_conversation('c1', 'user', 'one more')
+
+        for full in (False, True):
+            result = self.storage.verify_integrity(full=full)
+            self.assertFalse(result["valid"])
+            self.assertIn(("conversation_history", 3, "modified"), self.changes(result))
+            self.assertIn(("password_entries", 1, "deleted"), self.changes(result))
+        self.assertEqual(self.storage.get_setting('theme'), {'mode': 'light'})
+
+    def test_direct_edit_detected_after_clearing_dirty_log(self):
+        """A full check finds edits even when the dirty log was cleared to hide them."""
+        self.tamper("UPDATE conversation_history SET content = 'forged' WHERE id = 3",
+                    "DELETE FROM secure_settings",
+                    "DELETE FROM integrity_dirty")
+
+        self.assertTrue(self.storage.verify_integrity()["valid"])
+        result = self.storage.verify_integrity(full=True)
+
+        self.assertFalse(result["valid"])
+        self.assertEqual(self.changes(result), {("conversation_history", 3, "modified"),
+                                                ("secure_settings", 1, "deleted")})
+
+        # Startup runs the full check once full_integrity_interval has passed
+        with open(self.storage.integrity_file) as f:
+            anchor = json.load(f)
+        anchor["last_full_verified"] = (datetime.now() - timedelta(days=8)).isoformat()
+        with open(self.storage.integrity_file, 'w') as f:
+            json.dump(anchor, f)
+        self.storage.close()
+        reopened = SecureStorage(self.db_path, self.encryption)
+        try:
+            self.assertIsNone(reopened.last_integrity_check)
+        finally:
+            reopened.close()
+
+    def test_startup_check_is_incremental(self):
+        """Within full_integrity_interval, reopening the store hashes no unchanged rows."""
+        self.storage.close()
+        with mock.patch.object(SecureStorage, '_scan_table_leaves', side_effect=AssertionError("full scan")):
+            reopened = SecureStorage(self.db_path, self.encryption)
+        try:
+            self.assertIsNotNone(reopened.last_integrity_check)
+        finally:
+            reopened.close()
+
+    def test_rewritten_integrity_tables_mismatch_anchor(self):
+        """Rehashing integrity_rows to match forged data still disagrees with the anchor."""
+        self.tamper("UPDATE password_entries SET password = 'forged'",
+                    "DELETE FROM integrity_dirty")
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        leaves = self.storage._scan_table_leaves(conn, 'password_entries')
+        conn.executemany("UPDATE integrity_rows SET row_hash = ? WHERE table_name = 'password_entries' "
+                         "AND row_id = ?", [(row_hash, row_id) for row_id, row_hash in leaves.items()])
+        conn.commit()
+        conn.close()
+
+        result = self.storage.verify_integrity(full=True)
+
+        self.assertFalse(result["valid"])
+        self.assertIn("merkle_root_mismatch", result["issues"])
+
+    def test_rewritten_buckets_mismatch_anchor(self):
+        """Forged bucket nodes are caught by the default check."""
+        self.tamper("UPDATE integrity_buckets SET bucket_hash = 'forged' WHERE table_name = 'secure_settings'")
+
+        self.assertIn("merkle_root_mismatch", self.storage.verify_integrity()["issues"])
+
+    def test_anchor_not_advanced_by_failed_commit(self):
+        """A write whose commit fails leaves the anchor describing the old data."""
+        with open(self.storage.integrity_file) as f:
+            anchor = json.load(f)["merkle_root"]
+
+        self.storage._conn = FailingCommit(self.storage._conn)
+        with self.assertRaises(sqlite3.OperationalError):
+            self.storage.set_setting('theme', {'mode': 'light'})
+        self.storage._conn = self.storage._conn._conn
+
+        with open(self.storage.integrity_file) as f:
+            self.assertEqual(json.load(f)["merkle_root"], anchor)
+        self.assertEqual(self.storage.get_setting('theme'), {'mode': 'dark'})
+        self.assertTrue(self.storage.verify_integrity()["valid"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+Tests for the in-memory shortcut dispatch tables.
+"""
+
+import unittest
+import asyncio
+import sys
+import os
+import tempfile
+import gc
+import weakref
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from backend.features import shortcuts_manager
+from backend.features.shortcuts_manager import ShortcutManager
+
+
+class TestShortcutDispatch(unittest.TestCase):
+    """Test cases for chord sequences, conflicts and usage counting."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manager = ShortcutManager(config_dir=self.temp_dir.name,
+                                       db_path=os.path.join(self.temp_dir.name, 'shortcuts.db'))
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        asyncio.run(self.manager.close())
+        self.manager.db.close()
+        self.temp_dir.cleanup()
+
+    def run_async(self, coro_fn):
+        async def run():
+            await self.manager._load_shortcuts()
+            return await coro_fn()
+        return asyncio.run(run())
+
+    def test_context_falls_back_to_global(self):
+        """Context shortcuts win; anything else resolves through the global table."""
+        async def run():
+            return [(await self.manager.handle_shortcut(key, context))["action"]
+                    for key, context in [("Escape", "calculator"), ("escape", "browser"), ("ctrl + l", "music")]]
+
+        self.assertEqual(self.run_async(run), ["calculator_clear", "context_escape", "music_open_library"])
+
+    def test_chord_sequences(self):
+        """A sequence fires after its last chord, whether typed or passed whole."""
+        async def run():
+            added = await self.manager.add_custom_shortcut("Ctrl+Q Ctrl+S", "global", "save_all")
+            first = await self.manager.handle_shortcut("Ctrl+Q", "browser")
+            second = await self.manager.handle_shortcut("Ctrl+S", "browser")
+            whole = await self.manager.handle_shortcut("ctrl+q ctrl+s")
+            return added, first, second, whole
+
+        added, first, second, whole = self.run_async(run)
+
+        self.assertTrue(added)
+        self.assertEqual(first["status"], "pending")
+        self.assertEqual(second["action"], "save_all")
+        self.assertEqual(whole["action"], "save_all")
+
+    def test_chord_that_breaks_a_sequence_starts_over(self):
+        """A chord that doesn't continue the pending sequence is looked up on its own."""
+        async def run():
+            await self.manager.add_custom_shortcut("Ctrl+Q Ctrl+S", "global", "save_all")
+            await self.manager.handle_shortcut("Ctrl+Q")
+            result = await self.manager.handle_shortcut("Ctrl+Q")
+            await self.manager.handle_shortcut("Ctrl+S")
+            return result, dict(self.manager._usage_counts)
+
+        result, usage = self.run_async(run)
+
+        self.assertEqual(result["sequence"], "Ctrl+Q")
+        self.assertEqual(list(usage), [("Ctrl+Q Ctrl+S", "global", "save_all")])
+
+    def test_conflicts_detected_at_registration(self):
+        """Shared keys and shadowed sequences are rejected and reported."""
+        async def run():
+            shadowed = await self.manager.add_custom_shortcut("Ctrl+K Ctrl+S", "global", "save_all")
+            shared = await self.manager.add_custom_shortcut("Ctrl+T", "music", "music_shuffle")
+            return shadowed, shared, await self.manager.get_shortcut_conflicts()
+
+        shadowed, shared, conflicts = self.run_async(run)
+
+        self.assertFalse(shadowed)
+        self.assertFalse(shared)
+        self.assertEqual({c["action1"] for c in conflicts}, {"open_command_palette", "browser_new_tab"})
+
+    def test_usage_counted_in_memory(self):
+        """Keypresses are aggregated and written as one row per shortcut."""
+        async def run():
+            for _ in range(25):
+                await self.manager.handle_shortcut("F5", "browser")
+            pending = dict(self.manager._usage_counts)
+            return pending, await self.manager.get_usage_statistics()
+
+        pending, stats = self.run_async(run)
+
+        self.assertEqual(pending, {("F5", "browser", "browser_refresh"): 25})
+        self.assertEqual(stats["popular_shortcuts"][0]["usage_count"], 25)
+        self.assertEqual(stats["context_usage"], {"browser": 25})
+
+    def test_usage_written_on_close(self):
+        """Counts still waiting for the timed flush are written when the manager closes."""
+        async def run():
+            await self.manager.handle_shortcut("F5", "browser")
+            await self.manager.close()
+            return await self.manager.db.fetchall('SELECT shortcut_key, use_count FROM shortcut_usage')
+
+        self.assertEqual(self.run_async(run), [("F5", 1)])
+
+    def test_exit_hook_flushes_without_pinning_managers(self):
+        """The exit hook writes open managers' counts but holds them only weakly."""
+        async def run():
+            await self.manager.handle_shortcut("F5", "browser")
+        self.run_async(run)
+
+        shortcuts_manager._flush_open_managers()
+        written = asyncio.run(self.manager.db.fetchall('SELECT shortcut_key, use_count FROM shortcut_usage'))
+
+        other = ShortcutManager(config_dir=self.temp_dir.name,
+                                db_path=os.path.join(self.temp_dir.name, 'other.db'))
+        other.db.close()
+        ref = weakref.ref(other)
+        del other
+        gc.collect()
+
+        self.assertEqual(written, [("F5", 1)])
+        self.assertIsNone(ref())
+
+
+if __name__ == '__main__':
+    unittest.main()
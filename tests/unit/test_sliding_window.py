@@ -0,0 +1,90 @@
+"""
+Tests for the sliding-window conversation context.
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from backend import ai_integration
+from backend.ai_integration import SlidingWindowManager
+
+
+def count_words(text):
+    return len(text.split())
+
+
+class TestSlidingWindowManager(unittest.TestCase):
+    """Test cases for eviction, token budgets and token counting."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.window = SlidingWindowManager(max_context_tokens=10, token_counter=count_words)
+
+    def add(self, *contents):
+        for content in contents:
+            self.window.add_context(content)
+
+    def test_oldest_entries_evicted_first(self):
+        """Going over max_context_tokens drops entries from the old end only."""
+        self.add("alpha one two", "beta three four", "gamma five six", "delta seven eight")
+
+        self.assertEqual([e['content'] for e in self.window.context_history],
+                         ["beta three four", "gamma five six", "delta seven eight"])
+        self.assertEqual(self.window.total_tokens, 9)
+        self.assertEqual(self.window.get_relevant_context("alpha"), "")
+        self.assertNotIn("alpha", self.window._term_index)
+
+    def test_oversized_entry_evicts_everything(self):
+        """An entry larger than the whole budget leaves nothing behind it."""
+        self.add("alpha one", "a b c d e f g h i j k")
+
+        self.assertEqual(len(self.window.context_history), 0)
+        self.assertEqual(self.window.total_tokens, 0)
+
+    def test_window_stays_within_budget(self):
+        """The window is the newest run of entries that fits, oldest first."""
+        self.add("alpha one two", "beta three", "gamma four five")
+
+        self.assertEqual(self.window.get_context_window(max_tokens=5), "[user] beta three\n[user] gamma four five")
+        self.assertEqual(self.window.get_context_window(max_tokens=2), "")
+
+    def test_relevant_context_ranked_within_budget(self):
+        """More shared terms rank first, then recency; entries over budget are skipped."""
+        self.window.max_context_tokens = 20
+        self.add("python tips", "python generators guide", "cooking pasta", "python generators yield lazily")
+
+        context = self.window.get_relevant_context("python generators", max_tokens=6)
+
+        # The second-ranked entry would overrun the budget; the third still fits
+        self.assertEqual(context, "[user] python generators yield lazily\n[user] python tips")
+
+    def test_token_counts_without_tiktoken(self):
+        """Without tiktoken, or if its encoding fails to load, tokens are estimated at 4 characters each."""
+        with mock.patch.object(ai_integration, 'TIKTOKEN_AVAILABLE', False):
+            estimated = SlidingWindowManager()
+        broken = mock.Mock(get_encoding=mock.Mock(side_effect=OSError("no network")))
+        with mock.patch.object(ai_integration, 'TIKTOKEN_AVAILABLE', True), \
+                mock.patch.object(ai_integration, 'tiktoken', broken, create=True):
+            fallback = SlidingWindowManager()
+
+        for window in (estimated, fallback):
+            window.add_context("x" * 40)
+            self.assertEqual(window.total_tokens, 10)
+
+    def test_clear_context(self):
+        """Clearing resets the history, totals and term index."""
+        self.add("alpha one", "beta two")
+        self.window.clear_context()
+
+        stats = self.window.get_context_stats()
+        self.assertEqual((stats['total_entries'], stats['total_tokens']), (0, 0))
+        self.assertEqual(self.window.get_relevant_context("alpha"), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
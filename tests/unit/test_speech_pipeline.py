@@ -0,0 +1,103 @@
+"""
+Tests for the sentence-pipelined TTS with its audio cache.
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from voice.speech_pipeline import AudioCache, SentenceBuffer, SpeechPipeline, split_sentences
+
+
+class RecordingBackend:
+    """Backend double that writes the text as its audio and records playback"""
+
+    def __init__(self):
+        self.synthesized = []
+        self.played = []
+
+    def synthesize(self, text, path, voice=None, speed=1.0, volume=0.8):
+        self.synthesized.append(text)
+        with open(path, 'w') as f:
+            f.write(text)
+        return True
+
+    def play_file(self, path, volume=0.8):
+        with open(path) as f:
+            self.played.append(f.read())
+        return True
+
+    def speak(self, text, voice=None, speed=1.0, volume=0.8):
+        self.played.append(text)
+        return True
+
+    def stop(self):
+        pass
+
+
+class TestSpeechPipeline(unittest.TestCase):
+    """Test cases for sentence splitting, caching and ordered playback."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def test_streamed_text_splits_like_whole_text(self):
+        """Token-sized chunks produce the same sentences as the full response."""
+        text = ("Dr. Smith moved the meeting to 3.30 pm on Friday. Can you make it? "
+                "The agenda:\n- budget review\n- hiring plan\nThanks for checking, see you there.")
+        buffer = SentenceBuffer()
+        streamed = []
+        for i in range(0, len(text), 4):
+            streamed += buffer.feed(text[i:i + 4])
+        streamed += buffer.flush()
+
+        self.assertEqual(streamed, split_sentences(text))
+        self.assertEqual(streamed[0], "Dr. Smith moved the meeting to 3.30 pm on Friday.")
+        self.assertIn("- budget review", streamed)
+
+    def test_pipeline_speaks_in_order_and_caches(self):
+        """Sentences play in order; repeating a response skips synthesis."""
+        cache = AudioCache(self.temp_dir.name, 10 ** 6)
+        text = "The first sentence is here. The second one follows it. And a third to finish."
+
+        backend = RecordingBackend()
+        pipeline = SpeechPipeline(backend, cache)
+        pipeline.speak_all(word + " " for word in text.split(" "))
+        self.assertTrue(pipeline.wait(timeout=5))
+        self.assertEqual(backend.played, split_sentences(text))
+
+        again = RecordingBackend()
+        pipeline = SpeechPipeline(again, cache)
+        pipeline.speak_all([text])
+        pipeline.wait(timeout=5)
+        self.assertEqual(again.played, backend.played)
+        self.assertEqual(again.synthesized, [])
+
+    def test_cache_evicts_least_recently_used(self):
+        """The cache stays under its size limit, dropping the oldest entries."""
+        cache = AudioCache(self.temp_dir.name, 250)
+        for name in ["a", "b", "c"]:
+            path = cache.new_file()
+            with open(path, 'wb') as f:
+                f.write(b'0' * 100)
+            if name == "c":
+                cache.get("a")  # Touch "a" so "b" is the oldest
+            cache.put(name, path)
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ["a.wav", "c.wav"])
+
+
+if __name__ == '__main__':
+    unittest.main()
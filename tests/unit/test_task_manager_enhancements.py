@@ -3,13 +3,16 @@ Tests for enhanced task manager functionality.
 """
 
 import unittest
+import asyncio
 import sys
 import os
+import tempfile
 
 # Add project root to path for testing
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
 
 from core.task_manager import TaskManager, get_task_manager
+from backend.features.navigation_system import NavigationManager
 
 
 class TestTaskManagerEnhancements(unittest.TestCase):
@@ -83,5 +86,39 @@ class TestTaskManagerSingleton(unittest.TestCase):
         self.assertIs(tm1, tm2)
 
 
+class TestTaskSearchIndexing(unittest.TestCase):
+    """Test cases for keeping tasks in the navigation search index."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.search_index = NavigationManager(config_dir=self.temp_dir.name,
+                                              db_path=os.path.join(self.temp_dir.name, 'navigation.db'))
+        self.task_manager = TaskManager(search_index=self.search_index)
+        
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.search_index.db.close()
+        self.temp_dir.cleanup()
+        
+    def search(self, query):
+        async def run():
+            await self.search_index.db.run_write(lambda conn: None)  # Flush queued index writes
+            return await self.search_index.global_search(query)
+        return [(r["type"], r["title"]) for r in asyncio.run(run()) if r["type"] == "task"]
+        
+    def test_tasks_follow_add_update_and_remove(self):
+        """Added, renamed and removed tasks are reflected in global search."""
+        task_id = self.task_manager.add_task({'title': 'Quarterly tax filing', 'tags': ['finance']})
+        self.assertEqual(self.search("tax"), [("task", "Quarterly tax filing")])
+        
+        self.task_manager.update_task(task_id, {'title': 'Annual tax filing'})
+        self.assertEqual(self.search("annual"), [("task", "Annual tax filing")])
+        self.assertEqual(self.search("quarterly"), [])
+        
+        self.task_manager.remove_task(task_id)
+        self.assertEqual(self.search("tax"), [])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
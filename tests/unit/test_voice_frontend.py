@@ -0,0 +1,160 @@
+"""
+Tests for the wake-word front end: energy gate, keyword spotter and recognizer hand-off.
+"""
+
+import unittest
+import sys
+import os
+import math
+import random
+import array
+import json
+import tempfile
+import wave
+
+# Add project root to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from utils.voice_frontend import KeywordSpotter, StreamingRecognizer, VoiceFrontEnd
+from utils.voice_control import VoiceControlManager
+
+RATE = 16000
+WAKE = [600, 1200, 2400, 900]
+
+
+def tones(freqs, ms):
+    samples = []
+    for freq in freqs:
+        samples += [6000 * math.sin(2 * math.pi * freq * i / RATE) for i in range(RATE * ms // 1000)]
+    return samples
+
+
+def silence(ms):
+    return [0.0] * (RATE * ms // 1000)
+
+
+def pcm(samples, rng):
+    return array.array('h', [int(s + rng.gauss(0, 60)) for s in samples]).tobytes()
+
+
+class RecordingRecognizer(StreamingRecognizer):
+    """Recognizer double that 'hears' how many frames it was streamed"""
+
+    def __init__(self, text="open dashboard"):
+        self.text = text
+        self.frames = 0
+
+    def accept(self, frame):
+        self.frames += 1
+
+    def finish(self):
+        return self.text
+
+
+class TestVoiceFrontEnd(unittest.TestCase):
+    """Test cases for gating, spotting and streaming recognition."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.rng = random.Random(7)
+        self.spotter = KeywordSpotter(RATE)
+        self.spotter.enroll("computer", [pcm(tones(WAKE, ms), self.rng) for ms in (110, 120, 140)])
+        self.recognizers = []
+
+    def make_recognizer(self):
+        recognizer = RecordingRecognizer()
+        self.recognizers.append(recognizer)
+        return recognizer
+
+    def test_silence_never_reaches_spotter_or_recognizer(self):
+        """Background noise is stopped at the energy gate."""
+        front_end = VoiceFrontEnd(self.make_recognizer, RATE, spotter=self.spotter)
+        events = front_end.run(pcm(silence(5000), self.rng))
+
+        self.assertEqual(events, [])
+        self.assertEqual(front_end.stats.spotter_frames, 0)
+        self.assertEqual(self.recognizers, [])
+
+    def test_wake_word_starts_streaming_recognition(self):
+        """Only the speech after the wake word is streamed to the recognizer."""
+        audio = (silence(1000) + tones([700, 1500, 3000, 400], 150) + silence(1000)
+                 + tones(WAKE, 125) + silence(300) + tones([1800, 500], 300) + silence(1500))
+        front_end = VoiceFrontEnd(self.make_recognizer, RATE, spotter=self.spotter)
+        events = front_end.run(pcm(audio, self.rng))
+
+        self.assertEqual([(e.kind, e.text) for e in events], [("wake", "computer"), ("command", "open dashboard")])
+        self.assertLess(events[0].time, 3.2)  # The wake word ends at 3.1s
+        self.assertEqual(len(self.recognizers), 1)
+        self.assertEqual(self.recognizers[0].frames, round((events[1].time - events[0].time) * 50))
+
+    def test_transcript_check_without_enrolled_wake_word(self):
+        """With nothing enrolled, whole utterances are recognized and must name a wake word."""
+        audio = pcm(silence(500) + tones([800, 1600], 300) + silence(1500), self.rng)
+
+        ignored = VoiceFrontEnd(self.make_recognizer, RATE, wake_words=["computer"])
+        accepted = VoiceFrontEnd(lambda: RecordingRecognizer("computer open dashboard"), RATE,
+                                 wake_words=["computer"])
+
+        self.assertEqual(ignored.run(audio), [])
+        self.assertEqual([e.kind for e in accepted.run(audio)], ["wake", "command"])
+
+    def test_saved_spotter_hears_wake_word(self):
+        """A spotter rebuilt from to_dict() detects the wake word like the original."""
+        restored = KeywordSpotter.from_dict(json.loads(json.dumps(self.spotter.to_dict())))
+        audio = pcm(silence(500) + tones(WAKE, 125) + silence(1500), self.rng)
+
+        events = VoiceFrontEnd(self.make_recognizer, RATE, spotter=restored).run(audio)
+
+        self.assertEqual(restored.keywords["computer"]["threshold"], self.spotter.keywords["computer"]["threshold"])
+        self.assertEqual([(e.kind, e.text) for e in events][:1], [("wake", "computer")])
+
+
+class TestWakeWordEnrollment(unittest.TestCase):
+    """Test cases for saving enrolled wake words across VoiceControlManager instances."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.templates_file = os.path.join(self.temp_dir.name, 'voice', 'wake_words.json')
+        rng = random.Random(11)
+        self.clips = []
+        for ms in (110, 120, 140):
+            path = os.path.join(self.temp_dir.name, f'clip{ms}.wav')
+            with wave.open(path, 'wb') as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(RATE)
+                f.writeframes(pcm(silence(200) + tones(WAKE, ms) + silence(200), rng))
+            self.clips.append(path)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def test_enrolled_wake_word_loaded_by_next_session(self):
+        """Templates saved by enroll_wake_word give a new manager its spotter."""
+        first = VoiceControlManager(templates_file=self.templates_file)
+        self.assertIsNone(first.keyword_spotter)
+        self.assertTrue(first.enroll_wake_word("Jarvis", self.clips))
+        self.assertTrue(os.path.exists(self.templates_file))
+
+        second = VoiceControlManager(templates_file=self.templates_file)
+
+        self.assertTrue(second.get_status()["wake_word_spotter"])
+        self.assertIn("jarvis", second.wake_words)
+        self.assertIs(second._create_front_end(RATE).spotter, second.keyword_spotter)
+
+    def test_unreadable_templates_fall_back_to_transcripts(self):
+        """A corrupt templates file leaves the manager on transcript wake-word checks."""
+        os.makedirs(os.path.dirname(self.templates_file))
+        with open(self.templates_file, 'w') as f:
+            f.write('{not json')
+
+        manager = VoiceControlManager(templates_file=self.templates_file)
+
+        self.assertIsNone(manager.keyword_spotter)
+        self.assertIsNone(manager._create_front_end(RATE).spotter)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,16 +3,27 @@ API Gateway for Westfall Personal Assistant
 Provides centralized API management, rate limiting, and security
 """
 
+import asyncio
 import time
 import threading
 import hashlib
 import hmac
 import json
-from typing import Dict, List, Optional, Any, Callable
+from functools import partial
+from typing import Dict, List, Optional, Any, Callable, Awaitable
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from collections import defaultdict
 import uuid
+import weakref
+
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+# event loop -> gateway -> service -> Semaphore. asyncio semaphores are bound
+# to one loop, so every loop gets its own set.
+_loop_semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_loop_semaphores_lock = threading.Lock()
 
 
 @dataclass
@@ -44,85 +55,139 @@ class APIRequest:
     api_key_id: Optional[str]
 
 
+class RateLimitExceeded(Exception):
+    """Raised when a request would exceed its rate limit"""
+    pass
+
+
+class CircuitBreakerOpenError(Exception):
+    """Raised when a circuit breaker rejects a call"""
+    pass
+
+
 class RateLimiter:
-    """Rate limiting implementation"""
+    """Token-bucket rate limiting
+    
+    Each key keeps just a token count and a refill timestamp, so memory is
+    constant per key whatever the limit. A bucket holds up to ``limit``
+    tokens and refills at ``limit / window_seconds`` tokens per second.
+    """
     
     def __init__(self):
-        self.request_counts = defaultdict(lambda: deque())
-        self.lock = threading.RLock()
-        
-    def is_allowed(self, key: str, limit: int, window_seconds: int = 3600) -> bool:
+        self.buckets: Dict[str, List[float]] = {}  # key -> [tokens, last_refill]
+        self.lock = threading.Lock()
+        
+    def _refill(self, key: str, limit: int, window_seconds: int, now: float) -> List[float]:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [float(limit), now]
+        else:
+            bucket[0] = min(float(limit), bucket[0] + (now - bucket[1]) * limit / window_seconds)
+            bucket[1] = now
+        return bucket
+        
+    def is_allowed(self, key: str, limit: int, window_seconds: int = 3600, cost: float = 1.0) -> bool:
         """Check if request is allowed based on rate limit"""
         with self.lock:
-            current_time = time.time()
-            window_start = current_time - window_seconds
-            
-            # Clean old requests
-            while (self.request_counts[key] and 
-                   self.request_counts[key][0] < window_start):
-                self.request_counts[key].popleft()
-                
-            # Check if limit exceeded
-            if len(self.request_counts[key]) >= limit:
+            bucket = self._refill(key, limit, window_seconds, time.monotonic())
+            if bucket[0] < cost:
                 return False
-                
-            # Add current request
-            self.request_counts[key].append(current_time)
+            bucket[0] -= cost
             return True
             
     def get_remaining_requests(self, key: str, limit: int, window_seconds: int = 3600) -> int:
         """Get remaining requests in current window"""
         with self.lock:
-            current_time = time.time()
-            window_start = current_time - window_seconds
+            return int(self._refill(key, limit, window_seconds, time.monotonic())[0])
             
-            # Clean old requests
-            while (self.request_counts[key] and 
-                   self.request_counts[key][0] < window_start):
-                self.request_counts[key].popleft()
-                
-            return max(0, limit - len(self.request_counts[key]))
+    def time_until_allowed(self, key: str, limit: int, window_seconds: int = 3600, cost: float = 1.0) -> float:
+        """Seconds until a request of ``cost`` would be allowed"""
+        with self.lock:
+            tokens = self._refill(key, limit, window_seconds, time.monotonic())[0]
+            return max(0.0, (cost - tokens) * window_seconds / limit)
 
 
 class CircuitBreaker:
-    """Circuit breaker pattern implementation"""
+    """Circuit breaker pattern implementation
+    
+    The lock only guards state transitions; the protected call runs outside
+    it, so concurrent calls through a closed breaker proceed in parallel.
+    While HALF_OPEN at most ``half_open_max_calls`` probe calls are let
+    through at a time.
+    """
     
-    def __init__(self, failure_threshold: int = 5, timeout_seconds: int = 60):
+    def __init__(self, failure_threshold: int = 5, timeout_seconds: int = 60,
+                 half_open_max_calls: int = 1):
         self.failure_threshold = failure_threshold
         self.timeout_seconds = timeout_seconds
+        self.half_open_max_calls = half_open_max_calls
         self.failure_count = 0
         self.last_failure_time = None
         self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
-        self.lock = threading.RLock()
+        self.half_open_calls = 0
+        self.lock = threading.Lock()
         
-    def call(self, func: Callable, *args, **kwargs):
-        """Execute function with circuit breaker protection"""
+    def _before_call(self) -> bool:
+        """Admit or reject a call; returns True if it is a half-open probe"""
+        # Fast path: a plain attribute read, no lock while closed
+        if self.state == "CLOSED":
+            return False
+            
         with self.lock:
             if self.state == "OPEN":
                 if (self.last_failure_time and 
                     time.time() - self.last_failure_time > self.timeout_seconds):
                     self.state = "HALF_OPEN"
+                    self.half_open_calls = 0
                 else:
-                    raise Exception("Circuit breaker is OPEN")
+                    raise CircuitBreakerOpenError("Circuit breaker is OPEN")
                     
-            try:
-                result = func(*args, **kwargs)
+            if self.state == "HALF_OPEN":
+                if self.half_open_calls >= self.half_open_max_calls:
+                    raise CircuitBreakerOpenError("Circuit breaker is HALF_OPEN and probing")
+                self.half_open_calls += 1
+                return True
                 
+            return False
+            
+    def _on_success(self, probe: bool):
+        if probe:
+            with self.lock:
                 # Success - reset circuit breaker
-                if self.state == "HALF_OPEN":
-                    self.state = "CLOSED"
-                    self.failure_count = 0
-                    
-                return result
+                self.state = "CLOSED"
+                self.failure_count = 0
+                self.half_open_calls = 0
                 
-            except Exception as e:
-                self.failure_count += 1
-                self.last_failure_time = time.time()
+    def _on_failure(self, probe: bool):
+        with self.lock:
+            self.failure_count += 1
+            self.last_failure_time = time.time()
+            
+            if probe or self.failure_count >= self.failure_threshold:
+                self.state = "OPEN"
+                self.half_open_calls = 0
                 
-                if self.failure_count >= self.failure_threshold:
-                    self.state = "OPEN"
-                    
-                raise e
+    def call(self, func: Callable, *args, **kwargs):
+        """Execute function with circuit breaker protection"""
+        probe = self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self._on_failure(probe)
+            raise
+        self._on_success(probe)
+        return result
+        
+    async def call_async(self, func: Callable[..., Awaitable], *args, **kwargs):
+        """Await a coroutine function with circuit breaker protection"""
+        probe = self._before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            self._on_failure(probe)
+            raise
+        self._on_success(probe)
+        return result
 
 
 class APIGateway:
@@ -136,6 +201,8 @@ class APIGateway:
         self.service_health = {}
         self.request_transformers = {}
         self.response_transformers = {}
+        self.concurrency_limits = {}
+        self._history_lock = threading.Lock()
         
         # Default service configurations
         self.service_configs = {
@@ -144,6 +211,7 @@ class APIGateway:
                 "rate_limit": 3000,  # requests per hour
                 "timeout": 30,
                 "retry_attempts": 3,
+                "max_concurrency": 8,
                 "circuit_breaker": {"failure_threshold": 5, "timeout": 300}
             },
             "weather": {
@@ -151,6 +219,7 @@ class APIGateway:
                 "rate_limit": 1000,
                 "timeout": 10,
                 "retry_attempts": 2,
+                "max_concurrency": 4,
                 "circuit_breaker": {"failure_threshold": 3, "timeout": 120}
             },
             "news": {
@@ -158,6 +227,7 @@ class APIGateway:
                 "rate_limit": 500,
                 "timeout": 15,
                 "retry_attempts": 2,
+                "max_concurrency": 4,
                 "circuit_breaker": {"failure_threshold": 3, "timeout": 120}
             },
             "email": {
@@ -165,6 +235,7 @@ class APIGateway:
                 "rate_limit": 100,
                 "timeout": 30,
                 "retry_attempts": 1,
+                "max_concurrency": 2,
                 "circuit_breaker": {"failure_threshold": 2, "timeout": 180}
             }
         }
@@ -174,7 +245,11 @@ class APIGateway:
             cb_config = config.get("circuit_breaker", {})
             self.circuit_breakers[service] = CircuitBreaker(
                 failure_threshold=cb_config.get("failure_threshold", 5),
-                timeout_seconds=cb_config.get("timeout", 60)
+                timeout_seconds=cb_config.get("timeout", 60),
+                half_open_max_calls=cb_config.get("half_open_max_calls", 1)
+            )
+            self.concurrency_limits[service] = threading.BoundedSemaphore(
+                config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
             )
             
         self._init_default_api_keys()
@@ -252,6 +327,66 @@ class APIGateway:
         self.api_keys[key_id].is_active = False
         return True
         
+    def _admit_request(self, service: str, api_key_id: Optional[str]) -> Optional[APIKey]:
+        """Validate the service and key and take a rate-limit token"""
+        # Validate service
+        if service not in self.service_configs:
+            raise ValueError(f"Unknown service: {service}")
+            
+        # Get API key
+        api_key = None
+        if api_key_id:
+            api_key = self.api_keys.get(api_key_id)
+            if not api_key or not api_key.is_active:
+                raise ValueError("Invalid or inactive API key")
+                
+        # Check rate limits
+        rate_limit_key = f"{service}:{api_key_id}" if api_key_id else service
+        service_config = self.service_configs[service]
+        rate_limit = api_key.rate_limit if api_key else service_config["rate_limit"]
+        
+        if not self.rate_limiter.is_allowed(rate_limit_key, rate_limit):
+            raise RateLimitExceeded("Rate limit exceeded")
+            
+        return api_key
+        
+    def _complete_request(self, request_id: str, service: str, endpoint: str, method: str,
+                          start_time: float, api_key: Optional[APIKey], api_key_id: Optional[str],
+                          response: Any = None, error: Optional[Exception] = None) -> Dict[str, Any]:
+        """Update usage, log the request and build the gateway response"""
+        if error is not None:
+            # Log failed request
+            self._log_request(
+                request_id, service, endpoint, method,
+                time.time() - start_time, 500, str(error), api_key_id
+            )
+            
+            return {
+                "success": False,
+                "error": str(error),
+                "request_id": request_id,
+                "service": service
+            }
+            
+        # Update API key usage
+        if api_key:
+            with self._history_lock:
+                api_key.last_used = datetime.now()
+                api_key.usage_count += 1
+                
+        # Log successful request
+        self._log_request(
+            request_id, service, endpoint, method,
+            time.time() - start_time, 200, None, api_key_id
+        )
+        
+        return {
+            "success": True,
+            "data": response,
+            "request_id": request_id,
+            "service": service
+        }
+        
     def make_request(self, service: str, endpoint: str, method: str = "GET",
                     data: Any = None, headers: Dict[str, str] = None,
                     api_key_id: str = None, **kwargs) -> Dict[str, Any]:
@@ -259,72 +394,108 @@ class APIGateway:
         
         request_id = str(uuid.uuid4())
         start_time = time.time()
+        api_key = None
         
         try:
-            # Validate service
-            if service not in self.service_configs:
-                raise ValueError(f"Unknown service: {service}")
-                
-            # Get API key
-            api_key = None
-            if api_key_id:
-                api_key = self.api_keys.get(api_key_id)
-                if not api_key or not api_key.is_active:
-                    raise ValueError("Invalid or inactive API key")
-                    
-            # Check rate limits
-            rate_limit_key = f"{service}:{api_key_id}" if api_key_id else service
-            service_config = self.service_configs[service]
-            rate_limit = api_key.rate_limit if api_key else service_config["rate_limit"]
-            
-            if not self.rate_limiter.is_allowed(rate_limit_key, rate_limit):
-                raise Exception("Rate limit exceeded")
+            api_key = self._admit_request(service, api_key_id)
                 
             # Transform request if transformer exists
             if service in self.request_transformers:
                 data = self.request_transformers[service](data, **kwargs)
                 
-            # Make request through circuit breaker
-            def _make_actual_request():
-                return self._execute_request(service, endpoint, method, data, headers, **kwargs)
+            # Bound in-flight calls per service; wait at most the service timeout
+            semaphore = self.concurrency_limits[service]
+            if not semaphore.acquire(timeout=self.service_configs[service]["timeout"]):
+                raise Exception("Too many concurrent requests")
+                
+            try:
+                # Make request through circuit breaker
+                response = self.circuit_breakers[service].call(
+                    self._execute_request, service, endpoint, method, data, headers, **kwargs
+                )
+            finally:
+                semaphore.release()
                 
-            response = self.circuit_breakers[service].call(_make_actual_request)
-            
             # Transform response if transformer exists
             if service in self.response_transformers:
                 response = self.response_transformers[service](response)
                 
-            # Update API key usage
-            if api_key:
-                api_key.last_used = datetime.now()
-                api_key.usage_count += 1
-                
-            # Log successful request
-            self._log_request(
-                request_id, service, endpoint, method,
-                time.time() - start_time, 200, None, api_key_id
-            )
+        except Exception as e:
+            return self._complete_request(request_id, service, endpoint, method, start_time,
+                                          api_key, api_key_id, error=e)
             
-            return {
-                "success": True,
-                "data": response,
-                "request_id": request_id,
-                "service": service
-            }
+        return self._complete_request(request_id, service, endpoint, method, start_time,
+                                      api_key, api_key_id, response=response)
+            
+    async def make_request_async(self, service: str, endpoint: str, method: str = "GET",
+                                 data: Any = None, headers: Dict[str, str] = None,
+                                 api_key_id: str = None, **kwargs) -> Dict[str, Any]:
+        """Async variant of make_request for the FastAPI backend
+        
+        Uses per-event-loop semaphores and the same rate limiter and circuit
+        breakers, so sync and async callers share limits.
+        """
+        request_id = str(uuid.uuid4())
+        start_time = time.time()
+        api_key = None
+        
+        try:
+            api_key = self._admit_request(service, api_key_id)
             
+            # Transform request if transformer exists
+            if service in self.request_transformers:
+                data = self.request_transformers[service](data, **kwargs)
+                
+            semaphore = self._get_async_semaphore(service)
+            timeout = self.service_configs[service]["timeout"]
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout)
+            except asyncio.TimeoutError:
+                raise Exception("Too many concurrent requests")
+                
+            try:
+                response = await self.circuit_breakers[service].call_async(
+                    self._execute_request_async, service, endpoint, method, data, headers, **kwargs
+                )
+            finally:
+                semaphore.release()
+                
+            # Transform response if transformer exists
+            if service in self.response_transformers:
+                response = self.response_transformers[service](response)
+                
         except Exception as e:
-            # Log failed request
-            self._log_request(
-                request_id, service, endpoint, method,
-                time.time() - start_time, 500, str(e), api_key_id
-            )
+            return self._complete_request(request_id, service, endpoint, method, start_time,
+                                          api_key, api_key_id, error=e)
             
-            return {
-                "success": False,
-                "error": str(e),
-                "request_id": request_id,
-                "service": service
-            }
+        return self._complete_request(request_id, service, endpoint, method, start_time,
+                                      api_key, api_key_id, response=response)
+            
+    def _get_async_semaphore(self, service: str) -> asyncio.Semaphore:
+        """asyncio semaphores are bound to one loop, so each loop carries its own
+        
+        A contended semaphore references its loop, which keeps that loop's
+        entry alive; entries for closed loops are dropped on the next lookup.
+        """
+        loop = asyncio.get_running_loop()
+        with _loop_semaphores_lock:
+            for closed in [l for l in _loop_semaphores if l.is_closed()]:
+                del _loop_semaphores[closed]
+            per_gateway = _loop_semaphores.setdefault(loop, weakref.WeakKeyDictionary())
+            semaphores = per_gateway.setdefault(self, {})
+            semaphore = semaphores.get(service)
+            if semaphore is None:
+                limit = self.service_configs[service].get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+                semaphore = semaphores[service] = asyncio.Semaphore(limit)
+        return semaphore
+        
+    async def _execute_request_async(self, service: str, endpoint: str, method: str,
+                                     data: Any, headers: Dict[str, str], **kwargs) -> Any:
+        """Execute the actual API request without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, partial(self._execute_request, service, endpoint, method, data, headers, **kwargs)
+        )
             
     def _execute_request(self, service: str, endpoint: str, method: str,
                         data: Any, headers: Dict[str, str], **kwargs) -> Any:
@@ -399,11 +570,12 @@ class APIGateway:
             api_key_id=api_key_id
         )
         
-        self.request_history.append(request_log)
-        
-        # Keep only last 1000 requests to prevent memory issues
-        if len(self.request_history) > 1000:
-            self.request_history = self.request_history[-1000:]
+        with self._history_lock:
+            self.request_history.append(request_log)
+            
+            # Keep only last 1000 requests to prevent memory issues
+            if len(self.request_history) > 1000:
+                self.request_history = self.request_history[-1000:]
             
     def add_request_transformer(self, service: str, transformer: Callable):
         """Add request transformer for a service"""
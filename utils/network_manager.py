@@ -3,21 +3,24 @@ WestfallPersonalAssistant Network Manager
 Handles network requests with proper error handling and timeouts
 """
 
-import requests
 from requests.exceptions import Timeout, ConnectionError, RequestException
 import json
 import logging
+from concurrent.futures import wait as wait_futures
 from PyQt5.QtWidgets import QMessageBox
-from PyQt5.QtCore import QObject, pyqtSignal, QThread
+from PyQt5.QtCore import QObject, pyqtSignal
 from utils.error_handler import get_error_handler
+from backend.utils.http_client import get_http_client
 
-class NetworkRequest(QThread):
-    """Thread for network requests with proper error handling"""
+class NetworkRequest(QObject):
+    """Network request run on the shared HTTP worker pool with proper error handling"""
     
     # Signals
     request_completed = pyqtSignal(bool, object, str)
     progress_signal = pyqtSignal(int)
     
+    SUPPORTED_METHODS = ('get', 'post', 'put', 'delete', 'patch')
+    
     def __init__(self, url, method='get', params=None, data=None, json_data=None, 
                 timeout=10, headers=None, max_retries=3, stream=False):
         super().__init__()
@@ -31,110 +34,75 @@ class NetworkRequest(QThread):
         self.max_retries = max_retries
         self.stream = stream
         self.abort_flag = False
+        self._future = None
+    
+    def start(self):
+        """Queue the request on the shared pool instead of spawning a thread"""
+        self._future = get_http_client().submit_task(self.run)
+    
+    def isRunning(self):
+        return self._future is not None and not self._future.done()
+    
+    def wait(self, msecs=None):
+        """Block until the request finishes; returns False on timeout"""
+        if self._future is None:
+            return True
+        done, _ = wait_futures([self._future], timeout=None if msecs is None else msecs / 1000)
+        return bool(done)
     
     def run(self):
         """Execute the request"""
-        retries = 0
+        if self.method not in self.SUPPORTED_METHODS:
+            self.request_completed.emit(False, None, f"Unsupported method: {self.method}")
+            return
+        if self.abort_flag:
+            return
         
-        while retries < self.max_retries and not self.abort_flag:
-            try:
-                # Select method
-                if self.method == 'get':
-                    response = requests.get(
-                        self.url, 
-                        params=self.params, 
-                        timeout=self.timeout,
-                        headers=self.headers,
-                        stream=self.stream
-                    )
-                elif self.method == 'post':
-                    response = requests.post(
-                        self.url, 
-                        params=self.params,
-                        data=self.data,
-                        json=self.json_data,
-                        timeout=self.timeout,
-                        headers=self.headers
-                    )
-                elif self.method == 'put':
-                    response = requests.put(
-                        self.url, 
-                        params=self.params,
-                        data=self.data,
-                        json=self.json_data,
-                        timeout=self.timeout,
-                        headers=self.headers
-                    )
-                elif self.method == 'delete':
-                    response = requests.delete(
-                        self.url, 
-                        params=self.params,
-                        timeout=self.timeout,
-                        headers=self.headers
-                    )
-                elif self.method == 'patch':
-                    response = requests.patch(
-                        self.url, 
-                        params=self.params,
-                        data=self.data,
-                        json=self.json_data,
-                        timeout=self.timeout,
-                        headers=self.headers
-                    )
-                else:
-                    self.request_completed.emit(False, None, f"Unsupported method: {self.method}")
-                    return
-                
-                # Check if streaming response for large content
-                if self.stream and response.status_code // 100 == 2:
-                    # For streaming content like file downloads
-                    self.request_completed.emit(True, response, "")
-                    return
-                
-                # Check if successful
-                if response.status_code // 100 == 2:  # 2xx status code
-                    self.request_completed.emit(True, response, "")
-                else:
-                    # Retry server errors (5xx) but not client errors (4xx)
-                    if response.status_code // 100 == 5 and retries < self.max_retries - 1:
-                        retries += 1
-                        continue
-                    
-                    self.request_completed.emit(
-                        False, 
-                        response, 
-                        f"Server returned error: {response.status_code} - {response.reason}"
-                    )
-                
-                return
-                    
-            except Timeout:
-                if retries < self.max_retries - 1:
-                    retries += 1
-                    continue
-                self.request_completed.emit(False, None, "Request timed out")
-            except ConnectionError:
-                if retries < self.max_retries - 1:
-                    retries += 1
-                    continue
-                self.request_completed.emit(False, None, "Connection error")
-            except RequestException as e:
-                if retries < self.max_retries - 1:
-                    retries += 1
-                    continue
-                self.request_completed.emit(False, None, str(e))
-            except Exception as e:
-                self.request_completed.emit(False, None, f"Unexpected error: {str(e)}")
-            
-            # If we get here, an error occurred
-            if retries < self.max_retries - 1:
-                retries += 1
+        client = get_http_client()
+        kwargs = {'params': self.params, 'timeout': self.timeout, 'headers': self.headers}
+        if self.method in ('post', 'put', 'patch'):
+            kwargs.update(data=self.data, json=self.json_data)
+        
+        try:
+            # max_retries counts attempts here; the client retries 5xx, 429,
+            # timeouts and connection errors with jittered backoff
+            attempts = max(self.max_retries, 1)
+            if self.method == 'get':
+                response = client.get(self.url, stream=self.stream, max_retries=attempts - 1, **kwargs)
             else:
-                break
+                response = client.request(self.method, self.url, max_retries=attempts - 1, **kwargs)
+        except Timeout:
+            response, error = None, "Request timed out"
+        except ConnectionError:
+            response, error = None, "Connection error"
+        except RequestException as e:
+            response, error = None, str(e)
+        except Exception as e:
+            response, error = None, f"Unexpected error: {str(e)}"
+        else:
+            error = None
+        
+        if self.abort_flag:
+            if response is not None:
+                response.close()
+            return
+        
+        if response is None:
+            self.request_completed.emit(False, None, error)
+        elif response.status_code // 100 == 2:  # 2xx status code
+            self.request_completed.emit(True, response, "")
+        else:
+            self.request_completed.emit(
+                False, 
+                response, 
+                f"Server returned error: {response.status_code} - {response.reason}"
+            )
     
     def abort(self):
         """Abort the network request"""
         self.abort_flag = True
+        if self._future is not None:
+            self._future.cancel()
 
 class NetworkManager(QObject):
     """Manager for network operations with proper error handling"""
@@ -3,12 +3,29 @@ Voice Control System for Westfall Personal Assistant
 Provides speech recognition, wake word detection, and voice feedback capabilities
 """
 
+import itertools
+import json
+import os
 import threading
 import time
 import queue
+from pathlib import Path
 from typing import Dict, List, Callable, Optional, Any
 from dataclasses import dataclass
 
+from config.settings import get_settings
+from utils.voice_frontend import (
+    BufferedRecognizer, KeywordSpotter, VoiceFrontEnd, VoskStreamingRecognizer,
+    VOSK_AVAILABLE, read_wav
+)
+
+
+# Relative wake word template paths are resolved against the project root
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Queued spoken feedback is said in this order, oldest first within a priority
+SPEECH_PRIORITIES = {"urgent": 0, "high": 1, "normal": 2, "low": 3}
+
 
 @dataclass
 class VoiceCommand:
@@ -22,14 +39,33 @@ class VoiceCommand:
 class VoiceControlManager:
     """Manages voice control functionality with graceful fallbacks"""
     
-    def __init__(self):
+    def __init__(self, templates_file: Optional[str] = None):
+        voice_settings = get_settings().voice
         self.enabled = False
         self.listening = False
         self.wake_words = ["hey assistant", "computer", "westfall"]
+        configured = voice_settings.wake_word.lower() if voice_settings.wake_word_enabled else ""
+        if configured and configured not in self.wake_words:
+            self.wake_words.append(configured)
         self.command_queue = queue.Queue()
         self.listeners = []
         self.voice_profiles = {}
         
+        # Wake words heard by a local spotter once examples are enrolled;
+        # enrollments are saved so later sessions start with the spotter
+        self.keyword_spotter = None
+        self.front_end = None
+        self.templates_file = Path(templates_file or voice_settings.wake_word_templates_file)
+        if not self.templates_file.is_absolute():
+            self.templates_file = PROJECT_ROOT / self.templates_file
+        self._load_wake_words()
+        
+        # Spoken feedback is queued for a single speaker thread
+        self.speech_queue = queue.PriorityQueue()
+        self._speech_sequence = itertools.count()
+        self._speech_thread = None
+        self._speech_lock = threading.Lock()
+        
         # Voice settings
         self.settings = {
             "wake_word_enabled": True,
@@ -37,7 +73,8 @@ class VoiceControlManager:
             "voice_feedback": True,
             "noise_threshold": 0.5,
             "confidence_threshold": 0.7,
-            "language": "en-US"
+            "language": "en-US",
+            "vosk_model_path": None  # Local streaming recognizer, used when vosk is installed
         }
         
         # Initialize voice engines with fallbacks
@@ -120,39 +157,114 @@ class VoiceControlManager:
         self.listening = False
         
     def _listen_loop(self):
-        """Main listening loop running in background thread"""
+        """Main listening loop running in background thread
+
+        Reads the microphone in short frames through the wake-word front end,
+        so silence costs next to nothing and only speech after the wake word
+        reaches the recognizer.
+        """
         while self.listening and self.sr_available:
             try:
                 with self.microphone as source:
-                    # Listen for audio with timeout
-                    audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=5)
-                    
-                try:
-                    # Recognize speech
-                    text = self.recognizer.recognize_google(audio).lower()
-                    confidence = 0.8  # Google API doesn't provide confidence directly
-                    
-                    # Check for wake words or process command
-                    if self._contains_wake_word(text) or not self.settings["wake_word_enabled"]:
-                        command = VoiceCommand(
-                            command=text,
-                            confidence=confidence,
-                            timestamp=time.time(),
-                            context=self._get_current_context()
-                        )
-                        
-                        self.command_queue.put(command)
-                        self._notify_listeners(command)
-                        
-                except Exception as e:
-                    # Recognition failed - continue listening
-                    continue
+                    self.front_end = self._create_front_end(source.SAMPLE_RATE)
+                    frame_samples = self.front_end.frame_samples
                     
+                    while self.listening:
+                        frame = source.stream.read(frame_samples)
+                        for event in self.front_end.process(frame):
+                            if event.kind == "command":
+                                self._handle_command_text(event.text)
+                                
             except Exception as e:
-                # Timeout or other error - continue listening
+                # Microphone error - reopen and continue listening
                 time.sleep(0.1)
                 continue
                 
+    def _create_front_end(self, sample_rate: int) -> VoiceFrontEnd:
+        """Build the front end for the current settings and microphone rate"""
+        model_path = self.settings.get("vosk_model_path")
+        if VOSK_AVAILABLE and model_path:
+            def recognizer_factory():
+                return VoskStreamingRecognizer(model_path, sample_rate)
+        else:
+            def recognizer_factory():
+                return BufferedRecognizer(self._recognize_audio, sample_rate)
+                
+        wake_word_enabled = self.settings["wake_word_enabled"]
+        spotter = None
+        if wake_word_enabled and self.keyword_spotter:
+            spotter = self.keyword_spotter.for_rate(sample_rate)
+            
+        return VoiceFrontEnd(
+            recognizer_factory,
+            sample_rate,
+            spotter=spotter,
+            wake_words=self.wake_words if wake_word_enabled else ()
+        )
+        
+    def _recognize_audio(self, pcm: bytes, sample_rate: int) -> str:
+        """Recognize a finished command with the online recognizer"""
+        import speech_recognition as sr
+        return self.recognizer.recognize_google(sr.AudioData(pcm, sample_rate, 2)).lower()
+        
+    def _handle_command_text(self, text: str):
+        """Queue a recognized command and tell listeners about it"""
+        command = VoiceCommand(
+            command=text,
+            confidence=0.8,  # Google API doesn't provide confidence directly
+            timestamp=time.time(),
+            context=self._get_current_context()
+        )
+        
+        self.command_queue.put(command)
+        self._notify_listeners(command)
+        
+    def enroll_wake_word(self, wake_word: str, wav_paths: List[str]) -> bool:
+        """Teach the local spotter a wake word from recordings of it being said
+
+        Three to five 16-bit WAV clips work well. Until a wake word is
+        enrolled, utterances are recognized and checked for wake words in text.
+        The templates are saved and loaded again by later sessions.
+        """
+        try:
+            examples = [read_wav(path) for path in wav_paths]
+            sample_rate = examples[0][1]
+            if any(rate != sample_rate for _, rate in examples):
+                raise ValueError("all examples must share one sample rate")
+                
+            spotter = self.keyword_spotter or KeywordSpotter(sample_rate)
+            spotter.enroll(wake_word.lower(), [pcm for pcm, _ in examples], sample_rate)
+            self.keyword_spotter = spotter
+            if wake_word.lower() not in self.wake_words:
+                self.wake_words.append(wake_word.lower())
+            self._save_wake_words()
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not enroll wake word '{wake_word}': {e}")
+            return False
+            
+    def _load_wake_words(self):
+        """Restore the spotter from wake words enrolled in earlier sessions"""
+        if not self.templates_file.exists():
+            return
+        try:
+            with open(self.templates_file, 'r') as f:
+                self.keyword_spotter = KeywordSpotter.from_dict(json.load(f))
+            for wake_word in self.keyword_spotter.keywords:
+                if wake_word not in self.wake_words:
+                    self.wake_words.append(wake_word)
+        except Exception as e:
+            print(f"⚠️ Could not load wake words from {self.templates_file}: {e}")
+            self.keyword_spotter = None
+            
+    def _save_wake_words(self):
+        """Write the enrolled templates, replacing the previous file atomically"""
+        self.templates_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.templates_file.with_suffix('.tmp')
+        with open(temp_file, 'w') as f:
+            json.dump(self.keyword_spotter.to_dict(), f)
+        os.replace(temp_file, self.templates_file)
+            
     def _contains_wake_word(self, text: str) -> bool:
         """Check if text contains a wake word"""
         text = text.lower()
@@ -189,17 +301,25 @@ class VoiceControlManager:
         if not self.tts_available or not self.settings["voice_feedback"]:
             return False
             
-        def _speak():
+        rank = SPEECH_PRIORITIES.get(priority, SPEECH_PRIORITIES["normal"])
+        self.speech_queue.put((rank, next(self._speech_sequence), text))
+        
+        # pyttsx3 wants one thread driving it, so reuse the same one for every call
+        with self._speech_lock:
+            if self._speech_thread is None:
+                self._speech_thread = threading.Thread(target=self._speech_loop, daemon=True)
+                self._speech_thread.start()
+        return True
+        
+    def _speech_loop(self):
+        """Speak queued feedback one utterance at a time"""
+        while True:
+            _, _, text = self.speech_queue.get()
             try:
                 self.tts_engine.say(text)
                 self.tts_engine.runAndWait()
             except Exception as e:
                 print(f"Error in text-to-speech: {e}")
-                
-        # Run in separate thread to avoid blocking
-        speak_thread = threading.Thread(target=_speak, daemon=True)
-        speak_thread.start()
-        return True
         
     def process_command(self, command: str) -> Dict[str, Any]:
         """Process a voice command and return action result"""
@@ -268,6 +388,8 @@ class VoiceControlManager:
             "sr_available": self.sr_available,
             "tts_available": self.tts_available,
             "queue_size": self.command_queue.qsize(),
+            "wake_word_spotter": bool(self.keyword_spotter and self.keyword_spotter.enrolled),
+            "front_end": self.front_end.stats.to_dict() if self.front_end else None,
             "settings": self.settings.copy(),
             "profiles": list(self.voice_profiles.keys())
         }
@@ -0,0 +1,543 @@
+"""
+Wake-word front end for Westfall Personal Assistant
+
+Listens continuously for almost nothing: every audio frame passes an
+energy gate, only speech reaches a small keyword spotter fed from a ring
+buffer, and only audio after the wake word is streamed to the full
+speech recognizer.
+"""
+
+import array
+import json
+import logging
+import math
+import sys
+import wave
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from vosk import KaldiRecognizer, Model
+    VOSK_AVAILABLE = True
+except ImportError:
+    VOSK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+FRAME_MS = 20
+
+# Audio kept from before speech onset, so the spotter hears the start of the word
+PRE_ROLL_MS = 300
+
+# Silence that ends a command, and how long to wait for one after the wake word
+END_SILENCE_MS = 700
+COMMAND_WAIT_MS = 3000
+MAX_COMMAND_MS = 10000
+
+# Spotter features: log energies in bands between these frequencies
+BAND_COUNT = 12
+BAND_LOW_HZ = 200.0
+BAND_HIGH_HZ = 4000.0
+
+# Match cost accepted when a keyword has a single example to compare against
+DEFAULT_THRESHOLD = 1.2
+
+# Enrolled thresholds are the worst example-to-example cost times this
+THRESHOLD_MARGIN = 1.25
+
+
+def frame_rms(frame: bytes) -> float:
+    """Root mean square of a frame of 16-bit little-endian PCM"""
+    if NUMPY_AVAILABLE:
+        samples = np.frombuffer(frame, dtype="<i2").astype(np.float32)
+        return float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+
+    samples = array.array("h", frame)
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+def read_wav(path: str) -> Tuple[bytes, int]:
+    """Read a 16-bit WAV file as mono PCM; returns (pcm, sample_rate)"""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit WAV files are supported")
+        channels, sample_rate = wav.getnchannels(), wav.getframerate()
+        pcm = wav.readframes(wav.getnframes())
+
+    if channels > 1:
+        samples = array.array("h", pcm)
+        pcm = array.array("h", samples[::channels]).tobytes()  # First channel
+    return pcm, sample_rate
+
+
+def split_frames(pcm: bytes, frame_samples: int) -> Iterator[bytes]:
+    """Cut PCM into whole frames, dropping a short tail"""
+    size = frame_samples * 2
+    for start in range(0, len(pcm) - size + 1, size):
+        yield pcm[start:start + size]
+
+
+class EnergyVAD:
+    """Energy gate that follows the noise floor
+
+    Speech starts after a few frames well above the floor and ends after a
+    run of quiet ones, so clicks don't open it and short pauses don't close it.
+    """
+
+    def __init__(self, ratio: float = 3.0, min_rms: float = 150.0,
+                 attack_frames: int = 3, hangover_frames: int = 15):
+        self.ratio = ratio
+        self.min_rms = min_rms
+        self.attack_frames = attack_frames
+        self.hangover_frames = hangover_frames
+        self.noise_floor = None
+        self.active = False
+        self._loud = 0
+        self._quiet = 0
+
+    def update(self, rms: float) -> bool:
+        """Feed one frame's RMS; returns whether speech is in progress"""
+        if self.noise_floor is None:
+            self.noise_floor = max(rms, 1.0)
+
+        if rms > max(self.min_rms, self.noise_floor * self.ratio):
+            self._loud += 1
+            self._quiet = 0
+        else:
+            self._quiet += 1
+            self._loud = 0
+            # Only quiet frames move the floor; it falls quickly and rises slowly
+            rate = 0.05 if rms < self.noise_floor else 0.01
+            self.noise_floor = max(1.0, self.noise_floor + (rms - self.noise_floor) * rate)
+
+        if not self.active and self._loud >= self.attack_frames:
+            self.active = True
+        elif self.active and self._quiet >= self.hangover_frames:
+            self.active = False
+        return self.active
+
+
+class BandFeatures:
+    """Per-frame log band energies, normalized against their own mean
+
+    Uses an FFT when NumPy is installed and Goertzel filters otherwise;
+    bands are placed in Hz, so features from different sample rates line up.
+    """
+
+    def __init__(self, sample_rate: int, frame_samples: int):
+        self.sample_rate = sample_rate
+        self.frame_samples = frame_samples
+        ratio = (BAND_HIGH_HZ / BAND_LOW_HZ) ** (1 / (BAND_COUNT - 1))
+        self.centers = [BAND_LOW_HZ * ratio ** i for i in range(BAND_COUNT)]
+
+        if NUMPY_AVAILABLE:
+            self._window = np.hanning(frame_samples).astype(np.float32)
+            freqs = np.fft.rfftfreq(frame_samples, 1 / sample_rate)
+            edges = [self.centers[0] / ratio] + self.centers + [self.centers[-1] * ratio]
+            weights = np.zeros((BAND_COUNT, len(freqs)), dtype=np.float32)
+            for i in range(BAND_COUNT):
+                low, center, high = edges[i], edges[i + 1], edges[i + 2]
+                rising = (freqs - low) / (center - low)
+                falling = (high - freqs) / (high - center)
+                weights[i] = np.clip(np.minimum(rising, falling), 0, None)
+            self._weights = weights
+        else:
+            self._coefficients = [2 * math.cos(2 * math.pi * f / sample_rate) for f in self.centers]
+
+    def compute(self, frame: bytes) -> List[float]:
+        if NUMPY_AVAILABLE:
+            samples = np.frombuffer(frame, dtype="<i2").astype(np.float32) * self._window
+            power = np.abs(np.fft.rfft(samples)) ** 2
+            energies = np.log(self._weights @ power + 1.0)
+            return (energies - energies.mean()).tolist()
+
+        samples = array.array("h", frame)
+        if sys.byteorder == "big":
+            samples.byteswap()
+        energies = []
+        for coefficient in self._coefficients:
+            s1 = s2 = 0.0
+            for sample in samples:
+                s1, s2 = sample + coefficient * s1 - s2, s1
+            energies.append(math.log(s1 * s1 + s2 * s2 - coefficient * s1 * s2 + 1.0))
+        mean = sum(energies) / len(energies)
+        return [e - mean for e in energies]
+
+
+def _distance(a: Sequence[float], b: Sequence[float]) -> float:
+    return math.sqrt(sum((x - y) * (x - y) for x, y in zip(a, b)) / len(a))
+
+
+class _TemplateMatcher:
+    """Streaming subsequence DTW against one example of a keyword
+
+    Keeps one column of the alignment per template frame, so each incoming
+    frame costs O(template length). A match may start at any frame; steps
+    allow speech up to twice as fast or arbitrarily slower than the example.
+    """
+
+    def __init__(self, template: List[List[float]]):
+        self.template = template
+        self.reset()
+
+    def reset(self):
+        self.cost = [math.inf] * len(self.template)
+        self.length = [0] * len(self.template)
+
+    def step(self, feature: List[float]) -> float:
+        """Add a frame; returns the average cost of the best match ending here"""
+        prev_cost, prev_length = self.cost, self.length
+        cost, length = [0.0] * len(self.template), [0] * len(self.template)
+
+        for j, template_frame in enumerate(self.template):
+            d = _distance(feature, template_frame)
+            if j == 0:
+                cost[0], length[0] = d, 1
+                continue
+            best_cost, best_length = prev_cost[j], prev_length[j]  # Slower than the example
+            for k in (j - 1, j - 2):  # In step, or skipping a frame
+                if k >= 0 and prev_length[k] and (
+                        not best_length or prev_cost[k] / prev_length[k] < best_cost / best_length):
+                    best_cost, best_length = prev_cost[k], prev_length[k]
+            cost[j], length[j] = best_cost + d, best_length + 1
+
+        self.cost, self.length = cost, length
+        return cost[-1] / length[-1] if length[-1] else math.inf
+
+
+class KeywordSpotter:
+    """Template-matching keyword spotter enrolled from a few recorded examples
+
+    Runs only while the energy gate reports speech, so its cost scales with
+    how much people talk, not with how long the microphone is open.
+    """
+
+    def __init__(self, sample_rate: int, frame_ms: int = FRAME_MS):
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.features = BandFeatures(sample_rate, self.frame_samples)
+        self.keywords: Dict[str, Dict] = {}  # keyword -> {"matchers": [...], "threshold": float}
+
+    @property
+    def enrolled(self) -> bool:
+        return bool(self.keywords)
+
+    def enroll(self, keyword: str, examples: Sequence[bytes], sample_rate: int = None,
+               threshold: float = None):
+        """Add recordings of a keyword as 16-bit mono PCM"""
+        sample_rate = sample_rate or self.sample_rate
+        frame_samples = sample_rate * self.frame_samples // self.sample_rate
+        features = self.features if sample_rate == self.sample_rate else BandFeatures(sample_rate, frame_samples)
+
+        templates = []
+        for pcm in examples:
+            frames = self._trim(list(split_frames(pcm, frame_samples)))
+            if len(frames) >= 5:
+                templates.append([features.compute(frame) for frame in frames])
+        if not templates:
+            raise ValueError(f"No usable speech in the examples for '{keyword}'")
+
+        if threshold is None:
+            threshold = self._pairwise_cost(templates) * THRESHOLD_MARGIN if len(templates) > 1 \
+                else DEFAULT_THRESHOLD
+
+        self.keywords[keyword] = {
+            "matchers": [_TemplateMatcher(template) for template in templates],
+            "threshold": threshold
+        }
+        logger.info(f"Enrolled wake word '{keyword}' from {len(templates)} examples "
+                    f"(threshold {threshold:.3f})")
+
+    @staticmethod
+    def _trim(frames: List[bytes]) -> List[bytes]:
+        """Drop leading and trailing frames much quieter than the loudest one"""
+        levels = [frame_rms(frame) for frame in frames]
+        if not levels:
+            return []
+        floor = max(levels) * 0.1
+        loud = [i for i, level in enumerate(levels) if level > floor]
+        return frames[loud[0]:loud[-1] + 1] if loud else []
+
+    @staticmethod
+    def _pairwise_cost(templates: List[List[List[float]]]) -> float:
+        worst = 0.0
+        for i, template in enumerate(templates):
+            for j, other in enumerate(templates):
+                if i != j:
+                    matcher = _TemplateMatcher(template)
+                    worst = max(worst, min(matcher.step(feature) for feature in other))
+        return worst
+
+    def to_dict(self) -> Dict:
+        """Enrolled templates and thresholds, JSON-serializable"""
+        return {
+            "sample_rate": self.sample_rate,
+            "frame_ms": self.frame_samples * 1000 // self.sample_rate,
+            "keywords": {
+                keyword: {
+                    "templates": [matcher.template for matcher in entry["matchers"]],
+                    "threshold": entry["threshold"]
+                }
+                for keyword, entry in self.keywords.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "KeywordSpotter":
+        """Rebuild a spotter saved with to_dict(), without the original recordings"""
+        spotter = cls(data["sample_rate"], data.get("frame_ms", FRAME_MS))
+        for keyword, entry in data["keywords"].items():
+            spotter.keywords[keyword] = {
+                "matchers": [_TemplateMatcher(template) for template in entry["templates"]],
+                "threshold": entry["threshold"]
+            }
+        return spotter
+
+    def for_rate(self, sample_rate: int) -> "KeywordSpotter":
+        """This spotter, or one sharing its keywords for audio at another rate"""
+        if sample_rate == self.sample_rate:
+            return self
+        spotter = KeywordSpotter(sample_rate, self.frame_samples * 1000 // self.sample_rate)
+        spotter.keywords = self.keywords  # Features are placed in Hz, so templates carry over
+        return spotter
+
+    def reset(self):
+        for keyword in self.keywords.values():
+            for matcher in keyword["matchers"]:
+                matcher.reset()
+
+    def process(self, frame: bytes) -> Optional[str]:
+        """Feed one frame; returns a keyword when one has just been heard"""
+        feature = self.features.compute(frame)
+        for keyword, entry in self.keywords.items():
+            if min(matcher.step(feature) for matcher in entry["matchers"]) <= entry["threshold"]:
+                self.reset()
+                return keyword
+        return None
+
+
+class StreamingRecognizer:
+    """Receives a command's audio frame by frame; finish() returns the text"""
+
+    def accept(self, frame: bytes):
+        raise NotImplementedError
+
+    def finish(self) -> str:
+        raise NotImplementedError
+
+
+class BufferedRecognizer(StreamingRecognizer):
+    """Collects frames for a recognizer that takes a whole utterance"""
+
+    def __init__(self, recognize: Callable[[bytes, int], str], sample_rate: int):
+        self.recognize = recognize
+        self.sample_rate = sample_rate
+        self._audio = bytearray()
+
+    def accept(self, frame: bytes):
+        self._audio += frame
+
+    def finish(self) -> str:
+        return self.recognize(bytes(self._audio), self.sample_rate) if self._audio else ""
+
+
+class VoskStreamingRecognizer(StreamingRecognizer):
+    """Local recognizer that decodes while the command is still being spoken"""
+
+    _models: Dict[str, "Model"] = {}
+
+    def __init__(self, model_path: str, sample_rate: int):
+        if not VOSK_AVAILABLE:
+            raise RuntimeError("vosk is not installed")
+        model = self._models.get(model_path)
+        if model is None:
+            model = self._models[model_path] = Model(model_path)
+        self._recognizer = KaldiRecognizer(model, sample_rate)
+
+    def accept(self, frame: bytes):
+        self._recognizer.AcceptWaveform(frame)
+
+    def finish(self) -> str:
+        return json.loads(self._recognizer.FinalResult()).get("text", "")
+
+
+@dataclass
+class FrontEndEvent:
+    """Something the front end heard"""
+    kind: str  # "wake" or "command"
+    text: str
+    time: float  # Seconds into the audio stream
+
+
+@dataclass
+class FrontEndStats:
+    """Frame counts at each stage, for seeing where audio stops"""
+    frames: int = 0
+    speech_frames: int = 0
+    spotter_frames: int = 0
+    recognizer_frames: int = 0
+    recognitions: int = 0
+    wake_detections: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class VoiceFrontEnd:
+    """Energy gate, keyword spotter and streaming recognizer chained together
+
+    Feed it fixed-size frames with process(). Without a spotter, or with no
+    keyword enrolled, each gated utterance is recognized and accepted only
+    if the transcript contains one of ``wake_words`` (any, if none given).
+    """
+
+    IDLE, SPOTTING, LISTENING = "idle", "spotting", "listening"
+
+    def __init__(self, recognizer_factory: Callable[[], StreamingRecognizer],
+                 sample_rate: int, spotter: Optional[KeywordSpotter] = None,
+                 wake_words: Sequence[str] = (), frame_ms: int = FRAME_MS, vad: EnergyVAD = None):
+        self.recognizer_factory = recognizer_factory
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.spotter = spotter if spotter and spotter.enrolled else None
+        self.wake_words = [w.lower() for w in wake_words]
+        self.vad = vad or EnergyVAD()
+        self.stats = FrontEndStats()
+
+        self.state = self.IDLE
+        self._ring = deque(maxlen=max(1, PRE_ROLL_MS // frame_ms))
+        self._recognizer: Optional[StreamingRecognizer] = None
+        self._wake_word: Optional[str] = None
+        self._heard_command = False
+        self._silent_frames = 0
+        self._listening_frames = 0
+
+    @property
+    def time(self) -> float:
+        return self.stats.frames * self.frame_ms / 1000
+
+    def process(self, frame: bytes) -> List[FrontEndEvent]:
+        """Feed one frame of 16-bit mono PCM; returns anything it completed"""
+        self.stats.frames += 1
+        speech = self.vad.update(frame_rms(frame))
+        if speech:
+            self.stats.speech_frames += 1
+
+        if self.state == self.IDLE:
+            self._ring.append(frame)
+            if speech:
+                return self._start_utterance()
+            return []
+
+        if self.state == self.SPOTTING:
+            if not speech:
+                self.state = self.IDLE
+                return []
+            return self._spot(frame)
+
+        return self._listen(frame, speech)
+
+    def run(self, pcm: bytes) -> List[FrontEndEvent]:
+        """Process a whole recording"""
+        events = []
+        for frame in split_frames(pcm, self.frame_samples):
+            events.extend(self.process(frame))
+        return events
+
+    def _start_utterance(self) -> List[FrontEndEvent]:
+        pre_roll = list(self._ring)
+        self._ring.clear()
+
+        if self.spotter is None:
+            # No spotter: recognize the utterance and look for the wake word in the text
+            self._start_listening(None)
+            for frame in pre_roll:
+                self._recognizer.accept(frame)
+            self._heard_command = True
+            return []
+
+        self.state = self.SPOTTING
+        self.spotter.reset()
+        events = []
+        for frame in pre_roll:
+            events.extend(self._spot(frame))
+            if self.state != self.SPOTTING:
+                break
+        return events
+
+    def _spot(self, frame: bytes) -> List[FrontEndEvent]:
+        self.stats.spotter_frames += 1
+        keyword = self.spotter.process(frame)
+        if keyword is None:
+            return []
+
+        self.stats.wake_detections += 1
+        self._start_listening(keyword)
+        return [FrontEndEvent("wake", keyword, self.time)]
+
+    def _start_listening(self, wake_word: Optional[str]):
+        self.state = self.LISTENING
+        self._recognizer = self.recognizer_factory()
+        self._wake_word = wake_word
+        self._heard_command = False
+        self._silent_frames = 0
+        self._listening_frames = 0
+
+    def _listen(self, frame: bytes, speech: bool) -> List[FrontEndEvent]:
+        self._listening_frames += 1
+        self._recognizer.accept(frame)
+        self.stats.recognizer_frames += 1
+
+        if speech:
+            self._heard_command = True
+            self._silent_frames = 0
+        else:
+            self._silent_frames += 1
+
+        elapsed_ms = self._listening_frames * self.frame_ms
+        if self._heard_command:
+            done = self._silent_frames * self.frame_ms >= END_SILENCE_MS or elapsed_ms >= MAX_COMMAND_MS
+        else:
+            done = elapsed_ms >= COMMAND_WAIT_MS
+        if not done:
+            return []
+
+        recognizer, self._recognizer = self._recognizer, None
+        self.state = self.IDLE
+        if not self._heard_command:
+            return []
+        return self._finish(recognizer)
+
+    def _finish(self, recognizer: StreamingRecognizer) -> List[FrontEndEvent]:
+        self.stats.recognitions += 1
+        try:
+            text = (recognizer.finish() or "").strip().lower()
+        except Exception as e:
+            logger.debug(f"Recognition failed: {e}")
+            return []
+        if not text:
+            return []
+
+        if self._wake_word is not None:
+            return [FrontEndEvent("command", text, self.time)]
+
+        # Transcript-based wake word check, as before the spotter existed
+        if self.wake_words:
+            wake_word = next((w for w in self.wake_words if w in text), None)
+            if wake_word is None:
+                return []
+            self.stats.wake_detections += 1
+            return [FrontEndEvent("wake", wake_word, self.time), FrontEndEvent("command", text, self.time)]
+        return [FrontEndEvent("command", text, self.time)]
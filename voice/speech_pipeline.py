@@ -0,0 +1,290 @@
+"""
+Streaming speech pipeline for Westfall Personal Assistant
+
+Speaks a response sentence by sentence: the next sentences are synthesized
+while the current one plays, synthesized audio is cached on disk, and text
+can be fed in as it is generated so speech starts with the first sentence.
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import re
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Sentences synthesized ahead of the one playing
+LOOKAHEAD = 2
+
+# Fragments shorter than this are joined to the next sentence
+MIN_SENTENCE_CHARS = 20
+
+# Longer sentences are cut at a comma or space so the first audio isn't held up
+MAX_SENTENCE_CHARS = 250
+
+_SENTENCE_END = re.compile(r'(?<=[.!?;:])["\')\]]*\s+|\n+')
+_SOFT_BREAK = re.compile(r'[,;:]\s+|\s+')
+
+# "Dr. Smith" and "e.g. this" don't end a sentence
+_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "no", "fig"}
+
+
+def _ends_sentence(text: str, end: int) -> bool:
+    words = text[:end].rstrip().rstrip('"\')]').split()
+    if not words:
+        return False
+    last = words[-1].lower().rstrip(".!?;:")
+    return last not in _ABBREVIATIONS and not (len(last) == 1 and last.isalpha())
+
+
+def _cut_long(text: str):
+    """Cut text into pieces of at most MAX_SENTENCE_CHARS; returns (pieces, remainder)"""
+    pieces = []
+    while len(text) > MAX_SENTENCE_CHARS:
+        breaks = [m.end() for m in _SOFT_BREAK.finditer(text, 0, MAX_SENTENCE_CHARS)]
+        cut = breaks[-1] if breaks else MAX_SENTENCE_CHARS
+        pieces.append(text[:cut].strip())
+        text = text[cut:]
+    return pieces, text
+
+
+def _pieces(sentence: str) -> List[str]:
+    pieces, rest = _cut_long(sentence)
+    return pieces + [rest.strip()] if rest.strip() else pieces
+
+
+class SentenceBuffer:
+    """Collects streamed text and hands back sentences as they complete"""
+
+    def __init__(self):
+        self._text = ""
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add a chunk of text; returns the sentences it completed"""
+        self._text += chunk
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._text):
+            sentence = self._text[start:match.start()].strip()
+            if len(sentence) < MIN_SENTENCE_CHARS and "\n" not in match.group():
+                continue
+            if not _ends_sentence(self._text, match.start()):
+                continue
+            if sentence:
+                sentences.extend(_pieces(sentence))
+            start = match.end()
+        self._text = self._text[start:]
+
+        # A run-on sentence is spoken in pieces rather than held back
+        if len(self._text) > MAX_SENTENCE_CHARS:
+            ready, self._text = _cut_long(self._text)
+            sentences.extend(ready)
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Return whatever is left once the stream has ended"""
+        rest, self._text = self._text.strip(), ""
+        return _pieces(rest) if rest else []
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a complete text into speakable sentences"""
+    buffer = SentenceBuffer()
+    return buffer.feed(text) + buffer.flush()
+
+
+class AudioCache:
+    """Synthesized audio on disk, keyed by what was said and how, evicted LRU"""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # file name -> size, least recently used first
+        self._total = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        files = []
+        for entry in os.scandir(cache_dir):
+            if entry.is_file() and entry.name.endswith(".wav"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total += size
+
+    @staticmethod
+    def key(text: str, voice: str, speed: float, volume: float, backend: str) -> str:
+        raw = f"{backend}\0{voice}\0{speed:.2f}\0{volume:.2f}\0{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached audio, or None"""
+        name = f"{key}.wav"
+        with self._lock:
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        path = os.path.join(self.cache_dir, name)
+        try:
+            os.utime(path)  # Keeps the LRU order across restarts
+            return path
+        except OSError:
+            with self._lock:
+                self._total -= self._entries.pop(name, 0)
+            return None
+
+    def new_file(self) -> str:
+        """A temporary path in the cache directory to synthesize into"""
+        fd, path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        os.close(fd)
+        return path
+
+    def put(self, key: str, temp_path: str) -> str:
+        """Move a synthesized file into the cache and evict down to size"""
+        name = f"{key}.wav"
+        path = os.path.join(self.cache_dir, name)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+
+        evicted = []
+        with self._lock:
+            self._total += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                old_name, old_size = self._entries.popitem(last=False)
+                self._total -= old_size
+                evicted.append(old_name)
+        for old_name in evicted:
+            try:
+                os.remove(os.path.join(self.cache_dir, old_name))
+            except OSError:
+                pass
+        return path
+
+
+class SpeechPipeline:
+    """Speaks sentences in order while synthesizing the ones after them
+
+    Feed text with feed() as it arrives and call finish() at the end;
+    wait() blocks until everything has been spoken.
+    """
+
+    _END = object()
+
+    def __init__(self, backend, cache: Optional[AudioCache], voice: str = None,
+                 speed: float = 1.0, volume: float = 0.8, clean=None):
+        self.backend = backend
+        self.cache = cache
+        self.voice = voice
+        self.speed = speed
+        self.volume = volume
+        self.clean = clean or (lambda text: text)
+
+        self.sentences_spoken = 0
+        self._buffer = SentenceBuffer()
+        self._sentences = queue.Queue()
+        self._stopped = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=LOOKAHEAD, thread_name_prefix="tts-synth")
+        self._speaker = threading.Thread(target=self._speak_loop, name="tts-speaker", daemon=True)
+        self._speaker.start()
+
+    def feed(self, chunk: str):
+        """Add streamed text; complete sentences start synthesizing at once"""
+        for sentence in self._buffer.feed(chunk):
+            self._sentences.put(sentence)
+
+    def finish(self):
+        """Mark the end of the text"""
+        for sentence in self._buffer.flush():
+            self._sentences.put(sentence)
+        self._sentences.put(self._END)
+
+    def speak_all(self, chunks: Iterable[str]):
+        """Feed an iterable of text chunks, such as an LLM token stream"""
+        try:
+            for chunk in chunks:
+                if self._stopped.is_set():
+                    break
+                self.feed(chunk)
+        finally:
+            self.finish()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until speech finishes; False if it timed out"""
+        self._speaker.join(timeout)
+        return not self._speaker.is_alive()
+
+    def stop(self):
+        """Drop everything queued and cut off the current sentence"""
+        self._stopped.set()
+        self._sentences.put(self._END)
+        self.backend.stop()
+
+    @property
+    def done(self) -> bool:
+        return not self._speaker.is_alive()
+
+    def _synthesize(self, sentence: str) -> Optional[str]:
+        """Audio file for a sentence, from the cache or freshly synthesized"""
+        if self.cache is None or self._stopped.is_set():
+            return None
+
+        text = self.clean(sentence)
+        if not text:
+            return None
+        key = AudioCache.key(text, self.voice or "", self.speed, self.volume, type(self.backend).__name__)
+        path = self.cache.get(key)
+        if path:
+            return path
+
+        temp_path = self.cache.new_file()
+        try:
+            if self.backend.synthesize(text, temp_path, voice=self.voice,
+                                       speed=self.speed, volume=self.volume):
+                return self.cache.put(key, temp_path)
+        except Exception as e:
+            logger.error(f"TTS synthesis failed: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+
+    def _speak_loop(self):
+        pending = deque()  # (sentence, future) in speaking order
+        ended = False
+        try:
+            while not self._stopped.is_set():
+                # Keep LOOKAHEAD sentences synthesizing behind the one about to play
+                while not ended and len(pending) <= LOOKAHEAD:
+                    try:
+                        sentence = self._sentences.get(block=not pending)
+                    except queue.Empty:
+                        break
+                    if sentence is self._END:
+                        ended = True
+                    else:
+                        pending.append((sentence, self._executor.submit(self._synthesize, sentence)))
+
+                if not pending:
+                    break
+                sentence, future = pending.popleft()
+                path = future.result()
+                if self._stopped.is_set():
+                    break
+
+                if not (path and self.backend.play_file(path, volume=self.volume)):
+                    self.backend.speak(self.clean(sentence), voice=self.voice,
+                                       speed=self.speed, volume=self.volume)
+                self.sentences_spoken += 1
+        except Exception as e:
+            logger.error(f"Speech pipeline failed: {e}")
+        finally:
+            for _, future in pending:
+                future.cancel()
+            self._executor.shutdown(wait=False)
@@ -4,10 +4,14 @@ TTS Engine for Westfall Personal Assistant
 Provides text-to-speech functionality with multiple backend support.
 """
 
+import asyncio
 import logging
 import platform
-from typing import Optional, Dict, Any, List
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, AsyncIterable
 from config.settings import get_settings
+from voice.speech_pipeline import AudioCache, SpeechPipeline
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +22,7 @@ class TTSBackend:
     def __init__(self):
         self.available = False
         self.voices = []
+        self._processes = set()
         self._initialize()
     
     def _initialize(self):
@@ -28,13 +33,38 @@ class TTSBackend:
         """Speak the given text"""
         raise NotImplementedError
     
+    def synthesize(self, text: str, path: str, voice: str = None, speed: float = 1.0,
+                   volume: float = 0.8) -> bool:
+        """Render speech to a WAV file; False if this backend can only speak aloud"""
+        return False
+    
+    def play_file(self, path: str, volume: float = 0.8) -> bool:
+        """Play a WAV file, blocking until it finishes"""
+        return False
+    
     def get_voices(self) -> List[Dict[str, Any]]:
         """Get available voices"""
         return self.voices
     
     def stop(self):
         """Stop current speech"""
-        pass
+        for process in list(self._processes):
+            process.terminate()
+    
+    def _run_process(self, cmd: List[str], timeout: float = 60) -> bool:
+        """Run a synthesis or playback command that stop() can interrupt"""
+        import subprocess
+        
+        process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self._processes.add(process)
+        try:
+            return process.wait(timeout=timeout) == 0
+        except subprocess.TimeoutExpired:
+            process.kill()
+            logger.error(f"TTS command timed out: {cmd[0]}")
+            return False
+        finally:
+            self._processes.discard(process)
 
 
 class WindowsTTSBackend(TTSBackend):
@@ -98,11 +128,61 @@ class WindowsTTSBackend(TTSBackend):
         except Exception as e:
             logger.error(f"Windows TTS speak failed: {e}")
             return False
+    
+    def synthesize(self, text: str, path: str, voice: str = None, speed: float = 1.0,
+                   volume: float = 0.8) -> bool:
+        if not self.available:
+            return False
+        
+        import pythoncom
+        import win32com.client
+        
+        # Synthesis runs on worker threads, each with its own COM apartment and voice
+        pythoncom.CoInitialize()
+        try:
+            engine = win32com.client.Dispatch("SAPI.SpVoice")
+            if voice and voice.isdigit() and 0 <= int(voice) < len(self.voices):
+                engine.Voice = engine.GetVoices().Item(int(voice))
+            engine.Rate = int((speed - 1.0) * 10)
+            engine.Volume = int(volume * 100)
+            
+            stream = win32com.client.Dispatch("SAPI.SpFileStream")
+            stream.Open(path, 3)  # SSFMCreateForWrite
+            try:
+                engine.AudioOutputStream = stream
+                engine.Speak(text)
+            finally:
+                stream.Close()
+            return True
+        except Exception as e:
+            logger.error(f"Windows TTS synthesis failed: {e}")
+            return False
+        finally:
+            pythoncom.CoUninitialize()
+    
+    def play_file(self, path: str, volume: float = 0.8) -> bool:
+        try:
+            import winsound
+            winsound.PlaySound(path, winsound.SND_FILENAME)
+            return True
+        except Exception as e:
+            logger.error(f"Windows audio playback failed: {e}")
+            return False
+    
+    def stop(self):
+        try:
+            import winsound
+            winsound.PlaySound(None, winsound.SND_PURGE)
+            self.engine.Speak("", 2)  # SVSFPurgeBeforeSpeak
+        except Exception as e:
+            logger.debug(f"Windows TTS stop failed: {e}")
 
 
 class LinuxTTSBackend(TTSBackend):
     """Linux espeak/espeak-ng TTS backend"""
     
+    player = None
+    
     def _initialize(self):
         try:
             if platform.system() == "Linux":
@@ -113,6 +193,7 @@ class LinuxTTSBackend(TTSBackend):
                 if result.returncode == 0:
                     self.available = True
                     self._load_voices()
+                    self._find_player()
                 else:
                     self.available = False
             else:
@@ -124,6 +205,16 @@ class LinuxTTSBackend(TTSBackend):
             logger.error(f"Linux TTS initialization failed: {e}")
             self.available = False
     
+    def _find_player(self):
+        """Pick a command line WAV player for pipelined speech"""
+        import shutil
+        
+        for player in (['paplay'], ['aplay', '-q'], ['ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet']):
+            if shutil.which(player[0]):
+                self.player = player
+                return
+        logger.info("Linux TTS: no audio player found, speaking through espeak directly")
+    
     def _load_voices(self):
         """Load available espeak voices"""
         try:
@@ -181,6 +272,23 @@ class LinuxTTSBackend(TTSBackend):
         except Exception as e:
             logger.error(f"Linux TTS speak failed: {e}")
             return False
+    
+    def synthesize(self, text: str, path: str, voice: str = None, speed: float = 1.0,
+                   volume: float = 0.8) -> bool:
+        if not self.available:
+            return False
+        
+        cmd = ['espeak', '-w', path, '-s', str(int(175 * speed)), '-a', str(int(100 * volume))]
+        if voice:
+            cmd.extend(['-v', voice])
+        cmd.append(text)
+        return self._run_process(cmd, timeout=30)
+    
+    def play_file(self, path: str, volume: float = 0.8) -> bool:
+        # Volume is already part of the synthesized audio
+        if not self.player:
+            return False
+        return self._run_process(self.player + [path])
 
 
 class MacOSTTSBackend(TTSBackend):
@@ -264,6 +372,22 @@ class MacOSTTSBackend(TTSBackend):
         except Exception as e:
             logger.error(f"macOS TTS speak failed: {e}")
             return False
+    
+    def synthesize(self, text: str, path: str, voice: str = None, speed: float = 1.0,
+                   volume: float = 0.8) -> bool:
+        if not self.available:
+            return False
+        
+        cmd = ['say', '-o', path, '--file-format=WAVE', '--data-format=LEI16@22050',
+               '-r', str(int(175 * speed))]
+        if voice:
+            cmd.extend(['-v', voice])
+        cmd.append(text)
+        return self._run_process(cmd, timeout=30)
+    
+    def play_file(self, path: str, volume: float = 0.8) -> bool:
+        # say has no volume option, so it is applied on playback
+        return self._run_process(['afplay', '-v', str(volume), path])
 
 
 class TTSEngine:
@@ -273,7 +397,9 @@ class TTSEngine:
         self.settings = get_settings()
         self.backends = []
         self.current_backend = None
+        self._pipeline = None
         self._initialize_backends()
+        self.cache = self._initialize_cache()
     
     def _initialize_backends(self):
         """Initialize available TTS backends"""
@@ -294,28 +420,87 @@ class TTSEngine:
         if not self.backends:
             logger.warning("No TTS backends available")
     
+    def _initialize_cache(self) -> Optional[AudioCache]:
+        """Open the on-disk cache of synthesized sentences"""
+        if self.current_backend is None or not self.settings.voice.tts_cache_enabled:
+            return None
+        try:
+            cache_dir = Path(__file__).parent.parent / "data" / "tts_cache"
+            return AudioCache(str(cache_dir), self.settings.voice.tts_cache_size_mb * 1024 * 1024)
+        except Exception as e:
+            logger.warning(f"TTS audio cache unavailable: {e}")
+            return None
+    
     def is_available(self) -> bool:
         """Check if TTS is available"""
         return self.current_backend is not None and self.settings.voice.tts_enabled
     
-    def speak(self, text: str) -> bool:
-        """Speak the given text using current settings"""
-        if not self.is_available():
-            logger.debug("TTS not available or disabled")
-            return False
+    def speak(self, text: str, wait: bool = True) -> bool:
+        """Speak the given text using current settings
         
+        Speech starts as soon as the first sentence is synthesized; the rest
+        are synthesized while it plays.
+        """
         if not text or not text.strip():
             return False
         
-        # Clean text for speech
-        clean_text = self._clean_text_for_speech(text)
+        pipeline = self.speak_stream([text])
+        if pipeline is None:
+            return False
+        if wait:
+            pipeline.wait()
+        return True
+    
+    def start_speech(self) -> Optional[SpeechPipeline]:
+        """Open a pipeline to feed() text into and finish() when done
+        
+        Starting new speech stops whatever is being said.
+        """
+        if not self.is_available():
+            logger.debug("TTS not available or disabled")
+            return None
         
-        return self.current_backend.speak(
-            clean_text,
+        self.stop()
+        self._pipeline = SpeechPipeline(
+            self.current_backend,
+            self.cache,
             voice=self.settings.voice.tts_voice,
             speed=self.settings.voice.tts_speed,
-            volume=self.settings.voice.tts_volume
+            volume=self.settings.voice.tts_volume,
+            clean=self._clean_text_for_speech
         )
+        return self._pipeline
+    
+    def speak_stream(self, chunks: Iterable[str]) -> Optional[SpeechPipeline]:
+        """Speak text as it is produced, such as tokens streamed from the LLM
+        
+        The chunks are consumed on a background thread; the returned pipeline
+        can be waited on or stopped.
+        """
+        pipeline = self.start_speech()
+        if pipeline is None:
+            return None
+        
+        threading.Thread(target=pipeline.speak_all, args=(chunks,), daemon=True).start()
+        return pipeline
+    
+    async def speak_async(self, chunks: AsyncIterable[str]) -> bool:
+        """Speak an async token stream, returning once it has all been spoken"""
+        pipeline = self.start_speech()
+        if pipeline is None:
+            return False
+        
+        try:
+            async for chunk in chunks:
+                pipeline.feed(chunk)
+        except asyncio.CancelledError:
+            pipeline.stop()
+            raise
+        finally:
+            pipeline.finish()
+        
+        await asyncio.get_running_loop().run_in_executor(None, pipeline.wait)
+        return True
     
     def _clean_text_for_speech(self, text: str) -> str:
         """Clean text for better speech synthesis"""
@@ -380,6 +565,9 @@ class TTSEngine:
     
     def stop(self):
         """Stop current speech"""
+        if self._pipeline:
+            self._pipeline.stop()
+            self._pipeline = None
         if self.current_backend:
             self.current_backend.stop()
 